@@ -0,0 +1,162 @@
+"""
+Background acquisition loop.
+
+Ticks the sensor simulator at a fixed sample rate from an asyncio task
+started in the FastAPI lifespan, so the time series advances with wall
+time instead of with request traffic. Read endpoints only look at the
+latest published snapshot. Ingested batches are published to the same
+listeners (`publish`); with AQUAVIEW_SIMULATE=0 the loop is not started
+and ingest is the only producer. In replay mode each tick plays the
+records of a recorded session that fell due since the last one.
+
+In a reader process of the snapshot bus the loop follows the bus instead
+(`follow`): it polls for snapshots published by the producer process and
+hands each to the same listeners.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+from time import perf_counter
+from typing import Callable
+
+from .config import SAMPLE_INTERVAL
+from .metrics import TICK_LAG_SECONDS, TICK_SECONDS
+from .simulator import SensorSimulator, SensorSnapshot, simulator
+from .snapshot_bus import SnapshotBus
+
+logger = logging.getLogger(__name__)
+
+TickListener = Callable[[SensorSnapshot], None]
+
+FOLLOW_INTERVAL = 0.02   # seconds between bus polls (ingest publishes off the tick clock)
+REATTACH_AFTER = 5.0     # idle seconds before checking for a restarted producer
+
+
+class AcquisitionLoop:
+    """Fixed-rate driver for `SensorSimulator.tick()`."""
+
+    def __init__(self, sim: SensorSimulator, interval: float) -> None:
+        if interval <= 0:
+            raise ValueError("sample interval must be positive")
+        self.simulator = sim
+        self.interval = interval
+        self.ticks = 0
+        self.missed = 0      # sample slots skipped because we fell behind
+        self.lag = 0.0       # seconds late on the most recent tick
+        self._task: asyncio.Task | None = None
+        self._listeners: list[TickListener] = []
+        self.bus: SnapshotBus | None = None   # followed bus (readers)
+
+    def add_listener(self, listener: TickListener) -> None:
+        """Call `listener(snapshot)` on the event loop after every tick."""
+        self._listeners.append(listener)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start ticking in the running event loop (idempotent)."""
+        if self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def follow(self, name: str) -> None:
+        """Publish snapshots from the producer's bus `name` instead of ticking (idempotent)."""
+        if self.running:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._follow(name))
+
+    async def stop(self) -> None:
+        """Cancel the loop and wait for it to finish."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_at = loop.time()
+        while True:
+            next_at += self.interval
+            delay = next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # Behind schedule: drop the missed slots rather than bursting
+                # several ticks back-to-back with identical timestamps.
+                skipped = int(-delay // self.interval)
+                if skipped:
+                    self.missed += skipped
+                    next_at += skipped * self.interval
+                await asyncio.sleep(0)
+            self.lag = max(0.0, loop.time() - next_at)
+            TICK_LAG_SECONDS.observe(self.lag)
+            started = perf_counter()
+            previous = self.simulator.snapshot
+            snapshot = self.simulator.tick()
+            TICK_SECONDS.observe(perf_counter() - started)
+            self.ticks += 1
+            # A paused or finished replay publishes nothing new
+            if snapshot is not previous:
+                self.publish(snapshot)
+
+    async def _follow(self, name: str) -> None:
+        loop = asyncio.get_running_loop()
+        after = 0
+        idle_since = loop.time()
+        try:
+            while True:
+                if self.bus is None or loop.time() - idle_since > REATTACH_AFTER:
+                    after = self._attach(name, after)
+                    idle_since = loop.time()
+                if self.bus is not None:
+                    snapshots, after = self.bus.read_since(after)
+                    for snapshot in snapshots:
+                        self.simulator.follow(snapshot)
+                        self.ticks += 1
+                        self.publish(snapshot)
+                    if snapshots:
+                        idle_since = loop.time()
+                await asyncio.sleep(FOLLOW_INTERVAL)
+        finally:
+            if self.bus is not None:
+                self.bus.close()
+                self.bus = None
+
+    def _attach(self, name: str, after: int) -> int:
+        # Not started yet, or maybe restarted: a new segment has a new epoch
+        try:
+            bus = SnapshotBus.attach(name, self.simulator.sensors)
+        except FileNotFoundError:
+            return after
+        except ValueError:
+            logger.exception("snapshot bus %s: cannot attach", name)
+            return after
+        if self.bus is not None and bus.epoch == self.bus.epoch:
+            bus.close()
+            return after
+        if self.bus is not None:
+            logger.info("snapshot bus %s: producer restarted", name)
+            self.bus.close()
+        self.bus = bus
+        # Start at the newest snapshot, not at whatever the ring still holds
+        return max(0, bus.published - 1)
+
+    def publish(self, snapshot: SensorSnapshot) -> None:
+        """Hand a snapshot from any producer (tick or ingest) to the listeners."""
+        for listener in self._listeners:
+            try:
+                listener(snapshot)
+            except Exception:
+                # A faulty consumer must not stop acquisition
+                logger.exception("acquisition listener %r failed", listener)
+
+
+# ── Singleton instance ──────────────────────────────────────────────
+acquisition = AcquisitionLoop(simulator, SAMPLE_INTERVAL)
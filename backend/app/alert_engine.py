@@ -0,0 +1,321 @@
+"""
+Stateful alert engine.
+
+Evaluated once per acquired frame, vectorized over all tags:
+
+- Hysteresis: a tag escalates as soon as a value leaves a band, but only
+  de-escalates once the value is back inside that band shrunk by
+  `hysteresis` × band width on each side, so readings hovering on an
+  edge do not flap.
+- Debounce: a new level must persist for `debounce` consecutive samples
+  before it takes effect.
+- Anomalies: a tag flagged by the anomaly detector (drift or spike) is
+  held at WARNING at least, so a trend alerts before it reaches a band.
+
+Only tags whose confirmed level changes are touched in Python. An alert
+opens when a tag leaves NORMAL, changes severity in place while active,
+can be acknowledged, and clears when the tag returns to NORMAL. Every
+lifecycle change is appended to an event log with a monotonically
+increasing cursor; clients poll "events since cursor X" and receive only
+what is new. The log is indexed by tag and severity for filtered queries.
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+
+import numpy as np
+
+from .anomaly import ANOMALY_BY_CODE
+from .history_store import STATUS_BY_CODE, from_ns
+from .http_cache import SerializedBody
+from .models import Alert, AlertEventKind, AlertResponse, AlertState, AnomalyKind, SensorStatus
+from .sensor_registry import NORMAL, WARNING, SensorArray, TagSpec, classify_bands
+
+
+@dataclass(frozen=True)
+class AlertEvent:
+    """One lifecycle change, addressed by its log cursor."""
+    cursor: int
+    kind: AlertEventKind
+    alert: Alert          # alert state right after the change
+    ts_ns: int
+
+
+def alert_message(
+    spec: TagSpec, status: SensorStatus, value: float, anomaly: AnomalyKind | None = None
+) -> str:
+    n_lo, n_hi = spec.normal
+    what = f"{anomaly.value} detected" if anomaly else f"is {status.value}"
+    return (
+        f"{spec.tag} {what}: "
+        f"{value}{spec.unit} "
+        f"(normal: {n_lo}~{n_hi}{spec.unit})"
+    )
+
+
+class AlertEngine:
+    """Per-tag alert state machine plus an indexed, bounded event log."""
+
+    def __init__(
+        self,
+        sensors: SensorArray,
+        hysteresis: float = 0.05,
+        debounce: int = 3,
+        log_capacity: int = 10_000,
+    ) -> None:
+        if not 0 <= hysteresis < 0.5:
+            raise ValueError("hysteresis must be in [0, 0.5)")
+        if debounce < 1 or log_capacity < 1:
+            raise ValueError("debounce and log capacity must be at least 1")
+        self.sensors = sensors
+        self.debounce = debounce
+        self.log_capacity = log_capacity
+
+        # Bands used to step down a level (shrunk by the hysteresis margin)
+        n_margin = hysteresis * (sensors.normal_hi - sensors.normal_lo)
+        w_margin = hysteresis * (sensors.warning_hi - sensors.warning_lo)
+        self._release_bands = (
+            sensors.normal_lo + n_margin,
+            sensors.normal_hi - n_margin,
+            sensors.warning_lo + w_margin,
+            sensors.warning_hi - w_margin,
+        )
+
+        n = len(sensors)
+        self._level = np.zeros(n, dtype=np.int8)       # confirmed level
+        self._candidate = np.zeros(n, dtype=np.int8)   # pending level
+        self._streak = np.zeros(n, dtype=np.int32)     # samples the candidate has held
+
+        self._active: dict[int, Alert] = {}             # row → active alert
+        self._by_id: dict[int, int] = {}                # alert id → row
+        self._next_id = 1
+        self.version = 0                                # bumps on every active-set change
+        self._payloads: dict[str | None, tuple[int, SerializedBody]] = {}
+
+        # Event log: cursor of _events[i] is _base + i
+        self._events: list[AlertEvent] = []
+        self._event_ts: list[int] = []
+        self._base = 1
+        self._by_key: dict[str, list[int]] = {}
+        self._by_status: dict[SensorStatus, list[int]] = {}
+        self._tick_ns = 0                               # time of the last evaluated frame
+        self._lock = threading.Lock()
+
+    # ── Evaluation ──────────────────────────────────────────────────
+
+    def evaluate(self, ts_ns: int, values: np.ndarray, anomalies: np.ndarray | None = None) -> int:
+        """
+        Feed one frame (row-aligned with `sensors`); returns the number of
+        events. `anomalies` holds anomaly detector codes (0 = none).
+        """
+        self._tick_ns = ts_ns
+        band = plain = self.sensors.classify(values)
+        strict = classify_bands(values, *self._release_bands)
+        if anomalies is not None:
+            floor = np.where(anomalies > 0, WARNING, NORMAL).astype(np.int8)
+            plain = np.maximum(plain, floor)
+            strict = np.maximum(strict, floor)
+        level = self._level
+        # Escalate on plain bands, step down only through the release bands
+        raw = np.where(plain >= level, plain, np.minimum(strict, level))
+
+        same = raw == self._candidate
+        self._streak = np.where(same, self._streak + 1, 1).astype(np.int32)
+        self._candidate = raw
+        settled = raw == level
+        self._streak[settled] = 0
+        rows = np.flatnonzero(~settled & (self._streak >= self.debounce))
+        if len(rows) == 0:
+            return 0
+
+        old = level[rows].tolist()
+        new = raw[rows].tolist()
+        # The detector is the cause only where the bands alone would not reach the level
+        causes = [None] * len(rows)
+        if anomalies is not None:
+            for i, (b, n, code) in enumerate(zip(band[rows].tolist(), new, anomalies[rows].tolist())):
+                if b < n:
+                    causes[i] = ANOMALY_BY_CODE[code]
+        level[rows] = raw[rows]
+        self._streak[rows] = 0
+        with self._lock:
+            before = len(self._events) + self._base
+            for row, was, now, cause in zip(rows.tolist(), old, new, causes):
+                self._transition(row, was, now, float(values[row]), ts_ns, cause)
+            return len(self._events) + self._base - before
+
+    def _transition(
+        self, row: int, was: int, now: int, value: float, ts_ns: int, anomaly: AnomalyKind | None = None
+    ) -> None:
+        spec = self.sensors.specs[row]
+        timestamp = from_ns(ts_ns)
+        if now == NORMAL:
+            alert = self._active.pop(row)
+            del self._by_id[alert.id]
+            alert = alert.model_copy(
+                update={
+                    "state": AlertState.CLEARED,
+                    "status": STATUS_BY_CODE[NORMAL],
+                    "value": value,
+                    "timestamp": timestamp,
+                }
+            )
+            self._log(AlertEventKind.CLEARED, alert, ts_ns)
+            return
+
+        status = STATUS_BY_CODE[now]
+        message = alert_message(spec, status, value, anomaly)
+        if was == NORMAL:
+            alert = Alert(
+                id=self._next_id,
+                state=AlertState.OPEN,
+                site=spec.site,
+                sensor=spec.tag,
+                value=value,
+                unit=spec.unit,
+                status=status,
+                message=message,
+                anomaly=anomaly,
+                opened_at=timestamp,
+                timestamp=timestamp,
+            )
+            self._next_id += 1
+            self._by_id[alert.id] = row
+            kind = AlertEventKind.OPENED
+        else:
+            alert = self._active[row].model_copy(
+                update={
+                    "status": status,
+                    "value": value,
+                    "message": message,
+                    "anomaly": anomaly,
+                    "timestamp": timestamp,
+                }
+            )
+            kind = AlertEventKind.ESCALATED if now > was else AlertEventKind.DEESCALATED
+        self._active[row] = alert
+        self._log(kind, alert, ts_ns)
+
+    def acknowledge(self, alert_id: int, ts_ns: int | None = None) -> Alert:
+        """
+        Mark an active alert acknowledged. The event is stamped with the
+        time of the last evaluated frame unless `ts_ns` is given, so the
+        log stays in frame time during replay. Raises KeyError if not active.
+        """
+        with self._lock:
+            if ts_ns is None:
+                ts_ns = self._tick_ns
+            row = self._by_id.get(alert_id)
+            if row is None:
+                raise KeyError(f"no active alert with id {alert_id}")
+            alert = self._active[row]
+            if alert.state is AlertState.ACKNOWLEDGED:
+                return alert
+            alert = self._active[row] = alert.model_copy(update={"state": AlertState.ACKNOWLEDGED})
+            self._log(AlertEventKind.ACKNOWLEDGED, alert, ts_ns)
+            return alert
+
+    # ── Active alerts ───────────────────────────────────────────────
+
+    def active(self, site: str | None = None) -> list[Alert]:
+        """Open and acknowledged alerts (one site or all), in registry order."""
+        if site is not None and site not in self.sensors.sites:
+            raise KeyError(f"unknown site: {site}")
+        with self._lock:
+            alerts = [self._active[row] for row in sorted(self._active)]
+        if site is not None:
+            alerts = [a for a in alerts if a.site == site]
+        return alerts
+
+    def active_payload(self, site: str | None = None) -> SerializedBody:
+        """`AlertResponse` JSON, re-serialized only when the active set changes."""
+        version = self.version
+        cached = self._payloads.get(site)
+        if cached is None or cached[0] != version:
+            body = SerializedBody.from_model(AlertResponse(alerts=self.active(site)))
+            cached = self._payloads[site] = (version, body)
+        return cached[1]
+
+    # ── Event log ───────────────────────────────────────────────────
+
+    @property
+    def cursor(self) -> int:
+        """Cursor of the newest event (0 before the first one)."""
+        return self._base + len(self._events) - 1
+
+    def _log(self, kind: AlertEventKind, alert: Alert, ts_ns: int) -> None:
+        cursor = self._base + len(self._events)
+        self._events.append(AlertEvent(cursor=cursor, kind=kind, alert=alert, ts_ns=ts_ns))
+        self._event_ts.append(ts_ns)
+        self._by_key.setdefault(f"{alert.site}/{alert.sensor}", []).append(cursor)
+        self._by_status.setdefault(alert.status, []).append(cursor)
+        self.version += 1
+        if len(self._events) > self.log_capacity + self.log_capacity // 4:
+            self._trim()
+
+    def _trim(self) -> None:
+        # Drop in chunks so trimming is amortized O(1) per event
+        drop = len(self._events) - self.log_capacity
+        self._events = self._events[drop:]
+        self._event_ts = self._event_ts[drop:]
+        self._base += drop
+        for index in (self._by_key, self._by_status):
+            for name in list(index):
+                kept = index[name][bisect_left(index[name], self._base):]
+                if kept:
+                    index[name] = kept
+                else:
+                    del index[name]
+
+    def events(
+        self,
+        since: int = 0,
+        key: str | None = None,
+        status: SensorStatus | None = None,
+        start_ns: int | None = None,
+        end_ns: int | None = None,
+        limit: int = 1_000,
+    ) -> tuple[list[AlertEvent], bool, int]:
+        """
+        Events with cursor > `since`, optionally filtered, oldest first.
+
+        Returns (events, truncated, head); truncated is True when events
+        after `since` have already been dropped from the bounded log, and
+        head is the log cursor read under the same lock as the events, so
+        a poller that got fewer than `limit` events may resume from it.
+        """
+        with self._lock:
+            head = self.cursor
+            truncated = since + 1 < self._base and since < head
+            lo = max(since + 1, self._base)
+            hi = self._base + len(self._events)
+            if start_ns is not None:
+                lo = max(lo, self._base + bisect_left(self._event_ts, start_ns))
+            if end_ns is not None:
+                hi = min(hi, self._base + bisect_right(self._event_ts, end_ns))
+            if lo >= hi:
+                return [], truncated, head
+
+            candidates: list[int] | range = range(lo, hi)
+            for index, name in ((self._by_key, key), (self._by_status, status)):
+                if name is None:
+                    continue
+                cursors = index.get(name, [])
+                sliced = cursors[bisect_left(cursors, lo):bisect_left(cursors, hi)]
+                if len(sliced) < len(candidates):
+                    candidates = sliced
+
+            out = []
+            for cursor in candidates:
+                event = self._events[cursor - self._base]
+                if key is not None and f"{event.alert.site}/{event.alert.sensor}" != key:
+                    continue
+                if status is not None and event.alert.status != status:
+                    continue
+                out.append(event)
+                if len(out) == limit:
+                    break
+            return out, truncated, head
@@ -0,0 +1,200 @@
+"""
+Online per-tag analytics: smoothed level, spread, rate of change and
+change detection, updated with constant memory and constant work per
+sample, vectorized over all tags.
+
+Per tag the detector keeps a handful of floats:
+
+- `ewma`: fast exponentially weighted mean of the value (what the
+  reading is doing now).
+- `std`: exponentially weighted Welford mean, variance and lag-1
+  covariance of the value (the slow baseline). The weight starts at
+  1/n, so the first samples give the exact running moments, and settles
+  at `BASELINE_ALPHA`.
+- `rate`: change per second since the previous sample.
+- CUSUM: two-sided cumulative sum of standardized one-step forecast
+  residuals, z = r / std r, where the forecast is the AR(1) fit of the
+  baseline (mean + φ · (previous − mean), φ = lag-1 autocorrelation).
+  Process values are autocorrelated to very different degrees: a CUSUM
+  on the level alarms on a slowly wandering tag, one on the differences
+  misses a slow ramp on a noisy, flat tag. The residuals are close to
+  white noise in both cases, and a sustained trend shows up as a run of
+  same-signed z.
+
+Flags, after `warmup` samples of a tag:
+
+- spike: |z| > `spike_z` on one sample. The flag is held for `hold`
+  samples so that it survives alert debouncing.
+- drift: either CUSUM side above `drift_threshold` — a ramp that is
+  flagged before it reaches a band.
+
+Outlying residuals are clipped to ±`spike_z` before they enter the CUSUM
+and the baseline, so a single glitch neither trips the drift flag nor
+inflates the spread.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .models import AnomalyKind
+from .sensor_registry import SensorArray
+
+# Anomaly codes (index into ANOMALY_BY_CODE)
+NONE, DRIFT, SPIKE = 0, 1, 2
+ANOMALY_BY_CODE: tuple[AnomalyKind | None, ...] = (None, AnomalyKind.DRIFT, AnomalyKind.SPIKE)
+
+EWMA_ALPHA = 0.2          # fast level
+BASELINE_ALPHA = 0.02     # slow baseline (≈ 50-sample memory)
+CUSUM_SLACK = 1.0         # per-sample allowance k, in z units
+PHI_MAX = 0.99            # AR(1) coefficient cap (keeps the forecast mean-reverting)
+STD_FLOOR = 1e-3          # fraction of the normal band width; flat tags still score
+MAX_BATCH_STEPS = 256     # samples per tag fed from one ingest batch (newest kept)
+
+
+@dataclass(frozen=True)
+class AnalyticsFrame:
+    """Derived features after one update, row-aligned with the `SensorArray`."""
+    seen: np.ndarray      # bool: tag has at least one sample
+    ewma: np.ndarray
+    std: np.ndarray
+    rate: np.ndarray      # units per second
+    cusum: np.ndarray     # signed: upper side if larger, else −lower side
+    anomaly: np.ndarray   # int8 code
+
+
+class AnomalyDetector:
+    """Streaming EWMA / Welford / rate / CUSUM state for every tag."""
+
+    def __init__(
+        self,
+        sensors: SensorArray,
+        drift_threshold: float = 10.0,
+        spike_z: float = 5.0,
+        hold: int = 3,
+        warmup: int = 30,
+    ) -> None:
+        if drift_threshold <= 0 or spike_z <= 0:
+            raise ValueError("drift threshold and spike z must be positive")
+        if hold < 1 or warmup < 2:
+            raise ValueError("hold must be at least 1 and warmup at least 2")
+        self.sensors = sensors
+        self.drift_threshold = drift_threshold
+        self.spike_z = spike_z
+        self.hold = hold
+        self.warmup = warmup
+        self._floor = STD_FLOOR * (sensors.normal_hi - sensors.normal_lo)
+
+        n = len(sensors)
+        self._count = np.zeros(n, dtype=np.int64)
+        self._last = np.zeros(n)
+        self._last_ns = np.zeros(n, dtype=np.int64)
+        self._ewma = np.zeros(n)
+        self._mean = np.zeros(n)
+        self._var = np.zeros(n)
+        self._cov = np.zeros(n)      # lag-1
+        self._r_var = np.zeros(n)    # forecast residuals (mean 0)
+        self._rate = np.zeros(n)
+        self._hi = np.zeros(n)
+        self._lo = np.zeros(n)
+        self._held = np.zeros(n, dtype=np.int32)
+        self._anomaly = np.zeros(n, dtype=np.int8)
+
+    def update(self, ts_ns: int, values: np.ndarray) -> AnalyticsFrame:
+        """Feed one frame (every tag at `ts_ns`)."""
+        self._step(slice(None), ts_ns, values)
+        return self.frame()
+
+    def update_columns(self, rows: np.ndarray, ts_ns: np.ndarray, values: np.ndarray) -> AnalyticsFrame:
+        """
+        Feed samples of arbitrary tags, sorted by (row, timestamp). Each
+        tag's samples are applied in order, one vectorized step per run
+        position; only the newest `MAX_BATCH_STEPS` of a run count.
+        """
+        if len(rows):
+            starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+            lengths = np.diff(np.r_[starts, len(rows)])
+            # Samples before each run's newest one (0 = newest)
+            back = np.repeat(starts + lengths - 1, lengths) - np.arange(len(rows))
+            steps = min(int(lengths.max()), MAX_BATCH_STEPS)
+            order = np.argsort(-back, kind="stable")
+            order = order[back[order] < steps]
+            cuts = np.cumsum(np.bincount(steps - 1 - back[order], minlength=steps))[:-1]
+            for sel in np.split(order, cuts):
+                self._step(rows[sel], ts_ns[sel], values[sel])
+        return self.frame()
+
+    def frame(self) -> AnalyticsFrame:
+        frame = AnalyticsFrame(
+            seen=self._count > 0,
+            ewma=self._ewma.copy(),
+            std=np.sqrt(self._var),
+            rate=self._rate.copy(),
+            cusum=np.where(self._hi >= self._lo, self._hi, -self._lo),
+            anomaly=self._anomaly.copy(),
+        )
+        for column in (frame.seen, frame.ewma, frame.std, frame.rate, frame.cusum, frame.anomaly):
+            column.flags.writeable = False
+        return frame
+
+    @property
+    def anomalies(self) -> np.ndarray:
+        """Current anomaly code per tag (read-only view)."""
+        view = self._anomaly.view()
+        view.flags.writeable = False
+        return view
+
+    def _step(self, idx, ts_ns, x: np.ndarray) -> None:
+        # idx: slice(None) for a whole frame, or distinct rows
+        count = self._count[idx] + 1
+        first = count == 1
+        prev = np.where(first, x, self._last[idx])
+        dt = (ts_ns - np.where(first, ts_ns, self._last_ns[idx])) / 1e9
+        moved = dt > 0
+        rate = np.where(moved, (x - prev) / np.where(moved, dt, 1.0), self._rate[idx])
+        ewma = np.where(first, x, self._ewma[idx] + EWMA_ALPHA * (x - self._ewma[idx]))
+
+        # Score the AR(1) forecast residual against the baseline so far
+        mean, var, cov, r_var = self._mean[idx], self._var[idx], self._cov[idx], self._r_var[idx]
+        phi = np.clip(cov / np.maximum(var, 1e-300), 0.0, PHI_MAX)
+        forecast = mean + phi * (prev - mean)
+        r_std = np.maximum(np.sqrt(r_var), self._floor[idx])
+        z = (x - forecast) / r_std
+        armed = count > self.warmup
+        clipped = np.clip(z, -self.spike_z, self.spike_z)
+        hi = np.where(armed, np.maximum(self._hi[idx] + clipped - CUSUM_SLACK, 0.0), 0.0)
+        lo = np.where(armed, np.maximum(self._lo[idx] - clipped - CUSUM_SLACK, 0.0), 0.0)
+        held = np.where(
+            armed & (np.abs(z) > self.spike_z), self.hold, np.maximum(self._held[idx] - 1, 0)
+        )
+        anomaly = np.where(
+            held > 0, SPIKE, np.where((hi > self.drift_threshold) | (lo > self.drift_threshold), DRIFT, NONE)
+        )
+
+        # Then fold the sample in; once armed, outliers enter clipped
+        x_in = np.where(armed, forecast + clipped * r_std, x)
+        w = np.maximum(BASELINE_ALPHA, 1.0 / count)
+        resid = x_in - forecast
+        # The first sample has no forecast: its residual weighs nothing
+        r_w = np.where(first, 0.0, np.maximum(BASELINE_ALPHA, 1.0 / np.maximum(count - 1, 1)))
+        r_var = r_var + r_w * (resid * resid - r_var)
+        delta, lag = x_in - mean, prev - mean
+        mean = mean + w * delta
+        var = (1.0 - w) * (var + w * delta * delta)
+        cov = (1.0 - w) * (cov + w * delta * lag)
+
+        self._count[idx] = count
+        self._last[idx] = x
+        self._last_ns[idx] = ts_ns
+        self._rate[idx] = rate
+        self._ewma[idx] = ewma
+        self._mean[idx] = mean
+        self._var[idx] = var
+        self._cov[idx] = cov
+        self._r_var[idx] = r_var
+        self._hi[idx] = hi
+        self._lo[idx] = lo
+        self._held[idx] = held
+        self._anomaly[idx] = anomaly
@@ -0,0 +1,102 @@
+"""Runtime settings for AquaView, read from environment variables."""
+
+from __future__ import annotations
+
+import os
+
+# Seconds between simulator ticks (background acquisition loop)
+SAMPLE_INTERVAL: float = float(os.environ.get("AQUAVIEW_SAMPLE_INTERVAL", "1.0"))
+
+# Run the random-walk simulator as a sensor producer ("0" → readings come
+# only from POST /api/ingest)
+SIMULATE: bool = os.environ.get("AQUAVIEW_SIMULATE", "1").lower() not in ("0", "false", "no")
+
+# Session recording: append every published snapshot to this file (empty → off)
+RECORD_PATH: str = os.environ.get("AQUAVIEW_RECORD_PATH", "")
+# Replay mode: play this recording instead of simulating (empty → off), at
+# this many recorded seconds per wall-clock second (1–1000)
+REPLAY_PATH: str = os.environ.get("AQUAVIEW_REPLAY_PATH", "")
+REPLAY_SPEED: float = float(os.environ.get("AQUAVIEW_REPLAY_SPEED", "1.0"))
+
+# Random-walk seed: the same seed replays the same series (empty → random)
+SIMULATOR_SEED: int | None = (
+    int(os.environ["AQUAVIEW_SIMULATOR_SEED"]) if os.environ.get("AQUAVIEW_SIMULATOR_SEED") else None
+)
+
+# Multi-process deployment: name of the shared-memory snapshot bus (empty →
+# single process), this process's role on it ("producer" runs acquisition
+# and publishes; "reader" serves from the bus, e.g. `uvicorn --workers N`),
+# snapshots kept in the ring, and where readers redirect requests that need
+# producer state (empty → 503)
+SNAPSHOT_BUS: str = os.environ.get("AQUAVIEW_SNAPSHOT_BUS", "")
+BUS_ROLE: str = os.environ.get("AQUAVIEW_BUS_ROLE", "producer")
+SNAPSHOT_BUS_SLOTS: int = int(os.environ.get("AQUAVIEW_SNAPSHOT_BUS_SLOTS", "16"))
+PRODUCER_URL: str = os.environ.get("AQUAVIEW_PRODUCER_URL", "")
+BUS_READER: bool = bool(SNAPSHOT_BUS) and BUS_ROLE == "reader"
+
+# Recent snapshots kept as bases for binary delta frames (GET /api/sensors?since=)
+WIRE_DELTA_WINDOW: int = int(os.environ.get("AQUAVIEW_WIRE_DELTA_WINDOW", "64"))
+
+# Largest POST /api/ingest body in bytes
+INGEST_MAX_BYTES: int = int(os.environ.get("AQUAVIEW_INGEST_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Max distinct HRT ratio combinations kept by the pipeline result cache
+PIPELINE_CACHE_SIZE: int = int(os.environ.get("AQUAVIEW_PIPELINE_CACHE_SIZE", "512"))
+
+# Lookup-table mode: pipeline stages interpolated from transfer functions
+# tabulated at startup (see pipeline_table.py), optionally cached in a file
+PIPELINE_TABLE: bool = os.environ.get("AQUAVIEW_PIPELINE_TABLE", "0").lower() in ("1", "true", "yes")
+PIPELINE_TABLE_POINTS: int = int(os.environ.get("AQUAVIEW_PIPELINE_TABLE_POINTS", "226"))
+PIPELINE_TABLE_PATH: str = os.environ.get("AQUAVIEW_PIPELINE_TABLE_PATH", "")
+
+# Upper bound on rows evaluated by one POST /api/pipeline/batch request
+BATCH_MAX_ROWS: int = int(os.environ.get("AQUAVIEW_BATCH_MAX_ROWS", "200000"))
+
+# Upper bound on named scenarios in one POST /api/pipeline/compare request
+COMPARE_MAX_SCENARIOS: int = int(os.environ.get("AQUAVIEW_COMPARE_MAX_SCENARIOS", "256"))
+
+# Sensor history backend: "memory" (ring buffer only) or "sqlite" (ring + disk)
+HISTORY_BACKEND: str = os.environ.get("AQUAVIEW_HISTORY_BACKEND", "memory")
+# Samples kept in memory per sensor (86400 = one day at 1 Hz)
+HISTORY_CAPACITY: int = int(os.environ.get("AQUAVIEW_HISTORY_CAPACITY", "86400"))
+# SQLite database file for the "sqlite" backend
+HISTORY_PATH: str = os.environ.get("AQUAVIEW_HISTORY_PATH", "aquaview_history.db")
+# Seconds between group commits of the "sqlite" backend's writer thread
+HISTORY_COMMIT_INTERVAL: float = float(os.environ.get("AQUAVIEW_HISTORY_COMMIT_INTERVAL", "1.0"))
+
+# JSON file declaring sites and sensor tags (empty → built-in default site)
+SENSOR_CONFIG_PATH: str = os.environ.get("AQUAVIEW_SENSOR_CONFIG", "")
+
+# JSON file adding stage models and named treatment trains (empty → built-ins only)
+TRAIN_CONFIG_PATH: str = os.environ.get("AQUAVIEW_TRAIN_CONFIG", "")
+
+# Token required in X-Admin-Token for /api/admin/* (empty → admin endpoints disabled)
+ADMIN_TOKEN: str = os.environ.get("AQUAVIEW_ADMIN_TOKEN", "")
+
+# Alert engine: release margin (fraction of band width), minimum seconds a
+# new level must persist, and events kept in the alert log
+ALERT_HYSTERESIS: float = float(os.environ.get("AQUAVIEW_ALERT_HYSTERESIS", "0.05"))
+ALERT_MIN_DURATION: float = float(os.environ.get("AQUAVIEW_ALERT_MIN_DURATION", "3.0"))
+ALERT_LOG_CAPACITY: int = int(os.environ.get("AQUAVIEW_ALERT_LOG_CAPACITY", "10000"))
+
+# Anomaly detector: CUSUM level that flags drift and |z| of one change that
+# flags a spike (standardized changes), and whether flags raise alerts
+ANOMALY_DRIFT_THRESHOLD: float = float(os.environ.get("AQUAVIEW_ANOMALY_DRIFT_THRESHOLD", "10.0"))
+ANOMALY_SPIKE_Z: float = float(os.environ.get("AQUAVIEW_ANOMALY_SPIKE_Z", "5.0"))
+ANOMALY_ALERTS: bool = os.environ.get("AQUAVIEW_ANOMALY_ALERTS", "1").lower() not in ("0", "false", "no")
+
+# Dynamic pipeline: site whose flow/temp sensors drive it (empty → first
+# configured site), simulated seconds per wall-clock second, and ticks of
+# per-stage effluent kept for trajectories
+DYNAMIC_SITE: str = os.environ.get("AQUAVIEW_DYNAMIC_SITE", "")
+DYNAMIC_TIME_SCALE: float = float(os.environ.get("AQUAVIEW_DYNAMIC_TIME_SCALE", "1.0"))
+DYNAMIC_TRAJECTORY_CAPACITY: int = int(os.environ.get("AQUAVIEW_DYNAMIC_TRAJECTORY_CAPACITY", "3600"))
+
+# Monte Carlo uncertainty: max realizations per request
+UNCERTAINTY_MAX_REALIZATIONS: int = int(os.environ.get("AQUAVIEW_UNCERTAINTY_MAX_REALIZATIONS", "1000000"))
+
+# Background jobs: worker processes (default leaves one core for the API),
+# jobs queued or running at once, and seconds a finished job is kept
+JOBS_MAX_WORKERS: int = int(os.environ.get("AQUAVIEW_JOBS_MAX_WORKERS", str(max(1, (os.cpu_count() or 1) - 1))))
+JOBS_MAX_ACTIVE: int = int(os.environ.get("AQUAVIEW_JOBS_MAX_ACTIVE", "4"))
+JOBS_RESULT_TTL: float = float(os.environ.get("AQUAVIEW_JOBS_RESULT_TTL", "600"))
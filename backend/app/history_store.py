@@ -0,0 +1,542 @@
+"""
+Pluggable sensor history storage.
+
+Two backends share the `HistoryStore` interface:
+
+- `RingBufferHistory`: fixed-capacity in-memory columns per key —
+  `array('q')` epoch-nanosecond timestamps, `array('d')` values and a
+  `bytearray` of status codes. Each sample is written twice (at i and
+  i + capacity), so any window of up to `capacity` recent samples is one
+  contiguous region and is read with one slice copy per column (taken
+  under the store lock, so a concurrent append cannot overwrite it).
+  Columns start small and grow with the key, so many sparse keys stay cheap.
+  Bulk appends (`append_columns`) copy each key's run as slices.
+- `SQLiteHistory`: append-only on-disk store (SQLite in WAL mode) that
+  survives restarts and holds as much history as the disk allows; rows
+  are written and group-committed by a background writer thread.
+
+`TieredHistory` combines both: writes go to disk and memory, reads are
+served from memory whenever the requested window is still in the ring.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import repeat
+from typing import Iterable, Sequence
+
+import numpy as np
+
+from .models import SensorStatus
+
+# Status codes stored in the status column
+STATUS_BY_CODE: tuple[SensorStatus, ...] = (
+    SensorStatus.NORMAL,
+    SensorStatus.WARNING,
+    SensorStatus.DANGER,
+)
+CODE_BY_STATUS: dict[SensorStatus, int] = {s: i for i, s in enumerate(STATUS_BY_CODE)}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_INITIAL_ALLOC = 64  # samples allocated per key before the ring starts growing
+
+Sample = tuple[str, int, float, int]  # (key, epoch ns, value, status code)
+
+
+def to_ns(ts: datetime) -> int:
+    """Aware datetime → epoch nanoseconds (microsecond precision)."""
+    delta = ts - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1_000
+
+
+def from_ns(ns: int) -> datetime:
+    """Epoch nanoseconds → aware UTC datetime (truncated to microseconds)."""
+    return _EPOCH + timedelta(microseconds=ns // 1_000)
+
+
+@dataclass(frozen=True)
+class HistorySlice:
+    """Parallel columns for a run of samples, oldest first."""
+    timestamps: Sequence[int]   # epoch ns
+    values: Sequence[float]
+    statuses: Sequence[int]     # STATUS_BY_CODE indices
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def entries(self) -> list[dict]:
+        """Row dicts shaped like `HistoryEntry`."""
+        return [
+            {"value": v, "status": STATUS_BY_CODE[s], "timestamp": from_ns(t)}
+            for t, v, s in zip(self.timestamps, self.values, self.statuses)
+        ]
+
+
+EMPTY_SLICE = HistorySlice(timestamps=(), values=(), statuses=())
+
+
+def to_list(column: Sequence) -> list:
+    """NumPy columns → Python scalars in one call (plain sequences pass through)."""
+    return column.tolist() if hasattr(column, "tolist") else list(column)
+
+
+class HistoryStore(ABC):
+    """Append-only time series per key; timestamps must be non-decreasing per key."""
+
+    @abstractmethod
+    def append_batch(self, samples: Iterable[Sample]) -> None:
+        """Append many samples (any mix of keys) as one write."""
+
+    def append(self, key: str, ts_ns: int, value: float, status: int) -> None:
+        self.append_batch(((key, ts_ns, value, status),))
+
+    def append_frame(
+        self, keys: Sequence[str], ts_ns: int, values: Sequence[float], statuses: Sequence[int]
+    ) -> None:
+        """Append one sample per key, all sharing the timestamp `ts_ns`."""
+        self.append_batch(zip(keys, repeat(ts_ns), to_list(values), to_list(statuses)))
+
+    def append_columns(
+        self,
+        keys: Sequence[str],
+        rows: np.ndarray,
+        ts_ns: np.ndarray,
+        values: np.ndarray,
+        statuses: np.ndarray,
+    ) -> None:
+        """
+        Append samples given as columns; sample j belongs to `keys[rows[j]]`.
+        Samples must be sorted by row, then by timestamp.
+        """
+        names = [keys[r] for r in rows.tolist()]
+        self.append_batch(zip(names, ts_ns.tolist(), values.tolist(), statuses.tolist()))
+
+    @abstractmethod
+    def latest(self, key: str, limit: int) -> HistorySlice:
+        """Most recent `limit` samples for `key`."""
+
+    @abstractmethod
+    def range(self, key: str, start_ns: int | None, end_ns: int | None) -> HistorySlice:
+        """Samples with start_ns ≤ ts ≤ end_ns (open bounds when None)."""
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        """Number of stored samples for `key`."""
+
+    def total(self) -> int:
+        """Number of stored samples across all keys (cheap enough for every /metrics scrape)."""
+        return sum(self.size(k) for k in self.keys())
+
+    def keys(self) -> list[str]:
+        return []
+
+    def close(self) -> None:
+        pass
+
+
+# ── In-memory ring buffer ───────────────────────────────────────────
+
+class _Ring:
+    """
+    Ring of parallel columns for one key.
+
+    Storage grows by doubling until `capacity` samples are held; from then
+    on it is mirrored (each sample written at i and i + capacity) so that
+    the most recent `capacity` samples are always contiguous.
+    """
+
+    __slots__ = ("capacity", "ts", "values", "status", "head", "count", "mirrored")
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        size = min(capacity, _INITIAL_ALLOC)
+        self.ts = array("q", bytes(8 * size))
+        self.values = array("d", bytes(8 * size))
+        self.status = bytearray(size)
+        self.head = 0      # next write position in [0, capacity)
+        self.count = 0
+        self.mirrored = False
+
+    def _reallocate(self, size: int, copies: int) -> None:
+        # New column objects: views handed out earlier keep the old ones alive
+        n = self.count
+        ts, values, status = array("q", bytes(8 * size)), array("d", bytes(8 * size)), bytearray(size)
+        for k in range(copies):
+            ts[k * n:(k + 1) * n] = self.ts[:n]
+            values[k * n:(k + 1) * n] = self.values[:n]
+            status[k * n:(k + 1) * n] = self.status[:n]
+        self.ts, self.values, self.status = ts, values, status
+
+    def append(self, ts_ns: int, value: float, status: int) -> None:
+        if not self.mirrored:
+            n = self.count
+            if n == len(self.status):
+                if n < self.capacity:
+                    self._reallocate(min(2 * n, self.capacity), 1)
+                else:
+                    self._reallocate(2 * n, 2)
+                    self.mirrored = True
+            if not self.mirrored:
+                self.ts[n] = ts_ns
+                self.values[n] = value
+                self.status[n] = status
+                self.head = (n + 1) % self.capacity
+                # Publish the count last so readers never see a half-written sample
+                self.count = n + 1
+                return
+
+        i, j = self.head, self.head + self.capacity
+        self.ts[i] = self.ts[j] = ts_ns
+        self.values[i] = self.values[j] = value
+        self.status[i] = self.status[j] = status
+        self.head = (i + 1) % self.capacity
+
+    def extend(self, ts: np.ndarray, values: np.ndarray, status: np.ndarray) -> None:
+        """Append a run of samples with slice copies instead of one write per sample."""
+        n = len(ts)
+        if n > self.capacity:
+            # Only the newest `capacity` samples would survive anyway
+            ts, values, status = ts[-self.capacity:], values[-self.capacity:], status[-self.capacity:]
+            n = self.capacity
+        pos = 0
+        while pos < n and not self.mirrored:
+            c = self.count
+            if c == len(self.status):
+                if c < self.capacity:
+                    self._reallocate(min(max(2 * c, c + n - pos), self.capacity), 1)
+                else:
+                    self._reallocate(2 * c, 2)
+                    self.mirrored = True
+                    break
+            k = min(n - pos, len(self.status) - c)
+            self._write(c, ts[pos:pos + k], values[pos:pos + k], status[pos:pos + k])
+            self.head = (c + k) % self.capacity
+            self.count = c + k
+            pos += k
+        while pos < n:
+            i = self.head
+            k = min(n - pos, self.capacity - i)
+            for at in (i, i + self.capacity):
+                self._write(at, ts[pos:pos + k], values[pos:pos + k], status[pos:pos + k])
+            self.head = (i + k) % self.capacity
+            pos += k
+
+    def _write(self, at: int, ts: np.ndarray, values: np.ndarray, status: np.ndarray) -> None:
+        stop = at + len(ts)
+        np.frombuffer(self.ts, dtype=np.int64)[at:stop] = ts
+        np.frombuffer(self.values, dtype=np.float64)[at:stop] = values
+        np.frombuffer(self.status, dtype=np.uint8)[at:stop] = status
+
+    def window(self) -> tuple[int, int]:
+        """[start, stop) of all stored samples in storage coordinates."""
+        if not self.mirrored:
+            return 0, self.count
+        head = self.head
+        return head, head + self.capacity
+
+    def copy(self, start: int, stop: int) -> HistorySlice:
+        return HistorySlice(
+            timestamps=self.ts[start:stop],
+            values=self.values[start:stop],
+            statuses=bytes(self.status[start:stop]),
+        )
+
+
+class RingBufferHistory(HistoryStore):
+    """
+    Fixed-capacity in-memory history. Appends run on the event loop and
+    reads in the threadpool; both take `_lock`, and reads return copies.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("history capacity must be at least 1")
+        self.capacity = capacity
+        self._rings: dict[str, _Ring] = {}
+        self._lock = threading.Lock()
+        # Ring list for the last key tuple passed to append_frame
+        self._frame_keys: Sequence[str] | None = None
+        self._frame_rings: list[_Ring] = []
+
+    def _ring(self, key: str) -> _Ring:
+        ring = self._rings.get(key)
+        if ring is None:
+            ring = self._rings[key] = _Ring(self.capacity)
+        return ring
+
+    def append_batch(self, samples: Iterable[Sample]) -> None:
+        with self._lock:
+            for key, ts_ns, value, status in samples:
+                self._ring(key).append(ts_ns, value, status)
+
+    def append_frame(
+        self, keys: Sequence[str], ts_ns: int, values: Sequence[float], statuses: Sequence[int]
+    ) -> None:
+        values, statuses = to_list(values), to_list(statuses)
+        with self._lock:
+            if keys is not self._frame_keys:
+                self._frame_rings = [self._ring(k) for k in keys]
+                self._frame_keys = keys
+            for ring, value, status in zip(self._frame_rings, values, statuses):
+                ring.append(ts_ns, value, status)
+
+    def append_columns(
+        self,
+        keys: Sequence[str],
+        rows: np.ndarray,
+        ts_ns: np.ndarray,
+        values: np.ndarray,
+        statuses: np.ndarray,
+    ) -> None:
+        if not len(rows):
+            return
+        bounds = np.flatnonzero(np.diff(rows)) + 1
+        with self._lock:
+            for lo, hi in zip([0, *bounds.tolist()], [*bounds.tolist(), len(rows)]):
+                self._ring(keys[rows[lo]]).extend(ts_ns[lo:hi], values[lo:hi], statuses[lo:hi])
+
+    def latest(self, key: str, limit: int) -> HistorySlice:
+        ring = self._rings.get(key)
+        if ring is None:
+            return EMPTY_SLICE
+        with self._lock:
+            start, stop = ring.window()
+            return ring.copy(max(start, stop - limit), stop)
+
+    def range(self, key: str, start_ns: int | None, end_ns: int | None) -> HistorySlice:
+        ring = self._rings.get(key)
+        if ring is None:
+            return EMPTY_SLICE
+        with self._lock:
+            start, stop = ring.window()
+            ts = ring.ts
+            lo = start if start_ns is None else bisect_left(ts, start_ns, start, stop)
+            hi = stop if end_ns is None else bisect_right(ts, end_ns, lo, stop)
+            return ring.copy(lo, hi)
+
+    def oldest(self, key: str) -> int | None:
+        """Timestamp of the oldest sample still in memory."""
+        ring = self._rings.get(key)
+        if ring is None:
+            return None
+        with self._lock:
+            return ring.ts[ring.window()[0]] if ring.count else None
+
+    def size(self, key: str) -> int:
+        ring = self._rings.get(key)
+        return ring.count if ring else 0
+
+    def total(self) -> int:
+        return sum(ring.count for ring in list(self._rings.values()))
+
+    def keys(self) -> list[str]:
+        return list(self._rings)
+
+
+# ── On-disk store (SQLite WAL) ──────────────────────────────────────
+
+class SQLiteHistory(HistoryStore):
+    """
+    Append-only history persisted in a SQLite database (WAL mode).
+
+    Appends only queue their rows; a writer thread inserts everything
+    queued and commits once every `commit_interval` seconds, so the
+    acquisition loop never waits for the disk. Reads first write out what
+    is still queued, so they always see every appended sample.
+    """
+
+    def __init__(self, path: str, commit_interval: float = 1.0) -> None:
+        if commit_interval <= 0:
+            raise ValueError("commit interval must be positive")
+        self.path = path
+        self.commit_interval = commit_interval
+        self._lock = threading.Lock()              # connection
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS samples ("
+            " key TEXT NOT NULL, ts INTEGER NOT NULL,"
+            " value REAL NOT NULL, status INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS samples_key_ts ON samples (key, ts)")
+        self._conn.commit()
+        # Running sample count: one COUNT(*) at open, then maintained by appends
+        self._total = self._conn.execute("SELECT COUNT(*) FROM samples").fetchone()[0]
+        self._pending: list[list[Sample]] = []
+        self._wake = threading.Condition()         # guards _pending and _closed
+        self._closed = False
+        self._writer: threading.Thread | None = None
+
+    def append_batch(self, samples: Iterable[Sample]) -> None:
+        rows = list(samples)
+        if not rows:
+            return
+        with self._wake:
+            if self._closed:
+                raise ValueError("history store is closed")
+            self._pending.append(rows)
+            self._total += len(rows)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            with self._wake:
+                closed = self._wake.wait_for(lambda: self._closed, timeout=self.commit_interval)
+            with self._lock:
+                self._flush()
+            if closed:
+                return
+
+    def _flush(self) -> None:
+        """Insert and commit everything queued (caller holds the connection lock)."""
+        with self._wake:
+            batches, self._pending = self._pending, []
+        if not batches:
+            return
+        for rows in batches:
+            self._conn.executemany("INSERT INTO samples VALUES (?, ?, ?, ?)", rows)
+        self._conn.commit()
+
+    def flush(self) -> None:
+        """Write out queued samples now."""
+        with self._lock:
+            self._flush()
+
+    @staticmethod
+    def _columns(rows: list[tuple]) -> HistorySlice:
+        if not rows:
+            return EMPTY_SLICE
+        ts, values, statuses = zip(*rows)
+        return HistorySlice(
+            timestamps=array("q", ts),
+            values=array("d", values),
+            statuses=bytes(statuses),
+        )
+
+    def latest(self, key: str, limit: int) -> HistorySlice:
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(
+                "SELECT ts, value, status FROM samples WHERE key = ?"
+                " ORDER BY ts DESC LIMIT ?",
+                (key, limit),
+            ).fetchall()
+        rows.reverse()
+        return self._columns(rows)
+
+    def range(self, key: str, start_ns: int | None, end_ns: int | None) -> HistorySlice:
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(
+                "SELECT ts, value, status FROM samples WHERE key = ?"
+                " AND ts >= ? AND ts <= ? ORDER BY ts",
+                (key, start_ns if start_ns is not None else -(2**63),
+                 end_ns if end_ns is not None else 2**63 - 1),
+            ).fetchall()
+        return self._columns(rows)
+
+    def size(self, key: str) -> int:
+        with self._lock:
+            self._flush()
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM samples WHERE key = ?", (key,)
+            ).fetchone()[0]
+
+    def total(self) -> int:
+        return self._total
+
+    def keys(self) -> list[str]:
+        with self._lock:
+            self._flush()
+            return [r[0] for r in self._conn.execute("SELECT DISTINCT key FROM samples")]
+
+    def close(self) -> None:
+        with self._wake:
+            self._closed = True
+            self._wake.notify()
+            writer = self._writer
+        if writer is not None:
+            writer.join()
+        with self._lock:
+            self._flush()
+            self._conn.close()
+
+
+# ── Tiered (memory + disk) ──────────────────────────────────────────
+
+class TieredHistory(HistoryStore):
+    """Ring buffer for recent reads, durable store for everything else."""
+
+    def __init__(self, memory: RingBufferHistory, disk: HistoryStore) -> None:
+        self.memory = memory
+        self.disk = disk
+        # Warm the ring from disk so recent history survives restarts
+        for key in disk.keys():
+            tail = disk.latest(key, memory.capacity)
+            memory.append_batch(
+                (key, t, v, s) for t, v, s in zip(tail.timestamps, tail.values, tail.statuses)
+            )
+
+    def append_batch(self, samples: Iterable[Sample]) -> None:
+        samples = list(samples)
+        self.disk.append_batch(samples)
+        self.memory.append_batch(samples)
+
+    def append_frame(
+        self, keys: Sequence[str], ts_ns: int, values: Sequence[float], statuses: Sequence[int]
+    ) -> None:
+        self.disk.append_frame(keys, ts_ns, values, statuses)
+        self.memory.append_frame(keys, ts_ns, values, statuses)
+
+    def append_columns(
+        self,
+        keys: Sequence[str],
+        rows: np.ndarray,
+        ts_ns: np.ndarray,
+        values: np.ndarray,
+        statuses: np.ndarray,
+    ) -> None:
+        self.disk.append_columns(keys, rows, ts_ns, values, statuses)
+        self.memory.append_columns(keys, rows, ts_ns, values, statuses)
+
+    def latest(self, key: str, limit: int) -> HistorySlice:
+        if limit <= self.memory.size(key) or self.memory.size(key) < self.memory.capacity:
+            return self.memory.latest(key, limit)
+        return self.disk.latest(key, limit)
+
+    def range(self, key: str, start_ns: int | None, end_ns: int | None) -> HistorySlice:
+        oldest = self.memory.oldest(key)
+        if oldest is not None and start_ns is not None and start_ns >= oldest:
+            return self.memory.range(key, start_ns, end_ns)
+        return self.disk.range(key, start_ns, end_ns)
+
+    def size(self, key: str) -> int:
+        return self.disk.size(key)
+
+    def total(self) -> int:
+        return self.disk.total()
+
+    def keys(self) -> list[str]:
+        return self.disk.keys()
+
+    def close(self) -> None:
+        self.disk.close()
+
+
+def create_history_store(backend: str, capacity: int, path: str, commit_interval: float = 1.0) -> HistoryStore:
+    """Build the configured backend: 'memory' or 'sqlite'."""
+    if backend == "memory":
+        return RingBufferHistory(capacity)
+    if backend == "sqlite":
+        return TieredHistory(RingBufferHistory(capacity), SQLiteHistory(path, commit_interval))
+    raise ValueError(f"unknown history backend: {backend!r} (expected 'memory' or 'sqlite')")
@@ -0,0 +1,121 @@
+"""
+Pre-serialized response bodies for hot GET endpoints.
+
+A `SerializedBody` is built once per snapshot (or cached pipeline result):
+JSON (or binary wire, see wire.py) bytes, a content-hash ETag, and compressed variants encoded on first
+request and kept alongside. `cached_response` answers `If-None-Match`
+with 304 and otherwise returns the best encoding the client accepts, so a
+polling request costs a header parse and a dictionary lookup.
+
+Brotli is used when the optional `brotli` package is installed; gzip is
+always available.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+from time import perf_counter
+from typing import Callable
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+from .metrics import PAYLOAD_SERIALIZE_SECONDS
+
+MIN_COMPRESS_SIZE = 500  # bytes; smaller bodies are sent uncompressed
+
+_COMPRESSORS: dict[str, Callable[[bytes], bytes]] = {
+    "gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0),
+}
+if brotli is not None:
+    _COMPRESSORS["br"] = lambda body: brotli.compress(body, quality=5)
+
+# Server preference when the client accepts several encodings
+_PREFERENCE: tuple[str, ...] = tuple(e for e in ("br", "gzip") if e in _COMPRESSORS)
+
+
+class SerializedBody:
+    """Response body with its ETag and lazily built compressed variants."""
+
+    __slots__ = ("body", "etag", "media_type", "_encoded")
+
+    def __init__(self, body: bytes, media_type: str = "application/json") -> None:
+        self.body = body
+        self.media_type = media_type
+        self.etag = f'"{hashlib.blake2b(body, digest_size=8).hexdigest()}"'
+        self._encoded: dict[str, bytes] = {}
+
+    @classmethod
+    def from_model(cls, model: BaseModel) -> SerializedBody:
+        started = perf_counter()
+        body = model.model_dump_json().encode()
+        PAYLOAD_SERIALIZE_SECONDS.observe(perf_counter() - started, type(model).__name__)
+        return cls(body)
+
+    @property
+    def text(self) -> str:
+        return self.body.decode()
+
+    def encoded(self, encoding: str) -> bytes:
+        """Body compressed with `encoding` ('gzip' or 'br'), computed once."""
+        data = self._encoded.get(encoding)
+        if data is None:
+            # Concurrent first requests may both compress; the results are identical
+            data = self._encoded[encoding] = _COMPRESSORS[encoding](self.body)
+        return data
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    """Preferred supported encoding listed in Accept-Encoding (q=0 excluded)."""
+    if not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q=") and _is_zero(q[2:]):
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in _PREFERENCE:
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def _is_zero(q: str) -> bool:
+    try:
+        return float(q) == 0
+    except ValueError:
+        return False
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag`."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def cached_response(request: Request, payload: SerializedBody, vary: str = "Accept-Encoding") -> Response:
+    """304 if the client's copy is current, else the (compressed) cached body."""
+    headers = {"ETag": payload.etag, "Vary": vary, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), payload.etag):
+        return Response(status_code=304, headers=headers)
+    encoding = None
+    if len(payload.body) >= MIN_COMPRESS_SIZE:
+        encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding is None:
+        return Response(content=payload.body, media_type=payload.media_type, headers=headers)
+    headers["Content-Encoding"] = encoding
+    return Response(content=payload.encoded(encoding), media_type=payload.media_type, headers=headers)
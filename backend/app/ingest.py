@@ -0,0 +1,201 @@
+"""
+Batched sensor readings from external producers (PLC gateways).
+
+`POST /api/ingest` accepts two encodings of the same thing — a list of
+(site, tag, timestamp, value) samples:
+
+- NDJSON (`application/x-ndjson`): one object per line,
+
+      {"site": "plant-a", "sensor": "ph", "value": 7.12, "timestamp": "2026-01-01T00:00:00Z"}
+
+  `site` defaults to the default site; `timestamp` is ISO 8601 (UTC if
+  naive) or epoch seconds, and defaults to the time of receipt. All
+  lines are decoded with one `json.loads` call.
+- Packed frames (`application/vnd.aquaview.frames`), little-endian,
+  any number of frames back to back:
+
+      magic "AQVF" | version u16 = 1 | n_tags u16 | n_samples u32
+      n_tags × (u16 length, UTF-8 "site/tag")
+      n_samples × (u16 tag index, i64 epoch ns, f64 value)   — 18 bytes each
+
+  Samples are read straight into NumPy with a structured dtype.
+
+Either way the result is an `IngestBatch` of row-aligned columns, checked
+with whole-array operations and sorted by (tag row, timestamp) so that
+each tag's run can be appended to history as one slice.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import struct
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Sequence
+
+import numpy as np
+
+from .history_store import to_ns
+from .sensor_registry import DEFAULT_SITE, SensorArray
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl")
+FRAMES_MEDIA_TYPE = "application/vnd.aquaview.frames"
+
+FRAME_MAGIC = b"AQVF"
+FRAME_VERSION = 1
+_FRAME_HEADER = struct.Struct("<4sHHI")
+_TAG_LENGTH = struct.Struct("<H")
+SAMPLE_DTYPE = np.dtype([("tag", "<u2"), ("ts", "<i8"), ("value", "<f8")])   # packed, 18 bytes
+
+MAX_CLOCK_SKEW_NS = 60 * 1_000_000_000   # samples further ahead of the server clock are rejected
+_MAX_EPOCH_S = 9e9                        # int64 epoch-ns range, in seconds
+
+
+@dataclass(frozen=True)
+class IngestBatch:
+    """Samples as parallel columns; `rows` index the `SensorArray`."""
+    rows: np.ndarray     # intp
+    ts_ns: np.ndarray    # int64 epoch ns
+    values: np.ndarray   # float64
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+
+# ── NDJSON ──────────────────────────────────────────────────────────
+
+def _epoch_ns(raw, now_ns: int) -> int:
+    if raw is None:
+        return now_ns
+    if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+        if math.isfinite(raw) and abs(raw) < _MAX_EPOCH_S:
+            return round(raw * 1e9)
+    if isinstance(raw, str):
+        try:
+            ts = datetime.fromisoformat(raw)
+        except ValueError:
+            pass
+        else:
+            ns = to_ns(ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc))
+            if abs(ns) < _MAX_EPOCH_S * 1_000_000_000:
+                return ns
+    raise ValueError(f"invalid timestamp: {raw!r} (ISO 8601 or epoch seconds)")
+
+
+def parse_ndjson(body: bytes, sensors: SensorArray, now_ns: int) -> IngestBatch:
+    """Decode newline-delimited JSON samples. Raises ValueError."""
+    lines = [line for line in body.split(b"\n") if line.strip()]
+    records = json.loads(b"[" + b",".join(lines) + b"]")
+    index = sensors.index
+    try:
+        rows = [index.get((r.get("site", DEFAULT_SITE), r.get("sensor")), -1) for r in records]
+        values = [r.get("value") for r in records]
+        stamps = [r.get("timestamp") for r in records]
+        # Gateways send whole scans, so timestamps repeat: parse each distinct one once
+        parsed = {raw: _epoch_ns(raw, now_ns) for raw in set(stamps)}
+    except (AttributeError, TypeError):
+        raise ValueError("each line must be a JSON object with scalar site, sensor and timestamp") from None
+    rows = np.array(rows, dtype=np.intp)
+    unknown = np.flatnonzero(rows < 0)
+    if len(unknown):
+        r = records[unknown[0]]
+        raise ValueError(
+            f"line {unknown[0] + 1}: unknown sensor {r.get('site', DEFAULT_SITE)}/{r.get('sensor')}"
+            f" ({len(unknown)} unknown in batch)"
+        )
+    # np.array would coerce "7.1" and true; only JSON numbers are readings
+    if any(isinstance(v, (bool, str)) for v in values):
+        raise ValueError("values must be numbers")
+    try:
+        values = np.array(values, dtype=np.float64)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("values must be numbers") from None
+    ts_ns = np.fromiter((parsed[raw] for raw in stamps), dtype=np.int64, count=len(stamps))
+    return IngestBatch(rows=rows, ts_ns=ts_ns, values=values)
+
+
+# ── Packed frames ───────────────────────────────────────────────────
+
+def parse_frames(body: bytes, sensors: SensorArray) -> IngestBatch:
+    """Decode concatenated binary frames (see module docstring). Raises ValueError."""
+    view = memoryview(body)
+    keys = sensors.key_rows
+    rows, ts, values = [], [], []
+    offset = 0
+    while offset < len(view):
+        if len(view) - offset < _FRAME_HEADER.size:
+            raise ValueError(f"truncated frame header at byte {offset}")
+        magic, version, n_tags, n_samples = _FRAME_HEADER.unpack_from(view, offset)
+        if magic != FRAME_MAGIC or version != FRAME_VERSION:
+            raise ValueError(f"not an AQVF v{FRAME_VERSION} frame at byte {offset}")
+        offset += _FRAME_HEADER.size
+        table = np.empty(n_tags, dtype=np.intp)
+        for t in range(n_tags):
+            if len(view) - offset < _TAG_LENGTH.size:
+                raise ValueError(f"truncated tag table at byte {offset}")
+            (length,) = _TAG_LENGTH.unpack_from(view, offset)
+            offset += _TAG_LENGTH.size
+            key = bytes(view[offset:offset + length]).decode("utf-8", errors="replace")
+            offset += length
+            if key not in keys:
+                raise ValueError(f"unknown sensor {key}")
+            table[t] = keys[key]
+        size = n_samples * SAMPLE_DTYPE.itemsize
+        if len(view) - offset < size:
+            raise ValueError(f"frame at byte {offset} declares {n_samples} samples but is truncated")
+        samples = np.frombuffer(view, dtype=SAMPLE_DTYPE, count=n_samples, offset=offset)
+        offset += size
+        if n_samples and samples["tag"].max() >= n_tags:
+            raise ValueError(f"tag index out of range (frame has {n_tags} tags)")
+        rows.append(table[samples["tag"]])
+        ts.append(samples["ts"].astype(np.int64))
+        values.append(samples["value"].astype(np.float64))
+    if not rows:
+        return IngestBatch(
+            rows=np.empty(0, dtype=np.intp), ts_ns=np.empty(0, dtype=np.int64), values=np.empty(0)
+        )
+    return IngestBatch(rows=np.concatenate(rows), ts_ns=np.concatenate(ts), values=np.concatenate(values))
+
+
+def encode_frame(keys: Sequence[str], tags: np.ndarray, ts_ns: np.ndarray, values: np.ndarray) -> bytes:
+    """One packed frame; `tags[j]` indexes `keys` (gateway side, benchmarks)."""
+    table = b"".join(_TAG_LENGTH.pack(len(k.encode())) + k.encode() for k in keys)
+    samples = np.empty(len(tags), dtype=SAMPLE_DTYPE)
+    samples["tag"], samples["ts"], samples["value"] = tags, ts_ns, values
+    header = _FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, len(keys), len(tags))
+    return header + table + samples.tobytes()
+
+
+# ── Validation ──────────────────────────────────────────────────────
+
+def validate_batch(batch: IngestBatch, now_ns: int) -> IngestBatch:
+    """
+    Reject non-finite values and timestamps outside [epoch, now + skew],
+    then sort by (row, timestamp). Raises ValueError.
+    """
+    bad = np.flatnonzero(~np.isfinite(batch.values))
+    if len(bad):
+        raise ValueError(f"sample {bad[0] + 1}: missing or non-finite value ({len(bad)} in batch)")
+    bad = np.flatnonzero((batch.ts_ns < 0) | (batch.ts_ns > now_ns + MAX_CLOCK_SKEW_NS))
+    if len(bad):
+        raise ValueError(
+            f"sample {bad[0] + 1}: timestamp before 1970 or more than"
+            f" {MAX_CLOCK_SKEW_NS // 1_000_000_000} s ahead of the server clock ({len(bad)} in batch)"
+        )
+    order = np.lexsort((batch.ts_ns, batch.rows))
+    return IngestBatch(rows=batch.rows[order], ts_ns=batch.ts_ns[order], values=batch.values[order])
+
+
+def parse_batch(body: bytes, media_type: str, sensors: SensorArray, now_ns: int) -> IngestBatch:
+    """Decode and validate a request body. Raises LookupError for an unsupported media type."""
+    if media_type in NDJSON_MEDIA_TYPES:
+        batch = parse_ndjson(body, sensors, now_ns)
+    elif media_type == FRAMES_MEDIA_TYPE:
+        batch = parse_frames(body, sensors)
+    else:
+        raise LookupError(
+            f"unsupported content type {media_type!r}"
+            f" (expected {NDJSON_MEDIA_TYPES[0]} or {FRAMES_MEDIA_TYPE})"
+        )
+    return validate_batch(batch, now_ns)
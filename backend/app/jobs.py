@@ -0,0 +1,281 @@
+"""
+Background jobs for CPU-heavy pipeline work.
+
+Large sweeps, optimizations and Monte Carlo runs are planned into
+picklable chunks and executed on one bounded `ProcessPoolExecutor`, so
+they never hold the GIL of the process serving the API. Each job is an
+asyncio task on the event loop that keeps at most `max_workers` of its
+chunks in flight (jobs submitted later still get pool slots), counts
+finished chunks as progress, and merges chunk results in a thread.
+
+Finished jobs keep their serialized result until `ttl` seconds after
+completion. Cancelling a job drops its queued chunks; chunks already
+running in a worker finish and are discarded.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from .config import JOBS_MAX_ACTIVE, JOBS_MAX_WORKERS, JOBS_RESULT_TTL
+from .http_cache import SerializedBody
+from .models import JobKind, JobRequest, JobState, JobStatus
+from .optimizer import optimize, optimize_response, request_arrays
+from .pipeline_batch import (
+    CHUNK_ROWS,
+    evaluate_batch,
+    merge_results,
+    request_ratios,
+    to_columns,
+    validate_ratios,
+)
+from .pipeline_uncertainty import merge_uncertainty, plan_uncertainty, run_chunk, uncertainty_response
+from .stage_registry import train_registry
+
+logger = logging.getLogger(__name__)
+
+BATCH_JOB_CHUNK_ROWS = 8 * CHUNK_ROWS   # rows per worker task
+
+
+@dataclass
+class JobPlan:
+    """Chunks to run in the pool (`fn(*args)` each) and how to merge their results."""
+    tasks: list[tuple[Callable, tuple]]
+    merge: Callable[[list[Any]], SerializedBody]
+
+
+@dataclass(eq=False)
+class Job:
+    id: str
+    kind: JobKind
+    plan: JobPlan | None          # released once the job finishes
+    total: int                    # chunks
+    state: JobState = JobState.QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    done: int = 0
+    error: str | None = None
+    result: SerializedBody | None = None
+    task: asyncio.Task | None = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def finished(self) -> bool:
+        return self.finished_at is not None
+
+
+def _utc(ts: float | None) -> datetime | None:
+    return datetime.fromtimestamp(ts, timezone.utc) if ts is not None else None
+
+
+# ── Plans per job kind ──────────────────────────────────────────────
+
+def _batch_plan(request: JobRequest) -> JobPlan:
+    body = request.batch
+    train = train_registry.get(body.train)
+    ratios = validate_ratios(request_ratios(body), len(train))
+    chunks = [ratios[lo:lo + BATCH_JOB_CHUNK_ROWS] for lo in range(0, len(ratios), BATCH_JOB_CHUNK_ROWS)]
+
+    def merge(parts: list) -> SerializedBody:
+        columns = to_columns(merge_results(parts), body.include_stages)
+        return SerializedBody(json.dumps(columns).encode())
+
+    return JobPlan(
+        tasks=[(evaluate_batch, (chunk, True, False, CHUNK_ROWS, train.name)) for chunk in chunks],
+        merge=merge,
+    )
+
+
+def _optimize_plan(request: JobRequest) -> JobPlan:
+    body = request.optimize
+    bounds, weights = request_arrays(body)
+    args = (bounds, weights, body.time_budget_ms / 1000, body.max_front_points, body.train)
+    # Coarse-to-fine search is sequential: one task
+    return JobPlan(
+        tasks=[(optimize, args)],
+        merge=lambda outcomes: SerializedBody.from_model(optimize_response(outcomes[0])),
+    )
+
+
+def _uncertainty_plan(request: JobRequest, workers: int) -> JobPlan:
+    body = request.uncertainty
+    plan = plan_uncertainty(
+        train_registry.get(body.train).ratio_vector(body.hrt_ratios),
+        influent=body.influent,
+        curve_spread=body.curve_spread,
+        realizations=body.realizations,
+        seed=body.seed,
+        percentiles=body.percentiles,
+        train=body.train,
+    )
+    return JobPlan(
+        tasks=[(run_chunk, args) for args in plan.chunks],
+        merge=lambda chunks: SerializedBody.from_model(
+            uncertainty_response(merge_uncertainty(plan, chunks), workers)
+        ),
+    )
+
+
+# ── Manager ─────────────────────────────────────────────────────────
+
+class JobManager:
+    """Owns the worker pool and the job table. Jobs are managed from the event loop."""
+
+    def __init__(self, max_workers: int, max_active: int, ttl: float) -> None:
+        if max_workers < 1 or max_active < 1:
+            raise ValueError("max workers and max active jobs must be at least 1")
+        self.max_workers = max_workers
+        self.max_active = max_active
+        self.ttl = ttl
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+        self._jobs: dict[str, Job] = {}
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        """Shared worker pool, started on first use."""
+        with self._pool_lock:   # also used from threadpool endpoints
+            if self._pool is None:
+                # spawn: forking a process that runs threads can copy held locks
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool
+
+    def _discard_pool(self) -> None:
+        # On shutdown, or after a worker died (later jobs get a fresh pool)
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    @property
+    def active(self) -> int:
+        return sum(not job.finished for job in self._jobs.values())
+
+    def plan(self, request: JobRequest) -> JobPlan:
+        """
+        Split a request into pool tasks. Raises ValueError for invalid
+        parameters, KeyError for an unknown train.
+        """
+        if request.kind is JobKind.BATCH:
+            return _batch_plan(request)
+        if request.kind is JobKind.OPTIMIZE:
+            return _optimize_plan(request)
+        return _uncertainty_plan(request, min(request.uncertainty.workers, self.max_workers))
+
+    def submit(self, kind: JobKind, plan: JobPlan) -> Job:
+        """Start a job. Raises OverflowError when `max_active` jobs are unfinished."""
+        self._evict()
+        if self.active >= self.max_active:
+            raise OverflowError(f"{self.max_active} jobs are already queued or running")
+        job = Job(id=uuid.uuid4().hex, kind=kind, plan=plan, total=len(plan.tasks))
+        self._jobs[job.id] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        return job
+
+    def get(self, job_id: str) -> Job:
+        """Raises KeyError for unknown or expired jobs."""
+        self._evict()
+        try:
+            return self._jobs[job_id]
+        except KeyError:
+            raise KeyError(f"unknown job: {job_id}") from None
+
+    def jobs(self) -> list[Job]:
+        self._evict()
+        return list(self._jobs.values())
+
+    def cancel(self, job_id: str) -> Job:
+        """Cancel a queued or running job (no-op once finished)."""
+        job = self.get(job_id)
+        if not job.finished and job.task is not None:
+            job.task.cancel()
+            if job.state is JobState.QUEUED:
+                # The task never started, so `_run` won't record the outcome
+                job.state, job.plan, job.finished_at = JobState.CANCELLED, None, time.time()
+                self._notify(job)
+        return job
+
+    def status(self, job: Job) -> JobStatus:
+        return JobStatus(
+            id=job.id,
+            kind=job.kind,
+            state=job.state,
+            progress=round(job.done / job.total, 4) if job.total else 1.0,
+            chunks_done=job.done,
+            chunks_total=job.total,
+            created_at=_utc(job.created_at),
+            started_at=_utc(job.started_at),
+            finished_at=_utc(job.finished_at),
+            expires_at=_utc(job.finished_at + self.ttl) if job.finished else None,
+            error=job.error,
+        )
+
+    async def shutdown(self) -> None:
+        for job in list(self._jobs.values()):
+            if job.task is not None and not job.finished:
+                job.task.cancel()
+                await asyncio.gather(job.task, return_exceptions=True)
+        self._discard_pool()
+
+    def _notify(self, job: Job) -> None:
+        # Wake current waiters; later waiters wait for the next change
+        job.changed.set()
+        job.changed = asyncio.Event()
+
+    def _evict(self) -> None:
+        now = time.time()
+        expired = [j.id for j in self._jobs.values() if j.finished and j.finished_at + self.ttl < now]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _run(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        plan = job.plan
+        results: list[Any] = [None] * job.total
+        queued = list(enumerate(plan.tasks))[::-1]
+        in_flight: dict[asyncio.Future, int] = {}
+        job.state, job.started_at = JobState.RUNNING, time.time()
+        self._notify(job)
+        try:
+            while queued or in_flight:
+                while queued and len(in_flight) < self.max_workers:
+                    index, (fn, args) = queued.pop()
+                    in_flight[loop.run_in_executor(self.pool, fn, *args)] = index
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    results[in_flight.pop(future)] = future.result()
+                    job.done += 1
+                self._notify(job)
+            job.result = await asyncio.to_thread(plan.merge, results)
+            job.state = JobState.SUCCEEDED
+        except asyncio.CancelledError:
+            job.state = JobState.CANCELLED
+        except Exception as e:
+            logger.exception("job %s failed", job.id)
+            if isinstance(e, BrokenProcessPool):
+                self._discard_pool()
+            job.state, job.error = JobState.FAILED, f"{type(e).__name__}: {e}"
+        finally:
+            for future in in_flight:
+                future.cancel()
+            job.plan = None
+            job.finished_at = time.time()
+            self._notify(job)
+
+
+# ── Singleton instance ──────────────────────────────────────────────
+job_manager = JobManager(JOBS_MAX_WORKERS, JOBS_MAX_ACTIVE, JOBS_RESULT_TTL)
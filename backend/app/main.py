@@ -1,15 +1,145 @@
 """AquaView — Water Treatment Process Monitoring API."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from .acquisition import acquisition
+from .config import BUS_READER, RECORD_PATH, REPLAY_PATH, SIMULATE, SNAPSHOT_BUS, SNAPSHOT_BUS_SLOTS
+from .http_cache import SerializedBody
+from .jobs import job_manager
+from .metrics import MetricsMiddleware, TimedRoute, registry
+from .pipeline_cache import pipeline_cache
+from .pipeline_dynamic import dynamic_pipeline
+from .replay import SessionRecorder
+from .snapshot_bus import SnapshotBus
+from .routers import admin, alerts, history, ingest, jobs, pipeline, replay, sensors, stream
+from .stream import hub
+
+# Every tick is serialized once and fanned out to stream subscribers
+acquisition.add_listener(hub.publish_snapshot)
+
+
+def _advance_dynamics(snapshot) -> None:
+    # One plant step per tick; the stream carries the per-stage trajectories
+    dynamic_pipeline.advance(snapshot)
+    hub.publish_json("dynamics", dynamic_pipeline.payload.text)
+    if bus is not None:
+        bus.dynamics.write(dynamic_pipeline.payload.body)
+
+
+_dynamics_version = 0
+
+
+def _follow_dynamics(snapshot) -> None:
+    # Readers take the producer's plant state instead of stepping their own
+    global _dynamics_version
+    _dynamics_version, body = acquisition.bus.dynamics.read(_dynamics_version)
+    if body is not None:
+        dynamic_pipeline.payload = SerializedBody(body)
+        hub.publish_json("dynamics", dynamic_pipeline.payload.text)
+
+
+# Multi-process: the producer publishes every snapshot to shared memory,
+# readers follow it (see snapshot_bus.py)
+bus = SnapshotBus.create(SNAPSHOT_BUS, acquisition.simulator.sensors, SNAPSHOT_BUS_SLOTS) if (
+    SNAPSHOT_BUS and not BUS_READER
+) else None
+if bus is not None:
+    acquisition.add_listener(bus.publish)
+acquisition.add_listener(_follow_dynamics if BUS_READER else _advance_dynamics)
+
+# Every published snapshot (ticks, ingest batches) is appended to the recording
+recorder = (
+    SessionRecorder(RECORD_PATH, acquisition.simulator.sensors.keys) if RECORD_PATH and not BUS_READER else None
+)
+if recorder is not None:
+    acquisition.add_listener(recorder.record)
+
+# ── Scrape-time gauges ──────────────────────────────────────────────
+registry.gauge("aquaview_ticks_total", "Simulator ticks since start", lambda: acquisition.ticks, kind="counter")
+registry.gauge(
+    "aquaview_ticks_missed_total", "Sample slots skipped while behind", lambda: acquisition.missed, kind="counter"
+)
+registry.gauge(
+    "aquaview_ingest_samples_total",
+    "Ingested samples by outcome",
+    lambda: {("accepted",): acquisition.simulator.ingested, ("stale",): acquisition.simulator.stale},
+    ("outcome",),
+    kind="counter",
+)
+if recorder is not None:
+    registry.gauge(
+        "aquaview_recorded_snapshots_total", "Snapshots appended to the recording", lambda: recorder.records,
+        kind="counter",
+    )
+if BUS_READER:
+    registry.gauge(
+        "aquaview_bus_skipped_total",
+        "Bus snapshots overwritten before this reader saw them",
+        lambda: acquisition.bus.skipped if acquisition.bus is not None else 0,
+        kind="counter",
+    )
+registry.gauge("aquaview_tick_lag_last_seconds", "Lag of the most recent tick", lambda: acquisition.lag)
+registry.gauge("aquaview_stream_subscribers", "Connected stream clients", lambda: hub.subscriber_count)
+registry.gauge("aquaview_jobs_active", "Background jobs queued or running", lambda: job_manager.active)
+registry.gauge(
+    "aquaview_pipeline_cache_events_total",
+    "Pipeline result cache lookups by outcome",
+    lambda: {(k,): v for k, v in pipeline_cache.stats().items() if k in ("hits", "misses", "evictions")},
+    ("event",),
+    kind="counter",
+)
+
+
+def _history_sizes() -> dict[tuple[str, ...], float]:
+    # Totals rather than one series per tag, to keep cardinality bounded
+    history = acquisition.simulator.history
+    rollups = acquisition.simulator.rollups.sizes()
+    return {
+        ("keys",): len(rollups),
+        ("samples",): history.total(),
+        ("rollup_buckets",): sum(sum(levels) for levels in rollups.values()),
+    }
+
+
+registry.gauge("aquaview_history_size", "Sensor history store size", _history_sizes, ("kind",))
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    hub.publish_snapshot(acquisition.simulator.snapshot)
+    hub.publish_json("pipeline", pipeline_cache.default.payload.text, binary=pipeline_cache.default.wire.body)
+    hub.publish_json("dynamics", dynamic_pipeline.payload.text)
+    # Sensor ticks run on a fixed sample clock, independent of request rate;
+    # without the simulator, snapshots come only from POST /api/ingest
+    if BUS_READER:
+        acquisition.follow(SNAPSHOT_BUS)
+    elif SIMULATE or REPLAY_PATH:
+        acquisition.start()
+    if bus is not None:
+        # Readers get the current state before the first tick or ingest batch
+        bus.publish(acquisition.simulator.snapshot)
+        bus.dynamics.write(dynamic_pipeline.payload.body)
+    yield
+    await acquisition.stop()
+    await job_manager.shutdown()
+    acquisition.simulator.history.close()
+    if recorder is not None:
+        recorder.close()
+    if bus is not None:
+        bus.close()
 
-from .routers import alerts, history, pipeline, sensors
 
 app = FastAPI(
     title="AquaView API",
     description="수처리 공정 모니터링 시스템 REST API",
     version="0.1.0",
+    lifespan=lifespan,
 )
+app.router.route_class = TimedRoute
 
 # CORS — React dev server (3000/5173) + Unity WebGL
 app.add_middleware(
@@ -19,14 +149,26 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Register routers
 app.include_router(sensors.router, prefix="/api", tags=["sensors"])
 app.include_router(alerts.router, prefix="/api", tags=["alerts"])
 app.include_router(history.router, prefix="/api", tags=["history"])
+app.include_router(ingest.router, prefix="/api", tags=["ingest"])
 app.include_router(pipeline.router, prefix="/api", tags=["pipeline"])
+app.include_router(stream.router, prefix="/api", tags=["stream"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
+app.include_router(replay.router, prefix="/api", tags=["replay"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
 
 
 @app.get("/")
 def root():
     return {"service": "AquaView API", "status": "running"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Prometheus text exposition of all AquaView metrics."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
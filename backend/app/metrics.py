@@ -0,0 +1,280 @@
+"""
+Prometheus-style metrics with no external dependency.
+
+Instruments are module-level objects updated on hot paths with a
+`time.perf_counter()` pair and one locked bucket increment. `/metrics`
+renders them in the Prometheus text exposition format (0.0.4), together
+with gauges that read their value from a callback at scrape time.
+
+HTTP timing is split into three histograms:
+
+- request: whole ASGI request, from the middleware's point of view
+- handler: the endpoint function only (`TimedRoute` wraps it)
+- serialize: handler return → response start, i.e. response-model
+  validation and JSON encoding done by FastAPI
+"""
+
+from __future__ import annotations
+
+import functools
+import inspect
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable
+
+from fastapi.routing import APIRoute
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+FAST_BUCKETS: tuple[float, ...] = (
+    0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, optionally labelled."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels → [per-bucket counts (+Inf last), sum]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][i] += 1
+            series[1] += value
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = [(k, list(counts), total) for k, (counts, total) in self._series.items()]
+        lines = []
+        for labels, counts, total in items:
+            running = 0
+            for bound, n in zip((*self.buckets, float("inf")), counts):
+                running += n
+                le = f'le="{_fmt(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {running}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_fmt(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {running}")
+        return lines
+
+
+class GaugeFunc:
+    """Gauge (or externally maintained counter) read from a callback at scrape time.
+
+    The callback returns a number, or a dict of label-value tuples → number.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        fn: Callable[[], float | dict[tuple[str, ...], float]],
+        labelnames: tuple[str, ...] = (),
+        kind: str = "gauge",
+    ) -> None:
+        self.name, self.help, self.fn, self.labelnames, self.kind = name, help, fn, labelnames, kind
+
+    def samples(self) -> list[str]:
+        value = self.fn()
+        if isinstance(value, dict):
+            return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in value.items()]
+        return [f"{self.name} {_fmt(value)}"]
+
+
+class Registry:
+    """Ordered collection of instruments rendered by `/metrics`."""
+
+    def __init__(self) -> None:
+        self._metrics: dict[str, Histogram | GaugeFunc] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, fn, labelnames: tuple[str, ...] = (), kind: str = "gauge") -> GaugeFunc:
+        return self.register(GaugeFunc(name, help, fn, labelnames, kind))
+
+    def render(self) -> str:
+        out = []
+        for metric in self._metrics.values():
+            out.append(f"# HELP {metric.name} {metric.help}")
+            out.append(f"# TYPE {metric.name} {metric.kind}")
+            out.extend(metric.samples())
+        return "\n".join(out) + "\n"
+
+
+# ── Instruments ─────────────────────────────────────────────────────
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "aquaview_http_request_duration_seconds",
+    "Whole HTTP request time (ASGI middleware)",
+    ("method", "route", "status"),
+)
+HTTP_HANDLER_SECONDS = registry.histogram(
+    "aquaview_http_handler_duration_seconds",
+    "Endpoint function time",
+    ("route",),
+)
+HTTP_SERIALIZE_SECONDS = registry.histogram(
+    "aquaview_http_serialize_duration_seconds",
+    "Handler return to response start (response validation + JSON encoding)",
+    ("route",),
+)
+PAYLOAD_SERIALIZE_SECONDS = registry.histogram(
+    "aquaview_payload_serialize_duration_seconds",
+    "Pre-serialized body encoding (once per snapshot / cached result)",
+    ("model",),
+    FAST_BUCKETS,
+)
+PIPELINE_STAGE_SECONDS = registry.histogram(
+    "aquaview_pipeline_stage_duration_seconds",
+    "run_pipeline compute time per stage",
+    ("stage",),
+    FAST_BUCKETS,
+)
+TICK_SECONDS = registry.histogram(
+    "aquaview_tick_duration_seconds",
+    "SensorSimulator.tick() time",
+)
+TICK_LAG_SECONDS = registry.histogram(
+    "aquaview_tick_lag_seconds",
+    "How late each tick started relative to the sample clock",
+)
+
+
+# ── HTTP instrumentation ────────────────────────────────────────────
+
+class _RequestTiming:
+    __slots__ = ("route", "handler_end")
+
+    def __init__(self) -> None:
+        self.route = "unmatched"
+        self.handler_end = 0.0
+
+
+# Mutated (not reassigned) from the endpoint, which may run in the threadpool
+_current: ContextVar[_RequestTiming | None] = ContextVar("aquaview_request_timing", default=None)
+
+
+def _handler_done(started: float) -> None:
+    ended = perf_counter()
+    timing = _current.get()
+    if timing is not None:
+        timing.handler_end = ended
+        HTTP_HANDLER_SECONDS.observe(ended - started, timing.route)
+
+
+def _timed_endpoint(endpoint: Callable) -> Callable:
+    if inspect.iscoroutinefunction(endpoint):
+        @functools.wraps(endpoint)
+        async def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                _handler_done(started)
+    else:
+        @functools.wraps(endpoint)
+        def timed(*args, **kwargs):
+            started = perf_counter()
+            try:
+                return endpoint(*args, **kwargs)
+            finally:
+                _handler_done(started)
+    timed.__aquaview_timed__ = True
+    return timed
+
+
+class TimedRoute(APIRoute):
+    """APIRoute that labels the request with its path template and times the endpoint."""
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs) -> None:
+        if not getattr(endpoint, "__aquaview_timed__", False):
+            endpoint = _timed_endpoint(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        route = self.path_format
+
+        async def labelled(request):
+            timing = _current.get()
+            if timing is not None:
+                timing.route = route
+            return await handler(request)
+
+        return labelled
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request, handler and serialize time."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = _RequestTiming()
+        token = _current.set(timing)
+        started = perf_counter()
+        status = 500
+
+        async def send_timed(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timing.handler_end:
+                    HTTP_SERIALIZE_SECONDS.observe(perf_counter() - timing.handler_end, timing.route)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            _current.reset(token)
+            HTTP_REQUEST_SECONDS.observe(
+                perf_counter() - started, scope["method"], timing.route, str(status)
+            )
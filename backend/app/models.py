@@ -4,7 +4,7 @@ from __future__ import annotations
 
 from datetime import datetime
 from enum import Enum
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
 
 class SensorStatus(str, Enum):
@@ -20,13 +20,29 @@ class SensorType(str, Enum):
     TEMP = "temp"
 
 
+class AnomalyKind(str, Enum):
+    DRIFT = "drift"
+    SPIKE = "spike"
+
+
+class SensorAnalytics(BaseModel):
+    """Online features of one tag (see app/anomaly.py)."""
+    ewma: float = Field(description="Fast exponentially weighted mean")
+    std: float = Field(description="Baseline standard deviation (weighted Welford)")
+    rate: float = Field(description="Change per second since the previous sample")
+    cusum: float = Field(description="CUSUM of standardized changes; negative when the downward side leads")
+    anomaly: AnomalyKind | None = None
+
+
 class SensorData(BaseModel):
     """Single sensor reading."""
-    sensor: SensorType
+    site: str
+    sensor: str = Field(description="Tag name within the site")
     value: float
     unit: str
     status: SensorStatus
     timestamp: datetime
+    analytics: SensorAnalytics | None = Field(None, description="Absent until the tag has a sample")
 
 
 class SensorResponse(BaseModel):
@@ -34,14 +50,68 @@ class SensorResponse(BaseModel):
     sensors: list[SensorData]
 
 
+class SiteInfo(BaseModel):
+    """One monitored site and its tags."""
+    site: str
+    tags: list[str]
+
+
+class SiteResponse(BaseModel):
+    """Response for GET /api/sites."""
+    sites: list[SiteInfo]
+
+
+class IngestResponse(BaseModel):
+    """Response for POST /api/ingest."""
+    received: int = Field(description="Samples in the request body")
+    accepted: int = Field(description="Samples appended to history")
+    stale: int = Field(description="Samples older than the newest stored sample of their tag (dropped)")
+    tags: int = Field(description="Distinct tags in the batch")
+    seq: int = Field(description="Snapshot sequence number after the batch")
+
+
+class ReplayControl(BaseModel):
+    """Body for POST /api/replay (omitted fields stay unchanged)."""
+    speed: float | None = Field(None, ge=1, le=1000, description="Recorded seconds per wall-clock second")
+    paused: bool | None = None
+    seek: datetime | None = Field(None, description="Continue from the first record at or after this time")
+
+
+class ReplayStatus(BaseModel):
+    """Response for GET/POST /api/replay."""
+    path: str
+    tags: int
+    records: int
+    start: datetime
+    end: datetime
+    position: datetime = Field(description="Recorded time reached by playback")
+    records_played: int
+    speed: float
+    paused: bool
+    finished: bool
+
+
+class AlertState(str, Enum):
+    OPEN = "open"
+    ACKNOWLEDGED = "acknowledged"
+    CLEARED = "cleared"
+
+
 class Alert(BaseModel):
     """An alert for a sensor in warning/danger state."""
-    sensor: SensorType
+    id: int
+    state: AlertState
+    site: str
+    sensor: str = Field(description="Tag name within the site")
     value: float
     unit: str
     status: SensorStatus
     message: str
-    timestamp: datetime
+    anomaly: AnomalyKind | None = Field(
+        None, description="Set when the anomaly detector, not the bands, caused the latest level change"
+    )
+    opened_at: datetime
+    timestamp: datetime = Field(description="Time of the latest lifecycle change")
 
 
 class AlertResponse(BaseModel):
@@ -49,6 +119,28 @@ class AlertResponse(BaseModel):
     alerts: list[Alert]
 
 
+class AlertEventKind(str, Enum):
+    OPENED = "opened"
+    ESCALATED = "escalated"
+    DEESCALATED = "deescalated"
+    ACKNOWLEDGED = "acknowledged"
+    CLEARED = "cleared"
+
+
+class AlertLogEntry(BaseModel):
+    """One alert lifecycle change."""
+    cursor: int
+    kind: AlertEventKind
+    alert: Alert = Field(description="Alert state right after the change")
+
+
+class AlertLogResponse(BaseModel):
+    """Response for GET /api/alerts/log."""
+    events: list[AlertLogEntry]
+    cursor: int = Field(description="Pass as `since` to get only newer events")
+    truncated: bool = Field(description="Events after `since` were dropped from the bounded log")
+
+
 class HistoryEntry(BaseModel):
     """A single history data point."""
     value: float
@@ -58,7 +150,8 @@ class HistoryEntry(BaseModel):
 
 class HistoryResponse(BaseModel):
     """Response for GET /api/history."""
-    sensor: SensorType
+    site: str
+    sensor: str
     unit: str
     data: list[HistoryEntry]
 
@@ -72,6 +165,7 @@ class ProcessStage(str, Enum):
     SECONDARY_SETTLING = "secondary_settling"
     NITRIFICATION = "nitrification"
     DISINFECTION = "disinfection"
+    UV_DISINFECTION = "uv_disinfection"
 
 
 class WaterQuality(BaseModel):
@@ -88,7 +182,7 @@ class WaterQuality(BaseModel):
 
 class StageParams(BaseModel):
     """HRT parameter for a single process stage."""
-    stage: ProcessStage
+    stage: str = Field(description="Stage id within the train (e.g. 'aeration')")
     hrt_ratio: float = Field(
         default=1.0,
         ge=0.25,
@@ -99,7 +193,7 @@ class StageParams(BaseModel):
 
 class StageResult(BaseModel):
     """Result of a single process stage calculation."""
-    stage: ProcessStage
+    stage: str
     stage_name_ko: str
     hrt_ratio: float
     hrt_hours: float
@@ -112,12 +206,390 @@ class StageResult(BaseModel):
 class PipelineParams(BaseModel):
     """Request body for POST /api/pipeline/params."""
     params: list[StageParams]
+    train: str | None = Field(None, description="Treatment train (default: 'standard')")
 
 
 class PipelineResult(BaseModel):
     """Full pipeline calculation result."""
+    train: str
     raw_water: WaterQuality
     stages: list[StageResult]
     treated_water: WaterQuality
     overall_removal: dict[str, float]  # % removal for each metric
     overall_status: SensorStatus
+
+
+class TrainStage(BaseModel):
+    """One stage of a treatment train."""
+    stage: str
+    stage_name_ko: str
+    design_hrt_hours: float
+
+
+class TrainInfo(BaseModel):
+    """A named treatment train (stages in flow order)."""
+    name: str
+    stages: list[TrainStage]
+
+
+class TrainListResponse(BaseModel):
+    """Response for GET /api/pipeline/trains."""
+    default: str
+    trains: list[TrainInfo]
+
+
+class PipelineCacheStats(BaseModel):
+    """Response for GET /api/pipeline/cache."""
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class PipelineTableStats(BaseModel):
+    """Response for GET /api/pipeline/table (lookup-table mode)."""
+    enabled: bool
+    points: int | None = Field(None, description="Grid points per stage over HRT ratio 0.25–2.5")
+    step: float | None = Field(None, description="Grid spacing in HRT ratio")
+    max_error: dict[str, dict[str, float]] = Field(
+        default_factory=dict,
+        description="Per train and metric: largest |table − exact| of unrounded treated water found by the build check",
+    )
+
+
+class GridAxis(BaseModel):
+    """Evenly spaced HRT ratios for one stage of a grid sweep."""
+    start: float = Field(default=1.0, ge=0.25, le=2.5)
+    stop: float = Field(default=1.0, ge=0.25, le=2.5)
+    num: int = Field(default=1, ge=1, le=1000)
+
+
+class BatchRequest(BaseModel):
+    """
+    Request body for POST /api/pipeline/batch.
+
+    Either `params` (N vectors of HRT ratios, one per stage of the train
+    in order) or `grid` (per-stage axes; missing stages stay at 1.0) must
+    be given.
+    """
+    params: list[list[float]] | None = None
+    grid: dict[str, GridAxis] | None = None
+    train: str | None = Field(None, description="Treatment train (default: 'standard')")
+    include_stages: bool = Field(default=False, description="Add per-stage status columns")
+
+    @model_validator(mode="after")
+    def _one_source(self) -> "BatchRequest":
+        if (self.params is None) == (self.grid is None):
+            raise ValueError("exactly one of 'params' or 'grid' is required")
+        return self
+
+
+class BatchResponse(BaseModel):
+    """Columnar response for POST /api/pipeline/batch (row i across all columns)."""
+    count: int
+    train: str
+    stages: list[str]
+    hrt_ratios: dict[str, list[float]]
+    total_hrt_hours: list[float]
+    treated_water: dict[str, list[float]]
+    overall_status: list[SensorStatus]
+    stage_status: dict[str, list[SensorStatus]] | None = None
+
+
+class StageBounds(BaseModel):
+    """Allowed HRT ratio range for one stage during optimization."""
+    lo: float = Field(default=0.25, ge=0.25, le=2.5)
+    hi: float = Field(default=2.5, ge=0.25, le=2.5)
+
+
+class OptimizeRequest(BaseModel):
+    """Request body for POST /api/pipeline/optimize."""
+    bounds: dict[str, StageBounds] = Field(default_factory=dict)
+    weights: dict[str, float] = Field(
+        default_factory=dict,
+        description="Cost weight per stage (default 1.0); cost = Σ weight × design HRT × ratio",
+    )
+    time_budget_ms: int = Field(default=500, ge=10, le=10_000)
+    max_front_points: int = Field(default=25, ge=1, le=200)
+    train: str | None = Field(None, description="Treatment train (default: 'standard')")
+
+
+class ParetoPoint(BaseModel):
+    """One HRT setting on the cost vs. effluent margin trade-off."""
+    hrt_ratios: dict[str, float]
+    total_hrt_hours: float
+    cost: float
+    margin: float = Field(description="Smallest relative headroom below the effluent 'normal' standard")
+
+
+class OptimizeResponse(BaseModel):
+    """Response for POST /api/pipeline/optimize."""
+    train: str
+    feasible: bool
+    best: ParetoPoint | None
+    result: PipelineResult | None
+    pareto_front: list[ParetoPoint]
+    evaluations: int
+    rounds: int
+    elapsed_ms: float
+
+
+class DistributionKind(str, Enum):
+    UNIFORM = "uniform"
+    TRIANGULAR = "triangular"
+    NORMAL = "normal"
+    LOGNORMAL = "lognormal"
+
+
+class Distribution(BaseModel):
+    """
+    Sampling distribution of one uncertain input.
+
+    - uniform: low, high
+    - triangular: low, mode, high
+    - normal: mean, std (clipped to [low, high] when given, and to ≥ 0)
+    - lognormal: mean = median, std = standard deviation of log10(value)
+    """
+    kind: DistributionKind
+    low: float | None = None
+    high: float | None = None
+    mode: float | None = None
+    mean: float | None = None
+    std: float | None = Field(None, ge=0)
+
+    @model_validator(mode="after")
+    def _params(self) -> "Distribution":
+        required = {
+            DistributionKind.UNIFORM: ("low", "high"),
+            DistributionKind.TRIANGULAR: ("low", "mode", "high"),
+            DistributionKind.NORMAL: ("mean", "std"),
+            DistributionKind.LOGNORMAL: ("mean", "std"),
+        }[self.kind]
+        missing = [name for name in required if getattr(self, name) is None]
+        if missing:
+            raise ValueError(f"{self.kind.value} distribution requires {', '.join(missing)}")
+        if self.low is not None and self.high is not None and self.low > self.high:
+            raise ValueError("low must not exceed high")
+        if self.kind is DistributionKind.TRIANGULAR and not self.low <= self.mode <= self.high:
+            raise ValueError("mode must lie within [low, high]")
+        if self.kind is DistributionKind.LOGNORMAL and self.mean <= 0:
+            raise ValueError("lognormal median must be positive")
+        return self
+
+
+class UncertaintyRequest(BaseModel):
+    """Request body for POST /api/pipeline/uncertainty."""
+    hrt_ratios: dict[str, float] = Field(
+        default_factory=dict, description="Operating point; missing stages run at 1.0"
+    )
+    train: str | None = Field(None, description="Treatment train (default: 'standard')")
+    influent: dict[str, Distribution] = Field(
+        default_factory=dict,
+        description="Per-metric influent distributions, overriding the built-in typical ranges",
+    )
+    curve_spread: float = Field(
+        default=0.1, ge=0, le=0.5,
+        description="Relative standard deviation of removal-curve r_min, r_max and steepness",
+    )
+    realizations: int = Field(default=100_000, ge=1_000)
+    seed: int | None = Field(None, ge=0, description="Same seed → same result (random when omitted)")
+    percentiles: list[float] = Field(default=[5.0, 25.0, 50.0, 75.0, 95.0], min_length=1, max_length=20)
+    workers: int = Field(default=1, ge=1, description="Processes sharing the realizations")
+
+    @model_validator(mode="after")
+    def _check(self) -> "UncertaintyRequest":
+        if any(not 0.25 <= r <= 2.5 for r in self.hrt_ratios.values()):
+            raise ValueError("hrt ratios must be within 0.25–2.5")
+        if any(not 0 <= q <= 100 for q in self.percentiles):
+            raise ValueError("percentiles must be within 0–100")
+        unknown = set(self.influent) - set(WaterQuality.model_fields)
+        if unknown:
+            raise ValueError(f"unknown influent metric(s): {', '.join(sorted(unknown))}")
+        return self
+
+
+class ViolationProbability(BaseModel):
+    """Share of realizations whose treated water exceeds an effluent standard."""
+    normal: float = Field(description="P(value > 'normal' limit)")
+    warning: float = Field(description="P(value > 'warning' limit)")
+
+
+class UncertaintyResponse(BaseModel):
+    """Response for POST /api/pipeline/uncertainty (bands: metric → {"p5": …, "mean": …})."""
+    train: str
+    realizations: int
+    seed: int
+    workers: int
+    stages: dict[str, dict[str, dict[str, float]]]
+    treated_water: dict[str, dict[str, float]]
+    violation_probability: dict[str, ViolationProbability]
+    status_probability: dict[SensorStatus, float]
+    elapsed_ms: float
+
+
+class SensitivityRequest(BaseModel):
+    """Request body for POST /api/pipeline/sensitivity."""
+    hrt_ratios: dict[str, float] = Field(
+        default_factory=dict, description="Operating point; missing stages run at 1.0"
+    )
+    train: str | None = Field(None, description="Treatment train (default: 'standard')")
+
+    @model_validator(mode="after")
+    def _check(self) -> "SensitivityRequest":
+        if any(not 0.25 <= r <= 2.5 for r in self.hrt_ratios.values()):
+            raise ValueError("hrt ratios must be within 0.25–2.5")
+        return self
+
+
+class SensitivityResponse(BaseModel):
+    """Response for POST /api/pipeline/sensitivity (metric → {stage: value})."""
+    train: str
+    hrt_ratios: dict[str, float]
+    treated_water: dict[str, float] = Field(description="Unrounded model at the operating point")
+    jacobian: dict[str, dict[str, float]] = Field(description="∂metric / ∂hrt_ratio")
+    elasticity: dict[str, dict[str, float]] = Field(
+        description="(∂metric / metric) / (∂ratio / ratio); 0 where the metric is 0"
+    )
+    most_sensitive: dict[str, str] = Field(description="Stage with the largest |∂metric / ∂hrt_ratio|")
+
+
+class CompareRequest(BaseModel):
+    """Request body for POST /api/pipeline/compare."""
+    scenarios: dict[str, PipelineParams] = Field(description="Scenario name → stage params (and train)")
+    baseline: str | None = Field(None, description="Scenario the deltas refer to (default: the first)")
+
+    @model_validator(mode="after")
+    def _check(self) -> "CompareRequest":
+        if not self.scenarios:
+            raise ValueError("at least one scenario is required")
+        if self.baseline is not None and self.baseline not in self.scenarios:
+            raise ValueError(f"baseline {self.baseline!r} is not one of the scenarios")
+        return self
+
+
+class CompareResponse(BaseModel):
+    """Response for POST /api/pipeline/compare."""
+    baseline: str
+    scenarios: dict[str, PipelineResult]
+    deltas: dict[str, dict[str, float]] = Field(
+        description="Scenario → metric → treated water minus the baseline's"
+    )
+    stage_evaluations: int = Field(description="Stages computed; identical stage prefixes are computed once")
+
+
+class DynamicPipelineState(BaseModel):
+    """Response for GET /api/pipeline/dynamic (and the `dynamics` stream channel)."""
+    timestamp: datetime
+    site: str
+    flow: float = Field(description="Live inflow driving the HRTs (m³/h)")
+    temperature: float = Field(description="Live water temperature (°C)")
+    design_flow: float = Field(description="Flow at which every stage runs at design HRT (m³/h)")
+    pipeline: PipelineResult = Field(description="Current tank effluents; hrt_ratio = design flow / flow")
+
+
+class DynamicTrajectoryResponse(BaseModel):
+    """Columnar effluent history per stage (index i across all lists is one tick)."""
+    site: str
+    timestamps: list[datetime]
+    flow: list[float]
+    temperature: list[float]
+    stages: dict[str, dict[str, list[float]]] = Field(description="Stage id → metric → values")
+
+
+class JobKind(str, Enum):
+    BATCH = "batch"
+    OPTIMIZE = "optimize"
+    UNCERTAINTY = "uncertainty"
+
+
+class JobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+class JobRequest(BaseModel):
+    """Request body for POST /api/jobs; the field named by `kind` holds its parameters."""
+    kind: JobKind
+    batch: BatchRequest | None = None
+    optimize: OptimizeRequest | None = None
+    uncertainty: UncertaintyRequest | None = None
+
+    @model_validator(mode="after")
+    def _params(self) -> "JobRequest":
+        if self.kind is JobKind.BATCH and self.batch is None:
+            raise ValueError("'batch' parameters are required for a batch job")
+        if self.kind is JobKind.OPTIMIZE and self.optimize is None:
+            self.optimize = OptimizeRequest()
+        if self.kind is JobKind.UNCERTAINTY and self.uncertainty is None:
+            self.uncertainty = UncertaintyRequest()
+        return self
+
+
+class JobStatus(BaseModel):
+    """Response for POST /api/jobs and GET /api/jobs/{id}."""
+    id: str
+    kind: JobKind
+    state: JobState
+    progress: float = Field(description="Finished chunks / total chunks (0–1)")
+    chunks_done: int
+    chunks_total: int
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+    expires_at: datetime | None = Field(description="When a finished job and its result are dropped")
+    error: str | None
+
+
+class JobListResponse(BaseModel):
+    """Response for GET /api/jobs."""
+    jobs: list[JobStatus]
+
+
+class HistoryBucket(BaseModel):
+    """Aggregate of one time bucket of sensor history."""
+    timestamp: datetime = Field(description="Bucket start")
+    min: float
+    max: float
+    mean: float
+    last: float
+    count: int
+    status_counts: dict[SensorStatus, int]
+
+
+class HistoryAggregateResponse(BaseModel):
+    """Response for GET /api/history with a `bucket` parameter."""
+    site: str
+    sensor: str
+    unit: str
+    bucket_seconds: int
+    data: list[HistoryBucket]
+
+
+# ── Admin Models ─────────────────────────────────────────────────────
+
+
+class ProfilerRequest(BaseModel):
+    """Body for POST /api/admin/profiler."""
+    enabled: bool
+    interval_ms: float | None = Field(None, ge=1, le=1000, description="Sampling interval")
+    reset: bool = Field(False, description="Discard samples collected so far")
+
+
+class ProfileEntry(BaseModel):
+    """One frame in the profiler summary."""
+    function: str
+    self: int = Field(description="Samples with this frame on top of the stack")
+    total: int = Field(description="Samples with this frame anywhere on the stack")
+
+
+class ProfilerStatus(BaseModel):
+    """Response for GET/POST /api/admin/profiler."""
+    running: bool
+    interval_ms: float
+    samples: int
+    started_at: datetime | None
+    top: list[ProfileEntry]
@@ -0,0 +1,257 @@
+"""
+HRT optimizer — minimum total retention time that meets EFFLUENT_STANDARDS.
+
+Coarse-to-fine search on top of the vectorized batch engine: a full grid
+over the (bounded) ratio box, then repeated shrinking grids around the
+cheapest feasible points until the time budget runs out. A point is
+feasible when its treated water is NORMAL under `_assess_final_status`.
+
+Every evaluated point also feeds a Pareto front of weighted HRT cost vs.
+effluent margin (the smallest relative headroom below the "normal"
+standard across all regulated metrics).
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .models import OptimizeRequest, OptimizeResponse, ParetoPoint, StageParams
+from .pipeline import EFFLUENT_STANDARDS
+from .pipeline_batch import (
+    HRT_QUANTUM,
+    HRT_RATIO_MAX,
+    HRT_RATIO_MIN,
+    NORMAL,
+    BatchResult,
+    evaluate_batch,
+    grid_ratios,
+)
+from .stage_registry import Train, train_registry
+
+COARSE_LEVELS = 9     # grid points per stage in the first pass (9^5 ≈ 59k rows)
+REFINE_LEVELS = 5     # grid points per stage around each incumbent
+REFINE_SEEDS = 3      # incumbents refined per round
+SHRINK = 0.5          # search box shrink factor per round
+
+_STANDARD_NORMAL = {m: s["normal"] for m, s in EFFLUENT_STANDARDS.items()}
+# Lattice points are steps / _STEPS_PER_UNIT: dividing gives the float nearest
+# the decimal ratio (steps × HRT_QUANTUM can land just past a bound)
+_STEPS_PER_UNIT = round(1 / HRT_QUANTUM)
+
+
+@dataclass
+class _Evaluated:
+    """Accumulated (ratios, cost, margin, feasible) over all rounds."""
+    ratios: list[np.ndarray] = field(default_factory=list)
+    cost: list[np.ndarray] = field(default_factory=list)
+    margin: list[np.ndarray] = field(default_factory=list)
+    feasible: list[np.ndarray] = field(default_factory=list)
+
+    def add(self, ratios: np.ndarray, cost: np.ndarray, margin: np.ndarray, feasible: np.ndarray) -> None:
+        self.ratios.append(ratios)
+        self.cost.append(cost)
+        self.margin.append(margin)
+        self.feasible.append(feasible)
+
+    def merged(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            np.concatenate(self.ratios),
+            np.concatenate(self.cost),
+            np.concatenate(self.margin),
+            np.concatenate(self.feasible),
+        )
+
+
+@dataclass
+class OptimizeOutcome:
+    train: str
+    feasible: bool
+    best_ratios: np.ndarray | None
+    best_cost: float | None
+    best_margin: float | None
+    front_ratios: np.ndarray      # (K, stages), ascending cost
+    front_cost: np.ndarray
+    front_margin: np.ndarray
+    evaluations: int
+    rounds: int
+    elapsed: float
+
+
+def effluent_margin(result: BatchResult) -> np.ndarray:
+    """Smallest relative headroom below the 'normal' standard (≥ 0 ⇔ compliant)."""
+    margin = np.full(len(result), np.inf)
+    for metric, limit in _STANDARD_NORMAL.items():
+        np.minimum(margin, (limit - result.treated[metric]) / limit, out=margin)
+    return margin
+
+
+def _snap(ratios: np.ndarray, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+    """Snap to the cache lattice so run_pipeline reproduces results (`lo`, `hi` are on it)."""
+    snapped = np.round(ratios * _STEPS_PER_UNIT) / _STEPS_PER_UNIT
+    return np.unique(np.clip(snapped, lo, hi), axis=0)
+
+
+def _axes(lo: np.ndarray, hi: np.ndarray, levels: int) -> list[np.ndarray]:
+    return [np.linspace(a, b, levels) if b > a else np.array([a]) for a, b in zip(lo, hi)]
+
+
+def pareto_front(cost: np.ndarray, margin: np.ndarray) -> np.ndarray:
+    """Indices of points not dominated in (min cost, max margin), ascending cost."""
+    order = np.lexsort((-margin, cost))
+    running = np.maximum.accumulate(margin[order])
+    keep = np.empty(len(order), dtype=bool)
+    keep[:1] = True
+    keep[1:] = margin[order][1:] > running[:-1]
+    return order[keep]
+
+
+def optimize(
+    bounds: np.ndarray | None = None,
+    weights: np.ndarray | None = None,
+    time_budget: float = 0.5,
+    max_front_points: int = 25,
+    train: str | None = None,
+) -> OptimizeOutcome:
+    """
+    Search for the cheapest compliant HRT ratios of the named train (None → default).
+
+    bounds: (stages, 2) per-stage [lo, hi] in train order (default 0.25–2.5)
+    weights: (stages,) cost weight per stage; cost = Σ weight × design HRT × ratio
+    time_budget: seconds; refinement stops once it is exhausted (the coarse
+                 pass always completes)
+    """
+    started = time.perf_counter()
+    deadline = started + time_budget
+    compiled = train_registry.get(train)
+    stages = len(compiled)
+
+    if bounds is None:
+        bounds = np.tile([HRT_RATIO_MIN, HRT_RATIO_MAX], (stages, 1))
+    bounds = np.asarray(bounds, dtype=np.float64)
+    if bounds.shape != (stages, 2):
+        raise ValueError(f"bounds must be {stages} (lo, hi) pairs")
+    lo, hi = bounds.T
+    if np.any(lo > hi) or lo.min() < HRT_RATIO_MIN or hi.max() > HRT_RATIO_MAX:
+        raise ValueError(f"bounds must satisfy {HRT_RATIO_MIN} ≤ lo ≤ hi ≤ {HRT_RATIO_MAX}")
+    # Search the cache lattice only: bounds snap inward onto it, so every
+    # candidate is a point run_pipeline reproduces exactly
+    lo = np.ceil(lo * _STEPS_PER_UNIT - 1e-6) / _STEPS_PER_UNIT
+    hi = np.floor(hi * _STEPS_PER_UNIT + 1e-6) / _STEPS_PER_UNIT
+    if np.any(lo > hi):
+        raise ValueError(f"every bound range must contain a multiple of {HRT_QUANTUM}")
+    weights = np.ones(stages) if weights is None else np.asarray(weights, dtype=np.float64)
+    if weights.shape != (stages,) or np.any(weights < 0):
+        raise ValueError(f"weights must be {stages} non-negative numbers")
+    cost_vector = weights * compiled.design_hrt
+
+    seen = _Evaluated()
+
+    def evaluate(ratios: np.ndarray) -> None:
+        result = evaluate_batch(ratios, train=compiled.name)
+        feasible = result.overall_status == NORMAL
+        seen.add(ratios, ratios @ cost_vector, effluent_margin(result), feasible)
+
+    def incumbents() -> np.ndarray:
+        ratios, cost, _, feasible = seen.merged()
+        if not feasible.any():
+            return ratios[:0]
+        idx = np.flatnonzero(feasible)
+        best = idx[np.argsort(cost[idx], kind="stable")[:REFINE_SEEDS]]
+        return ratios[best]
+
+    evaluate(_snap(grid_ratios(_axes(lo, hi, COARSE_LEVELS)), lo, hi))
+
+    width = (hi - lo) / (COARSE_LEVELS - 1)
+    rounds = 0
+    while time.perf_counter() < deadline and width.max() >= HRT_QUANTUM:
+        seeds = incumbents()
+        if len(seeds) == 0:
+            break
+        candidates = [
+            grid_ratios(_axes(np.maximum(lo, s - width), np.minimum(hi, s + width), REFINE_LEVELS))
+            for s in seeds
+        ]
+        evaluate(_snap(np.concatenate(candidates), lo, hi))
+        width *= SHRINK
+        rounds += 1
+
+    ratios, cost, margin, feasible = seen.merged()
+    f_idx = np.flatnonzero(feasible)
+    front = f_idx[pareto_front(cost[f_idx], margin[f_idx])]
+    if len(front) > max_front_points:
+        front = front[np.linspace(0, len(front) - 1, max_front_points).round().astype(int)]
+
+    best = f_idx[np.argmin(cost[f_idx])] if len(f_idx) else None
+    return OptimizeOutcome(
+        train=compiled.name,
+        feasible=best is not None,
+        best_ratios=ratios[best] if best is not None else None,
+        best_cost=float(cost[best]) if best is not None else None,
+        best_margin=float(margin[best]) if best is not None else None,
+        front_ratios=ratios[front],
+        front_cost=cost[front],
+        front_margin=margin[front],
+        evaluations=len(ratios),
+        rounds=rounds,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+# ── API glue ────────────────────────────────────────────────────────
+
+def request_arrays(body: OptimizeRequest) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (bounds, weights) arrays in train order from an optimize request.
+    Raises KeyError for an unknown train, ValueError for foreign stages.
+    """
+    train = train_registry.get(body.train)
+    unknown = (set(body.bounds) | set(body.weights)) - set(train.stages)
+    if unknown:
+        raise ValueError(f"stage(s) not in train {train.name}: {', '.join(sorted(unknown))}")
+    bounds = np.array([
+        [b.lo, b.hi] if (b := body.bounds.get(stage)) else [HRT_RATIO_MIN, HRT_RATIO_MAX]
+        for stage in train.stages
+    ])
+    weights = np.array([body.weights.get(stage, 1.0) for stage in train.stages])
+    return bounds, weights
+
+
+def _pareto_point(train: Train, ratios: np.ndarray, cost: float, margin: float) -> ParetoPoint:
+    return ParetoPoint(
+        hrt_ratios={stage: round(float(r), 3) for stage, r in zip(train.stages, ratios)},
+        total_hrt_hours=round(float(ratios @ train.design_hrt), 3),
+        cost=round(cost, 3),
+        margin=round(margin, 4),
+    )
+
+
+def optimize_response(outcome: OptimizeOutcome) -> OptimizeResponse:
+    """API model of an outcome, with the full pipeline result of the best point."""
+    # Imported here: job-pool workers import this module, and the cache
+    # builds its pinned result (and lookup tables) on import
+    from .pipeline_cache import pipeline_cache
+
+    train = train_registry.get(outcome.train)
+    best = result = None
+    if outcome.feasible:
+        best = _pareto_point(train, outcome.best_ratios, outcome.best_cost, outcome.best_margin)
+        result = pipeline_cache.get(
+            [StageParams(stage=stage, hrt_ratio=ratio) for stage, ratio in best.hrt_ratios.items()],
+            train.name,
+        ).result
+    return OptimizeResponse(
+        train=train.name,
+        feasible=outcome.feasible,
+        best=best,
+        result=result,
+        pareto_front=[
+            _pareto_point(train, r, float(c), float(m))
+            for r, c, m in zip(outcome.front_ratios, outcome.front_cost, outcome.front_margin)
+        ],
+        evaluations=outcome.evaluations,
+        rounds=outcome.rounds,
+        elapsed_ms=round(outcome.elapsed * 1000, 1),
+    )
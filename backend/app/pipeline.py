@@ -6,51 +6,44 @@ Based on real municipal wastewater treatment data:
 - Typical HRT ranges from engineering references
 - Quantitative BOD/TSS/COD/NH3 removal curves
 
-Pipeline stages (in order):
+Default ("standard") train stages (in order):
   1. Primary Settling    (HRT 1–4h,   design 2h)
   2. Aeration            (HRT 3–12h,  design 6h)
   3. Secondary Settling  (HRT 0.75–3h, design 1.5h)
   4. Nitrification       (HRT 5–20h,  design 10h)
   5. Disinfection        (CT 0.25–1h, design 0.5h)
+
+Stage models and the other named trains are declared in
+`stage_registry`; every train runs through the same compiled kernel.
 """
 
 from __future__ import annotations
 
 import math
+from time import perf_counter
+from typing import TYPE_CHECKING
+
+import numpy as np
 
+from .metrics import PIPELINE_STAGE_SECONDS
 from .models import (
-    ProcessStage,
     SensorStatus,
     StageParams,
     StageResult,
     WaterQuality,
     PipelineResult,
 )
+from .stage_registry import METRICS, Train, train_registry
 
-# ── Design HRT (hours) per stage ────────────────────────────────────
-DESIGN_HRT: dict[ProcessStage, float] = {
-    ProcessStage.PRIMARY_SETTLING: 2.0,
-    ProcessStage.AERATION: 6.0,
-    ProcessStage.SECONDARY_SETTLING: 1.5,
-    ProcessStage.NITRIFICATION: 10.0,
-    ProcessStage.DISINFECTION: 0.5,
-}
+if TYPE_CHECKING:   # pipeline_table builds on the batch engine, which imports this module
+    from .pipeline_table import TransferTable
 
-STAGE_ORDER = [
-    ProcessStage.PRIMARY_SETTLING,
-    ProcessStage.AERATION,
-    ProcessStage.SECONDARY_SETTLING,
-    ProcessStage.NITRIFICATION,
-    ProcessStage.DISINFECTION,
-]
-
-STAGE_NAMES_KO: dict[ProcessStage, str] = {
-    ProcessStage.PRIMARY_SETTLING: "1차 침전",
-    ProcessStage.AERATION: "폭기조 (생물학적 처리)",
-    ProcessStage.SECONDARY_SETTLING: "2차 침전",
-    ProcessStage.NITRIFICATION: "질산화 (고도처리)",
-    ProcessStage.DISINFECTION: "소독",
-}
+# ── Default train (see stage_registry for all stage models) ─────────
+DEFAULT = train_registry.default
+
+STAGE_ORDER: list[str] = list(DEFAULT.stages)
+DESIGN_HRT: dict[str, float] = dict(zip(DEFAULT.stages, DEFAULT.design_hrt.tolist()))
+STAGE_NAMES_KO: dict[str, str] = dict(zip(DEFAULT.stages, DEFAULT.names_ko))
 
 # ── Raw wastewater (typical municipal influent) ──────────────────────
 # Source: EPA, WEF engineering references
@@ -65,6 +58,18 @@ RAW_WATER = WaterQuality(
     coliform=1_000_000.0,  # CFU/100mL (10^6, typical raw sewage)
 )
 
+# ── Removal curves per stage ─────────────────────────────────────────
+# metric → (r_min, r_max, steepness, midpoint) for `_sigmoid_removal`,
+# per stage of the default train. Log-reduction curves (disinfection
+# "coliform") give log10 reductions, not removal fractions.
+REMOVAL_CURVES: dict[str, dict[str, tuple[float, float, float, float]]] = {
+    stage: {
+        METRICS[DEFAULT.curve_metric[c]]: tuple(DEFAULT.curves[c].tolist())
+        for c in range(DEFAULT.curve_offsets[i], DEFAULT.curve_offsets[i + 1])
+    }
+    for i, stage in enumerate(DEFAULT.stages)
+}
+
 # ── Effluent quality standards (Korean & EPA secondary) ─────────────
 EFFLUENT_STANDARDS = {
     "bod": {"normal": 10.0, "warning": 20.0},       # mg/L
@@ -76,10 +81,6 @@ EFFLUENT_STANDARDS = {
 }
 
 
-def _clamp(value: float, lo: float, hi: float) -> float:
-    return max(lo, min(hi, value))
-
-
 def _sigmoid_removal(hrt_ratio: float, r_min: float, r_max: float,
                      steepness: float = 3.0, midpoint: float = 1.0) -> float:
     """
@@ -129,164 +130,6 @@ def _removal_efficiencies(influent: WaterQuality, effluent: WaterQuality) -> dic
     }
 
 
-# ── Stage calculation functions ──────────────────────────────────────
-
-def _calc_primary_settling(influent: WaterQuality, hrt_ratio: float) -> WaterQuality:
-    """
-    Primary Settling: gravity sedimentation of settleable solids.
-    Design HRT 2h → TSS 65%, BOD 45%, COD 35% removal
-    Range: HRT 1–4h (ratio 0.5–2.0)
-
-    References:
-    - TSS removal: 60–70% at 2h, max ~75%
-    - BOD removal: 40–50% at 2h (particulate fraction), max ~55%
-    """
-    tss_removal = _sigmoid_removal(hrt_ratio, r_min=0.35, r_max=0.78, steepness=2.5)
-    bod_removal = _sigmoid_removal(hrt_ratio, r_min=0.25, r_max=0.58, steepness=2.5)
-    cod_removal = _sigmoid_removal(hrt_ratio, r_min=0.20, r_max=0.45, steepness=2.5)
-    # Turbidity roughly tracks TSS
-    turb_removal = _sigmoid_removal(hrt_ratio, r_min=0.30, r_max=0.70, steepness=2.5)
-
-    return WaterQuality(
-        bod=round(influent.bod * (1 - bod_removal), 2),
-        tss=round(influent.tss * (1 - tss_removal), 2),
-        cod=round(influent.cod * (1 - cod_removal), 2),
-        ammonia=round(influent.ammonia * 0.98, 2),   # minimal NH3 change in settling
-        turbidity=round(influent.turbidity * (1 - turb_removal), 2),
-        ph=round(_clamp(influent.ph + 0.05, 6.0, 9.0), 2),
-        do_level=round(_clamp(influent.do_level + 0.2, 0.0, 4.0), 2),
-        coliform=round(influent.coliform * 0.85, 0),  # ~15% reduction
-    )
-
-
-def _calc_aeration(influent: WaterQuality, hrt_ratio: float) -> WaterQuality:
-    """
-    Aeration (Activated Sludge): biological oxidation of organics.
-    Design HRT 6h → BOD ~88%, COD ~78% removal
-    Range: HRT 3–12h (ratio 0.5–2.0)
-
-    References:
-    - HRT 3h  → BOD removal ~75%
-    - HRT 6h  → BOD removal ~88%
-    - HRT 12h → BOD removal ~95%
-    - COD: 6→78%, 12→94%
-    - DO rises to 2–4 mg/L with aeration
-    """
-    bod_removal = _sigmoid_removal(hrt_ratio, r_min=0.55, r_max=0.97, steepness=3.0)
-    cod_removal = _sigmoid_removal(hrt_ratio, r_min=0.45, r_max=0.92, steepness=3.0)
-    tss_removal = _sigmoid_removal(hrt_ratio, r_min=0.20, r_max=0.55, steepness=2.5)
-    # Partial nitrification in aeration at longer HRT
-    nh3_removal = _sigmoid_removal(hrt_ratio, r_min=0.05, r_max=0.40, steepness=2.0)
-    # DO increases with aeration
-    do_out = _clamp(2.0 + hrt_ratio * 0.8, 1.0, 5.0)
-
-    return WaterQuality(
-        bod=round(influent.bod * (1 - bod_removal), 2),
-        tss=round(influent.tss * (1 - tss_removal), 2),
-        cod=round(influent.cod * (1 - cod_removal), 2),
-        ammonia=round(influent.ammonia * (1 - nh3_removal), 2),
-        turbidity=round(influent.turbidity * 0.70, 2),  # biological floc traps turbidity
-        ph=round(_clamp(influent.ph - 0.1 * hrt_ratio, 6.5, 8.5), 2),
-        do_level=round(do_out, 2),
-        coliform=round(influent.coliform * 0.80, 0),  # ~20% reduction
-    )
-
-
-def _calc_secondary_settling(influent: WaterQuality, hrt_ratio: float) -> WaterQuality:
-    """
-    Secondary Settling: separates biological sludge from treated water.
-    Design HRT 1.5h → TSS ~80% cumulative
-    Range: HRT 0.75–3h (ratio 0.5–2.0)
-    """
-    tss_removal = _sigmoid_removal(hrt_ratio, r_min=0.50, r_max=0.88, steepness=3.0)
-    bod_removal = _sigmoid_removal(hrt_ratio, r_min=0.20, r_max=0.50, steepness=2.5)
-    turb_removal = _sigmoid_removal(hrt_ratio, r_min=0.40, r_max=0.80, steepness=3.0)
-
-    return WaterQuality(
-        bod=round(influent.bod * (1 - bod_removal), 2),
-        tss=round(influent.tss * (1 - tss_removal), 2),
-        cod=round(influent.cod * 0.85, 2),
-        ammonia=round(influent.ammonia * 0.97, 2),
-        turbidity=round(influent.turbidity * (1 - turb_removal), 2),
-        ph=round(_clamp(influent.ph, 6.5, 8.5), 2),
-        do_level=round(_clamp(influent.do_level - 0.3, 1.0, 5.0), 2),
-        coliform=round(influent.coliform * 0.70, 0),
-    )
-
-
-def _calc_nitrification(influent: WaterQuality, hrt_ratio: float) -> WaterQuality:
-    """
-    Nitrification: biological conversion of NH3 → NO3.
-    Design HRT 10h → NH3 removal ~90%
-    Range: HRT 5–20h (ratio 0.5–2.0)
-
-    Critical: nitrifiers are slow-growing; very short HRT → washout
-    - HRT 3h (ratio 0.3): ~38% removal (washout risk)
-    - HRT 6h (ratio 0.6): ~80% removal
-    - HRT 10h (ratio 1.0): ~90% removal
-    - HRT 15h (ratio 1.5): ~95% removal
-    References: Wang et al. 2020 (Water 12, 650)
-    """
-    # Steep sigmoid: very sensitive to low HRT (nitrifier washout)
-    nh3_removal = _sigmoid_removal(hrt_ratio, r_min=0.10, r_max=0.97, steepness=4.5, midpoint=0.8)
-    # pH drops slightly during nitrification (acid produced)
-    ph_drop = 0.3 * nh3_removal
-    # DO consumed by nitrification
-    do_out = _clamp(influent.do_level - 1.0 * nh3_removal + 1.5, 1.0, 5.0)
-
-    return WaterQuality(
-        bod=round(influent.bod * 0.90, 2),   # small additional BOD reduction
-        tss=round(influent.tss * 0.92, 2),
-        cod=round(influent.cod * 0.88, 2),
-        ammonia=round(influent.ammonia * (1 - nh3_removal), 3),
-        turbidity=round(influent.turbidity * 0.85, 2),
-        ph=round(_clamp(influent.ph - ph_drop, 6.0, 8.5), 2),
-        do_level=round(do_out, 2),
-        coliform=round(influent.coliform * 0.60, 0),
-    )
-
-
-def _calc_disinfection(influent: WaterQuality, hrt_ratio: float) -> WaterQuality:
-    """
-    Disinfection: chlorination CT-based pathogen removal.
-    Design HRT 0.5h (30 min contact time) → coliform reduction 99.99%
-    Range: 0.25–1h (ratio 0.5–2.0)
-    CT = chlorine conc (5 mg/L) × time (min)
-
-    - CT low (ratio 0.5, ~15 min): ~3 log reduction (99.9%)
-    - CT design (ratio 1.0, ~30 min): ~4 log reduction (99.99%)
-    - CT high (ratio 2.0, ~60 min): ~5 log reduction (99.999%)
-    """
-    # log reduction of coliform (CT-based)
-    log_reduction = _sigmoid_removal(hrt_ratio, r_min=2.0, r_max=5.5, steepness=3.0)
-    coliform_out = max(1.0, influent.coliform / (10 ** log_reduction))
-
-    # Turbidity: filtration before disinfection achieves <2 NTU target
-    turb_removal = _sigmoid_removal(hrt_ratio, r_min=0.50, r_max=0.97, steepness=3.0)
-    # Residual chlorine raises pH slightly
-    ph_out = _clamp(influent.ph + 0.1, 6.5, 8.5)
-
-    return WaterQuality(
-        bod=round(influent.bod * 0.85, 2),   # some BOD from sand filter
-        tss=round(influent.tss * 0.80, 2),   # tertiary filtration
-        cod=round(influent.cod * 0.85, 2),
-        ammonia=round(influent.ammonia * 0.95, 3),
-        turbidity=round(influent.turbidity * (1 - turb_removal), 2),
-        ph=round(ph_out, 2),
-        do_level=round(_clamp(influent.do_level + 0.5, 3.0, 8.0), 2),
-        coliform=round(coliform_out, 1),
-    )
-
-
-_CALC_FUNCTIONS = {
-    ProcessStage.PRIMARY_SETTLING: _calc_primary_settling,
-    ProcessStage.AERATION: _calc_aeration,
-    ProcessStage.SECONDARY_SETTLING: _calc_secondary_settling,
-    ProcessStage.NITRIFICATION: _calc_nitrification,
-    ProcessStage.DISINFECTION: _calc_disinfection,
-}
-
-
 def _assess_final_status(treated: WaterQuality) -> SensorStatus:
     """Assess overall pipeline status against effluent standards."""
     worst = SensorStatus.NORMAL
@@ -317,54 +160,78 @@ def _overall_removal(raw: WaterQuality, treated: WaterQuality) -> dict[str, floa
 
 # ── Public API ───────────────────────────────────────────────────────
 
-DEFAULT_PARAMS: list[StageParams] = [
-    StageParams(stage=s, hrt_ratio=1.0) for s in STAGE_ORDER
-]
+def _vector(quality: WaterQuality) -> np.ndarray:
+    return np.array([[getattr(quality, m)] for m in METRICS])
+
+
+def _quality(column: np.ndarray) -> WaterQuality:
+    return WaterQuality(**dict(zip(METRICS, column[:, 0].tolist())))
+
+
+def calc_stage(stage: str, influent: WaterQuality, hrt_ratio: float, train: Train = DEFAULT) -> WaterQuality:
+    """Steady-state effluent of one stage for `influent` at `hrt_ratio`."""
+    return _quality(train.step(train.index[stage], _vector(influent), np.array([hrt_ratio])))
+
+
+def stage_result(
+    stage: str,
+    hrt_ratio: float,
+    influent: WaterQuality,
+    effluent: WaterQuality,
+    train: Train = DEFAULT,
+) -> StageResult:
+    """Wrap one stage's influent/effluent with its efficiencies and status."""
+    i = train.index[stage]
+    return StageResult(
+        stage=stage,
+        stage_name_ko=train.names_ko[i],
+        hrt_ratio=round(hrt_ratio, 3),
+        hrt_hours=round(float(train.design_hrt[i]) * hrt_ratio, 2),
+        influent=influent,
+        effluent=effluent,
+        removal_efficiencies=_removal_efficiencies(influent, effluent),
+        status=_assess_stage_status(effluent),
+    )
 
 
-def run_pipeline(params: list[StageParams] | None = None) -> PipelineResult:
+def pipeline_result(raw: WaterQuality, stages: list[StageResult], train: Train = DEFAULT) -> PipelineResult:
+    """Assemble a `PipelineResult`; treated water is the last stage's effluent."""
+    treated = stages[-1].effluent
+    return PipelineResult(
+        train=train.name,
+        raw_water=raw,
+        stages=stages,
+        treated_water=treated,
+        overall_removal=_overall_removal(raw, treated),
+        overall_status=_assess_final_status(treated),
+    )
+
+
+def run_pipeline(
+    params: list[StageParams] | None = None,
+    train: Train = DEFAULT,
+    table: TransferTable | None = None,
+) -> PipelineResult:
     """
-    Run the full pipeline simulation with given HRT ratios.
+    Run the full pipeline simulation of `train` with given HRT ratios.
     Returns WaterQuality at each stage and final treated water.
+    With a `table` of the same train, stages are interpolated from it.
+    Raises ValueError for stages that are not part of the train.
     """
-    if params is None:
-        params = DEFAULT_PARAMS
-
-    # Build a lookup for quick access
-    param_map: dict[ProcessStage, float] = {p.stage: p.hrt_ratio for p in params}
+    ratios = train.ratio_vector({p.stage: p.hrt_ratio for p in params or []})
+    step = table.step if table is not None else train.step
 
-    current: WaterQuality = RAW_WATER
+    current = _vector(RAW_WATER)
+    influent = RAW_WATER
     stage_results: list[StageResult] = []
 
-    for stage in STAGE_ORDER:
-        hrt_ratio = param_map.get(stage, 1.0)
-        hrt_hours = DESIGN_HRT[stage] * hrt_ratio
-        influent = current
-
-        calc_fn = _CALC_FUNCTIONS[stage]
-        effluent = calc_fn(influent, hrt_ratio)
+    for i, stage in enumerate(train.stages):
+        started = perf_counter()
+        current = step(i, current, ratios[i:i + 1])
+        PIPELINE_STAGE_SECONDS.observe(perf_counter() - started, stage)
 
-        efficiencies = _removal_efficiencies(influent, effluent)
-        status = _assess_stage_status(effluent)
+        effluent = _quality(current)
+        stage_results.append(stage_result(stage, float(ratios[i]), influent, effluent, train))
+        influent = effluent
 
-        stage_results.append(StageResult(
-            stage=stage,
-            stage_name_ko=STAGE_NAMES_KO[stage],
-            hrt_ratio=round(hrt_ratio, 3),
-            hrt_hours=round(hrt_hours, 2),
-            influent=influent,
-            effluent=effluent,
-            removal_efficiencies=efficiencies,
-            status=status,
-        ))
-
-        current = effluent
-
-    treated = current
-    return PipelineResult(
-        raw_water=RAW_WATER,
-        stages=stage_results,
-        treated_water=treated,
-        overall_removal=_overall_removal(RAW_WATER, treated),
-        overall_status=_assess_final_status(treated),
-    )
+    return pipeline_result(RAW_WATER, stage_results, train)
@@ -0,0 +1,258 @@
+"""
+Vectorized pipeline engine for HRT parameter sweeps.
+
+Evaluates a treatment train like `pipeline.run_pipeline`, but for N
+parameter vectors at once: every stage is one `Train.step` over a
+(metrics, N) block, with no per-row pydantic construction.
+
+Rows are HRT ratio vectors in the train's stage order. With
+`rounded=True` the intermediate rounding of the scalar engine is
+reproduced, so treated water and statuses agree with `run_pipeline`;
+`rounded=False` gives the smooth model used by optimizers.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from .models import BatchRequest, SensorStatus, WaterQuality
+from .pipeline import EFFLUENT_STANDARDS, RAW_WATER
+from .stage_registry import DEFAULT_TRAIN, METRICS, Train, train_registry
+
+# Status codes used in batch results (index into STATUS_CODES)
+NORMAL, WARNING, DANGER = 0, 1, 2
+STATUS_CODES: tuple[SensorStatus, ...] = (
+    SensorStatus.NORMAL,
+    SensorStatus.WARNING,
+    SensorStatus.DANGER,
+)
+
+DESIGN_HRT_VECTOR = train_registry.default.design_hrt
+
+HRT_RATIO_MIN = 0.25
+HRT_RATIO_MAX = 2.5
+HRT_QUANTUM = 0.001  # ratio resolution of the result cache; closer ratios share an entry
+
+CHUNK_ROWS = 16_384  # rows per kernel pass; keeps temporaries cache-sized
+
+# (metric, warning threshold, danger threshold) — mirrors _assess_stage_status
+_STAGE_CHECKS = (
+    ("bod", 50.0, 100.0),
+    ("tss", 40.0, 80.0),
+    ("cod", 80.0, 180.0),
+    ("ammonia", 10.0, 25.0),
+    ("turbidity", 10.0, 25.0),
+)
+
+Columns = dict[str, np.ndarray]
+Curves = tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+@dataclass
+class BatchResult:
+    """Columnar result of a batch evaluation (row i ↔ ratios[i])."""
+    ratios: np.ndarray                 # (N, stages) HRT ratios in train order
+    treated: Columns                   # metric → (N,) treated water
+    stage_status: np.ndarray           # (N, stages) int8 status codes
+    overall_status: np.ndarray         # (N,) int8 status codes
+    stage_effluent: list[Columns] | None = None  # per stage, if requested
+    train: str = DEFAULT_TRAIN
+
+    @property
+    def total_hrt_hours(self) -> np.ndarray:
+        return self.ratios @ train_registry.get(self.train).design_hrt
+
+    def __len__(self) -> int:
+        return len(self.ratios)
+
+
+def sigmoid_removal(hrt_ratio, r_min, r_max, steepness=3.0, midpoint=1.0):
+    """Array version of `pipeline._sigmoid_removal` (broadcasts over all args)."""
+    return r_min + (r_max - r_min) / (1.0 + np.exp(-steepness * (hrt_ratio - midpoint)))
+
+
+# ── Status assessment ────────────────────────────────────────────────
+
+def stage_status(effluent: Columns) -> np.ndarray:
+    """Vectorized `_assess_stage_status` → int8 status codes."""
+    status = np.zeros(len(effluent["bod"]), dtype=np.int8)
+    for metric, warn, danger in _STAGE_CHECKS:
+        val = effluent[metric]
+        status = np.maximum(status, np.where(val >= danger, DANGER, np.where(val >= warn, WARNING, NORMAL)))
+    return status.astype(np.int8)
+
+
+def final_status(treated: Columns) -> np.ndarray:
+    """Vectorized `_assess_final_status` → int8 status codes."""
+    status = np.zeros(len(treated["bod"]), dtype=np.int8)
+    for metric, std in EFFLUENT_STANDARDS.items():
+        val = treated[metric]
+        status = np.maximum(
+            status,
+            np.where(val > std["warning"], DANGER, np.where(val > std["normal"], WARNING, NORMAL)),
+        )
+    return status.astype(np.int8)
+
+
+# ── Public API ───────────────────────────────────────────────────────
+
+def validate_ratios(ratios: np.ndarray, stages: int = len(train_registry.default)) -> np.ndarray:
+    """Coerce to a float (N, stages) array and check the StageParams bounds."""
+    ratios = np.asarray(ratios, dtype=np.float64)
+    if ratios.ndim != 2 or ratios.shape[1] != stages:
+        raise ValueError(f"expected shape (N, {stages}), got {ratios.shape}")
+    if not np.isfinite(ratios).all():
+        raise ValueError("hrt ratios must be finite")
+    if ratios.size and (ratios.min() < HRT_RATIO_MIN or ratios.max() > HRT_RATIO_MAX):
+        raise ValueError(f"hrt ratios must be within {HRT_RATIO_MIN}–{HRT_RATIO_MAX}")
+    return ratios
+
+
+def influent_columns(quality: WaterQuality = RAW_WATER) -> dict[str, float]:
+    """Influent as scalar columns (broadcast against every row)."""
+    return quality.model_dump()
+
+
+def evaluate_chain(
+    ratios: np.ndarray,
+    influent: dict[str, np.ndarray | float] | None = None,
+    curves: Curves | None = None,
+    rounded: bool = True,
+    keep_stages: bool = False,
+    train: Train | None = None,
+) -> tuple[Columns, np.ndarray, list[Columns] | None]:
+    """
+    Run all stages of `train` (default train if None) over `ratios` (N, stages).
+
+    `influent` defaults to RAW_WATER; any entry may be an (N,) array to
+    vary per row. `curves` replaces the train's (r_min, r_max, steepness,
+    midpoint) curve columns, each (C,) or (C, N) — see `Train.step`.
+    Returns the treated columns, (N, stages) stage status codes and
+    optionally every stage effluent.
+    """
+    train = train or train_registry.default
+    influent = influent if influent is not None else influent_columns()
+    q = np.empty((len(METRICS), len(ratios)))
+    for j, m in enumerate(METRICS):
+        q[j] = influent[m]
+    statuses = np.empty(ratios.shape, dtype=np.int8)
+    effluents: list[Columns] | None = [] if keep_stages else None
+
+    for i in range(len(train)):
+        q = train.step(i, q, ratios[:, i], curves, rounded)
+        columns = dict(zip(METRICS, q))
+        statuses[:, i] = stage_status(columns)
+        if effluents is not None:
+            effluents.append(columns)
+    return dict(zip(METRICS, q)), statuses, effluents
+
+
+def evaluate_batch(
+    ratios: np.ndarray,
+    rounded: bool = True,
+    keep_stages: bool = False,
+    chunk_rows: int = CHUNK_ROWS,
+    train: str | None = None,
+) -> BatchResult:
+    """Evaluate the named train (default if None) for every row of `ratios` (N, stages)."""
+    compiled = train_registry.get(train)
+    ratios = validate_ratios(ratios, len(compiled))
+    n = len(ratios)
+    treated = {m: np.empty(n) for m in METRICS}
+    stage_codes = np.empty(ratios.shape, dtype=np.int8)
+    effluents = [{m: np.empty(n) for m in METRICS} for _ in compiled.stages] if keep_stages else None
+
+    for lo in range(0, n, chunk_rows):
+        hi = min(lo + chunk_rows, n)
+        q, codes, stages = evaluate_chain(
+            ratios[lo:hi], rounded=rounded, keep_stages=keep_stages, train=compiled
+        )
+        for m in METRICS:
+            treated[m][lo:hi] = q[m]
+        stage_codes[lo:hi] = codes
+        if effluents is not None:
+            for dst, src in zip(effluents, stages):
+                for m in METRICS:
+                    dst[m][lo:hi] = src[m]
+
+    return BatchResult(
+        ratios=ratios,
+        treated=treated,
+        stage_status=stage_codes,
+        overall_status=final_status(treated),
+        stage_effluent=effluents,
+        train=compiled.name,
+    )
+
+
+def merge_results(parts: list[BatchResult]) -> BatchResult:
+    """Concatenate results of consecutive row chunks (e.g. from worker processes)."""
+    if len(parts) == 1:
+        return parts[0]
+    stages = None
+    if parts[0].stage_effluent is not None:
+        stages = [
+            {m: np.concatenate([p.stage_effluent[i][m] for p in parts]) for m in METRICS}
+            for i in range(len(parts[0].stage_effluent))
+        ]
+    return BatchResult(
+        ratios=np.concatenate([p.ratios for p in parts]),
+        treated={m: np.concatenate([p.treated[m] for p in parts]) for m in METRICS},
+        stage_status=np.concatenate([p.stage_status for p in parts]),
+        overall_status=np.concatenate([p.overall_status for p in parts]),
+        stage_effluent=stages,
+        train=parts[0].train,
+    )
+
+
+def grid_ratios(axes: list[np.ndarray]) -> np.ndarray:
+    """Cartesian product of per-stage ratio axes → (N, stages), last stage fastest."""
+    mesh = np.meshgrid(*axes, indexing="ij")
+    return np.stack([m.ravel() for m in mesh], axis=1)
+
+
+def _request_axes(body: BatchRequest) -> list[np.ndarray]:
+    train = train_registry.get(body.train)
+    unknown = [s for s in body.grid if s not in train.index]
+    if unknown:
+        raise ValueError(f"stage(s) not in train {train.name}: {', '.join(unknown)}")
+    return [
+        np.linspace(ax.start, ax.stop, ax.num) if (ax := body.grid.get(stage)) else np.ones(1)
+        for stage in train.stages
+    ]
+
+
+def request_rows(body: BatchRequest) -> int:
+    """Rows a batch request expands to, without materializing a grid."""
+    if body.grid is not None:
+        return math.prod(len(ax) for ax in _request_axes(body))
+    return len(body.params)
+
+
+def request_ratios(body: BatchRequest) -> np.ndarray:
+    """(N, stages) ratio rows of a batch request (explicit params or grid product)."""
+    return grid_ratios(_request_axes(body)) if body.grid is not None else body.params
+
+
+def to_columns(result: BatchResult, include_stages: bool = False) -> dict:
+    """JSON-ready columnar dict matching `models.BatchResponse`."""
+    names = np.array([s.value for s in STATUS_CODES])
+    stages = train_registry.get(result.train).stages
+    columns = {
+        "count": len(result),
+        "train": result.train,
+        "stages": list(stages),
+        "hrt_ratios": {s: result.ratios[:, i].tolist() for i, s in enumerate(stages)},
+        "total_hrt_hours": np.round(result.total_hrt_hours, 3).tolist(),
+        "treated_water": {m: v.tolist() for m, v in result.treated.items()},
+        "overall_status": names[result.overall_status].tolist(),
+        "stage_status": None,
+    }
+    if include_stages:
+        columns["stage_status"] = {
+            s: names[result.stage_status[:, i]].tolist() for i, s in enumerate(stages)
+        }
+    return columns
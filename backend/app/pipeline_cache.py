@@ -0,0 +1,128 @@
+"""
+Memoization for `run_pipeline`.
+
+The pipeline is a pure function of the train and its HRT ratios, and
+slider drags in the dashboard replay the same few combinations over and
+over. Results are cached with their serialized JSON body (plus ETag and
+compressed variants, see http_cache), keyed on the train name and the
+ratios quantized to `HRT_QUANTUM`, so a hit is a dictionary lookup
+returning ready bytes. The design-HRT result of the default train is
+pinned and never evicted. In lookup-table mode misses are interpolated
+from the precomputed stage transfer functions (see pipeline_table).
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+
+from .config import PIPELINE_CACHE_SIZE
+from .http_cache import SerializedBody
+from .models import PipelineResult, StageParams
+from .pipeline import run_pipeline
+from .pipeline_batch import HRT_QUANTUM
+from .pipeline_table import pipeline_tables
+from .stage_registry import Train, train_registry
+from .wire import WIRE_MEDIA_TYPE, encode_pipeline
+
+CacheKey = tuple[str, tuple[int, ...]]   # (train, ratio steps in stage order)
+
+
+@dataclass(frozen=True)
+class CachedPipeline:
+    """A pipeline result with its pre-serialized JSON body."""
+    key: CacheKey
+    result: PipelineResult
+    payload: SerializedBody
+
+    @cached_property
+    def wire(self) -> SerializedBody:
+        """Binary wire encoding (see wire.py), built on first request."""
+        return SerializedBody(encode_pipeline(self.result), WIRE_MEDIA_TYPE)
+
+
+def quantize(params: list[StageParams] | None, train: Train) -> CacheKey:
+    """Map stage params to integer ratio steps in the train's order (missing → 1.0)."""
+    ratios = train.ratio_vector({p.stage: p.hrt_ratio for p in params or ()})
+    return train.name, tuple(round(r / HRT_QUANTUM) for r in ratios.tolist())
+
+
+def _compute(key: CacheKey) -> CachedPipeline:
+    train = train_registry.get(key[0])
+    params = [
+        StageParams(stage=stage, hrt_ratio=steps * HRT_QUANTUM)
+        for stage, steps in zip(train.stages, key[1])
+    ]
+    table = pipeline_tables[train.name] if pipeline_tables is not None else None
+    result = run_pipeline(params, train, table)
+    return CachedPipeline(key=key, result=result, payload=SerializedBody.from_model(result))
+
+
+class PipelineCache:
+    """Thread-safe LRU of pipeline results (endpoints run in the threadpool)."""
+
+    def __init__(self, maxsize: int) -> None:
+        if maxsize < 1:
+            raise ValueError("cache size must be at least 1")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[CacheKey, CachedPipeline] = OrderedDict()
+        self._lock = threading.Lock()
+        self._default = _compute(quantize(None, train_registry.default))
+
+    @property
+    def default(self) -> CachedPipeline:
+        """Default train at design HRT (all ratios 1.0)."""
+        return self._default
+
+    def get(self, params: list[StageParams] | None, train: str | None = None) -> CachedPipeline:
+        """
+        Cached result for `params` on the named train (None → default).
+        Raises KeyError for an unknown train, ValueError for foreign stages.
+        """
+        key = quantize(params, train_registry.get(train))
+        if key == self._default.key:
+            with self._lock:
+                self.hits += 1
+            return self._default
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Compute outside the lock; a concurrent miss on the same key just
+        # produces an identical entry.
+        entry = _compute(key)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+# ── Singleton instance ──────────────────────────────────────────────
+pipeline_cache = PipelineCache(PIPELINE_CACHE_SIZE)
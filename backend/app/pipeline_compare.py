@@ -0,0 +1,105 @@
+"""
+Named scenario comparison: many HRT configurations in one pass.
+
+Scenarios of the same train are laid out as a prefix tree of their
+(quantized) ratio vectors: stage i is evaluated once per distinct prefix
+of length i + 1, all of them in one `Train.step` over a (metrics, nodes)
+block. "design" and "storm flow" differing only in the last stage share
+the effluents of every stage before it. Ratios are quantized like the
+result cache (`HRT_QUANTUM`), so each scenario equals the result of
+POST /api/pipeline/params for the same params; stage results of shared
+prefixes are built once and referenced by every scenario that has them.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .models import CompareResponse, PipelineParams, PipelineResult, StageResult, WaterQuality
+from .pipeline import RAW_WATER, pipeline_result, stage_result
+from .pipeline_cache import HRT_QUANTUM, quantize
+from .pipeline_table import pipeline_tables
+from .stage_registry import METRICS, Train, train_registry
+
+
+@dataclass
+class CompareOutcome:
+    """Per-scenario results in request order, and the stage evaluations it took."""
+    results: dict[str, PipelineResult]
+    stage_evaluations: int
+
+
+def _quality(block: np.ndarray, column: int) -> WaterQuality:
+    return WaterQuality(**dict(zip(METRICS, block[:, column].tolist())))
+
+
+def _run_tree(train: Train, vectors: list[tuple[int, ...]]) -> tuple[list[list[StageResult]], int]:
+    """Stage results per vector, evaluating each distinct ratio prefix once."""
+    table = pipeline_tables[train.name] if pipeline_tables is not None else None
+    step = table.step if table is not None else train.step
+    block = np.array([[getattr(RAW_WATER, m)] for m in METRICS])
+    influents: list[WaterQuality] = [RAW_WATER]   # per node of the previous depth
+    node_of = [0] * len(vectors)                  # each vector's node at the previous depth
+    stages: list[list[StageResult]] = [[] for _ in vectors]
+    evaluations = 0
+
+    for i, stage in enumerate(train.stages):
+        nodes: dict[tuple[int, ...], int] = {}
+        parents: list[int] = []
+        for v, steps in enumerate(vectors):
+            prefix = steps[:i + 1]
+            node = nodes.get(prefix)
+            if node is None:
+                node = nodes[prefix] = len(parents)
+                parents.append(node_of[v])
+            node_of[v] = node
+        ratios = np.array([prefix[-1] * HRT_QUANTUM for prefix in nodes])
+        block = step(i, block[:, parents], ratios)
+        evaluations += len(parents)
+
+        effluents = [_quality(block, node) for node in range(len(parents))]
+        results = [
+            stage_result(stage, float(ratio), influents[parent], effluent, train)
+            for ratio, parent, effluent in zip(ratios.tolist(), parents, effluents)
+        ]
+        for v in range(len(vectors)):
+            stages[v].append(results[node_of[v]])
+        influents = effluents
+    return stages, evaluations
+
+
+def compare(scenarios: dict[str, PipelineParams]) -> CompareOutcome:
+    """
+    Evaluate every scenario, sharing stage prefixes within each train.
+    Raises KeyError for an unknown train, ValueError for foreign stages.
+    """
+    groups: dict[str, list[tuple[str, tuple[int, ...]]]] = {}
+    for name, scenario in scenarios.items():
+        train_name, steps = quantize(scenario.params, train_registry.get(scenario.train))
+        groups.setdefault(train_name, []).append((name, steps))
+
+    results: dict[str, PipelineResult] = {}
+    evaluations = 0
+    for train_name, members in groups.items():
+        train = train_registry.get(train_name)
+        stages, count = _run_tree(train, [steps for _, steps in members])
+        evaluations += count
+        for (name, _), stage_results in zip(members, stages):
+            results[name] = pipeline_result(RAW_WATER, stage_results, train)
+    return CompareOutcome(results={name: results[name] for name in scenarios}, stage_evaluations=evaluations)
+
+
+def compare_response(outcome: CompareOutcome, baseline: str) -> CompareResponse:
+    """API model: results plus treated-water deltas against the `baseline` scenario."""
+    reference = outcome.results[baseline].treated_water
+    return CompareResponse(
+        baseline=baseline,
+        scenarios=outcome.results,
+        deltas={
+            name: {m: round(getattr(result.treated_water, m) - getattr(reference, m), 4) for m in METRICS}
+            for name, result in outcome.results.items()
+        },
+        stage_evaluations=outcome.stage_evaluations,
+    )
@@ -0,0 +1,96 @@
+"""
+HRT sensitivity of the pipeline: the Jacobian of treated water with
+respect to every stage's HRT ratio, in one forward pass.
+
+Each stage is affine in its influent for a fixed HRT ratio h,
+x = mult(h) × q + add(h) (`Train.linearize`), so the chain rule runs
+alongside the values: with T = ∂q/∂h (metrics × stages) for the influent,
+
+    T ← mult × T,  then  T[:, i] += mult′ × q + add′     (stage i)
+
+and rows clipped at a bound get zero slope. The result is exact for the
+smooth (unrounded) model that the batch engine and the optimizer use;
+intermediate rounding of `run_pipeline` is a step function and is left
+out, so treated water here may differ from /api/pipeline/params in the
+last displayed digit. Operating points are columns, so any number of
+them cost the same handful of array operations per stage.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .models import SensitivityResponse
+from .pipeline import EFFLUENT_STANDARDS
+from .pipeline_batch import METRICS, influent_columns, validate_ratios
+from .stage_registry import Train, train_registry
+
+# Metrics with an effluent standard, in EFFLUENT_STANDARDS order
+SENSITIVITY_METRICS: tuple[str, ...] = tuple(EFFLUENT_STANDARDS)
+_ROWS = [METRICS.index(m) for m in SENSITIVITY_METRICS]
+
+
+@dataclass
+class Sensitivity:
+    """Treated water and its HRT-ratio Jacobian at N operating points."""
+    ratios: np.ndarray       # (N, stages)
+    treated: np.ndarray      # (N, metrics) in METRICS order
+    jacobian: np.ndarray     # (N, metrics, stages): ∂treated / ∂hrt_ratio
+    train: str
+
+
+def sensitivity(ratios: np.ndarray, train: Train | None = None) -> Sensitivity:
+    """Forward-mode derivatives of every treated metric for `ratios` (N, stages). Raises ValueError."""
+    train = train or train_registry.default
+    ratios = validate_ratios(ratios, len(train))
+    n, stages = ratios.shape
+    influent = influent_columns()
+    q = np.empty((len(METRICS), n))
+    for j, m in enumerate(METRICS):
+        q[j] = influent[m]
+    tangent = np.zeros((len(METRICS), stages, n))
+
+    for i in range(stages):
+        h = ratios[:, i]
+        mult, dmult, add, dadd = train.linearize(i, h)
+        x = mult * q + add
+        tangent *= mult[:, None, :]
+        tangent[:, i, :] += dmult * q + dadd
+        lo, hi = train.lo[i][:, None], train.hi[i][:, None]
+        tangent *= ((x >= lo) & (x <= hi))[:, None, :]     # clipped rows: zero slope
+        q = np.clip(x, lo, hi)
+
+    return Sensitivity(
+        ratios=ratios,
+        treated=q.T.copy(),
+        jacobian=tangent.transpose(2, 0, 1).copy(),
+        train=train.name,
+    )
+
+
+def sensitivity_response(result: Sensitivity, point: int = 0) -> SensitivityResponse:
+    """API model for one operating point (metrics with an effluent standard only)."""
+    stages = train_registry.get(result.train).stages
+    ratios = result.ratios[point]
+    treated = result.treated[point, _ROWS]
+    jacobian = result.jacobian[point, _ROWS]
+    # Relative change of the metric per relative change of the ratio
+    with np.errstate(divide="ignore", invalid="ignore"):
+        elasticity = np.where(treated[:, None] > 0, jacobian * ratios / treated[:, None], 0.0)
+    return SensitivityResponse(
+        train=result.train,
+        hrt_ratios=dict(zip(stages, ratios.tolist())),
+        treated_water=dict(zip(SENSITIVITY_METRICS, np.round(treated, 4).tolist())),
+        jacobian={
+            metric: dict(zip(stages, row.tolist())) for metric, row in zip(SENSITIVITY_METRICS, jacobian)
+        },
+        elasticity={
+            metric: dict(zip(stages, np.round(row, 4).tolist()))
+            for metric, row in zip(SENSITIVITY_METRICS, elasticity)
+        },
+        most_sensitive={
+            metric: stages[int(np.argmax(np.abs(row)))] for metric, row in zip(SENSITIVITY_METRICS, jacobian)
+        },
+    )
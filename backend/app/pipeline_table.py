@@ -0,0 +1,162 @@
+"""
+Precomputed stage transfer functions (lookup-table mode of the pipeline).
+
+Every stage is affine in its influent for a given HRT ratio h,
+x = mult(h) × q + add(h) before clipping and rounding (`Train.linearize`).
+With AQUAVIEW_PIPELINE_TABLE=1 the coefficients and their h-derivatives
+are tabulated per train on a uniform grid over the StageParams range
+[0.25, 2.5], and `run_pipeline` evaluates each stage by cubic Hermite
+interpolation of its table row. The cost per request is then a fixed
+handful of array operations, however expensive the curve models are to
+evaluate; clipping and rounding are the engine's own (`Train.finish`).
+
+Error bound: Hermite interpolation of a smooth f with step Δ is off by
+at most Δ⁴/384 · max|f⁗|. With the default 226 points (Δ = 0.01) the
+built-in trains stay within 1e-7 relative of the exact engine. Rather than rely on the
+derivative bound, every table is checked against the exact engine when
+it is built: treated water of the unrounded chain is compared on the
+interval midpoints of each stage and on a fixed random sample of ratio
+vectors, and the largest absolute error per metric is kept
+(`TransferTable.error`, GET /api/pipeline/table). Rounded results equal
+the exact engine's except where a value lies within that error of a
+rounding boundary, where they differ by one unit in the last decimal.
+
+Tables can be cached in an .npz file (AQUAVIEW_PIPELINE_TABLE_PATH); a
+train whose compiled parameters or grid changed is rebuilt and rewritten.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+
+import numpy as np
+
+from .config import PIPELINE_TABLE, PIPELINE_TABLE_PATH, PIPELINE_TABLE_POINTS
+from .pipeline_batch import HRT_RATIO_MAX, HRT_RATIO_MIN, METRICS, evaluate_chain, influent_columns
+from .stage_registry import Train, TrainRegistry, train_registry
+
+TABLE_VERSION = 1
+CHECK_SAMPLES = 4_096     # random ratio vectors per train in the build check
+CHECK_SEED = 0
+
+
+def _fingerprint(train: Train, points: int) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{TABLE_VERSION}|{points}|{HRT_RATIO_MIN}|{HRT_RATIO_MAX}|{'/'.join(train.stages)}".encode())
+    for array in (train.curves, train.curve_metric, train.curve_log, train.factor, train.offset,
+                  train.per_hrt, train.lo, train.hi, train.couple_curve, train.couple_coef):
+        h.update(np.ascontiguousarray(array).tobytes())
+    return h.hexdigest()
+
+
+class TransferTable:
+    """Tabulated (mult, mult′, add, add′) per stage and metric of one train."""
+
+    def __init__(self, train: Train, points: int, coef: np.ndarray | None = None,
+                 error: np.ndarray | None = None) -> None:
+        if points < 2:
+            raise ValueError("a transfer table needs at least 2 grid points")
+        self.train = train
+        self.points = points
+        self.step_size = (HRT_RATIO_MAX - HRT_RATIO_MIN) / (points - 1)
+        self.fingerprint = _fingerprint(train, points)
+        if coef is None:
+            grid = np.linspace(HRT_RATIO_MIN, HRT_RATIO_MAX, points)
+            # (stages, 4, metrics, points): mult, dmult, add, dadd
+            coef = np.stack([np.stack(train.linearize(i, grid)) for i in range(len(train))])
+        self.coef = coef
+        self.coef.flags.writeable = False
+        self._poly = self._polynomials(coef, self.step_size)
+        self.error = self.check() if error is None else error
+
+    @staticmethod
+    def _polynomials(coef: np.ndarray, step: float) -> np.ndarray:
+        """
+        Hermite cubic of every grid interval in power form, in t ∈ [0, 1]:
+        (stages, intervals, 4, 2 × metrics), mult rows then add rows.
+        Constant entries get zero higher terms, so they come back exact.
+        """
+        f = np.concatenate([coef[:, 0], coef[:, 2]], axis=1)            # (stages, 2M, points)
+        d = np.concatenate([coef[:, 1], coef[:, 3]], axis=1) * step
+        f0, f1, d0, d1 = f[..., :-1], f[..., 1:], d[..., :-1], d[..., 1:]
+        poly = np.stack([f0, d0, 3.0 * (f1 - f0) - 2.0 * d0 - d1, 2.0 * (f0 - f1) + d0 + d1])
+        poly = np.ascontiguousarray(poly.transpose(1, 3, 0, 2))
+        poly.flags.writeable = False
+        return poly
+
+    def coefficients(self, i: int, hrt: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Interpolated (mult, add), each (metrics, N), of stage i at `hrt` (N,)."""
+        u = (hrt - HRT_RATIO_MIN) / self.step_size
+        k = np.clip(u.astype(np.intp), 0, self.points - 2)
+        t = (u - k)[:, None]
+        c = self._poly[i][k]                                             # (N, 4, 2M)
+        v = ((c[:, 3] * t + c[:, 2]) * t + c[:, 1]) * t + c[:, 0]
+        n = len(METRICS)
+        return v[:, :n].T, v[:, n:].T
+
+    def step(self, i: int, q: np.ndarray, hrt: np.ndarray, rounded: bool = True) -> np.ndarray:
+        """`Train.step` from the table: effluent (metrics, N) of stage i."""
+        mult, add = self.coefficients(i, hrt)
+        x = mult * q
+        x += add
+        return self.train.finish(i, x, rounded)
+
+    def evaluate(self, ratios: np.ndarray, rounded: bool = True) -> np.ndarray:
+        """Treated water (metrics, N) for `ratios` (N, stages), like `evaluate_chain`."""
+        influent = influent_columns()
+        q = np.empty((len(METRICS), len(ratios)))
+        for j, m in enumerate(METRICS):
+            q[j] = influent[m]
+        for i in range(len(self.train)):
+            q = self.step(i, q, ratios[:, i], rounded)
+        return q
+
+    def check(self) -> np.ndarray:
+        """Largest |table − exact| of unrounded treated water per metric (see module docstring)."""
+        stages = len(self.train)
+        midpoints = np.linspace(HRT_RATIO_MIN, HRT_RATIO_MAX, self.points)[:-1] + self.step_size / 2
+        sweeps = np.ones((stages * len(midpoints), stages))
+        for i in range(stages):
+            sweeps[i * len(midpoints):(i + 1) * len(midpoints), i] = midpoints
+        rng = np.random.default_rng(CHECK_SEED)
+        ratios = np.vstack([sweeps, rng.uniform(HRT_RATIO_MIN, HRT_RATIO_MAX, (CHECK_SAMPLES, stages))])
+        exact, _, _ = evaluate_chain(ratios, rounded=False, train=self.train)
+        table = self.evaluate(ratios, rounded=False)
+        return np.array([np.abs(table[j] - exact[m]).max() for j, m in enumerate(METRICS)])
+
+
+# ── Build / cache ───────────────────────────────────────────────────
+
+def build_tables(registry: TrainRegistry, points: int, path: str = "") -> dict[str, TransferTable]:
+    """A table per train; loaded from `path` when present and current, else built (and saved)."""
+    stored: dict[str, np.ndarray] = {}
+    if path and os.path.exists(path):
+        with np.load(path) as f:
+            stored = {k: f[k] for k in f.files}
+    tables: dict[str, TransferTable] = {}
+    for train in registry:
+        fingerprint = _fingerprint(train, points)
+        if stored.get(f"{train.name}.fingerprint") == fingerprint:
+            tables[train.name] = TransferTable(
+                train, points, stored[f"{train.name}.coef"], stored[f"{train.name}.error"]
+            )
+        else:
+            tables[train.name] = TransferTable(train, points)
+    if path and any(stored.get(f"{n}.fingerprint") != t.fingerprint for n, t in tables.items()):
+        arrays = {}
+        for name, table in tables.items():
+            arrays[f"{name}.fingerprint"] = np.array(table.fingerprint)
+            arrays[f"{name}.coef"] = table.coef
+            arrays[f"{name}.error"] = table.error
+        # Write next to the target and swap, so a crash never leaves half a file
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+    return tables
+
+
+# ── Singleton instance ──────────────────────────────────────────────
+pipeline_tables: dict[str, TransferTable] | None = (
+    build_tables(train_registry, PIPELINE_TABLE_POINTS, PIPELINE_TABLE_PATH) if PIPELINE_TABLE else None
+)
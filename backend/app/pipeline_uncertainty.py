@@ -0,0 +1,272 @@
+"""
+Monte Carlo uncertainty analysis for the pipeline.
+
+Influent quality and removal-curve parameters are sampled per
+realization and pushed through the vectorized batch engine
+(`evaluate_chain`, unrounded), so one chunk of realizations is a few
+dozen NumPy array operations.
+
+Realizations are split into fixed-size chunks, each with its own child
+of one `SeedSequence`. The chunk layout does not depend on how many
+worker processes run them (see `plan_uncertainty` / `run_chunk` /
+`merge_uncertainty`), so a seed reproduces the same result for any
+number of workers. Chunks return only mergeable summaries: sums, standard
+violation counts and a 1001-point quantile sketch per stage and metric.
+Requested percentiles are read from the merged sketches, which places
+them within ~0.1 percentile rank of the exact sample value.
+"""
+
+from __future__ import annotations
+
+import secrets
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass
+
+import numpy as np
+
+from .models import (
+    Distribution,
+    DistributionKind,
+    UncertaintyResponse,
+    ViolationProbability,
+)
+from .pipeline import EFFLUENT_STANDARDS, RAW_WATER
+from .pipeline_batch import METRICS, STATUS_CODES, Curves, evaluate_chain, final_status
+from .stage_registry import Train, train_registry
+
+CHUNK_REALIZATIONS = 65_536
+SKETCH_POINTS = np.linspace(0.0, 100.0, 1001)
+
+# Typical municipal influent ranges (see RAW_WATER); unlisted metrics stay fixed
+DEFAULT_INFLUENT: dict[str, Distribution] = {
+    "bod": Distribution(kind=DistributionKind.TRIANGULAR, low=150.0, mode=RAW_WATER.bod, high=300.0),
+    "tss": Distribution(kind=DistributionKind.TRIANGULAR, low=150.0, mode=RAW_WATER.tss, high=300.0),
+    "cod": Distribution(kind=DistributionKind.TRIANGULAR, low=300.0, mode=RAW_WATER.cod, high=600.0),
+    "ammonia": Distribution(kind=DistributionKind.TRIANGULAR, low=20.0, mode=RAW_WATER.ammonia, high=50.0),
+    "turbidity": Distribution(kind=DistributionKind.TRIANGULAR, low=40.0, mode=RAW_WATER.turbidity, high=80.0),
+    "ph": Distribution(kind=DistributionKind.TRIANGULAR, low=6.5, mode=RAW_WATER.ph, high=8.0),
+    "coliform": Distribution(kind=DistributionKind.LOGNORMAL, mean=RAW_WATER.coliform, std=0.3),
+}
+
+_STANDARD_METRICS = tuple(EFFLUENT_STANDARDS)
+
+
+@dataclass
+class ChunkSummary:
+    """Mergeable result of one chunk of realizations."""
+    n: int
+    sums: np.ndarray          # (stages, metrics)
+    sketch: np.ndarray        # (stages, metrics, len(SKETCH_POINTS))
+    over_normal: np.ndarray   # (len(_STANDARD_METRICS),)
+    over_warning: np.ndarray
+    status_counts: np.ndarray  # (3,) NORMAL/WARNING/DANGER
+
+
+@dataclass
+class UncertaintyOutcome:
+    """Merged Monte Carlo summary (stage index follows the train's order)."""
+    train: str
+    realizations: int
+    seed: int
+    percentiles: list[float]
+    bands: np.ndarray          # (stages, metrics, len(percentiles))
+    means: np.ndarray          # (stages, metrics)
+    over_normal: dict[str, float]
+    over_warning: dict[str, float]
+    status_probability: np.ndarray  # (3,)
+    elapsed: float
+
+
+def _sample(rng: np.random.Generator, dist: Distribution, n: int) -> np.ndarray:
+    if dist.kind is DistributionKind.UNIFORM:
+        return rng.uniform(dist.low, dist.high, n)
+    if dist.kind is DistributionKind.TRIANGULAR:
+        if dist.low == dist.high:
+            return np.full(n, dist.low)
+        return rng.triangular(dist.low, dist.mode, dist.high, n)
+    if dist.kind is DistributionKind.LOGNORMAL:
+        return dist.mean * 10.0 ** (dist.std * rng.standard_normal(n))
+    values = rng.normal(dist.mean, dist.std, n)
+    lo = 0.0 if dist.low is None else max(0.0, dist.low)
+    return np.clip(values, lo, dist.high if dist.high is not None else np.inf)
+
+
+def _sample_curves(rng: np.random.Generator, spread: float, n: int, train: Train) -> Curves | None:
+    if spread == 0:
+        return None
+    lo, hi, k = (np.empty((len(train.curves), n)) for _ in range(3))
+    for c, (r_min, r_max, steepness, _) in enumerate(train.curves.tolist()):
+        # Removal fractions stay in [0, 1]; log reductions only need to stay ≥ 0
+        upper = np.inf if train.curve_log[c] else 1.0
+        lo[c] = np.clip(r_min * (1 + spread * rng.standard_normal(n)), 0.0, upper)
+        hi[c] = np.clip(r_max * (1 + spread * rng.standard_normal(n)), lo[c], upper)
+        k[c] = np.maximum(steepness * (1 + spread * rng.standard_normal(n)), 0.1)
+    return lo, hi, k, train.curves[:, 3]
+
+
+def run_chunk(
+    seed: np.random.SeedSequence,
+    n: int,
+    ratios: np.ndarray,
+    influent: dict[str, Distribution],
+    curve_spread: float,
+    train: str,
+) -> ChunkSummary:
+    compiled = train_registry.get(train)
+    rng = np.random.default_rng(seed)
+    q = {m: _sample(rng, influent[m], n) if m in influent else getattr(RAW_WATER, m) for m in METRICS}
+    curves = _sample_curves(rng, curve_spread, n, compiled)
+    rows = np.broadcast_to(ratios, (n, len(compiled)))
+    treated, _, effluents = evaluate_chain(rows, q, curves, rounded=False, keep_stages=True, train=compiled)
+
+    # Linear-interpolated sketch percentiles; one sort is much cheaper than
+    # np.percentile's partition over 1001 kth positions
+    position = SKETCH_POINTS / 100 * (n - 1)
+    below = np.floor(position).astype(np.intp)
+    above = np.minimum(below + 1, n - 1)
+    frac = position - below
+    sums = np.empty((len(compiled), len(METRICS)))
+    sketch = np.empty((len(compiled), len(METRICS), len(SKETCH_POINTS)))
+    for i, effluent in enumerate(effluents):
+        columns = np.sort(np.stack([np.broadcast_to(effluent[m], n) for m in METRICS]), axis=1)
+        sums[i] = columns.sum(axis=1)
+        sketch[i] = columns[:, below] * (1 - frac) + columns[:, above] * frac
+
+    status = final_status(treated)
+    return ChunkSummary(
+        n=n,
+        sums=sums,
+        sketch=sketch,
+        over_normal=np.array([
+            np.count_nonzero(treated[m] > EFFLUENT_STANDARDS[m]["normal"]) for m in _STANDARD_METRICS
+        ]),
+        over_warning=np.array([
+            np.count_nonzero(treated[m] > EFFLUENT_STANDARDS[m]["warning"]) for m in _STANDARD_METRICS
+        ]),
+        status_counts=np.bincount(status, minlength=3),   # indexed by status code
+    )
+
+
+def _merge_quantiles(chunks: list[ChunkSummary], percentiles: list[float]) -> np.ndarray:
+    """Requested percentiles from per-chunk sketches weighted by chunk size."""
+    points = np.concatenate([c.sketch for c in chunks], axis=-1)
+    step = np.diff(SKETCH_POINTS, prepend=0.0, append=100.0)
+    # Each sketch point stands for the mass half-way to its neighbours
+    mass = np.concatenate([c.n * (step[:-1] + step[1:]) / 2 for c in chunks])
+    order = np.argsort(points, axis=-1, kind="stable")
+    sorted_points = np.take_along_axis(points, order, axis=-1)
+    cumulative = np.cumsum(mass[order], axis=-1)
+    cumulative /= cumulative[..., -1:]
+    out = np.empty(points.shape[:-1] + (len(percentiles),))
+    for idx in np.ndindex(points.shape[:-1]):
+        out[idx] = np.interp(np.asarray(percentiles) / 100, cumulative[idx], sorted_points[idx])
+    return out
+
+
+@dataclass
+class UncertaintyPlan:
+    """One run split into chunks: `run_chunk(*args)` per entry, then `merge_uncertainty`."""
+    train: str
+    seed: int
+    percentiles: list[float]
+    chunks: list[tuple]
+    started: float
+
+
+def plan_uncertainty(
+    ratios: np.ndarray,
+    influent: dict[str, Distribution] | None = None,
+    curve_spread: float = 0.1,
+    realizations: int = 100_000,
+    seed: int | None = None,
+    percentiles: list[float] | None = None,
+    train: str | None = None,
+) -> UncertaintyPlan:
+    """Fix the seed and chunk layout for `realizations` runs at `ratios` (stages,) of a train."""
+    if realizations < 1:
+        raise ValueError("realizations must be at least 1")
+    compiled = train_registry.get(train)
+    ratios = np.asarray(ratios, dtype=np.float64)
+    if ratios.shape != (len(compiled),):
+        raise ValueError(f"expected {len(compiled)} hrt ratios, got {ratios.shape}")
+    seed = secrets.randbits(32) if seed is None else seed
+    specs = {**DEFAULT_INFLUENT, **(influent or {})}
+
+    sizes = [CHUNK_REALIZATIONS] * (realizations // CHUNK_REALIZATIONS)
+    if realizations % CHUNK_REALIZATIONS:
+        sizes.append(realizations % CHUNK_REALIZATIONS)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return UncertaintyPlan(
+        train=compiled.name,
+        seed=seed,
+        percentiles=sorted(percentiles or [5.0, 50.0, 95.0]),
+        chunks=[(child, n, ratios, specs, curve_spread, compiled.name) for child, n in zip(seeds, sizes)],
+        started=time.perf_counter(),
+    )
+
+
+def merge_uncertainty(plan: UncertaintyPlan, chunks: list[ChunkSummary]) -> UncertaintyOutcome:
+    """Combine chunk summaries (in any order) into the final outcome."""
+    total = sum(c.n for c in chunks)
+    over_normal = sum(c.over_normal for c in chunks) / total
+    over_warning = sum(c.over_warning for c in chunks) / total
+    return UncertaintyOutcome(
+        train=plan.train,
+        realizations=total,
+        seed=plan.seed,
+        percentiles=plan.percentiles,
+        bands=_merge_quantiles(chunks, plan.percentiles),
+        means=sum(c.sums for c in chunks) / total,
+        over_normal=dict(zip(_STANDARD_METRICS, over_normal.tolist())),
+        over_warning=dict(zip(_STANDARD_METRICS, over_warning.tolist())),
+        status_probability=sum(c.status_counts for c in chunks) / total,
+        elapsed=time.perf_counter() - plan.started,
+    )
+
+
+def run_uncertainty(
+    ratios: np.ndarray,
+    influent: dict[str, Distribution] | None = None,
+    curve_spread: float = 0.1,
+    realizations: int = 100_000,
+    seed: int | None = None,
+    percentiles: list[float] | None = None,
+    train: str | None = None,
+    executor: Executor | None = None,
+) -> UncertaintyOutcome:
+    """Plan, run (in `executor` when given) and merge an uncertainty analysis."""
+    plan = plan_uncertainty(ratios, influent, curve_spread, realizations, seed, percentiles, train)
+    if executor is None or len(plan.chunks) == 1:
+        chunks = [run_chunk(*args) for args in plan.chunks]
+    else:
+        chunks = list(executor.map(run_chunk, *zip(*plan.chunks)))
+    return merge_uncertainty(plan, chunks)
+
+
+def uncertainty_response(outcome: UncertaintyOutcome, workers: int) -> UncertaintyResponse:
+    """API model of an outcome; bands are metric → {"p5": …, "mean": …}."""
+    def bands(stage_index: int) -> dict[str, dict[str, float]]:
+        return {
+            metric: {
+                **{f"p{q:g}": round(float(v), 4) for q, v in zip(outcome.percentiles, outcome.bands[stage_index, j])},
+                "mean": round(float(outcome.means[stage_index, j]), 4),
+            }
+            for j, metric in enumerate(METRICS)
+        }
+
+    stages = train_registry.get(outcome.train).stages
+    return UncertaintyResponse(
+        train=outcome.train,
+        realizations=outcome.realizations,
+        seed=outcome.seed,
+        workers=workers,
+        stages={stage: bands(i) for i, stage in enumerate(stages)},
+        treated_water=bands(len(stages) - 1),
+        violation_probability={
+            metric: ViolationProbability(normal=outcome.over_normal[metric], warning=outcome.over_warning[metric])
+            for metric in outcome.over_normal
+        },
+        status_probability=dict(zip(STATUS_CODES, outcome.status_probability.tolist())),
+        elapsed_ms=round(outcome.elapsed * 1000, 1),
+    )
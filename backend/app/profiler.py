@@ -0,0 +1,119 @@
+"""
+In-process sampling profiler.
+
+A daemon thread snapshots every other thread's Python stack with
+`sys._current_frames()` at a fixed interval and counts identical stacks.
+Nothing is instrumented, so the cost is bounded by the sample rate and is
+zero while stopped. Threads parked in a wait/select are not counted.
+Output is the folded-stack format read by flamegraph.pl / speedscope,
+plus a self/total table of the hottest frames.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+MAX_DEPTH = 64
+MIN_INTERVAL = 0.001   # seconds
+MAX_INTERVAL = 1.0
+
+# Leaf frames of parked threads (threadpool workers, event loop selector);
+# samples ending in one of these are skipped so the output shows busy time
+_IDLE_LEAVES = frozenset({
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+})
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Start/stop-able stack sampler; stacks accumulate until reset."""
+
+    def __init__(self) -> None:
+        self.interval = 0.005
+        self.samples = 0
+        self.started_at: float | None = None
+        self._stacks: Counter[tuple[str, ...]] = Counter()
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float | None = None) -> None:
+        """Begin sampling (idempotent; a running profiler only changes its interval)."""
+        if interval is not None:
+            if not MIN_INTERVAL <= interval <= MAX_INTERVAL:
+                raise ValueError(f"interval must be within {MIN_INTERVAL}–{MAX_INTERVAL} s")
+            self.interval = interval
+        if self.running:
+            return
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="aquaview-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stacks.clear()
+            self.samples = 0
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = []
+            for ident, frame in sys._current_frames().items():
+                code = frame.f_code
+                if ident == own or (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_DEPTH:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stacks.append(tuple(reversed(stack)))
+            with self._lock:
+                self._stacks.update(stacks)
+                self.samples += 1
+
+    def folded(self) -> str:
+        """'root;caller;leaf count' lines, most frequent first."""
+        with self._lock:
+            items = self._stacks.most_common()
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in items)
+
+    def top(self, limit: int = 20) -> list[dict]:
+        """Frames by self samples (leaf) with their inclusive (total) samples."""
+        with self._lock:
+            items = list(self._stacks.items())
+        self_counts: Counter[str] = Counter()
+        total_counts: Counter[str] = Counter()
+        for stack, n in items:
+            self_counts[stack[-1]] += n
+            for label in set(stack):
+                total_counts[label] += n
+        return [
+            {"function": label, "self": n, "total": total_counts[label]}
+            for label, n in self_counts.most_common(limit)
+        ]
+
+
+# ── Singleton instance ──────────────────────────────────────────────
+profiler = SamplingProfiler()
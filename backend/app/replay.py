@@ -0,0 +1,222 @@
+"""
+Recorded sensor sessions: compact frame files and memory-mapped playback.
+
+`SessionRecorder` is an acquisition listener that appends one record per
+published snapshot (simulator ticks and ingest batches alike). File
+layout, little-endian:
+
+    magic "AQVR" | version u16 = 1 | reserved u16 | n_tags u32 | keys_bytes u32
+    keys: JSON list of "site/tag", space-padded to a multiple of 8 bytes
+    records: (i64 epoch ns, n_tags × f64 value) each
+
+Records have a fixed size, so any run of them is a zero-copy NumPy view
+over the mmap and nothing is read until it is touched. `SessionFile`
+keeps a sparse index — the timestamp of every `INDEX_STRIDE`-th record —
+so opening and seeking in an hours-long recording reads a few pages:
+bisect the index, then search one block.
+
+`ReplaySource` is the playback position over a session, advanced by wall
+time × speed; `SensorSimulator` pulls due records from it instead of
+generating values.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_left
+from typing import Sequence
+
+import numpy as np
+
+from .history_store import to_ns
+
+SESSION_MAGIC = b"AQVR"
+SESSION_VERSION = 1
+_HEADER = struct.Struct("<4sHHII")
+
+INDEX_STRIDE = 1_024          # records per sparse index entry
+SPEED_MIN, SPEED_MAX = 1.0, 1_000.0
+MAX_FRAMES_PER_ADVANCE = 10_000   # playback falls behind rather than stalling the loop
+
+
+def _record_dtype(n_tags: int) -> np.dtype:
+    return np.dtype([("ts", "<i8"), ("values", "<f8", (n_tags,))])
+
+
+def _encode_header(keys: Sequence[str]) -> bytes:
+    table = json.dumps(list(keys)).encode()
+    table += b" " * (-len(table) % 8)
+    return _HEADER.pack(SESSION_MAGIC, SESSION_VERSION, 0, len(keys), len(table)) + table
+
+
+def _decode_header(buf) -> tuple[tuple[str, ...], int]:
+    """(keys, offset of the first record). Raises ValueError."""
+    if len(buf) < _HEADER.size:
+        raise ValueError("not a recorded session: file too short")
+    magic, version, _, n_tags, table_len = _HEADER.unpack_from(buf, 0)
+    if magic != SESSION_MAGIC or version != SESSION_VERSION:
+        raise ValueError(f"not an AQVR v{SESSION_VERSION} recording")
+    end = _HEADER.size + table_len
+    if len(buf) < end:
+        raise ValueError("not a recorded session: truncated tag table")
+    keys = tuple(json.loads(bytes(buf[_HEADER.size:end])))
+    if len(keys) != n_tags:
+        raise ValueError("corrupt recording: tag table does not match header")
+    return keys, end
+
+
+# ── Recording ───────────────────────────────────────────────────────
+
+class SessionRecorder:
+    """Appends snapshots to a session file; reopening continues the same file."""
+
+    def __init__(self, path: str, keys: Sequence[str]) -> None:
+        self.path = path
+        self.keys = tuple(keys)
+        self._dtype = _record_dtype(len(self.keys))
+        self._record = np.zeros(1, dtype=self._dtype)
+        self._file = open(path, "a+b")
+        self._file.seek(0)
+        head = self._file.read(_HEADER.size)
+        if not head:
+            self._file.write(_encode_header(self.keys))
+            self._file.flush()
+            self.records = 0
+        else:
+            self._file.seek(0)
+            stored, offset = _decode_header(self._file.read(_HEADER.size + _HEADER.unpack(head)[4]))
+            if stored != self.keys:
+                self._file.close()
+                raise ValueError(f"{path} was recorded with a different tag set")
+            # Drop a record cut short by a crash so the file stays aligned
+            size = os.path.getsize(path)
+            self.records = (size - offset) // self._dtype.itemsize
+            self._file.truncate(offset + self.records * self._dtype.itemsize)
+        self._last_seq: int | None = None
+        self._last_ns = np.iinfo(np.int64).min
+
+    def record(self, snapshot) -> None:
+        """Acquisition listener: append `snapshot` unless already recorded or out of order."""
+        ts_ns = to_ns(snapshot.timestamp)
+        if snapshot.seq == self._last_seq or ts_ns < self._last_ns:
+            return
+        self._record["ts"] = ts_ns
+        self._record["values"] = snapshot.values
+        self._file.write(self._record.tobytes())
+        # One write per snapshot; flushed so a crash loses at most the last record
+        self._file.flush()
+        self._last_seq, self._last_ns = snapshot.seq, ts_ns
+        self.records += 1
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# ── Playback ────────────────────────────────────────────────────────
+
+class SessionFile:
+    """Read-only, memory-mapped view of a recording with a sparse time index."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.keys, offset = _decode_header(self._mmap)
+        dtype = _record_dtype(len(self.keys))
+        count = (len(self._mmap) - offset) // dtype.itemsize
+        if count == 0:
+            raise ValueError(f"{path} holds no records")
+        records = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+        self.timestamps = records["ts"]      # strided views: pages load on access
+        self.values = records["values"]
+        self.index = self.timestamps[::INDEX_STRIDE].tolist()
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def start_ns(self) -> int:
+        return self.index[0]
+
+    @property
+    def end_ns(self) -> int:
+        return int(self.timestamps[-1])
+
+    def seek(self, ts_ns: int) -> int:
+        """Index of the first record at or after `ts_ns` (len(self) if none)."""
+        block = bisect_left(self.index, ts_ns) - 1
+        if block < 0:
+            return 0
+        lo = block * INDEX_STRIDE
+        hi = min(lo + INDEX_STRIDE, len(self))
+        return lo + int(np.searchsorted(self.timestamps[lo:hi], ts_ns))
+
+    def frames(self, start: int, stop: int) -> tuple[np.ndarray, np.ndarray]:
+        """(timestamps, values (records × tags)) for records [start, stop), zero-copy."""
+        return self.timestamps[start:stop], self.values[start:stop]
+
+
+class ReplaySource:
+    """Playback position over a `SessionFile`, advanced by wall time × speed."""
+
+    def __init__(self, session: SessionFile, speed: float = 1.0) -> None:
+        self.session = session
+        self.speed = check_speed(speed)
+        self.paused = False
+        self.position = 0                       # next record to emit
+        self.playhead_ns = session.start_ns     # recorded time reached so far
+        self.generation = 0                     # bumps on every seek
+        self._wall: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.position >= len(self.session)
+
+    def set_speed(self, speed: float) -> None:
+        speed = check_speed(speed)
+        self._move_playhead()    # time so far counts at the old speed
+        self.speed = speed
+
+    def set_paused(self, paused: bool) -> None:
+        self._move_playhead()
+        self.paused = paused
+
+    def seek(self, ts_ns: int) -> None:
+        """Continue playback from the first record at or after `ts_ns`."""
+        self.position = self.session.seek(ts_ns)
+        self.playhead_ns = max(ts_ns, self.session.start_ns)
+        self._wall = time.monotonic()
+        self.generation += 1
+
+    def _move_playhead(self) -> None:
+        now = time.monotonic()
+        if self._wall is not None and not self.paused:
+            self.playhead_ns += int((now - self._wall) * self.speed * 1e9)
+        self._wall = now
+
+    def advance(self) -> tuple[int, int]:
+        """Move the playhead by the elapsed wall time; [start, stop) of records now due."""
+        self._move_playhead()
+        start = self.position
+        stop = min(self.session.seek(self.playhead_ns + 1), start + MAX_FRAMES_PER_ADVANCE)
+        if stop > start:
+            self.position = stop
+            if stop < len(self.session):
+                # Capped: resume from the last emitted record, not from the wall clock
+                self.playhead_ns = min(self.playhead_ns, int(self.session.timestamps[stop - 1]))
+        return start, self.position
+
+
+def check_speed(speed: float) -> float:
+    if not SPEED_MIN <= speed <= SPEED_MAX:
+        raise ValueError(f"replay speed must be between {SPEED_MIN:g} and {SPEED_MAX:g}")
+    return float(speed)
+
+
+def open_replay(path: str, speed: float) -> ReplaySource:
+    """Replay source for a recording file. Raises OSError or ValueError."""
+    return ReplaySource(SessionFile(path), speed)
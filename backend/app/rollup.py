@@ -0,0 +1,527 @@
+"""
+Multi-resolution history rollups and downsampling.
+
+Every appended sample updates one bucket in each resolution level
+(1 s, 1 min, 1 h) in O(levels) work, keeping min/max/sum/count/last and
+per-status counts; levels no wider than the sample interval are skipped.
+Whole frames (one sample per tag) update the open buckets as NumPy
+columns instead; bulk batches are reduced per (key, bucket) with NumPy
+and folded in as pre-aggregated buckets. Aggregation queries merge the coarsest level that
+divides the requested bucket width, so a wide window costs O(buckets)
+instead of O(samples); rollup buckets cut by the window edges are
+replaced by their raw samples, so both paths count exactly the samples
+in [start, end]. LTTB (largest-triangle-three-buckets) downsampling
+picks its input the same way: raw samples for short windows, rollup
+means for wide ones.
+"""
+
+from __future__ import annotations
+
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from itertools import chain
+from typing import Iterable, Iterator, Sequence
+
+import numpy as np
+
+from .history_store import HistorySlice, HistoryStore, Sample, to_list
+
+NS = 1_000_000_000
+
+# (bucket width seconds, buckets kept per key)
+LEVELS: tuple[tuple[int, int], ...] = (
+    (1, 3_600),        # 1 s  × 1 h
+    (60, 10_080),      # 1 min × 7 days
+    (3_600, 8_760),    # 1 h  × 1 year
+)
+
+LTTB_INPUT_LIMIT = 20_000  # max points fed to LTTB before switching to rollups
+
+_INITIAL_BUCKETS = 16      # buckets allocated per level before it starts growing
+
+
+@dataclass
+class Bucket:
+    """Aggregate of the samples in [start, start + width)."""
+    start: int          # epoch ns
+    min: float
+    max: float
+    sum: float
+    count: int
+    last: float
+    status_counts: list[int]  # indexed by status code
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count
+
+    @property
+    def worst_status(self) -> int:
+        return max(i for i, n in enumerate(self.status_counts) if n)
+
+
+class _Level:
+    """Ring of fixed-width buckets for one key, oldest first."""
+
+    def __init__(self, width_s: int, capacity: int) -> None:
+        self.width = width_s * NS
+        self.capacity = capacity
+        self.allocated = min(capacity, _INITIAL_BUCKETS)
+        n = self.allocated
+        self.start = array("q", bytes(8 * n))
+        self.min = array("d", bytes(8 * n))
+        self.max = array("d", bytes(8 * n))
+        self.sum = array("d", bytes(8 * n))
+        self.last = array("d", bytes(8 * n))
+        self.count = array("I", bytes(4 * n))
+        self.status = [array("I", bytes(4 * n)) for _ in range(3)]
+        self.oldest = 0   # ring index of the oldest bucket
+        self.size = 0
+        self.tail = -1    # ring index of the newest bucket
+        self.tail_start = -(1 << 63)
+
+    def _grow(self) -> None:
+        # Only called before the ring wraps, so positions [0, size) stay put
+        extra = min(self.allocated, self.capacity - self.allocated)
+        for col in (self.start, self.min, self.max, self.sum, self.last, self.count, *self.status):
+            col.frombytes(bytes(col.itemsize * extra))
+        self.allocated += extra
+
+    def _idx(self, i: int) -> int:
+        return (self.oldest + i) % self.capacity
+
+    def _starts(self) -> _StartView:
+        return _StartView(self)
+
+    def add(self, ts: int, value: float, status: int) -> None:
+        self.add_at(ts - ts % self.width, value, status)
+
+    def add_at(self, b_start: int, value: float, status: int) -> None:
+        """Add a sample whose bucket start is already known."""
+        if b_start > self.tail_start:
+            j = self._push(b_start)
+            self.min[j] = self.max[j] = self.sum[j] = self.last[j] = value
+            self.count[j] = 1
+            self.status[status][j] = 1
+            return
+        j = self._locate(b_start)
+        if j is None:
+            return
+        self.min[j] = min(self.min[j], value)
+        self.max[j] = max(self.max[j], value)
+        self.sum[j] += value
+        self.last[j] = value
+        self.count[j] += 1
+        self.status[status][j] += 1
+
+    def merge_at(self, b: Bucket) -> None:
+        """Fold a pre-aggregated bucket of the same width into the ring."""
+        if b.start > self.tail_start:
+            j = self._push(b.start)
+            self.min[j], self.max[j], self.sum[j], self.last[j] = b.min, b.max, b.sum, b.last
+            self.count[j] = b.count
+            for col, n in zip(self.status, b.status_counts):
+                col[j] = n
+            return
+        j = self._locate(b.start)
+        if j is None:
+            return
+        self.min[j] = min(self.min[j], b.min)
+        self.max[j] = max(self.max[j], b.max)
+        self.sum[j] += b.sum
+        self.last[j] = b.last
+        self.count[j] += b.count
+        for col, n in zip(self.status, b.status_counts):
+            col[j] += n
+
+    def _locate(self, b_start: int) -> int | None:
+        """Ring index of an existing bucket (None if evicted or never created)."""
+        if b_start == self.tail_start:
+            return self.tail
+        # Late sample: update its bucket if still retained
+        k = bisect_left(self._starts(), b_start)
+        if k == self.size or self.start[self._idx(k)] != b_start:
+            return None
+        return self._idx(k)
+
+    def _push(self, b_start: int) -> int:
+        if self.size == self.capacity:
+            self.oldest = (self.oldest + 1) % self.capacity
+            self.size -= 1
+        elif self.size == self.allocated:
+            self._grow()
+        j = self._idx(self.size)
+        self.size += 1
+        self.start[j] = b_start
+        for col in self.status:
+            col[j] = 0
+        self.tail, self.tail_start = j, b_start
+        return j
+
+    def covers(self, start_ns: int | None) -> bool:
+        """True if no bucket at or after `start_ns` has been evicted."""
+        if not self.size:
+            return False
+        return self.size < self.capacity or start_ns is None or start_ns >= self.start[self.oldest]
+
+    def span(self, start_ns: int | None, end_ns: int | None) -> tuple[int, int]:
+        """Logical [lo, hi) bucket positions overlapping the time window."""
+        starts = self._starts()
+        lo = 0 if start_ns is None else bisect_left(starts, start_ns - start_ns % self.width)
+        hi = self.size if end_ns is None else bisect_right(starts, end_ns)
+        return lo, hi
+
+    def buckets(self, lo: int, hi: int) -> Iterator[Bucket]:
+        for i in range(lo, hi):
+            j = self._idx(i)
+            yield Bucket(
+                start=self.start[j],
+                min=self.min[j],
+                max=self.max[j],
+                sum=self.sum[j],
+                count=self.count[j],
+                last=self.last[j],
+                status_counts=[col[j] for col in self.status],
+            )
+
+
+class _StartView:
+    """Bucket start times in logical (oldest-first) order, for bisection."""
+
+    __slots__ = ("_level",)
+
+    def __init__(self, level: _Level) -> None:
+        self._level = level
+
+    def __len__(self) -> int:
+        return self._level.size
+
+    def __getitem__(self, i: int) -> int:
+        level = self._level
+        return level.start[(level.oldest + i) % level.capacity]
+
+
+class _OpenColumns:
+    """
+    The open bucket of one level for every key of a frame, as NumPy columns.
+
+    Frames share one timestamp, so all their keys fall into the same bucket;
+    updating it is a handful of vectorized ops per tick. It is folded into
+    the per-key rings only when the bucket closes.
+    """
+
+    def __init__(self, width_ns: int, n_keys: int) -> None:
+        self.width = width_ns
+        self.start: int | None = None
+        self.min = np.empty(n_keys)
+        self.max = np.empty(n_keys)
+        self.sum = np.zeros(n_keys)
+        self.last = np.empty(n_keys)
+        self.count = 0
+        self.status = np.zeros((3, n_keys), dtype=np.int64)
+
+    def add(self, values: np.ndarray, statuses: np.ndarray) -> None:
+        if self.count == 0:
+            self.min[:] = values
+            self.max[:] = values
+        else:
+            np.minimum(self.min, values, out=self.min)
+            np.maximum(self.max, values, out=self.max)
+        self.sum += values
+        self.last[:] = values
+        self.count += 1
+        self.status[statuses, np.arange(len(statuses))] += 1
+
+    def bucket(self, i: int) -> Bucket:
+        return Bucket(
+            start=self.start,
+            min=float(self.min[i]),
+            max=float(self.max[i]),
+            sum=float(self.sum[i]),
+            count=self.count,
+            last=float(self.last[i]),
+            status_counts=self.status[:, i].tolist(),
+        )
+
+    def buckets(self) -> Iterator[Bucket]:
+        """All keys' buckets in frame order (for flushing)."""
+        mins, maxs, sums, lasts = self.min.tolist(), self.max.tolist(), self.sum.tolist(), self.last.tolist()
+        for i, counts in enumerate(self.status.T.tolist()):
+            yield Bucket(self.start, mins[i], maxs[i], sums[i], self.count, lasts[i], counts)
+
+    def reset(self, start: int | None) -> None:
+        self.start = start
+        self.sum[:] = 0.0
+        self.count = 0
+        self.status[:] = 0
+
+
+def _group_buckets(
+    rows: np.ndarray, ts_ns: np.ndarray, values: np.ndarray, statuses: np.ndarray, width_ns: int
+) -> Iterator[tuple[int, Bucket]]:
+    """(row, bucket) per run of samples sharing a row and a bucket, reduced with NumPy."""
+    starts = ts_ns - ts_ns % width_ns
+    change = np.empty(len(rows), dtype=bool)
+    change[0] = True
+    change[1:] = (rows[1:] != rows[:-1]) | (starts[1:] != starts[:-1])
+    idx = np.flatnonzero(change)
+    ends = np.append(idx[1:], len(rows))
+    counts = np.stack([np.add.reduceat((statuses == code).astype(np.int64), idx) for code in range(3)], axis=1)
+    for row, start, lo, hi, total, count, last, status_counts in zip(
+        rows[idx].tolist(),
+        starts[idx].tolist(),
+        np.minimum.reduceat(values, idx).tolist(),
+        np.maximum.reduceat(values, idx).tolist(),
+        np.add.reduceat(values, idx).tolist(),
+        (ends - idx).tolist(),
+        values[ends - 1].tolist(),
+        counts.tolist(),
+    ):
+        yield row, Bucket(start, lo, hi, total, count, last, status_counts)
+
+
+def _raw_buckets(data: HistorySlice) -> Iterator[Bucket]:
+    counts = ([1, 0, 0], [0, 1, 0], [0, 0, 1])
+    for t, v, s in zip(data.timestamps, data.values, data.statuses):
+        yield Bucket(start=t, min=v, max=v, sum=v, count=1, last=v, status_counts=list(counts[s]))
+
+
+def _inside(source: Iterable[Bucket], width_ns: int, start_ns: int | None, end_ns: int | None) -> list[Bucket]:
+    """The buckets of `source` lying entirely within [start_ns, end_ns]."""
+    return [
+        b for b in source
+        if (start_ns is None or b.start >= start_ns) and (end_ns is None or b.start + width_ns - 1 <= end_ns)
+    ]
+
+
+def merge_buckets(source: Iterable[Bucket], width_ns: int) -> list[Bucket]:
+    """Combine time-ordered buckets into epoch-aligned buckets of `width_ns`."""
+    merged: list[Bucket] = []
+    cur: Bucket | None = None
+    for b in source:
+        if b.count == 0:
+            continue
+        start = b.start - b.start % width_ns
+        if cur is None or cur.start != start:
+            cur = Bucket(start, b.min, b.max, b.sum, b.count, b.last, list(b.status_counts))
+            merged.append(cur)
+            continue
+        cur.min = min(cur.min, b.min)
+        cur.max = max(cur.max, b.max)
+        cur.sum += b.sum
+        cur.count += b.count
+        cur.last = b.last
+        for i, n in enumerate(b.status_counts):
+            cur.status_counts[i] += n
+    return merged
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> list[int]:
+    """Largest-Triangle-Three-Buckets: indices of `threshold` representative points."""
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    selected = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        nxt_lo = int((i + 1) * every) + 1
+        nxt_hi = min(int((i + 2) * every) + 1, n)
+        span = nxt_hi - nxt_lo
+        avg_x = sum(xs[nxt_lo:nxt_hi]) / span
+        avg_y = sum(ys[nxt_lo:nxt_hi]) / span
+
+        lo = int(i * every) + 1
+        hi = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+class RollupStore:
+    """Per-key multi-resolution rollups, fed alongside the history store."""
+
+    def __init__(self, levels: tuple[tuple[int, int], ...] = LEVELS, sample_interval: float = 1.0) -> None:
+        # A level no wider than the sample interval holds one sample per
+        # bucket — a copy of raw history — so it is skipped
+        self._spec = tuple((w, c) for w, c in levels if w > sample_interval) or levels[-1:]
+        self._sample_ns = sample_interval * NS
+        self._levels: dict[str, list[_Level]] = {}
+        self._lock = threading.Lock()
+        # Open buckets for the key tuple passed to add_frame, one per level
+        self._frame_keys: Sequence[str] | None = None
+        self._frame_index: dict[str, int] = {}
+        self._frame_open: list[_OpenColumns] = []
+
+    def _key_levels(self, key: str) -> list[_Level]:
+        levels = self._levels.get(key)
+        if levels is None:
+            levels = self._levels[key] = [_Level(w, c) for w, c in self._spec]
+        return levels
+
+    def add_batch(self, samples: Iterable[Sample]) -> None:
+        with self._lock:
+            for key, ts, value, status in samples:
+                for level in self._key_levels(key):
+                    level.add(ts, value, status)
+
+    def add_frame(
+        self, keys: Sequence[str], ts_ns: int, values: Sequence[float], statuses: Sequence[int]
+    ) -> None:
+        """One sample per key at a shared timestamp (see HistoryStore.append_frame)."""
+        values = np.asarray(values, dtype=np.float64)
+        statuses = np.asarray(statuses, dtype=np.intp)
+        with self._lock:
+            if keys is not self._frame_keys:
+                self._flush_frame()
+                self._frame_keys = keys
+                self._frame_index = {k: i for i, k in enumerate(keys)}
+                self._frame_open = [_OpenColumns(w * NS, len(keys)) for w, _ in self._spec]
+            for n, columns in enumerate(self._frame_open):
+                b_start = ts_ns - ts_ns % columns.width
+                if b_start != columns.start:
+                    self._flush_level(n)
+                    columns.reset(b_start)
+                columns.add(values, statuses)
+
+    def add_columns(
+        self,
+        keys: Sequence[str],
+        rows: np.ndarray,
+        ts_ns: np.ndarray,
+        values: np.ndarray,
+        statuses: np.ndarray,
+    ) -> None:
+        """Bulk samples sorted by row, then time (see HistoryStore.append_columns)."""
+        if not len(rows):
+            return
+        with self._lock:
+            # Open frame buckets go first so each ring only ever grows at its tail
+            self._flush_frame()
+            for n, (width, _) in enumerate(self._spec):
+                for key_row, bucket in _group_buckets(rows, ts_ns, values, statuses, width * NS):
+                    self._key_levels(keys[key_row])[n].merge_at(bucket)
+
+    def _flush_level(self, n: int) -> None:
+        columns = self._frame_open[n]
+        if not columns.count:
+            return
+        for key, bucket in zip(self._frame_keys, columns.buckets()):
+            self._key_levels(key)[n].merge_at(bucket)
+        columns.reset(None)
+
+    def _flush_frame(self) -> None:
+        for n in range(len(self._frame_open)):
+            self._flush_level(n)
+
+    def _open_bucket(self, key: str, n: int, start_ns: int | None, end_ns: int | None) -> list[Bucket]:
+        """The not-yet-flushed bucket of level `n` for `key`, if inside the window."""
+        i = self._frame_index.get(key)
+        if i is None or not self._frame_open[n].count:
+            return []
+        columns = self._frame_open[n]
+        if start_ns is not None and columns.start < start_ns - start_ns % columns.width:
+            return []
+        if end_ns is not None and columns.start > end_ns:
+            return []
+        return [columns.bucket(i)]
+
+    def rebuild(self, history: HistoryStore, limit: int) -> None:
+        """Seed rollups from the most recent `limit` stored samples per key."""
+        for key in history.keys():
+            data = history.latest(key, limit)
+            self.add_batch(
+                (key, t, v, s) for t, v, s in zip(data.timestamps, data.values, data.statuses)
+            )
+
+    def aggregate(
+        self,
+        history: HistoryStore,
+        key: str,
+        start_ns: int | None,
+        end_ns: int | None,
+        bucket_s: int,
+    ) -> list[Bucket]:
+        """Buckets of `bucket_s` seconds over the window, from rollups when possible."""
+        width_ns = bucket_s * NS
+        with self._lock:
+            levels = self._levels.get(key, [])
+            for n in reversed(range(len(levels))):
+                level = levels[n]
+                if width_ns % level.width or not level.covers(start_ns):
+                    continue
+                lo, hi = level.span(start_ns, end_ns)
+                pending = self._open_bucket(key, n, start_ns, end_ns)
+                inner = _inside(chain(level.buckets(lo, hi), pending), level.width, start_ns, end_ns)
+                if inner:
+                    break
+            else:
+                inner = None
+        if not inner:
+            # Window older than the retained rollups (or unaligned width): scan raw samples
+            return merge_buckets(_raw_buckets(history.range(key, start_ns, end_ns)), width_ns)
+        # Buckets cut by the window edges are replaced by their raw samples inside it,
+        # so both paths aggregate exactly the samples in [start, end]
+        first, last = inner[0].start, inner[-1].start + level.width
+        head = history.range(key, start_ns, first - 1) if start_ns is not None and start_ns < first else None
+        tail = history.range(key, last, end_ns) if end_ns is not None and end_ns >= last else None
+        return merge_buckets(
+            chain(
+                _raw_buckets(head) if head is not None else (),
+                inner,
+                _raw_buckets(tail) if tail is not None else (),
+            ),
+            width_ns,
+        )
+
+    def downsample(
+        self,
+        history: HistoryStore,
+        key: str,
+        start_ns: int | None,
+        end_ns: int | None,
+        points: int,
+    ) -> tuple[list[int], list[float], list[int]]:
+        """LTTB-downsampled (timestamps, values, status codes) for the window."""
+        limit = max(LTTB_INPUT_LIMIT, points)
+        chosen: list[Bucket] | None = None   # None → raw samples
+        with self._lock:
+            levels = self._levels.get(key, [])
+            for n, level in enumerate(levels):
+                lo, hi = level.span(start_ns, end_ns)
+                coarsest = n == len(levels) - 1
+                if not coarsest and (not level.covers(start_ns) or hi - lo > limit):
+                    continue
+                # Rollup means only when the window holds too many raw samples
+                if (hi - lo) * level.width > limit * self._sample_ns:
+                    pending = self._open_bucket(key, n, start_ns, end_ns)
+                    chosen = merge_buckets(chain(level.buckets(lo, hi), pending), level.width)
+                    half = level.width // 2
+                break
+
+        if chosen is None:
+            data = history.range(key, start_ns, end_ns)
+            xs, ys, ss = list(data.timestamps), list(data.values), list(data.statuses)
+        else:
+            xs = [b.start + half for b in chosen]
+            ys = [b.mean for b in chosen]
+            ss = [b.worst_status for b in chosen]
+
+        idx = lttb(xs, ys, points)
+        return [xs[i] for i in idx], [ys[i] for i in idx], [ss[i] for i in idx]
+
+    def sizes(self) -> dict[str, list[int]]:
+        """Retained bucket count per level, per key (closed buckets only)."""
+        with self._lock:
+            return {key: [lv.size for lv in levels] for key, levels in self._levels.items()}
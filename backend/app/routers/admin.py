@@ -0,0 +1,62 @@
+"""GET/POST /api/admin/profiler — sampling profiler toggle."""
+
+import hmac
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from ..config import ADMIN_TOKEN
+from ..metrics import TimedRoute
+from ..models import ProfilerRequest, ProfilerStatus
+from ..profiler import profiler
+
+
+def _require_admin(x_admin_token: str | None = Header(None)) -> None:
+    # Fail closed: without a configured token the admin endpoints do not exist
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="admin endpoints are disabled (set AQUAVIEW_ADMIN_TOKEN)")
+    if not hmac.compare_digest(x_admin_token or "", ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="admin token required")
+
+
+router = APIRouter(route_class=TimedRoute, dependencies=[Depends(_require_admin)])
+
+
+def _status(limit: int = 20) -> ProfilerStatus:
+    started = profiler.started_at
+    return ProfilerStatus(
+        running=profiler.running,
+        interval_ms=profiler.interval * 1e3,
+        samples=profiler.samples,
+        started_at=datetime.fromtimestamp(started, timezone.utc) if started else None,
+        top=profiler.top(limit),
+    )
+
+
+@router.get("/admin/profiler", response_model=ProfilerStatus)
+def get_profiler(limit: int = Query(20, ge=1, le=500, description="Frames in the summary")):
+    """Return profiler state and the hottest frames by self samples."""
+    return _status(limit)
+
+
+@router.post("/admin/profiler", response_model=ProfilerStatus)
+def set_profiler(body: ProfilerRequest):
+    """Start or stop the sampling profiler (optionally resetting collected stacks)."""
+    if body.reset:
+        profiler.reset()
+    if body.enabled:
+        interval = body.interval_ms / 1e3 if body.interval_ms is not None else None
+        try:
+            profiler.start(interval)
+        except ValueError as exc:
+            raise HTTPException(status_code=422, detail=str(exc))
+    else:
+        profiler.stop()
+    return _status()
+
+
+@router.get("/admin/profiler/folded", response_class=PlainTextResponse)
+def get_profiler_folded():
+    """Collected stacks in folded format (flamegraph.pl, speedscope)."""
+    return PlainTextResponse(profiler.folded())
@@ -1,14 +1,84 @@
-"""GET /api/alerts — current alert list."""
+"""GET /api/alerts, /api/alerts/log & POST /api/alerts/{id}/ack — alert engine."""
 
-from fastapi import APIRouter
+from datetime import datetime, timezone
 
-from ..models import AlertResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+
+from ..history_store import to_ns
+from ..http_cache import cached_response
+from ..metrics import TimedRoute
+from ..models import Alert, AlertLogEntry, AlertLogResponse, AlertResponse, SensorStatus
+from ..sensor_registry import DEFAULT_SITE
 from ..simulator import simulator
+from ..snapshot_bus import require_producer
+
+router = APIRouter(route_class=TimedRoute)
+
+MAX_LOG_LIMIT = 5_000
 
-router = APIRouter()
+
+def _ns(ts: datetime | None) -> int | None:
+    if ts is None:
+        return None
+    return to_ns(ts if ts.tzinfo is not None else ts.replace(tzinfo=timezone.utc))
 
 
 @router.get("/alerts", response_model=AlertResponse)
-def get_alerts():
-    """Return alerts for sensors in warning or danger state."""
-    return AlertResponse(alerts=simulator.get_alerts())
+def get_alerts(
+    request: Request,
+    site: str | None = Query(None, description="Only this site (default: all)"),
+):
+    """
+    Return open and acknowledged alerts.
+
+    Alerts are debounced and use hysteresis around the sensor bands, so an
+    alert stays unchanged (same ETag → 304) until its lifecycle changes.
+    """
+    try:
+        payload = simulator.alerts_payload(site)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"unknown site: {site}")
+    return cached_response(request, payload)
+
+
+@router.get("/alerts/log", response_model=AlertLogResponse, dependencies=[Depends(require_producer)])
+def get_alert_log(
+    since: int = Query(0, ge=0, description="Return events after this cursor"),
+    sensor: str | None = Query(None, description="Tag name (with `site`)"),
+    site: str = Query(DEFAULT_SITE, description="Site of `sensor`"),
+    status: SensorStatus | None = Query(None, description="Severity after the change"),
+    start: datetime | None = Query(None, description="Window start (ISO 8601, UTC if naive)"),
+    end: datetime | None = Query(None, description="Window end (ISO 8601, UTC if naive)"),
+    limit: int = Query(1_000, ge=1, le=MAX_LOG_LIMIT),
+):
+    """
+    Alert lifecycle events (opened/escalated/deescalated/acknowledged/cleared).
+
+    Poll with `since=<cursor from the previous response>` to receive only
+    new events.
+    """
+    engine = simulator.alert_engine
+    key = None
+    if sensor is not None:
+        try:
+            simulator.sensors.lookup(site, sensor)
+        except KeyError:
+            raise HTTPException(status_code=404, detail=f"unknown sensor: {site}/{sensor}")
+        key = f"{site}/{sensor}"
+    events, truncated, head = engine.events(since, key, status, _ns(start), _ns(end), limit)
+    # Resume after the last returned event, or at the log head (as of the same read) if fewer matched
+    cursor = events[-1].cursor if len(events) == limit else max(since, head)
+    return AlertLogResponse(
+        events=[AlertLogEntry(cursor=e.cursor, kind=e.kind, alert=e.alert) for e in events],
+        cursor=cursor,
+        truncated=truncated,
+    )
+
+
+@router.post("/alerts/{alert_id}/ack", response_model=Alert, dependencies=[Depends(require_producer)])
+def acknowledge_alert(alert_id: int):
+    """Acknowledge an open alert; it stays active until the sensor recovers."""
+    try:
+        return simulator.alert_engine.acknowledge(alert_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"no active alert with id {alert_id}")
@@ -1,17 +1,76 @@
 """GET /api/history — sensor history data."""
 
-from fastapi import APIRouter, Query
+import re
+from datetime import datetime, timedelta, timezone
 
-from ..models import HistoryResponse, SensorType
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from ..metrics import TimedRoute
+from ..models import HistoryAggregateResponse, HistoryResponse
+from ..sensor_registry import DEFAULT_SITE
 from ..simulator import simulator
+from ..snapshot_bus import require_shared_history
+
+router = APIRouter(route_class=TimedRoute, dependencies=[Depends(require_shared_history)])
+
+MAX_LIMIT = 86_400  # one day of samples at the default 1 Hz sample rate
+DEFAULT_WINDOW = timedelta(days=1)  # window for bucket/points queries without `start`
+
+_BUCKET_RE = re.compile(r"^(\d+)([smhd]?)$")
+_UNIT_SECONDS = {"": 1, "s": 1, "m": 60, "h": 3_600, "d": 86_400}
+
+
+def _parse_bucket(raw: str) -> int:
+    """'30s', '5m', '1h', '1d' or plain seconds → bucket width in seconds."""
+    match = _BUCKET_RE.match(raw.strip())
+    if not match or int(match.group(1)) == 0:
+        raise HTTPException(status_code=422, detail=f"invalid bucket: {raw!r} (e.g. 30s, 5m, 1h)")
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
 
-router = APIRouter()
 
+def _utc(ts: datetime | None) -> datetime | None:
+    if ts is not None and ts.tzinfo is None:
+        return ts.replace(tzinfo=timezone.utc)
+    return ts
 
-@router.get("/history", response_model=HistoryResponse)
+
+@router.get("/history", response_model=HistoryResponse | HistoryAggregateResponse)
 def get_history(
-    sensor: SensorType = Query(..., description="Sensor type: ph, turbidity, flow, temp"),
-    limit: int = Query(20, ge=1, le=100, description="Number of recent entries"),
+    sensor: str = Query(..., description="Tag name (default site: ph, turbidity, flow, temp)"),
+    site: str = Query(DEFAULT_SITE, description="Site the tag belongs to"),
+    limit: int = Query(20, ge=1, le=MAX_LIMIT, description="Number of recent entries"),
+    start: datetime | None = Query(None, description="Window start (ISO 8601, UTC if naive)"),
+    end: datetime | None = Query(None, description="Window end (ISO 8601, UTC if naive)"),
+    bucket: str | None = Query(None, description="Aggregate per bucket: 30s, 5m, 1h, 1d"),
+    points: int | None = Query(None, ge=3, le=5_000, description="LTTB downsample to N points"),
 ):
-    """Return recent history for a specific sensor."""
-    return HistoryResponse(**simulator.get_history(sensor, limit))
+    """
+    Return history for a specific (site, tag) sensor.
+
+    - default: the last `limit` raw entries (optionally within start/end)
+    - bucket: min/max/mean/last + status counts per bucket
+    - points: LTTB-downsampled entries (status = worst in the represented span)
+
+    bucket/points queries without `start` cover the last 24 hours.
+    """
+    if bucket is not None and points is not None:
+        raise HTTPException(status_code=422, detail="use either 'bucket' or 'points', not both")
+    start, end = _utc(start), _utc(end)
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=422, detail="'start' must not be after 'end'")
+
+    try:
+        if bucket is None and points is None:
+            return HistoryResponse(**simulator.get_history(sensor, limit, start, end, site=site))
+
+        if start is None:
+            start = (end or datetime.now(timezone.utc)) - DEFAULT_WINDOW
+        if bucket is not None:
+            return HistoryAggregateResponse(
+                **simulator.get_history_buckets(sensor, start, end, _parse_bucket(bucket), site=site)
+            )
+        return HistoryResponse(
+            **simulator.get_history_downsampled(sensor, start, end, points, site=site)
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"unknown sensor: {site}/{sensor}")
@@ -0,0 +1,72 @@
+"""POST /api/ingest — batched readings from plant gateways."""
+
+import asyncio
+from datetime import datetime, timezone
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from ..acquisition import acquisition
+from ..config import INGEST_MAX_BYTES
+from ..history_store import to_ns
+from ..ingest import FRAMES_MEDIA_TYPE, NDJSON_MEDIA_TYPES, parse_batch
+from ..metrics import TimedRoute
+from ..models import IngestResponse
+from ..simulator import simulator
+from ..snapshot_bus import require_producer
+
+router = APIRouter(route_class=TimedRoute, dependencies=[Depends(require_producer)])
+
+
+async def _read_body(request: Request) -> bytes:
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > INGEST_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"body exceeds {INGEST_MAX_BYTES} bytes")
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > INGEST_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"body exceeds {INGEST_MAX_BYTES} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+@router.post(
+    "/ingest",
+    response_model=IngestResponse,
+    openapi_extra={"requestBody": {"content": {t: {} for t in (*NDJSON_MEDIA_TYPES, FRAMES_MEDIA_TYPE)}}},
+)
+async def post_ingest(request: Request):
+    """
+    Append a batch of readings to history and publish a new snapshot.
+
+    Body: NDJSON (`application/x-ndjson`, one `{"site", "sensor", "value",
+    "timestamp"}` object per line) or packed binary frames
+    (`application/vnd.aquaview.frames`, see `app/ingest.py`). The batch is
+    rejected as a whole (422) on unknown tags or invalid values; samples
+    older than the newest stored sample of their tag are dropped and counted
+    as stale.
+    """
+    if simulator.replay is not None:
+        raise HTTPException(status_code=409, detail="replaying a recorded session; ingest is disabled")
+    body = await _read_body(request)
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    now_ns = to_ns(datetime.now(timezone.utc))
+    try:
+        # Decoding and validation are pure array work: keep them off the event loop
+        batch = await asyncio.to_thread(parse_batch, body, media_type, simulator.sensors, now_ns)
+    except LookupError as e:
+        raise HTTPException(status_code=415, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    # Recording runs on the event loop, like the acquisition tick
+    accepted = simulator.ingest(batch)
+    if accepted:
+        acquisition.publish(simulator.snapshot)
+    return IngestResponse(
+        received=len(batch),
+        accepted=accepted,
+        stale=len(batch) - accepted,
+        tags=len(np.unique(batch.rows)),
+        seq=simulator.snapshot.seq,
+    )
@@ -0,0 +1,111 @@
+"""POST/GET/DELETE /api/jobs — background pipeline jobs on the worker pool."""
+
+import asyncio
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from ..config import BATCH_MAX_ROWS, UNCERTAINTY_MAX_REALIZATIONS
+from ..http_cache import cached_response
+from ..jobs import Job, job_manager
+from ..metrics import TimedRoute
+from ..models import JobKind, JobListResponse, JobRequest, JobState, JobStatus
+from ..pipeline_batch import request_rows
+from ..snapshot_bus import require_producer
+
+router = APIRouter(route_class=TimedRoute, dependencies=[Depends(require_producer)])
+
+SSE_KEEPALIVE = 15.0  # seconds between SSE comment pings when idle
+
+
+def _job(job_id: str) -> Job:
+    try:
+        return job_manager.get(job_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def post_job(body: JobRequest):
+    """
+    Queue a batch sweep, optimization or Monte Carlo run.
+
+    Returns immediately with the job id; poll `GET /api/jobs/{id}` or
+    follow `/api/jobs/{id}/events`, then fetch `/api/jobs/{id}/result`.
+    """
+    try:
+        rows = request_rows(body.batch) if body.kind is JobKind.BATCH else 0
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if rows > BATCH_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"batch of {rows} rows exceeds limit {BATCH_MAX_ROWS}")
+    if body.kind is JobKind.UNCERTAINTY and body.uncertainty.realizations > UNCERTAINTY_MAX_REALIZATIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{body.uncertainty.realizations} realizations exceed limit {UNCERTAINTY_MAX_REALIZATIONS}",
+        )
+    try:
+        # Planning materializes grids and seeds; keep it off the event loop
+        plan = await asyncio.to_thread(job_manager.plan, body)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        job = job_manager.submit(body.kind, plan)
+    except OverflowError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job_manager.status(job)
+
+
+@router.get("/jobs", response_model=JobListResponse)
+async def list_jobs():
+    """Return all queued, running and retained jobs."""
+    return JobListResponse(jobs=[job_manager.status(job) for job in job_manager.jobs()])
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Return state and progress (finished chunks / total) of a job."""
+    return job_manager.status(_job(job_id))
+
+
+@router.get("/jobs/{job_id}/events")
+async def get_job_events(job_id: str, request: Request):
+    """Server-Sent Events: one `JobStatus` per progress change, until the job finishes."""
+    job = _job(job_id)
+
+    async def events():
+        while not await request.is_disconnected():
+            changed = job.changed
+            status = job_manager.status(job)
+            yield f"event: job\ndata: {status.model_dump_json()}\n\n".encode()
+            if job.finished:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=SSE_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, request: Request):
+    """Result of a succeeded job: the same JSON as the matching synchronous endpoint."""
+    job = _job(job_id)
+    if job.state is not JobState.SUCCEEDED:
+        raise HTTPException(status_code=409, detail=f"job is {job.state.value}")
+    return cached_response(request, job.result)
+
+
+@router.delete("/jobs/{job_id}", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; queued chunks are dropped."""
+    return job_manager.status(job_manager.cancel(_job(job_id).id))
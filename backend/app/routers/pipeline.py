@@ -1,26 +1,301 @@
-"""GET /api/pipeline & POST /api/pipeline/params — pipeline simulation."""
+"""GET /api/pipeline, /api/pipeline/trains, /api/pipeline/dynamic & POST /api/pipeline/* — pipeline simulation."""
 
-from fastapi import APIRouter
+import json
+from datetime import datetime, timezone
+from typing import Literal
 
-from ..models import PipelineParams, PipelineResult
-from ..pipeline import run_pipeline
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response
 
-router = APIRouter()
+from ..config import BATCH_MAX_ROWS, COMPARE_MAX_SCENARIOS, UNCERTAINTY_MAX_REALIZATIONS
+from ..http_cache import cached_response
+from ..metrics import TimedRoute
+from ..models import (
+    BatchRequest,
+    BatchResponse,
+    CompareRequest,
+    CompareResponse,
+    DynamicPipelineState,
+    DynamicTrajectoryResponse,
+    OptimizeRequest,
+    OptimizeResponse,
+    PipelineCacheStats,
+    PipelineParams,
+    PipelineResult,
+    PipelineTableStats,
+    SensitivityRequest,
+    SensitivityResponse,
+    TrainInfo,
+    TrainListResponse,
+    TrainStage,
+    UncertaintyRequest,
+    UncertaintyResponse,
+)
+from ..jobs import job_manager
+from ..optimizer import optimize, optimize_response, request_arrays
+from ..pipeline_batch import evaluate_batch, request_ratios, request_rows, to_columns
+from ..pipeline_cache import CachedPipeline, pipeline_cache
+from ..pipeline_compare import compare, compare_response
+from ..pipeline_dynamic import dynamic_pipeline
+from ..pipeline_sensitivity import sensitivity, sensitivity_response
+from ..pipeline_table import pipeline_tables
+from ..pipeline_uncertainty import run_uncertainty, uncertainty_response
+from ..snapshot_bus import require_producer
+from ..stage_registry import METRICS, Train, train_registry
+from ..wire import wants_binary
+
+router = APIRouter(route_class=TimedRoute)
+
+_FORMAT_QUERY = Query(None, description="'binary' for the compact wire format (default: by Accept header)")
+
+
+def _train(name: str | None) -> Train:
+    try:
+        return train_registry.get(name)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e.args[0]))
+
+
+def _cached(params, train: str | None) -> CachedPipeline:
+    try:
+        return pipeline_cache.get(params, _train(train).name)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def _respond(request: Request, cached: CachedPipeline, format: str | None):
+    payload = cached.wire if wants_binary(request, format) else cached.payload
+    return cached_response(request, payload, vary="Accept, Accept-Encoding")
 
 
 @router.get("/pipeline", response_model=PipelineResult)
-def get_pipeline():
-    """Return pipeline result with all HRT at design value (ratio=1.0)."""
-    return run_pipeline()
+def get_pipeline(
+    request: Request,
+    train: str | None = Query(None, description="Treatment train (default: 'standard')"),
+    format: Literal["json", "binary"] | None = _FORMAT_QUERY,
+):
+    """
+    Return pipeline result with all HRT at design value (ratio=1.0).
+
+    `Accept: application/vnd.aquaview.wire` or `format=binary` returns the
+    compact binary encoding instead (see wire.py).
+    """
+    if train is None:
+        return _respond(request, pipeline_cache.default, format)
+    return _respond(request, _cached(None, train), format)
+
+
+@router.get("/pipeline/trains", response_model=TrainListResponse)
+def get_pipeline_trains():
+    """List the configured treatment trains and their stages in flow order."""
+    return TrainListResponse(
+        default=train_registry.default.name,
+        trains=[
+            TrainInfo(
+                name=train.name,
+                stages=[
+                    TrainStage(stage=stage, stage_name_ko=name, design_hrt_hours=hours)
+                    for stage, name, hours in zip(train.stages, train.names_ko, train.design_hrt.tolist())
+                ],
+            )
+            for train in train_registry
+        ],
+    )
 
 
 @router.post("/pipeline/params", response_model=PipelineResult)
-def post_pipeline_params(body: PipelineParams):
+def post_pipeline_params(
+    body: PipelineParams,
+    request: Request,
+    format: Literal["json", "binary"] | None = _FORMAT_QUERY,
+):
     """
     Recalculate pipeline with given HRT ratios.
 
     Each stage param has:
-    - stage: 'primary_settling' | 'aeration' | 'secondary_settling' | 'nitrification' | 'disinfection'
+    - stage: a stage of the train, e.g. 'primary_settling' | 'aeration' |
+      'secondary_settling' | 'nitrification' | 'disinfection' (standard train)
     - hrt_ratio: 0.25–2.5 (1.0 = design HRT 100%)
+
+    Results are memoized per train and ratio combination (quantized to 0.001).
+    In lookup-table mode misses are interpolated (see GET /api/pipeline/table).
+    Binary responses are negotiated as for GET /api/pipeline.
+    """
+    return _respond(request, _cached(body.params, body.train), format)
+
+
+@router.get("/pipeline/cache", response_model=PipelineCacheStats)
+def get_pipeline_cache_stats():
+    """Return hit/miss/eviction counters of the pipeline result cache."""
+    return pipeline_cache.stats()
+
+
+@router.get("/pipeline/table", response_model=PipelineTableStats)
+def get_pipeline_table():
+    """Grid and verified error bound of the lookup-table mode (AQUAVIEW_PIPELINE_TABLE)."""
+    if pipeline_tables is None:
+        return PipelineTableStats(enabled=False)
+    table = next(iter(pipeline_tables.values()))
+    return PipelineTableStats(
+        enabled=True,
+        points=table.points,
+        step=table.step_size,
+        max_error={
+            name: dict(zip(METRICS, t.error.tolist())) for name, t in pipeline_tables.items()
+        },
+    )
+
+
+@router.get("/pipeline/dynamic", response_model=DynamicPipelineState)
+def get_pipeline_dynamic(request: Request):
+    """
+    Current state of the time-stepped plant model.
+
+    Stages are tanks in series whose HRT follows the live flow reading;
+    biological stages are corrected for the live temperature. Updated
+    once per sensor tick (also pushed on the `dynamics` stream channel).
+    """
+    return cached_response(request, dynamic_pipeline.payload)
+
+
+@router.get(
+    "/pipeline/dynamic/trajectory",
+    response_model=DynamicTrajectoryResponse,
+    dependencies=[Depends(require_producer)],
+)
+def get_pipeline_dynamic_trajectory(
+    limit: int = Query(600, ge=1, le=86_400, description="Most recent ticks"),
+    start: datetime | None = Query(None, description="Only ticks at or after this time (UTC if naive)"),
+    stage: list[str] | None = Query(None, description="Only these stages of the simulated train (repeatable)"),
+):
+    """Per-stage effluent over recent ticks, as columns aligned with `timestamps`."""
+    if start is not None and start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    try:
+        return dynamic_pipeline.trajectory(limit, start, stage)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+@router.post("/pipeline/batch", response_model=BatchResponse)
+def post_pipeline_batch(body: BatchRequest):
+    """
+    Evaluate many HRT ratio vectors in one vectorized pass.
+
+    - params: [[ratio per stage of the train, in order], ...]
+    - grid: {stage: {start, stop, num}} — Cartesian product of per-stage axes
+    - train: treatment train (default 'standard')
+
+    Returns columns (one list per field) instead of one object per row.
+    """
+    _train(body.train)
+    try:
+        rows = request_rows(body)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if rows > BATCH_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"batch of {rows} rows exceeds limit {BATCH_MAX_ROWS}")
+
+    try:
+        result = evaluate_batch(request_ratios(body), train=body.train)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    content = json.dumps(to_columns(result, body.include_stages)).encode()
+    return Response(content=content, media_type="application/json")
+
+
+@router.post("/pipeline/optimize", response_model=OptimizeResponse)
+def post_pipeline_optimize(body: OptimizeRequest):
+    """
+    Find the lowest (weighted) total HRT whose treated water stays NORMAL.
+
+    - bounds: {stage: {lo, hi}} — optional per-stage ratio limits
+    - weights: {stage: w} — optional per-stage cost weights
+    - time_budget_ms: search time limit
+    - train: treatment train (default 'standard')
+
+    Also returns the Pareto front of HRT cost vs. effluent margin.
+    """
+    _train(body.train)
+    try:
+        bounds, weights = request_arrays(body)
+        outcome = optimize(bounds, weights, body.time_budget_ms / 1000, body.max_front_points, body.train)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return optimize_response(outcome)
+
+
+@router.post("/pipeline/sensitivity", response_model=SensitivityResponse)
+def post_pipeline_sensitivity(body: SensitivityRequest):
+    """
+    Jacobian of treated water (bod, tss, cod, ammonia, turbidity, coliform)
+    with respect to each stage's HRT ratio at one operating point.
+
+    Derivatives are analytic (chain rule through the removal curves) and
+    computed in one pass; `most_sensitive` names the stage whose ratio
+    moves each metric the most.
+    """
+    train = _train(body.train)
+    try:
+        ratios = train.ratio_vector(body.hrt_ratios)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return sensitivity_response(sensitivity(ratios[None, :], train))
+
+
+@router.post("/pipeline/compare", response_model=CompareResponse)
+def post_pipeline_compare(body: CompareRequest):
+    """
+    Evaluate named scenarios (each a POST /api/pipeline/params body) in one
+    pass and report treated-water deltas against the baseline scenario.
+
+    Scenarios of a train whose leading stages have the same HRT ratios share
+    those stages' results; `stage_evaluations` counts what was computed.
+    """
+    if len(body.scenarios) > COMPARE_MAX_SCENARIOS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{len(body.scenarios)} scenarios exceed limit {COMPARE_MAX_SCENARIOS}",
+        )
+    for scenario in body.scenarios.values():
+        _train(scenario.train)
+    try:
+        outcome = compare(body.scenarios)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return compare_response(outcome, body.baseline or next(iter(body.scenarios)))
+
+
+@router.post("/pipeline/uncertainty", response_model=UncertaintyResponse)
+def post_pipeline_uncertainty(body: UncertaintyRequest):
+    """
+    Monte Carlo run of the pipeline at one HRT operating point.
+
+    Influent quality (default: typical municipal ranges) and removal-curve
+    parameters (relative spread `curve_spread`) are sampled per realization.
+    Returns percentile bands per stage, the probability of exceeding each
+    effluent standard, and the overall status distribution. The same
+    `seed` gives the same result for any `workers`.
     """
-    return run_pipeline(body.params)
+    if body.realizations > UNCERTAINTY_MAX_REALIZATIONS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"{body.realizations} realizations exceed limit {UNCERTAINTY_MAX_REALIZATIONS}",
+        )
+    workers = min(body.workers, job_manager.max_workers)
+    try:
+        ratios = _train(body.train).ratio_vector(body.hrt_ratios)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    outcome = run_uncertainty(
+        ratios,
+        influent=body.influent,
+        curve_spread=body.curve_spread,
+        realizations=body.realizations,
+        seed=body.seed,
+        percentiles=body.percentiles,
+        train=body.train,
+        # Chunks run on the shared job pool, never on a per-request one
+        executor=job_manager.pool if workers > 1 else None,
+    )
+    return uncertainty_response(outcome, workers)
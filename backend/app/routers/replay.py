@@ -0,0 +1,61 @@
+"""GET/POST /api/replay — playback control for a recorded session."""
+
+from datetime import timezone
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from ..history_store import from_ns, to_ns
+from ..metrics import TimedRoute
+from ..models import ReplayControl, ReplayStatus
+from ..replay import ReplaySource
+from ..simulator import simulator
+from ..snapshot_bus import require_producer
+
+router = APIRouter(route_class=TimedRoute, dependencies=[Depends(require_producer)])
+
+
+def _replay() -> ReplaySource:
+    if simulator.replay is None:
+        raise HTTPException(status_code=404, detail="not in replay mode (set AQUAVIEW_REPLAY_PATH)")
+    return simulator.replay
+
+
+def _status(replay: ReplaySource) -> ReplayStatus:
+    session = replay.session
+    return ReplayStatus(
+        path=session.path,
+        tags=len(session.keys),
+        records=len(session),
+        start=from_ns(session.start_ns),
+        end=from_ns(session.end_ns),
+        position=from_ns(min(replay.playhead_ns, session.end_ns)),
+        records_played=replay.position,
+        speed=replay.speed,
+        paused=replay.paused,
+        finished=replay.finished,
+    )
+
+
+@router.get("/replay", response_model=ReplayStatus)
+async def get_replay():
+    """Return the recording being replayed and the playback position."""
+    return _status(_replay())
+
+
+@router.post("/replay", response_model=ReplayStatus)
+async def control_replay(body: ReplayControl):
+    """
+    Change speed (1–1000×), pause/resume, or seek. Seeking rebuilds history
+    from the records just before the new position; the sensors, history,
+    alerts and stream endpoints follow the replayed session.
+    """
+    replay = _replay()
+    # Runs on the event loop, between acquisition ticks
+    if body.speed is not None:
+        replay.set_speed(body.speed)
+    if body.paused is not None:
+        replay.set_paused(body.paused)
+    if body.seek is not None:
+        seek = body.seek if body.seek.tzinfo is not None else body.seek.replace(tzinfo=timezone.utc)
+        replay.seek(to_ns(seek))
+    return _status(replay)
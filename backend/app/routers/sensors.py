@@ -1,14 +1,52 @@
-"""GET /api/sensors — current sensor readings."""
+"""GET /api/sensors, /api/sites — current sensor readings and configured sites."""
 
-from fastapi import APIRouter
+from typing import Literal
 
-from ..models import SensorResponse
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from ..http_cache import cached_response
+from ..metrics import TimedRoute
+from ..models import SensorResponse, SiteInfo, SiteResponse
 from ..simulator import simulator
+from ..wire import wants_binary
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("/sensors", response_model=SensorResponse)
-def get_sensors():
-    """Return current readings for all 4 sensors."""
-    return SensorResponse(sensors=simulator.get_all_sensors())
+def get_sensors(
+    request: Request,
+    site: str | None = Query(None, description="Only this site (default: all)"),
+    format: Literal["json", "binary"] | None = Query(
+        None, description="'binary' for the compact wire format (default: by Accept header)"
+    ),
+    since: int | None = Query(None, ge=0, description="Binary only: delta against this snapshot seq"),
+):
+    """
+    Return current readings for all tags (latest acquired snapshot).
+
+    The body is serialized once per tick; `If-None-Match` with the current
+    ETag gets 304. `Accept: application/vnd.aquaview.wire` or
+    `format=binary` returns a binary frame (see wire.py): with `since`, only
+    the tags changed after that snapshot, or a full frame when it is no
+    longer held.
+    """
+    snapshot = simulator.snapshot
+    try:
+        if wants_binary(request, format):
+            payload = simulator.wire.payload(snapshot, site, since)
+        else:
+            payload = snapshot.sensors_payload(site)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"unknown site: {site}")
+    return cached_response(request, payload, vary="Accept, Accept-Encoding")
+
+
+@router.get("/sites", response_model=SiteResponse)
+def get_sites():
+    """Return configured sites and their tag names."""
+    specs = simulator.sensors.specs
+    return SiteResponse(sites=[
+        SiteInfo(site=site, tags=[specs[i].tag for i in rows])
+        for site, rows in simulator.sensors.sites.items()
+    ])
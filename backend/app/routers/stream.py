@@ -0,0 +1,108 @@
+"""WS /api/stream & GET /api/stream/sse — server-push updates."""
+
+import asyncio
+import contextlib
+import json
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from ..metrics import TimedRoute
+from ..stream import CHANNELS, hub, parse_channels
+
+router = APIRouter(route_class=TimedRoute)
+
+SSE_KEEPALIVE = 15.0  # seconds between SSE comment pings when idle
+
+_CHANNELS_QUERY = Query(
+    ",".join(CHANNELS),
+    description="Comma-separated channels: sensors, alerts, pipeline, dynamics",
+)
+
+
+@router.websocket("/stream")
+async def stream_ws(
+    websocket: WebSocket,
+    channels: str = _CHANNELS_QUERY,
+    format: Literal["json", "binary"] = Query("json", description="'binary': wire frames for sensors and pipeline"),
+):
+    """
+    Push one JSON frame per update: {"channel", "seq", "data"}.
+
+    `data` has the same shape as the matching REST response. Clients may
+    change their filter at any time by sending {"channels": [...]}. With
+    `format=binary`, sensors and pipeline updates are binary messages in
+    the wire format (sensors as deltas, see wire.py); other channels stay JSON.
+    """
+    try:
+        selected = parse_channels(channels)
+    except ValueError as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+        return
+
+    await websocket.accept()
+    sub = hub.subscribe(selected, binary=format == "binary")
+
+    async def send_frames() -> None:
+        while True:
+            frame = await sub.get()
+            data = sub.wire(frame)
+            if data is None:
+                await websocket.send_text(frame.text)
+            else:
+                await websocket.send_bytes(data)
+
+    async def receive_filters() -> None:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", status.WS_1000_NORMAL_CLOSURE))
+            # Malformed messages (not JSON, not an object, bad channels) are answered and ignored
+            try:
+                body = json.loads(message.get("text") or message.get("bytes") or "")
+                if not isinstance(body, dict):
+                    raise ValueError('expected a JSON object like {"channels": [...]}')
+                hub.set_channels(sub, parse_channels(body.get("channels", [])))
+            except ValueError as e:
+                await websocket.send_json({"error": str(e)})
+
+    tasks = [asyncio.create_task(send_frames()), asyncio.create_task(receive_filters())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            with contextlib.suppress(WebSocketDisconnect):
+                task.result()
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unsubscribe(sub)
+
+
+@router.get("/stream/sse")
+async def stream_sse(request: Request, channels: str = _CHANNELS_QUERY):
+    """Server-Sent Events fallback for clients without WebSocket support."""
+    try:
+        selected = parse_channels(channels)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    sub = hub.subscribe(selected)
+
+    async def events():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    frame = await asyncio.wait_for(sub.get(), timeout=SSE_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                yield frame.sse
+        finally:
+            hub.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
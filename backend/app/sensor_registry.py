@@ -0,0 +1,196 @@
+"""
+Sensor tag registry in struct-of-arrays layout.
+
+Sensors are identified by (site, tag). Every tag carries a `SensorType`
+whose `SENSOR_CONFIG` entry supplies defaults for unit and bands; a
+config file may override them per tag. All per-tag parameters live in
+parallel NumPy arrays so that value generation and band classification
+run as one vectorized step per tick, however many tags there are.
+
+Config file (JSON, path in AQUAVIEW_SENSOR_CONFIG):
+
+    {"sites": [
+        {"site": "plant-a", "tags": [
+            {"tag": "ph", "type": "ph"},
+            {"tag": "flow-inlet", "type": "flow", "normal": [40, 160]}
+        ]}
+    ]}
+
+Without a config file a single "default" site holds the four built-in
+sensors, tagged by their type (ph, turbidity, flow, temp).
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+from .models import SensorType
+
+DEFAULT_SITE = "default"
+
+# Status codes (same convention as history_store.STATUS_BY_CODE)
+NORMAL, WARNING, DANGER = 0, 1, 2
+
+# ── Per-type defaults ───────────────────────────────────────────────
+# range: simulation generation range
+# Normal zone: normal_lo <= value <= normal_hi
+# Warning zone: inside "warning" but outside "normal"; outside warning → danger
+
+SENSOR_CONFIG: dict[SensorType, dict] = {
+    SensorType.PH: {
+        "unit": "pH",
+        "range": (4.0, 11.0),
+        "normal": (6.5, 8.5),
+        "warning": (6.0, 9.0),
+    },
+    SensorType.TURBIDITY: {
+        "unit": "NTU",
+        "range": (0.0, 15.0),
+        "normal": (0.0, 5.0),
+        "warning": (0.0, 10.0),
+    },
+    SensorType.FLOW: {
+        "unit": "m³/h",
+        "range": (10.0, 200.0),
+        "normal": (50.0, 150.0),
+        "warning": (30.0, 180.0),
+    },
+    SensorType.TEMP: {
+        "unit": "°C",
+        "range": (5.0, 35.0),
+        "normal": (15.0, 25.0),
+        "warning": (10.0, 30.0),
+    },
+}
+
+
+@dataclass(frozen=True)
+class TagSpec:
+    """One configured sensor tag."""
+    site: str
+    tag: str
+    type: SensorType
+    unit: str
+    range: tuple[float, float]
+    normal: tuple[float, float]
+    warning: tuple[float, float]
+
+    @property
+    def key(self) -> str:
+        return f"{self.site}/{self.tag}"
+
+
+def tag_spec(site: str, tag: str, sensor_type: SensorType | str, **overrides) -> TagSpec:
+    """Build a TagSpec from type defaults plus optional unit/range/normal/warning overrides."""
+    sensor_type = SensorType(sensor_type)
+    base = SENSOR_CONFIG[sensor_type]
+    fields = {name: overrides.get(name, base[name]) for name in ("unit", "range", "normal", "warning")}
+    for name in ("range", "normal", "warning"):
+        lo, hi = fields[name]
+        if lo > hi:
+            raise ValueError(f"{site}/{tag}: {name} lower bound exceeds upper bound")
+        fields[name] = (float(lo), float(hi))
+    return TagSpec(site=site, tag=tag, type=sensor_type, **fields)
+
+
+class SensorArray:
+    """Immutable struct-of-arrays view of all configured tags."""
+
+    def __init__(self, specs: list[TagSpec]) -> None:
+        if not specs:
+            raise ValueError("at least one sensor tag is required")
+        self.specs: tuple[TagSpec, ...] = tuple(specs)
+        self.keys: tuple[str, ...] = tuple(s.key for s in specs)
+        self.key_rows: dict[str, int] = {k: i for i, k in enumerate(self.keys)}
+        self.index: dict[tuple[str, str], int] = {}
+        for i, s in enumerate(specs):
+            if (s.site, s.tag) in self.index:
+                raise ValueError(f"duplicate sensor tag: {s.key}")
+            self.index[(s.site, s.tag)] = i
+
+        def column(name: str, j: int) -> np.ndarray:
+            col = np.array([getattr(s, name)[j] for s in specs], dtype=np.float64)
+            col.flags.writeable = False
+            return col
+
+        self.range_lo, self.range_hi = column("range", 0), column("range", 1)
+        self.normal_lo, self.normal_hi = column("normal", 0), column("normal", 1)
+        self.warning_lo, self.warning_hi = column("warning", 0), column("warning", 1)
+
+        # Row indices per site, in config order
+        self.sites: dict[str, list[int]] = {}
+        for i, s in enumerate(specs):
+            self.sites.setdefault(s.site, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def lookup(self, site: str, tag: str) -> int:
+        """Row index of (site, tag); raises KeyError if unknown."""
+        try:
+            return self.index[(site, tag)]
+        except KeyError:
+            raise KeyError(f"unknown sensor: {site}/{tag}") from None
+
+    def rows(self, site: str | None) -> list[int] | range:
+        """Row indices of one site, or all rows when `site` is None."""
+        if site is None:
+            return range(len(self.specs))
+        try:
+            return self.sites[site]
+        except KeyError:
+            raise KeyError(f"unknown site: {site}") from None
+
+    def classify(self, values: np.ndarray) -> np.ndarray:
+        """Vectorized band classification → int8 status codes."""
+        return classify_bands(values, self.normal_lo, self.normal_hi, self.warning_lo, self.warning_hi)
+
+    def classify_rows(self, values: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Classify samples of arbitrary tags: `values[j]` belongs to row `rows[j]`."""
+        return classify_bands(
+            values, self.normal_lo[rows], self.normal_hi[rows], self.warning_lo[rows], self.warning_hi[rows]
+        )
+
+
+def classify_bands(
+    values: np.ndarray,
+    normal_lo: np.ndarray,
+    normal_hi: np.ndarray,
+    warning_lo: np.ndarray,
+    warning_hi: np.ndarray,
+) -> np.ndarray:
+    """Status code per value: NORMAL inside normal, WARNING inside warning, else DANGER."""
+    codes = np.full(values.shape, DANGER, dtype=np.int8)
+    codes[(values >= warning_lo) & (values <= warning_hi)] = WARNING
+    codes[(values >= normal_lo) & (values <= normal_hi)] = NORMAL
+    return codes
+
+
+def default_sensor_array() -> SensorArray:
+    """The four built-in sensors on the default site."""
+    return SensorArray([tag_spec(DEFAULT_SITE, t.value, t) for t in SensorType])
+
+
+def load_sensor_config(path: str) -> SensorArray:
+    """Load sites and tags from a JSON config file (see module docstring)."""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    specs = []
+    for site in config["sites"]:
+        for tag in site["tags"]:
+            overrides = {k: tag[k] for k in ("unit", "range", "normal", "warning") if k in tag}
+            specs.append(tag_spec(site["site"], tag["tag"], tag["type"], **overrides))
+    return SensorArray(specs)
+
+
+def synthetic_sensor_array(sites: int, tags_per_site: int) -> SensorArray:
+    """Many sites cycling through the built-in types (benchmarks and load tests)."""
+    types = list(SensorType)
+    return SensorArray([
+        tag_spec(f"site-{s:03d}", f"{types[t % len(types)].value}-{t:04d}", types[t % len(types)])
+        for s in range(sites)
+        for t in range(tags_per_site)
+    ])
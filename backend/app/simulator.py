@@ -1,159 +1,581 @@
-"""In-memory sensor data simulator for AquaView."""
+"""
+Sensor state for AquaView and its producers.
+
+`SensorSimulator` owns the live readings, history, rollups, anomaly
+detector and alert engine. Producers publish snapshots through the same path: the random
+walk (`tick`, driven by the acquisition loop), batches of real readings
+pushed to `POST /api/ingest` (`ingest`), or — in replay mode — records
+of a recorded session (`tick` pulls them from a `ReplaySource`). In a
+reader process of the snapshot bus there is no producer: snapshots
+published by the producer process are installed with `follow`.
+"""
 
 from __future__ import annotations
 
-import random
-from collections import deque
+import math
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 
-from .models import SensorStatus, SensorType
-
-# ── Sensor configurations ──────────────────────────────────────────
-# Each sensor: (unit, normal_min, normal_max, warn_lo, warn_hi, danger_lo, danger_hi)
-# Danger zone: value < danger_lo or value > danger_hi
-# Warning zone: danger_lo <= value < warn_lo or warn_hi < value <= danger_hi
-# Normal zone: warn_lo <= value <= warn_hi
-
-SENSOR_CONFIG: dict[SensorType, dict] = {
-    SensorType.PH: {
-        "unit": "pH",
-        "range": (4.0, 11.0),       # simulation generation range
-        "normal": (6.5, 8.5),
-        "warning": (6.0, 9.0),
-        # outside warning → danger
-    },
-    SensorType.TURBIDITY: {
-        "unit": "NTU",
-        "range": (0.0, 15.0),
-        "normal": (0.0, 5.0),
-        "warning": (0.0, 10.0),
-    },
-    SensorType.FLOW: {
-        "unit": "m³/h",
-        "range": (10.0, 200.0),
-        "normal": (50.0, 150.0),
-        "warning": (30.0, 180.0),
-    },
-    SensorType.TEMP: {
-        "unit": "°C",
-        "range": (5.0, 35.0),
-        "normal": (15.0, 25.0),
-        "warning": (10.0, 30.0),
-    },
-}
-
-MAX_HISTORY = 100  # max history entries to keep per sensor
-
-
-def _classify(value: float, config: dict) -> SensorStatus:
-    """Classify a sensor value into normal/warning/danger."""
-    n_lo, n_hi = config["normal"]
-    w_lo, w_hi = config["warning"]
-
-    if n_lo <= value <= n_hi:
-        return SensorStatus.NORMAL
-    if w_lo <= value <= w_hi:
-        return SensorStatus.WARNING
-    return SensorStatus.DANGER
-
-
-def _generate_value(config: dict, prev_value: float | None = None) -> float:
-    """Generate a realistic sensor value with small drift from previous."""
-    r_lo, r_hi = config["range"]
-    n_lo, n_hi = config["normal"]
-
-    if prev_value is None:
-        # First reading: mostly normal with some variance
-        base = random.uniform(n_lo, n_hi)
-        noise = random.gauss(0, (n_hi - n_lo) * 0.3)
-        return round(max(r_lo, min(r_hi, base + noise)), 2)
-
-    # Drift from previous value — biased toward normal range
-    drift = random.gauss(0, (n_hi - n_lo) * 0.15)
-    # Slight pull toward normal center
-    center = (n_lo + n_hi) / 2
-    pull = (center - prev_value) * 0.05
-    new_val = prev_value + drift + pull
-
-    return round(max(r_lo, min(r_hi, new_val)), 2)
+import numpy as np
+
+from .alert_engine import AlertEngine
+from .anomaly import ANOMALY_BY_CODE, AnalyticsFrame, AnomalyDetector
+from .config import (
+    ALERT_HYSTERESIS,
+    ALERT_LOG_CAPACITY,
+    ALERT_MIN_DURATION,
+    ANOMALY_ALERTS,
+    ANOMALY_DRIFT_THRESHOLD,
+    ANOMALY_SPIKE_Z,
+    BUS_READER,
+    HISTORY_BACKEND,
+    HISTORY_CAPACITY,
+    HISTORY_COMMIT_INTERVAL,
+    HISTORY_PATH,
+    REPLAY_PATH,
+    REPLAY_SPEED,
+    SAMPLE_INTERVAL,
+    SENSOR_CONFIG_PATH,
+    SIMULATE,
+    SIMULATOR_SEED,
+    WIRE_DELTA_WINDOW,
+)
+from .history_store import (
+    STATUS_BY_CODE,
+    HistorySlice,
+    HistoryStore,
+    RingBufferHistory,
+    SQLiteHistory,
+    create_history_store,
+    from_ns,
+    to_ns,
+)
+from .http_cache import SerializedBody
+from .ingest import IngestBatch
+from .models import Alert, AlertResponse, SensorAnalytics, SensorData, SensorResponse
+from .replay import ReplaySource, open_replay
+from .rollup import RollupStore
+from .sensor_registry import (
+    DEFAULT_SITE,
+    SensorArray,
+    TagSpec,
+    default_sensor_array,
+    load_sensor_config,
+)
+from .wire import WireEncoder
+
+
+REPLAY_BACKFILL_SAMPLES = 2_000_000   # history rebuilt behind the playhead after a seek
+REPLAY_DETECTOR_RECORDS = 256         # records fed to a fresh anomaly detector after a seek
+
+# Random walk: drift σ as a fraction of the normal band width, pull toward
+# the band centre per tick, and standard normals pre-drawn per block
+DRIFT_SCALE = 0.15
+MEAN_REVERSION = 0.05
+NOISE_BLOCK_SAMPLES = 1 << 18
+
+
+class RandomWalk:
+    """
+    Seeded, mean-reverting random walk over all tags.
+
+    Drift noise is drawn as standard normals for a block of ticks at once
+    (`NOISE_BLOCK_SAMPLES` values, one row per tick) and each tick applies
+    the update to every tag in a few in-place array ops. Normals are
+    consumed in draw order, so the series depends only on the seed and
+    the tag count, not on the block size.
+    """
+
+    def __init__(self, sensors: SensorArray, seed: int | None = None) -> None:
+        self.sensors = sensors
+        self.rng = np.random.default_rng(seed)
+        width = sensors.normal_hi - sensors.normal_lo
+        self._scale = width * DRIFT_SCALE
+        # prev + drift + (centre − prev) · pull, with the constant part precomputed
+        self._target = (sensors.normal_lo + sensors.normal_hi) / 2 * MEAN_REVERSION
+        self._rows = max(1, NOISE_BLOCK_SAMPLES // len(sensors))
+        self._noise = np.empty((0, len(sensors)))
+        self._next = 0
+
+    def initial(self) -> np.ndarray:
+        """First reading: uniform in the normal band plus wide noise."""
+        s = self.sensors
+        base = self.rng.uniform(s.normal_lo, s.normal_hi)
+        values = base + self.rng.normal(0.0, (s.normal_hi - s.normal_lo) * 0.3)
+        return self._finish(values)
+
+    def step(self, prev: np.ndarray) -> np.ndarray:
+        """Next reading for every tag: drift plus a slight pull toward the band centre."""
+        if self._next == len(self._noise):
+            self._noise = self.rng.standard_normal((self._rows, len(self.sensors)))
+            self._next = 0
+        values = self._noise[self._next] * self._scale
+        self._next += 1
+        values += prev * (1.0 - MEAN_REVERSION)
+        values += self._target
+        return self._finish(values)
+
+    def _finish(self, values: np.ndarray) -> np.ndarray:
+        np.clip(values, self.sensors.range_lo, self.sensors.range_hi, out=values)
+        return np.round(values, 2, out=values)
+
+
+@dataclass(frozen=True)
+class SensorSnapshot:
+    """
+    Immutable view of one simulator tick, shared by all readers.
+
+    Values, status codes and analytics are columns aligned with `sensors`;
+    response models and their serialized JSON are built lazily per site
+    and cached on the snapshot, so each is encoded at most once per tick.
+    Alerts come from the alert engine and are re-serialized only when
+    they change.
+    """
+    seq: int
+    timestamp: datetime
+    sensors: SensorArray
+    values: np.ndarray
+    statuses: np.ndarray
+    analytics: AnalyticsFrame
+    alerts_payload: SerializedBody   # active alerts (all sites) after this tick
+    _cache: dict = field(default_factory=dict, repr=False, compare=False)
+
+    def sensor_data(self, site: str | None = None) -> tuple[SensorData, ...]:
+        """Readings for one site (all sites when None). Raises KeyError."""
+        key = ("sensors", site)
+        cached = self._cache.get(key)
+        if cached is None:
+            rows = self.sensors.rows(site)
+            specs, values, codes = self.sensors.specs, self.values.tolist(), self.statuses.tolist()
+            analytics = self._analytics()
+            cached = self._cache[key] = tuple(
+                SensorData(
+                    site=specs[i].site,
+                    sensor=specs[i].tag,
+                    value=values[i],
+                    unit=specs[i].unit,
+                    status=STATUS_BY_CODE[codes[i]],
+                    timestamp=self.timestamp,
+                    analytics=analytics[i],
+                )
+                for i in rows
+            )
+        return cached
+
+    def alerts(self, site: str | None = None) -> tuple[Alert, ...]:
+        """Active alerts as published with this snapshot (one site or all)."""
+        key = ("alerts", site)
+        cached = self._cache.get(key)
+        if cached is None:
+            if site is not None and site not in self.sensors.sites:
+                raise KeyError(f"unknown site: {site}")
+            alerts = self._cache.get(("alerts", None))
+            if alerts is None:
+                alerts = self._cache[("alerts", None)] = tuple(
+                    AlertResponse.model_validate_json(self.alerts_payload.body).alerts
+                )
+            cached = self._cache[key] = tuple(a for a in alerts if site is None or a.site == site)
+        return cached
+
+    def site_alerts_payload(self, site: str | None = None) -> SerializedBody:
+        """`AlertResponse` JSON for one site (all when None). Raises KeyError."""
+        if site is None:
+            return self.alerts_payload
+        key = ("alerts_payload", site)
+        cached = self._cache.get(key)
+        if cached is None:
+            response = AlertResponse(alerts=list(self.alerts(site)))
+            cached = self._cache[key] = SerializedBody.from_model(response)
+        return cached
+
+    def _analytics(self) -> list[SensorAnalytics | None]:
+        cached = self._cache.get("analytics")
+        if cached is None:
+            a = self.analytics
+            cached = self._cache["analytics"] = [
+                SensorAnalytics(
+                    ewma=round(ewma, 4),
+                    std=round(std, 4),
+                    rate=round(rate, 4),
+                    cusum=round(cusum, 2),
+                    anomaly=ANOMALY_BY_CODE[code],
+                ) if seen else None
+                for seen, ewma, std, rate, cusum, code in zip(
+                    a.seen.tolist(), a.ewma.tolist(), a.std.tolist(),
+                    a.rate.tolist(), a.cusum.tolist(), a.anomaly.tolist(),
+                )
+            ]
+        return cached
+
+    def sensors_payload(self, site: str | None = None) -> SerializedBody:
+        """`SensorResponse` JSON for one site (all when None), serialized once."""
+        key = ("sensors_payload", site)
+        cached = self._cache.get(key)
+        if cached is None:
+            response = SensorResponse(sensors=list(self.sensor_data(site)))
+            cached = self._cache[key] = SerializedBody.from_model(response)
+        return cached
 
 
 class SensorSimulator:
-    """Manages simulated sensor data with history."""
-
-    def __init__(self) -> None:
-        # Latest value per sensor
-        self._current: dict[SensorType, float] = {}
-        # History per sensor (deque for auto-truncation)
-        self._history: dict[SensorType, deque] = {
-            st: deque(maxlen=MAX_HISTORY) for st in SensorType
-        }
-        # Generate initial readings
-        self._tick()
+    """Manages sensor readings with history; simulated and ingested data share one path."""
 
-    def _tick(self) -> None:
-        """Generate one new reading for every sensor."""
-        now = datetime.now(timezone.utc)
-        for sensor_type, config in SENSOR_CONFIG.items():
-            prev = self._current.get(sensor_type)
-            value = _generate_value(config, prev)
-            status = _classify(value, config)
-            self._current[sensor_type] = value
-            self._history[sensor_type].append({
-                "value": value,
-                "status": status,
-                "timestamp": now,
-            })
-
-    def get_all_sensors(self) -> list[dict]:
-        """Return current readings for all sensors (generates new tick)."""
-        self._tick()
+    def __init__(
+        self,
+        history: HistoryStore,
+        sensors: SensorArray | None = None,
+        simulate: bool = True,
+        replay: ReplaySource | None = None,
+        seed: int | None = None,
+        reader: bool = False,
+    ) -> None:
+        self.sensors = sensors or default_sensor_array()
+        self.alert_engine = self._new_alert_engine()
+        # EWMA / Welford / rate / CUSUM per tag, fed with every recorded sample
+        self.detector = self._new_detector()
+        # Binary sensor frames; recent snapshots are kept as delta bases
+        self.wire = WireEncoder(self.sensors, WIRE_DELTA_WINDOW)
+        # Same seed → same series (tests, benchmarks)
+        self.walk = RandomWalk(self.sensors, seed)
+        # Latest value per tag (row-aligned with self.sensors)
+        self._current: np.ndarray | None = None
+        # Newest stored timestamp per tag; older ingested samples are dropped
+        self._last_ns = np.full(len(self.sensors), np.iinfo(np.int64).min, dtype=np.int64)
+        # History per tag, keyed by "site/tag"
+        self.history = history
+        # Multi-resolution aggregates, updated incrementally with history
+        self.rollups = RollupStore(sample_interval=SAMPLE_INTERVAL)
+        # Snapshot bus reader: history is the producer's database, read as is
+        self.reader = reader
+        if not reader:
+            self.rollups.rebuild(history, HISTORY_CAPACITY)
+            for row, key in enumerate(self.sensors.keys):
+                tail = history.latest(key, 1)
+                if len(tail):
+                    self._last_ns[row] = tail.timestamps[-1]
+        self._seq = 0
+        self._snapshot: SensorSnapshot
+        self.ingested = 0    # samples accepted from ingest batches
+        self.stale = 0       # ingested samples older than the stored tail of their tag
+        # Replay: recorded columns → sensor rows; unrecorded tags hold their band centre
+        self.replay = replay
+        self._replay_generation = -1
+        if replay is not None:
+            unknown = [k for k in replay.session.keys if k not in self.sensors.key_rows]
+            if unknown:
+                raise ValueError(f"recorded tags missing from the sensor config: {', '.join(unknown[:5])}")
+            self._replay_rows = np.array([self.sensors.key_rows[k] for k in replay.session.keys], dtype=np.intp)
+        if simulate and replay is None and not reader:
+            # Generate initial readings
+            self.tick()
+        else:
+            # Nothing measured yet: publish band centres without recording them
+            centre = (self.sensors.normal_lo + self.sensors.normal_hi) / 2
+            now = datetime.now(timezone.utc)
+            self._publish(now, to_ns(now), centre, self.sensors.classify(centre), self.detector.frame())
+            if replay is not None:
+                self.tick()
+
+    def _new_alert_engine(self) -> AlertEngine:
+        return AlertEngine(
+            self.sensors,
+            hysteresis=ALERT_HYSTERESIS,
+            debounce=_debounce(),
+            log_capacity=ALERT_LOG_CAPACITY,
+        )
+
+    def _new_detector(self) -> AnomalyDetector:
+        # Spikes stay flagged long enough to pass alert debouncing
+        return AnomalyDetector(
+            self.sensors,
+            drift_threshold=ANOMALY_DRIFT_THRESHOLD,
+            spike_z=ANOMALY_SPIKE_Z,
+            hold=_debounce(),
+        )
+
+    def tick(self) -> SensorSnapshot:
+        """Generate one new reading for every tag (or play due records) and publish a snapshot."""
+        if self.replay is not None:
+            return self._replay_tick()
         now = datetime.now(timezone.utc)
-        result = []
-        for sensor_type, config in SENSOR_CONFIG.items():
-            value = self._current[sensor_type]
-            result.append({
-                "sensor": sensor_type,
-                "value": value,
-                "unit": config["unit"],
-                "status": _classify(value, config),
-                "timestamp": now,
-            })
-        return result
-
-    def get_alerts(self) -> list[dict]:
-        """Return alerts for sensors NOT in normal state."""
-        sensors = self.get_all_sensors()
-        alerts = []
-        for s in sensors:
-            if s["status"] != SensorStatus.NORMAL:
-                config = SENSOR_CONFIG[s["sensor"]]
-                n_lo, n_hi = config["normal"]
-                msg = (
-                    f"{s['sensor'].value} is {s['status'].value}: "
-                    f"{s['value']}{config['unit']} "
-                    f"(normal: {n_lo}~{n_hi}{config['unit']})"
+        now_ns = to_ns(now)
+        values = self.walk.initial() if self._current is None else self.walk.step(self._current)
+        ahead = self._last_ns > now_ns
+        if ahead.any():
+            return self._tick_behind(now_ns, values, ahead)
+        statuses = self.sensors.classify(values)
+
+        self.history.append_frame(self.sensors.keys, now_ns, values, statuses)
+        self.rollups.add_frame(self.sensors.keys, now_ns, values, statuses)
+        self._last_ns[:] = now_ns
+        return self._publish(now, now_ns, values, statuses, self.detector.update(now_ns, values))
+
+    def _tick_behind(self, now_ns: int, values: np.ndarray, ahead: np.ndarray) -> SensorSnapshot:
+        # Tags ingested with future timestamps keep that reading until the
+        # clock catches up, so history stays non-decreasing per tag
+        values[ahead] = self._current[ahead]
+        statuses = self.sensors.classify(values)
+        rows = np.flatnonzero(~ahead)
+        ts_ns = np.full(len(rows), now_ns, dtype=np.int64)
+        keys = self.sensors.keys
+        self.history.append_columns(keys, rows, ts_ns, values[rows], statuses[rows])
+        self.rollups.add_columns(keys, rows, ts_ns, values[rows], statuses[rows])
+        self._last_ns[rows] = now_ns
+        analytics = self.detector.update_columns(rows, ts_ns, values[rows])
+        # Snapshot time never goes back (as in `ingest`)
+        published_ns = max(now_ns, to_ns(self._snapshot.timestamp))
+        return self._publish(from_ns(published_ns), published_ns, values, statuses, analytics)
+
+    def ingest(self, batch: IngestBatch) -> int:
+        """
+        Record a validated batch (sorted by row, then time) with one bulk
+        append and publish a snapshot holding each tag's newest value.
+        Samples older than their tag's stored tail are dropped; returns the
+        number accepted. The anomaly detector sees every accepted sample;
+        alerts see the merged frame once per batch.
+        """
+        fresh = batch.ts_ns >= self._last_ns[batch.rows]
+        rows, ts_ns, values = batch.rows[fresh], batch.ts_ns[fresh], batch.values[fresh]
+        self.stale += len(batch) - len(rows)
+        if not len(rows):
+            return 0
+        statuses = self.sensors.classify_rows(values, rows)
+        keys = self.sensors.keys
+        self.history.append_columns(keys, rows, ts_ns, values, statuses)
+        self.rollups.add_columns(keys, rows, ts_ns, values, statuses)
+        self.ingested += len(rows)
+
+        # Last sample of each row's run is its newest reading
+        tails = np.append(np.flatnonzero(np.diff(rows)), len(rows) - 1)
+        current = self._current.copy()
+        current[rows[tails]] = values[tails]
+        self._last_ns[rows[tails]] = ts_ns[tails]
+        analytics = self.detector.update_columns(rows, ts_ns, values)
+        now_ns = max(int(ts_ns.max()), to_ns(self._snapshot.timestamp))
+        self._publish(from_ns(now_ns), now_ns, current, self.sensors.classify(current), analytics)
+        return len(rows)
+
+    # ── Replay ──────────────────────────────────────────────────────
+
+    def _replay_tick(self) -> SensorSnapshot:
+        replay = self.replay
+        if replay.generation != self._replay_generation:
+            self._restart_replay()
+        start, stop = replay.advance()
+        if start == stop:
+            return self._snapshot
+        ts_ns, recorded = replay.session.frames(start, stop)
+        frames = np.tile(self._current, (stop - start, 1))
+        frames[:, self._replay_rows] = recorded
+        statuses = self.sensors.classify(frames)
+        self._append_frames(ts_ns, frames, statuses)
+        # Analytics and alerts step through every record so rates, CUSUM and
+        # debouncing work in recorded time
+        for ts, values in zip(ts_ns[:-1].tolist(), frames[:-1]):
+            self.detector.update(ts, values)
+            self.alert_engine.evaluate(ts, values, self._alerting_anomalies())
+        now_ns = int(ts_ns[-1])
+        values = frames[-1].copy()
+        analytics = self.detector.update(now_ns, values)
+        return self._publish(from_ns(now_ns), now_ns, values, statuses[-1].copy(), analytics)
+
+    def _append_frames(self, ts_ns: np.ndarray, frames: np.ndarray, statuses: np.ndarray) -> None:
+        """Bulk-append records (records × tags) of the replayed tags."""
+        # Tag-major columns: each tag's run is contiguous, as append_columns expects
+        cols = self._replay_rows
+        rows = np.repeat(cols, len(ts_ns))
+        ts = np.tile(ts_ns, len(cols))
+        values, codes = frames[:, cols].T.ravel(), statuses[:, cols].T.ravel()
+        self.history.append_columns(self.sensors.keys, rows, ts, values, codes)
+        self.rollups.add_columns(self.sensors.keys, rows, ts, values, codes)
+        self._last_ns[cols] = ts_ns[-1]
+
+    def _restart_replay(self) -> None:
+        # After a seek, recorded time may go backwards: start over with empty
+        # state, then backfill history with the records just before the playhead
+        self._replay_generation = self.replay.generation
+        self.history = RingBufferHistory(HISTORY_CAPACITY)
+        self.rollups = RollupStore(sample_interval=SAMPLE_INTERVAL)
+        self.alert_engine = self._new_alert_engine()
+        self.detector = self._new_detector()
+        self._last_ns[:] = np.iinfo(np.int64).min
+        stop = self.replay.position
+        start = max(0, stop - min(HISTORY_CAPACITY, REPLAY_BACKFILL_SAMPLES // max(1, len(self._replay_rows))))
+        if start < stop:
+            ts_ns, recorded = self.replay.session.frames(start, stop)
+            frames = np.tile(self._current, (stop - start, 1))
+            frames[:, self._replay_rows] = recorded
+            self._append_frames(ts_ns, frames, self.sensors.classify(frames))
+            for ts, values in zip(ts_ns[-REPLAY_DETECTOR_RECORDS:].tolist(), frames[-REPLAY_DETECTOR_RECORDS:]):
+                self.detector.update(ts, values)
+            self._current = frames[-1].copy()
+
+    def _alerting_anomalies(self) -> np.ndarray | None:
+        return self.detector.anomalies if ANOMALY_ALERTS else None
+
+    def _publish(
+        self,
+        now: datetime,
+        now_ns: int,
+        values: np.ndarray,
+        statuses: np.ndarray,
+        analytics: AnalyticsFrame,
+    ) -> SensorSnapshot:
+        values.flags.writeable = False
+        statuses.flags.writeable = False
+        self._current = values
+        self.alert_engine.evaluate(now_ns, values, self._alerting_anomalies())
+        self._seq += 1
+        # Single reference swap: readers see either the old or the new tick
+        self._snapshot = SensorSnapshot(
+            seq=self._seq,
+            timestamp=now,
+            sensors=self.sensors,
+            values=values,
+            statuses=statuses,
+            analytics=analytics,
+            alerts_payload=self.alert_engine.active_payload(),
+        )
+        self.wire.remember(self._snapshot)
+        return self._snapshot
+
+    def follow(self, snapshot: SensorSnapshot) -> None:
+        """Install a snapshot published by the producer process (bus readers)."""
+        self._current = snapshot.values
+        self._seq = snapshot.seq
+        self._snapshot = snapshot
+        self.wire.remember(snapshot)
+
+    @property
+    def snapshot(self) -> SensorSnapshot:
+        """Latest published tick (O(1), never generates data)."""
+        return self._snapshot
+
+    def get_all_sensors(self, site: str | None = None) -> list[SensorData]:
+        """Return current readings from the latest snapshot (one site or all)."""
+        return list(self._snapshot.sensor_data(site))
+
+    def get_alerts(self, site: str | None = None) -> list[Alert]:
+        """Return open and acknowledged alerts (debounced, with hysteresis)."""
+        if self.reader:
+            return list(self._snapshot.alerts(site))
+        return self.alert_engine.active(site)
+
+    def alerts_payload(self, site: str | None = None) -> SerializedBody:
+        """Active alerts JSON (one site or all). Raises KeyError."""
+        if self.reader:
+            return self._snapshot.site_alerts_payload(site)
+        return self.alert_engine.active_payload(site)
+
+    def _spec(self, sensor: str, site: str) -> TagSpec:
+        return self.sensors.specs[self.sensors.lookup(site, sensor)]
+
+    def get_history(
+        self,
+        sensor: str,
+        limit: int = 20,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        site: str = DEFAULT_SITE,
+    ) -> dict:
+        """Return recent history for a specific tag (last `limit` in the window)."""
+        spec = self._spec(sensor, site)
+        if start is None and end is None:
+            data = self.history.latest(spec.key, limit)
+        else:
+            data = self.history.range(spec.key, _ns(start), _ns(end))
+            if len(data) > limit:
+                data = HistorySlice(
+                    timestamps=data.timestamps[-limit:],
+                    values=data.values[-limit:],
+                    statuses=data.statuses[-limit:],
                 )
-                alerts.append({
-                    "sensor": s["sensor"],
-                    "value": s["value"],
-                    "unit": config["unit"],
-                    "status": s["status"],
-                    "message": msg,
-                    "timestamp": s["timestamp"],
-                })
-        return alerts
-
-    def get_history(self, sensor: SensorType, limit: int = 20) -> dict:
-        """Return recent history for a specific sensor."""
-        config = SENSOR_CONFIG[sensor]
-        entries = list(self._history[sensor])[-limit:]
         return {
-            "sensor": sensor,
-            "unit": config["unit"],
-            "data": entries,
+            "site": spec.site,
+            "sensor": spec.tag,
+            "unit": spec.unit,
+            "data": data.entries(),
+        }
+
+    def get_history_buckets(
+        self,
+        sensor: str,
+        start: datetime | None,
+        end: datetime | None,
+        bucket_seconds: int,
+        site: str = DEFAULT_SITE,
+    ) -> dict:
+        """Return min/max/mean/last and status counts per time bucket."""
+        spec = self._spec(sensor, site)
+        buckets = self.rollups.aggregate(
+            self.history, spec.key, _ns(start), _ns(end), bucket_seconds
+        )
+        return {
+            "site": spec.site,
+            "sensor": spec.tag,
+            "unit": spec.unit,
+            "bucket_seconds": bucket_seconds,
+            "data": [
+                {
+                    "timestamp": from_ns(b.start),
+                    "min": b.min,
+                    "max": b.max,
+                    "mean": round(b.mean, 4),
+                    "last": b.last,
+                    "count": b.count,
+                    "status_counts": dict(zip(STATUS_BY_CODE, b.status_counts)),
+                }
+                for b in buckets
+            ],
+        }
+
+    def get_history_downsampled(
+        self,
+        sensor: str,
+        start: datetime | None,
+        end: datetime | None,
+        points: int,
+        site: str = DEFAULT_SITE,
+    ) -> dict:
+        """Return at most `points` LTTB-selected entries for the window."""
+        spec = self._spec(sensor, site)
+        ts, values, statuses = self.rollups.downsample(
+            self.history, spec.key, _ns(start), _ns(end), points
+        )
+        return {
+            "site": spec.site,
+            "sensor": spec.tag,
+            "unit": spec.unit,
+            "data": HistorySlice(timestamps=ts, values=values, statuses=statuses).entries(),
         }
 
 
+def _ns(ts: datetime | None) -> int | None:
+    return to_ns(ts) if ts is not None else None
+
+
+def _debounce() -> int:
+    """Samples a new alert level must persist (ALERT_MIN_DURATION in ticks)."""
+    return max(1, math.ceil(ALERT_MIN_DURATION / SAMPLE_INTERVAL))
+
+
 # ── Singleton instance ──────────────────────────────────────────────
-simulator = SensorSimulator()
+def _history_store() -> HistoryStore:
+    if BUS_READER:
+        # Readers query the producer's database; in-memory history is
+        # served by the producer (see snapshot_bus.require_shared_history)
+        return SQLiteHistory(HISTORY_PATH) if HISTORY_BACKEND == "sqlite" else RingBufferHistory(1)
+    if REPLAY_PATH:
+        # A replayed session lives in memory only, apart from recorded history
+        return RingBufferHistory(HISTORY_CAPACITY)
+    return create_history_store(HISTORY_BACKEND, HISTORY_CAPACITY, HISTORY_PATH, HISTORY_COMMIT_INTERVAL)
+
+
+simulator = SensorSimulator(
+    _history_store(),
+    load_sensor_config(SENSOR_CONFIG_PATH) if SENSOR_CONFIG_PATH else None,
+    simulate=SIMULATE,
+    replay=open_replay(REPLAY_PATH, REPLAY_SPEED) if REPLAY_PATH and not BUS_READER else None,
+    seed=SIMULATOR_SEED,
+    reader=BUS_READER,
+)
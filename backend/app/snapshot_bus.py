@@ -0,0 +1,308 @@
+"""
+Shared-memory snapshot bus for multi-process deployments.
+
+One producer process runs acquisition (simulator, ingest, replay, alert
+engine, recorder) and publishes every snapshot into a named
+`multiprocessing.shared_memory` segment. Any number of reader processes
+(`uvicorn --workers N` with AQUAVIEW_BUS_ROLE=reader) poll the segment
+and serve the same readings, alerts and stream frames without simulating
+anything themselves. Segment layout, little-endian, fixed at creation:
+
+    header (64 B): magic "AQVB" | version u16 | reserved u16 | n_tags u32
+                   | slots u32 | keys crc32 u32 | epoch u64
+                   | alerts capacity u64 | dynamics capacity u64 | published u64
+    slots × snapshot record: lock u64 | index u64 | seq i64 | ts i64
+                   | values, ewma, std, rate, cusum f8[n]
+                   | statuses, anomaly i1[n] | seen bool[n]        (8-byte aligned)
+    alerts, dynamics payloads: lock u64 | version u64 | length u64 | JSON bytes
+
+Writes are seqlocked: the producer makes a record's lock odd, writes the
+record, then makes the lock even again. A reader copies the record and
+retries when the lock was odd or moved meanwhile, so the producer never
+waits for readers. Snapshot `index` k goes to slot k mod `slots` and
+`published` advances after the record is complete; a reader behind by
+fewer than `slots` snapshots still sees each one, older ones are
+skipped. `epoch` is random per segment, so readers notice a restarted
+producer and re-attach.
+
+Payloads (active alerts, dynamic plant state) are JSON already
+serialized by the producer; they are written only when they change and
+readers serve the bytes as they are.
+"""
+
+from __future__ import annotations
+
+import secrets
+import zlib
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+from typing import Sequence
+
+import numpy as np
+from fastapi import HTTPException, Request
+
+from .anomaly import AnalyticsFrame
+from .config import BUS_READER, HISTORY_BACKEND, PRODUCER_URL
+from .history_store import from_ns, to_ns
+from .http_cache import SerializedBody
+from .sensor_registry import SensorArray
+from .simulator import SensorSnapshot
+
+BUS_MAGIC = b"AQVB"
+BUS_VERSION = 1
+HEADER_SIZE = 64
+_HEADER_DTYPE = np.dtype([
+    ("magic", "S4"), ("version", "<u2"), ("reserved", "<u2"), ("n_tags", "<u4"), ("slots", "<u4"),
+    ("keys_crc", "<u4"), ("epoch", "<u8"), ("alerts_capacity", "<u8"), ("dynamics_capacity", "<u8"),
+    ("published", "<u8"),
+])
+
+ALERT_BYTES_PER_TAG = 512          # room for every tag alerting at once
+DYNAMICS_CAPACITY = 256 * 1024
+MAX_READ_ATTEMPTS = 100            # seqlock retries before giving up until the next poll
+
+
+def _slot_dtype(n_tags: int) -> np.dtype:
+    return np.dtype([
+        ("lock", "<u8"), ("index", "<u8"), ("seq", "<i8"), ("ts", "<i8"),
+        ("values", "<f8", (n_tags,)), ("ewma", "<f8", (n_tags,)), ("std", "<f8", (n_tags,)),
+        ("rate", "<f8", (n_tags,)), ("cusum", "<f8", (n_tags,)),
+        ("statuses", "i1", (n_tags,)), ("anomaly", "i1", (n_tags,)), ("seen", "?", (n_tags,)),
+    ])
+
+
+def _align(size: int) -> int:
+    return size + (-size % 8)
+
+
+def _keys_crc(keys: Sequence[str]) -> int:
+    return zlib.crc32("\n".join(keys).encode())
+
+
+class _Payload:
+    """One seqlocked, versioned JSON blob inside the segment."""
+
+    META = 24   # lock, version, length
+
+    def __init__(self, buf, offset: int, capacity: int) -> None:
+        self.capacity = capacity
+        self._meta = np.ndarray((3,), dtype="<u8", buffer=buf, offset=offset)
+        self._data = np.ndarray((capacity,), dtype=np.uint8, buffer=buf, offset=offset + self.META)
+
+    def write(self, body: bytes) -> None:
+        """Raises ValueError when `body` exceeds the capacity fixed at creation."""
+        if len(body) > self.capacity:
+            raise ValueError(f"payload of {len(body)} bytes exceeds bus capacity {self.capacity}")
+        meta = self._meta
+        meta[0] += 1
+        self._data[:len(body)] = np.frombuffer(body, dtype=np.uint8)
+        meta[2] = len(body)
+        meta[1] += 1
+        meta[0] += 1
+
+    def read(self, known: int) -> tuple[int, bytes | None]:
+        """(version, body); body is None when unchanged since `known` (or unreadable right now)."""
+        meta = self._meta
+        for _ in range(MAX_READ_ATTEMPTS):
+            lock = int(meta[0])
+            if lock % 2:
+                continue
+            version = int(meta[1])
+            if version == known:
+                return known, None
+            body = self._data[:int(meta[2])].tobytes()
+            if int(meta[0]) == lock:
+                return version, body
+        return known, None
+
+
+class SnapshotBus:
+    """A snapshot ring plus payloads in one shared-memory segment."""
+
+    def __init__(self, shm: SharedMemory, sensors: SensorArray, owner: bool) -> None:
+        self.shm = shm
+        self.sensors = sensors
+        self.owner = owner
+        buf = shm.buf
+        self._header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=buf)
+        header = self._header
+        if header["magic"] != BUS_MAGIC or header["version"] != BUS_VERSION:
+            raise ValueError(f"shared memory {shm.name!r} is not an AQVB v{BUS_VERSION} snapshot bus")
+        if header["n_tags"] != len(sensors) or header["keys_crc"] != _keys_crc(sensors.keys):
+            raise ValueError(f"snapshot bus {shm.name!r} was created for a different tag set")
+        self.slots = int(header["slots"])
+        self.epoch = int(header["epoch"])
+        dtype = _slot_dtype(len(sensors))
+        stride = _align(dtype.itemsize)
+        self._records = np.ndarray(
+            (self.slots,), dtype=dtype, buffer=buf, offset=HEADER_SIZE, strides=(stride,)
+        )
+        offset = HEADER_SIZE + self.slots * stride
+        self.alerts = _Payload(buf, offset, int(header["alerts_capacity"]))
+        offset += _align(_Payload.META + self.alerts.capacity)
+        self.dynamics = _Payload(buf, offset, int(header["dynamics_capacity"]))
+        self.skipped = 0              # snapshots overwritten before this reader got to them
+        self._alerts_version = 0
+        self._alerts_body: SerializedBody | None = None
+        self._published_alerts: SerializedBody | None = None
+
+    @staticmethod
+    def _size(n_tags: int, slots: int, alerts_capacity: int) -> int:
+        return (
+            HEADER_SIZE
+            + slots * _align(_slot_dtype(n_tags).itemsize)
+            + _align(_Payload.META + alerts_capacity)
+            + _Payload.META + DYNAMICS_CAPACITY
+        )
+
+    @classmethod
+    def create(cls, name: str, sensors: SensorArray, slots: int) -> SnapshotBus:
+        """New segment for a producer, replacing one left behind by a previous run."""
+        if slots < 2:
+            raise ValueError("snapshot bus needs at least 2 slots")
+        alerts_capacity = ALERT_BYTES_PER_TAG * len(sensors) + 64 * 1024
+        size = cls._size(len(sensors), slots, alerts_capacity)
+        try:
+            shm = SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            stale = SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            shm = SharedMemory(name, create=True, size=size)
+        header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=shm.buf)
+        header[()] = (
+            BUS_MAGIC, BUS_VERSION, 0, len(sensors), slots, _keys_crc(sensors.keys),
+            secrets.randbits(63), alerts_capacity, DYNAMICS_CAPACITY, 0,
+        )
+        del header   # no exported views may outlive close()
+        return cls(shm, sensors, owner=True)
+
+    @classmethod
+    def attach(cls, name: str, sensors: SensorArray) -> SnapshotBus:
+        """Open a producer's segment. Raises FileNotFoundError (no producer yet) or ValueError."""
+        shm = SharedMemory(name)
+        # Readers must not unlink the producer's segment when they exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+        try:
+            return cls(shm, sensors, owner=False)
+        except ValueError:
+            shm.close()
+            raise
+
+    @property
+    def published(self) -> int:
+        """Snapshots published so far (index of the next one)."""
+        return int(self._header["published"])
+
+    # ── Producer ────────────────────────────────────────────────────
+
+    def publish(self, snapshot: SensorSnapshot) -> None:
+        """Acquisition listener: write `snapshot` to the next slot."""
+        if snapshot.alerts_payload is not self._published_alerts:
+            self.alerts.write(snapshot.alerts_payload.body)
+            self._published_alerts = snapshot.alerts_payload
+        index = self.published
+        record = self._records[index % self.slots]
+        a = snapshot.analytics
+        record["lock"] += 1
+        record["index"] = index
+        record["seq"] = snapshot.seq
+        record["ts"] = to_ns(snapshot.timestamp)
+        record["values"], record["statuses"] = snapshot.values, snapshot.statuses
+        record["ewma"], record["std"], record["rate"], record["cusum"] = a.ewma, a.std, a.rate, a.cusum
+        record["anomaly"], record["seen"] = a.anomaly, a.seen
+        record["lock"] += 1
+        self._header["published"] = index + 1
+
+    # ── Readers ─────────────────────────────────────────────────────
+
+    def read_since(self, after: int) -> tuple[list[SensorSnapshot], int]:
+        """Snapshots with index ≥ `after` still in the ring, and the index to resume from."""
+        head = self.published
+        if after > head:    # ring of a restarted producer; start over
+            after = 0
+        start = max(after, head - self.slots)
+        self.skipped += start - after
+        if start == head:
+            return [], head
+        alerts = self._alerts_payload()
+        out = []
+        for index in range(start, head):
+            record = self._read(index)
+            if record is None:
+                self.skipped += 1
+                continue
+            out.append(self._snapshot(record, alerts))
+        return out, head
+
+    def _read(self, index: int):
+        records = self._records
+        slot = index % self.slots
+        for _ in range(MAX_READ_ATTEMPTS):
+            lock = int(records["lock"][slot])
+            if lock % 2:
+                continue
+            record = records[slot].copy()
+            if int(records["lock"][slot]) == lock:
+                # Overwritten by a later lap: the snapshot is gone
+                return record if int(record["index"]) == index else None
+        return None
+
+    def _alerts_payload(self) -> SerializedBody:
+        version, body = self.alerts.read(self._alerts_version)
+        if body is not None or self._alerts_body is None:
+            self._alerts_version = version
+            self._alerts_body = SerializedBody(body or b'{"alerts":[]}')
+        return self._alerts_body
+
+    def _snapshot(self, record, alerts: SerializedBody) -> SensorSnapshot:
+        columns = {}
+        for name in ("values", "statuses", "ewma", "std", "rate", "cusum", "anomaly", "seen"):
+            column = columns[name] = record[name]
+            column.flags.writeable = False
+        return SensorSnapshot(
+            seq=int(record["seq"]),
+            timestamp=from_ns(int(record["ts"])),
+            sensors=self.sensors,
+            values=columns["values"],
+            statuses=columns["statuses"],
+            analytics=AnalyticsFrame(
+                seen=columns["seen"],
+                ewma=columns["ewma"],
+                std=columns["std"],
+                rate=columns["rate"],
+                cusum=columns["cusum"],
+                anomaly=columns["anomaly"],
+            ),
+            alerts_payload=alerts,
+        )
+
+    def close(self) -> None:
+        self._header = self._records = self.alerts = self.dynamics = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ── Request routing on readers ──────────────────────────────────────
+
+def require_producer(request: Request) -> None:
+    """
+    Route dependency for endpoints that need producer state (ingest,
+    replay, alert log, jobs, ...): readers redirect them to
+    AQUAVIEW_PRODUCER_URL (307 keeps method and body) or answer 503.
+    """
+    if not BUS_READER:
+        return
+    if not PRODUCER_URL:
+        raise HTTPException(status_code=503, detail="served by the producer process only")
+    url = PRODUCER_URL.rstrip("/") + request.url.path
+    if request.url.query:
+        url += "?" + request.url.query
+    raise HTTPException(status_code=307, detail="served by the producer process", headers={"Location": url})
+
+
+def require_shared_history(request: Request) -> None:
+    """History is shared through the SQLite backend; in-memory history lives in the producer."""
+    if HISTORY_BACKEND != "sqlite":
+        require_producer(request)
@@ -0,0 +1,498 @@
+"""
+Treatment stage models and named treatment trains.
+
+A stage model is data: for each water-quality metric it declares how the
+stage's effluent follows from its influent at HRT ratio h,
+
+    x = in × factor × (1 − R(h))      with "curve"      (removal fraction)
+    x = in × factor / 10^R(h)         with "log_curve"  (log10 reduction)
+    x = in × factor                   otherwise
+    out = round(clip(x + coef × R_other(h) + per_hrt × h + offset, lo, hi), decimals)
+
+where R is the sigmoid removal curve (r_min, r_max, steepness, midpoint)
+of `pipeline._sigmoid_removal` and R_other is the curve of another metric
+of the same stage ("couple": [metric, coef]). Metrics a stage does not
+list pass through unchanged.
+
+A train is an ordered list of stage ids. Every train is compiled once at
+load into flat (stages × metrics) parameter arrays, so evaluating any
+train for N HRT ratio vectors is the same handful of array operations
+per stage (`Train.step`) — there is no per-stage Python model code.
+
+Config file (JSON, path in AQUAVIEW_TRAIN_CONFIG) adds or replaces stage
+models and trains:
+
+    {"stages": {"ozonation": {"name_ko": "오존 소독", "design_hrt": 0.25, "metrics": {
+        "coliform": {"log_curve": [1.5, 4.0, 3.0, 1.0], "clip": [1.0, null], "decimals": 1}}}},
+     "trains": {"ozone": ["primary_settling", "aeration", "secondary_settling", "ozonation"]}}
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+
+import numpy as np
+
+from .config import TRAIN_CONFIG_PATH
+from .models import ProcessStage, WaterQuality
+
+METRICS: tuple[str, ...] = tuple(WaterQuality.model_fields)
+METRIC_INDEX: dict[str, int] = {m: j for j, m in enumerate(METRICS)}
+
+DEFAULT_TRAIN = "standard"
+
+_SPEC_KEYS = {"curve", "log_curve", "factor", "offset", "per_hrt", "couple", "clip", "decimals"}
+
+# ── Built-in stage models ───────────────────────────────────────────
+
+STAGE_MODELS: dict[str, dict] = {
+    # Primary Settling: gravity sedimentation of settleable solids.
+    # Design HRT 2h → TSS 65%, BOD 45%, COD 35% removal (range 1–4h)
+    # - TSS removal: 60–70% at 2h, max ~75%
+    # - BOD removal: 40–50% at 2h (particulate fraction), max ~55%
+    ProcessStage.PRIMARY_SETTLING.value: {
+        "name_ko": "1차 침전",
+        "design_hrt": 2.0,
+        "metrics": {
+            "bod": {"curve": (0.25, 0.58, 2.5, 1.0)},
+            "tss": {"curve": (0.35, 0.78, 2.5, 1.0)},
+            "cod": {"curve": (0.20, 0.45, 2.5, 1.0)},
+            "ammonia": {"factor": 0.98},                   # minimal NH3 change in settling
+            "turbidity": {"curve": (0.30, 0.70, 2.5, 1.0)},  # roughly tracks TSS
+            "ph": {"offset": 0.05, "clip": (6.0, 9.0)},
+            "do_level": {"offset": 0.2, "clip": (0.0, 4.0)},
+            "coliform": {"factor": 0.85, "decimals": 0},   # ~15% reduction
+        },
+    },
+    # Aeration (Activated Sludge): biological oxidation of organics.
+    # Design HRT 6h → BOD ~88%, COD ~78% removal (range 3–12h)
+    # - BOD removal: 3h ~75%, 6h ~88%, 12h ~95%; COD: 6h 78%, 12h 94%
+    # - DO rises to 2–4 mg/L with aeration
+    ProcessStage.AERATION.value: {
+        "name_ko": "폭기조 (생물학적 처리)",
+        "design_hrt": 6.0,
+        "metrics": {
+            "bod": {"curve": (0.55, 0.97, 3.0, 1.0)},
+            "tss": {"curve": (0.20, 0.55, 2.5, 1.0)},
+            "cod": {"curve": (0.45, 0.92, 3.0, 1.0)},
+            "ammonia": {"curve": (0.05, 0.40, 2.0, 1.0)},  # partial nitrification at longer HRT
+            "turbidity": {"factor": 0.70},                 # biological floc traps turbidity
+            "ph": {"per_hrt": -0.1, "clip": (6.5, 8.5)},
+            "do_level": {"factor": 0.0, "offset": 2.0, "per_hrt": 0.8, "clip": (1.0, 5.0)},
+            "coliform": {"factor": 0.80, "decimals": 0},   # ~20% reduction
+        },
+    },
+    # Secondary Settling: separates biological sludge from treated water.
+    # Design HRT 1.5h → TSS ~80% cumulative (range 0.75–3h)
+    ProcessStage.SECONDARY_SETTLING.value: {
+        "name_ko": "2차 침전",
+        "design_hrt": 1.5,
+        "metrics": {
+            "bod": {"curve": (0.20, 0.50, 2.5, 1.0)},
+            "tss": {"curve": (0.50, 0.88, 3.0, 1.0)},
+            "cod": {"factor": 0.85},
+            "ammonia": {"factor": 0.97},
+            "turbidity": {"curve": (0.40, 0.80, 3.0, 1.0)},
+            "ph": {"clip": (6.5, 8.5)},
+            "do_level": {"offset": -0.3, "clip": (1.0, 5.0)},
+            "coliform": {"factor": 0.70, "decimals": 0},
+        },
+    },
+    # Nitrification: biological conversion of NH3 → NO3.
+    # Design HRT 10h → NH3 removal ~90% (range 5–20h). Nitrifiers are
+    # slow-growing, so a steep curve: 3h ~38% (washout risk), 6h ~80%,
+    # 10h ~90%, 15h ~95%. References: Wang et al. 2020 (Water 12, 650)
+    ProcessStage.NITRIFICATION.value: {
+        "name_ko": "질산화 (고도처리)",
+        "design_hrt": 10.0,
+        "metrics": {
+            "bod": {"factor": 0.90},                       # small additional BOD reduction
+            "tss": {"factor": 0.92},
+            "cod": {"factor": 0.88},
+            "ammonia": {"curve": (0.10, 0.97, 4.5, 0.8), "decimals": 3},
+            "turbidity": {"factor": 0.85},
+            "ph": {"couple": ("ammonia", -0.3), "clip": (6.0, 8.5)},        # acid produced
+            "do_level": {"couple": ("ammonia", -1.0), "offset": 1.5, "clip": (1.0, 5.0)},  # DO consumed
+            "coliform": {"factor": 0.60, "decimals": 0},
+        },
+    },
+    # Disinfection: chlorination CT-based pathogen removal.
+    # Design 0.5h (30 min contact) → ~4 log coliform reduction (range 0.25–1h)
+    # CT = chlorine conc (5 mg/L) × time: 15 min ~3 log, 60 min ~5 log.
+    # Sand filtration ahead of the contact tank takes turbidity below 2 NTU.
+    ProcessStage.DISINFECTION.value: {
+        "name_ko": "소독",
+        "design_hrt": 0.5,
+        "metrics": {
+            "bod": {"factor": 0.85},
+            "tss": {"factor": 0.80},
+            "cod": {"factor": 0.85},
+            "ammonia": {"factor": 0.95, "decimals": 3},
+            "turbidity": {"curve": (0.50, 0.97, 3.0, 1.0)},
+            "ph": {"offset": 0.1, "clip": (6.5, 8.5)},     # residual chlorine
+            "do_level": {"offset": 0.5, "clip": (3.0, 8.0)},
+            "coliform": {"log_curve": (2.0, 5.5, 3.0, 1.0), "clip": (1.0, None), "decimals": 1},
+        },
+    },
+    # UV disinfection: dose = intensity × exposure time; no chemical
+    # residual and no filtration, so only coliform changes.
+    # Design 1.2 min → ~3.5 log reduction, saturating near 4.5 log
+    ProcessStage.UV_DISINFECTION.value: {
+        "name_ko": "자외선 소독",
+        "design_hrt": 0.02,
+        "metrics": {
+            "coliform": {"log_curve": (1.5, 4.5, 3.0, 0.8), "clip": (1.0, None), "decimals": 1},
+        },
+    },
+}
+
+TRAINS: dict[str, list[str]] = {
+    DEFAULT_TRAIN: [
+        ProcessStage.PRIMARY_SETTLING.value,
+        ProcessStage.AERATION.value,
+        ProcessStage.SECONDARY_SETTLING.value,
+        ProcessStage.NITRIFICATION.value,
+        ProcessStage.DISINFECTION.value,
+    ],
+    "no_nitrification": [
+        ProcessStage.PRIMARY_SETTLING.value,
+        ProcessStage.AERATION.value,
+        ProcessStage.SECONDARY_SETTLING.value,
+        ProcessStage.DISINFECTION.value,
+    ],
+    "uv": [
+        ProcessStage.PRIMARY_SETTLING.value,
+        ProcessStage.AERATION.value,
+        ProcessStage.SECONDARY_SETTLING.value,
+        ProcessStage.NITRIFICATION.value,
+        ProcessStage.UV_DISINFECTION.value,
+    ],
+}
+
+
+# ── Compiled trains ─────────────────────────────────────────────────
+
+def _frozen(array: np.ndarray) -> np.ndarray:
+    array.flags.writeable = False
+    return array
+
+
+# Scaled values this close to a .5 fraction are rounded exactly (see `Train.finish`)
+_TIE_TOLERANCE = 1e-6
+
+
+def _round_rows(x: np.ndarray, scale, rows: tuple[tuple[int, int], ...]) -> None:
+    """Round `x` (R, N) in place with `round(v, d)` semantics; `rows` maps row → (metric, d)."""
+    y = x * scale
+    r = np.rint(y)
+    y -= r
+    np.abs(y, out=y)
+    ties = y > 0.5 - _TIE_TOLERANCE
+    fix = np.argwhere(ties) if ties.any() else ()
+    exact = [round(float(x[a, b]), rows[a][1]) for a, b in fix]
+    np.divide(r, scale, out=x)
+    for (a, b), v in zip(fix, exact):
+        x[a, b] = v
+
+
+def _sigmoid(hrt: np.ndarray, steepness: np.ndarray, midpoint: np.ndarray) -> np.ndarray:
+    """1 / (1 + exp(−steepness × (hrt − midpoint))), one row per curve shape."""
+    x = hrt - midpoint
+    x *= -steepness
+    np.exp(x, out=x)
+    x += 1.0
+    return np.reciprocal(x, out=x)
+
+
+@dataclass(frozen=True)
+class _StagePlan:
+    """
+    Per-row operations of one stage for `Train.step`, derived from the
+    flat arrays at compile time. Metrics are rows of the (metrics, N)
+    block; curves are stage-local rows of the removal block.
+    """
+    r_min: np.ndarray                            # (C, 1) removal curves of the stage
+    span: np.ndarray                             # (C, 1) r_max − r_min
+    steepness: np.ndarray                        # (U, 1) distinct curve shapes
+    midpoint: np.ndarray                         # (U, 1)
+    shape_index: np.ndarray | None               # (C,) curve → shape; None if all distinct
+    factor: np.ndarray                           # (M, 1)
+    frac: tuple[tuple[int, int], ...]            # (metric, curve): × (1 − R)
+    log: tuple[tuple[int, int], ...]             # (metric, curve): ÷ 10^R
+    couple: tuple[tuple[int, int, float], ...]   # (metric, curve, coef): + coef × R
+    per_hrt: tuple[tuple[int, float], ...]       # (metric, coef): + coef × h
+    offset: tuple[tuple[int, float], ...]
+    clip: tuple[tuple[int, float, float], ...]
+    round: tuple[tuple[int, int], ...]           # (metric, decimals)
+    round_all: np.ndarray | None                 # (M, 1) scales when every metric is rounded
+
+
+class Train:
+    """
+    One treatment train compiled to flat parameter arrays.
+
+    Per (stage, metric): `factor`, `offset`, `per_hrt`, `lo`, `hi`,
+    `decimals` (-1 = not rounded), `couple_curve` (-1 = none) and
+    `couple_coef`, all (stages, metrics). Removal curves are rows of
+    `curves` (C, 4) in stage order; stage i owns rows
+    `curve_offsets[i]:curve_offsets[i + 1]`.
+    """
+
+    def __init__(self, name: str, stages: list[str], models: dict[str, dict]) -> None:
+        if not stages:
+            raise ValueError(f"train {name}: at least one stage is required")
+        if len(set(stages)) != len(stages):
+            raise ValueError(f"train {name}: duplicate stage")
+        unknown = [s for s in stages if s not in models]
+        if unknown:
+            raise ValueError(f"train {name}: unknown stage(s) {', '.join(unknown)}")
+
+        self.name = name
+        self.stages: tuple[str, ...] = tuple(stages)
+        self.index: dict[str, int] = {s: i for i, s in enumerate(stages)}
+        self.names_ko: tuple[str, ...] = tuple(models[s]["name_ko"] for s in stages)
+        self.design_hrt = _frozen(np.array([float(models[s]["design_hrt"]) for s in stages]))
+
+        shape = (len(stages), len(METRICS))
+        self.factor = np.ones(shape)
+        self.offset = np.zeros(shape)
+        self.per_hrt = np.zeros(shape)
+        self.lo = np.full(shape, -np.inf)
+        self.hi = np.full(shape, np.inf)
+        self.decimals = np.full(shape, -1, dtype=np.int8)
+        self.couple_curve = np.full(shape, -1, dtype=np.intp)
+        self.couple_coef = np.zeros(shape)
+        curves: list[tuple[float, ...]] = []
+        curve_metric: list[int] = []
+        curve_log: list[bool] = []
+        offsets = [0]
+
+        for i, stage in enumerate(stages):
+            metrics = models[stage]["metrics"]
+            local: dict[str, int] = {}
+            for metric, spec in metrics.items():
+                j = self._metric(stage, metric)
+                extra = set(spec) - _SPEC_KEYS
+                if extra:
+                    raise ValueError(f"{stage}/{metric}: unknown key(s) {', '.join(sorted(extra))}")
+                if "curve" in spec and "log_curve" in spec:
+                    raise ValueError(f"{stage}/{metric}: 'curve' and 'log_curve' are exclusive")
+                for key in ("curve", "log_curve"):
+                    if key in spec:
+                        if len(spec[key]) != 4:
+                            raise ValueError(f"{stage}/{metric}: {key} is (r_min, r_max, steepness, midpoint)")
+                        local[metric] = len(curves) - offsets[i]
+                        curves.append(tuple(float(v) for v in spec[key]))
+                        curve_metric.append(j)
+                        curve_log.append(key == "log_curve")
+                self.factor[i, j] = spec.get("factor", 1.0)
+                self.offset[i, j] = spec.get("offset", 0.0)
+                self.per_hrt[i, j] = spec.get("per_hrt", 0.0)
+                lo, hi = spec.get("clip", (None, None))
+                self.lo[i, j] = -np.inf if lo is None else lo
+                self.hi[i, j] = np.inf if hi is None else hi
+                decimals = spec.get("decimals", 2)
+                self.decimals[i, j] = -1 if decimals is None else decimals
+            for metric, spec in metrics.items():
+                if "couple" in spec:
+                    source, coef = spec["couple"]
+                    if source not in local:
+                        raise ValueError(f"{stage}/{metric}: couples to {source}, which has no curve here")
+                    j = METRIC_INDEX[metric]
+                    self.couple_curve[i, j] = local[source]
+                    self.couple_coef[i, j] = coef
+            offsets.append(len(curves))
+
+        for array in (self.factor, self.offset, self.per_hrt, self.lo, self.hi,
+                      self.decimals, self.couple_curve, self.couple_coef):
+            _frozen(array)
+        self.curves = _frozen(np.array(curves, dtype=np.float64).reshape(-1, 4))
+        self.curve_metric = _frozen(np.array(curve_metric, dtype=np.intp))
+        self.curve_log = _frozen(np.array(curve_log, dtype=bool))
+        self.curve_offsets: tuple[int, ...] = tuple(offsets)
+        self._plans = [self._plan(i) for i in range(len(stages))]
+
+    @staticmethod
+    def _metric(stage: str, metric: str) -> int:
+        try:
+            return METRIC_INDEX[metric]
+        except KeyError:
+            raise ValueError(f"{stage}: unknown metric {metric}") from None
+
+    def _plan(self, i: int) -> _StagePlan:
+        c0, c1 = self.curve_offsets[i], self.curve_offsets[i + 1]
+        curves = [(int(self.curve_metric[c]), c - c0, bool(self.curve_log[c])) for c in range(c0, c1)]
+        rows = range(len(METRICS))
+        scale = 10.0 ** self.decimals[i].astype(np.float64)
+        rounded = self.decimals[i] >= 0
+        # Curves with equal (steepness, midpoint) share one sigmoid evaluation
+        shapes, shape_index = np.unique(self.curves[c0:c1, 2:], axis=0, return_inverse=True)
+        return _StagePlan(
+            r_min=self.curves[c0:c1, 0, None],
+            span=(self.curves[c0:c1, 1] - self.curves[c0:c1, 0])[:, None],
+            steepness=shapes[:, 0, None],
+            midpoint=shapes[:, 1, None],
+            shape_index=None if len(shapes) == c1 - c0 else shape_index.ravel(),
+            factor=self.factor[i][:, None],
+            frac=tuple((j, c) for j, c, log in curves if not log),
+            log=tuple((j, c) for j, c, log in curves if log),
+            couple=tuple(
+                (j, int(self.couple_curve[i, j]), float(self.couple_coef[i, j]))
+                for j in rows if self.couple_curve[i, j] >= 0
+            ),
+            per_hrt=tuple((j, float(self.per_hrt[i, j])) for j in rows if self.per_hrt[i, j]),
+            offset=tuple((j, float(self.offset[i, j])) for j in rows if self.offset[i, j]),
+            clip=tuple(
+                (j, float(self.lo[i, j]), float(self.hi[i, j]))
+                for j in rows if np.isfinite(self.lo[i, j]) or np.isfinite(self.hi[i, j])
+            ),
+            round=tuple((j, int(self.decimals[i, j])) for j in rows if rounded[j]),
+            round_all=scale[:, None] if rounded.all() else None,
+        )
+
+    def __len__(self) -> int:
+        return len(self.stages)
+
+    def ratio_vector(self, ratios: dict[str, float]) -> np.ndarray:
+        """(stages,) HRT ratios in train order (missing → 1.0). Raises ValueError for foreign stages."""
+        unknown = [s for s in ratios if s not in self.index]
+        if unknown:
+            raise ValueError(f"stage(s) not in train {self.name}: {', '.join(map(str, unknown))}")
+        return np.array([ratios.get(s, 1.0) for s in self.stages], dtype=np.float64)
+
+    def removal(self, i: int, hrt: np.ndarray, curves: tuple[np.ndarray, ...] | None = None) -> np.ndarray:
+        """(curves of stage i, N) removal values at HRT ratios `hrt` (N,)."""
+        if curves is None:
+            p = self._plans[i]
+            sig = _sigmoid(hrt, p.steepness, p.midpoint)
+            removal = sig if p.shape_index is None else sig[p.shape_index]
+            removal *= p.span
+            removal += p.r_min
+            return removal
+        c0, c1 = self.curve_offsets[i], self.curve_offsets[i + 1]
+        r_min, r_max, steepness, midpoint = (p[c0:c1] if np.ndim(p) == 2 else p[c0:c1, None] for p in curves)
+        return r_min + (r_max - r_min) * _sigmoid(hrt, steepness, midpoint)
+
+    def linearize(self, i: int, hrt: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stage i before clipping and rounding as x = mult × q + add, with
+        the derivatives of both in h: (mult, dmult, add, dadd), each
+        (metrics, N) at HRT ratios `hrt` (N,). R′(h) = span × s × σ(1 − σ).
+        """
+        p = self._plans[i]
+        sig = _sigmoid(hrt, p.steepness, p.midpoint)
+        steepness = p.steepness
+        if p.shape_index is not None:
+            sig, steepness = sig[p.shape_index], steepness[p.shape_index]
+        removal = p.r_min + p.span * sig
+        slope = p.span * steepness * sig * (1.0 - sig)
+        mult = np.repeat(p.factor, len(hrt), axis=1)
+        dmult = np.zeros_like(mult)
+        add = np.zeros_like(mult)
+        dadd = np.zeros_like(mult)
+        for j, c in p.frac:
+            dmult[j] = -mult[j] * slope[c]
+            mult[j] *= 1 - removal[c]
+        for j, c in p.log:
+            mult[j] /= 10.0 ** removal[c]
+            dmult[j] = -np.log(10.0) * slope[c] * mult[j]
+        for j, c, coef in p.couple:
+            add[j] += coef * removal[c]
+            dadd[j] += coef * slope[c]
+        for j, coef in p.per_hrt:
+            add[j] += coef * hrt
+            dadd[j] += coef
+        for j, offset in p.offset:
+            add[j] += offset
+        return mult, dmult, add, dadd
+
+    def step(
+        self,
+        i: int,
+        q: np.ndarray,
+        hrt: np.ndarray,
+        curves: tuple[np.ndarray, ...] | None = None,
+        rounded: bool = True,
+    ) -> np.ndarray:
+        """
+        Effluent (metrics, N) of stage i for influent `q` (metrics, N).
+
+        `curves` optionally replaces the (r_min, r_max, steepness,
+        midpoint) columns of `self.curves`; each may be (C,) or (C, N).
+        """
+        p = self._plans[i]
+        removal = self.removal(i, hrt, curves)
+        x = q * p.factor
+        for j, c in p.frac:
+            x[j] *= 1 - removal[c]
+        for j, c in p.log:
+            x[j] /= 10.0 ** removal[c]
+        for j, c, coef in p.couple:
+            x[j] += coef * removal[c]
+        for j, coef in p.per_hrt:
+            x[j] += coef * hrt
+        for j, offset in p.offset:
+            x[j] += offset
+        return self.finish(i, x, rounded)
+
+    def finish(self, i: int, x: np.ndarray, rounded: bool = True) -> np.ndarray:
+        """Clip (and round) the raw effluent `x` (metrics, N) of stage i in place."""
+        p = self._plans[i]
+        for j, lo, hi in p.clip:
+            np.clip(x[j], lo, hi, out=x[j])
+        if rounded:
+            # rint(v × 10^d) / 10^d for all rows at once; values whose scaled
+            # fraction is within float error of .5 go through Python's round(),
+            # which decides on the exact double (as the scalar engine always did)
+            if p.round_all is not None:
+                _round_rows(x, p.round_all, p.round)
+            else:
+                for j, decimals in p.round:
+                    _round_rows(x[j:j + 1], 10.0 ** decimals, ((j, decimals),))
+        return x
+
+
+# ── Registry ────────────────────────────────────────────────────────
+
+class TrainRegistry:
+    """All compiled trains by name."""
+
+    def __init__(self, trains: dict[str, Train], default: str = DEFAULT_TRAIN) -> None:
+        if default not in trains:
+            raise ValueError(f"default train {default} is not defined")
+        self.trains = trains
+        self.default = trains[default]
+
+    def get(self, name: str | None = None) -> Train:
+        """Train by name (None → default); raises KeyError if unknown."""
+        if name is None:
+            return self.default
+        try:
+            return self.trains[name]
+        except KeyError:
+            raise KeyError(f"unknown train: {name}") from None
+
+    def __iter__(self):
+        return iter(self.trains.values())
+
+
+def compile_trains(models: dict[str, dict], trains: dict[str, list[str]]) -> TrainRegistry:
+    return TrainRegistry({name: Train(name, stages, models) for name, stages in trains.items()})
+
+
+def default_train_registry() -> TrainRegistry:
+    """The built-in stage models and trains."""
+    return compile_trains(STAGE_MODELS, TRAINS)
+
+
+def load_train_config(path: str) -> TrainRegistry:
+    """Built-ins plus the stage models and trains of a JSON config file (see module docstring)."""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    models = {**STAGE_MODELS, **config.get("stages", {})}
+    return compile_trains(models, {**TRAINS, **config.get("trains", {})})
+
+
+# ── Singleton instance ──────────────────────────────────────────────
+train_registry = load_train_config(TRAIN_CONFIG_PATH) if TRAIN_CONFIG_PATH else default_train_registry()
@@ -0,0 +1,176 @@
+"""
+Server-push fan-out for sensors, alerts, pipeline and plant dynamics updates.
+
+Each published payload is serialized exactly once into a `Frame`; every
+subscriber receives a reference to the same frame. Subscribers keep at
+most one pending frame per channel, so a slow consumer skips stale
+frames instead of buffering without limit.
+
+Binary WebSocket clients get the wire encoding (wire.py) of the sensors
+and pipeline channels. Sensors frames carry a delta against the previous
+published snapshot; a client that skipped a frame gets the full frame
+instead. Alerts and dynamics stay JSON text frames.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from pydantic import BaseModel
+
+from .simulator import SensorSnapshot
+from .wire import WireEncoder
+
+CHANNELS: tuple[str, ...] = ("sensors", "alerts", "pipeline", "dynamics")
+
+
+@dataclass(frozen=True)
+class Frame:
+    """One pre-serialized message, shared by all subscribers."""
+    channel: str
+    seq: int
+    text: str          # WebSocket text frame (JSON envelope)
+    sse: bytes         # Server-Sent Events encoding of the same envelope
+    binary: bytes | None = None    # self-contained wire frame, when the channel has one
+    delta: bytes | None = None     # sensors: wire delta against snapshot `base_seq`
+    base_seq: int = -1
+    wire_seq: int = -1             # sensors: snapshot seq of this frame
+
+
+def _make_frame(channel: str, seq: int, payload_json: str, **wire) -> Frame:
+    # Envelope is assembled around the already-encoded payload to avoid
+    # a second JSON encoding pass.
+    text = f'{{"channel":"{channel}","seq":{seq},"data":{payload_json}}}'
+    sse = f"id: {seq}\nevent: {channel}\ndata: {text}\n\n".encode()
+    return Frame(channel=channel, seq=seq, text=text, sse=sse, **wire)
+
+
+@dataclass(eq=False)
+class Subscription:
+    """A single client's channel filter and pending frames."""
+    channels: frozenset[str]
+    binary: bool = False
+    dropped: int = 0
+    wire_seq: int = -1      # snapshot seq of the last sensors wire frame sent
+    _pending: OrderedDict[str, Frame] = field(default_factory=OrderedDict)
+    _ready: asyncio.Event = field(default_factory=asyncio.Event)
+
+    def offer(self, frame: Frame) -> None:
+        """Queue a frame, replacing an undelivered frame of the same channel."""
+        if frame.channel not in self.channels:
+            return
+        if frame.channel in self._pending:
+            self.dropped += 1
+            del self._pending[frame.channel]
+        self._pending[frame.channel] = frame
+        self._ready.set()
+
+    async def get(self) -> Frame:
+        """Wait for the oldest pending frame."""
+        while not self._pending:
+            self._ready.clear()
+            await self._ready.wait()
+        _, frame = self._pending.popitem(last=False)
+        return frame
+
+    def wire(self, frame: Frame) -> bytes | None:
+        """Binary encoding of `frame` for this client (None: send the JSON text)."""
+        if not self.binary or frame.binary is None:
+            return None
+        data = frame.delta if frame.delta is not None and frame.base_seq == self.wire_seq else frame.binary
+        if frame.wire_seq >= 0:
+            self.wire_seq = frame.wire_seq
+        return data
+
+
+class StreamHub:
+    """Fan-out of frames to all subscribers. Must be used from the event loop."""
+
+    def __init__(self) -> None:
+        self._subscribers: set[Subscription] = set()
+        self._latest: dict[str, Frame] = {}
+        self._alerts_body: object = None
+        self._wire: WireEncoder | None = None
+        self._wire_seq = -1
+        self._seq = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, channels: frozenset[str], binary: bool = False) -> Subscription:
+        """Register a client; it immediately receives the latest frame per channel."""
+        sub = Subscription(channels=channels, binary=binary)
+        for channel in CHANNELS:
+            frame = self._latest.get(channel)
+            if frame is not None:
+                sub.offer(frame)
+        self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        self._subscribers.discard(sub)
+
+    def set_channels(self, sub: Subscription, channels: frozenset[str]) -> None:
+        """Change a client's filter; newly added channels get their latest frame."""
+        added = channels - sub.channels
+        sub.channels = channels
+        for channel in added:
+            frame = self._latest.get(channel)
+            if frame is not None:
+                sub.offer(frame)
+
+    def publish(self, channel: str, payload: BaseModel) -> Frame:
+        """Serialize `payload` once and offer it to every subscriber."""
+        return self.publish_json(channel, payload.model_dump_json())
+
+    def publish_json(self, channel: str, payload_json: str, **wire) -> Frame:
+        """Offer an already-serialized JSON payload (and its wire frames) to every subscriber."""
+        if channel not in CHANNELS:
+            raise ValueError(f"unknown channel: {channel}")
+        self._seq += 1
+        frame = _make_frame(channel, self._seq, payload_json, **wire)
+        self._latest[channel] = frame
+        for sub in self._subscribers:
+            sub.offer(frame)
+        return frame
+
+    def publish_snapshot(self, snapshot: SensorSnapshot) -> None:
+        """Acquisition listener: publish sensors, and alerts when they changed."""
+        # Same bytes the REST endpoints serve for this snapshot
+        if self._wire is None:
+            self._wire = WireEncoder(snapshot.sensors, window=2)
+        base = self._wire_seq if self._wire.has(self._wire_seq) else -1
+        self._wire.remember(snapshot)
+        self._wire_seq = snapshot.seq
+        self.publish_json(
+            "sensors",
+            snapshot.sensors_payload().text,
+            binary=self._wire.payload(snapshot).body,
+            delta=self._wire.payload(snapshot, since=base).body if base >= 0 else None,
+            base_seq=base,
+            wire_seq=snapshot.seq,
+        )
+        if snapshot.alerts_payload is not self._alerts_body:
+            self._alerts_body = snapshot.alerts_payload
+            self.publish_json("alerts", snapshot.alerts_payload.text)
+
+
+def parse_channels(raw: str | list[str]) -> frozenset[str]:
+    """Parse a comma-separated (or list) channel filter. Raises ValueError."""
+    names = raw.split(",") if isinstance(raw, str) else raw
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        raise ValueError("channels must be a comma-separated string or a list of strings")
+    channels = frozenset(n.strip() for n in names if n.strip())
+    unknown = channels - set(CHANNELS)
+    if unknown:
+        raise ValueError(f"unknown channel(s): {', '.join(sorted(unknown))}")
+    if not channels:
+        raise ValueError("at least one channel is required")
+    return channels
+
+
+# ── Singleton instance ──────────────────────────────────────────────
+hub = StreamHub()
@@ -0,0 +1,188 @@
+"""
+Compact binary encoding of sensor snapshots and pipeline results.
+
+Opt-in alternative to JSON for clients that decode every update (the
+Unity WebGL scene, high-rate consumers): `GET /api/sensors` and
+`GET /api/pipeline` with `Accept: application/vnd.aquaview.wire` or
+`?format=binary`, and WebSocket binary frames on `/api/stream?format=binary`.
+Everything is little-endian, 4-byte aligned after the header:
+
+    header (32 B): magic "AQVW" | version u16 = 1 | kind u8 | reserved u8
+                   | seq i64 | base seq i64 | epoch ns i64
+
+    kind 1 = sensors (full), 2 = sensors (delta):
+        n_tags u32 | count u32 | table_len u32 | reserved u32
+        table: n_tags × (u16 length, UTF-8 "site/tag", u16 length, UTF-8 unit),
+               zero-padded to a multiple of 4                 (full frames only)
+        values f32[count] | index u16[count] | status u8[count] | anomaly u8[count]
+
+    kind 3 = pipeline:
+        n_stages u16 | overall status u8 | reserved u8 | table_len u32
+        table: u16-length strings — train, then (stage, stage_name_ko) per stage,
+               zero-padded to a multiple of 4
+        raw_water f32[8] | treated_water f32[8]
+        n_stages × (hrt_ratio f32, hrt_hours f32, effluent f32[8]) | status u8[n_stages]
+
+`index` points into the tag table of the last full frame (the tags of the
+requested site, in config order); a full frame lists every tag with
+count = n_tags. A delta frame carries only the tags whose value, status or
+anomaly changed between snapshot `base seq` and `seq`; a client applies it
+only when it holds exactly `base seq`, otherwise it asks for a full frame.
+Status and anomaly codes are those of the JSON enums in declaration order
+(normal/warning/danger; none/drift/spike). Water quality is in `WaterQuality`
+field order. Influents, removal efficiencies and analytics stay JSON-only.
+"""
+
+from __future__ import annotations
+
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from fastapi import Request
+
+from .history_store import CODE_BY_STATUS, to_ns
+from .http_cache import SerializedBody
+from .models import PipelineResult, WaterQuality
+from .sensor_registry import SensorArray
+
+WIRE_MEDIA_TYPE = "application/vnd.aquaview.wire"
+WIRE_MAGIC = b"AQVW"
+WIRE_VERSION = 1
+SENSORS_FULL, SENSORS_DELTA, PIPELINE = 1, 2, 3
+
+_HEADER = struct.Struct("<4sHBBqqq")      # 32 bytes
+_SENSORS = struct.Struct("<IIII")
+_PIPELINE = struct.Struct("<HBBI")
+_LENGTH = struct.Struct("<H")
+_QUALITY = tuple(WaterQuality.model_fields)
+
+MAX_WIRE_TAGS = 65_535                    # u16 index
+
+
+def wants_binary(request: Request, format: str | None) -> bool:
+    """`?format=binary`, or the wire media type in Accept (unless `?format=json`)."""
+    if format is not None:
+        return format == "binary"
+    return WIRE_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _strings(items) -> bytes:
+    table = b"".join(_LENGTH.pack(len(raw)) + raw for raw in (s.encode() for s in items))
+    return table + b"\0" * (-len(table) % 4)
+
+
+# ── Sensors ─────────────────────────────────────────────────────────
+
+class WireEncoder:
+    """
+    Binary sensor frames for one `SensorArray`. Keeps the columns of the
+    last `window` snapshots so that deltas can be cut against any of them,
+    and caches each encoded frame until the next snapshot.
+    """
+
+    def __init__(self, sensors: SensorArray, window: int = 64) -> None:
+        if len(sensors) > MAX_WIRE_TAGS:
+            raise ValueError(f"binary frames support at most {MAX_WIRE_TAGS} tags")
+        if window < 1:
+            raise ValueError("delta window must be at least 1")
+        self.sensors = sensors
+        self.window = window
+        self._tables: dict[str | None, bytes] = {}
+        self._columns: OrderedDict[int, tuple[np.ndarray, np.ndarray, np.ndarray]] = OrderedDict()
+        self._frames: tuple[int, dict] = (-1, {})
+        self._lock = threading.Lock()
+
+    def remember(self, snapshot) -> None:
+        """Keep `snapshot` as a delta base (call once per published snapshot)."""
+        with self._lock:
+            if self._columns and snapshot.seq <= next(reversed(self._columns)):
+                # Sequence restarted (new producer behind the snapshot bus): old bases are void
+                self._columns.clear()
+                self._frames = (-1, {})
+            self._columns[snapshot.seq] = (snapshot.values, snapshot.statuses, snapshot.analytics.anomaly)
+            while len(self._columns) > self.window:
+                self._columns.popitem(last=False)
+
+    def has(self, seq: int) -> bool:
+        return seq in self._columns
+
+    def payload(self, snapshot, site: str | None = None, since: int | None = None) -> SerializedBody:
+        """
+        Frame for `snapshot`: a delta against snapshot `since` when it is
+        still in the window, otherwise full. Raises KeyError for an unknown site.
+        """
+        with self._lock:
+            base = self._columns.get(since) if since is not None else None
+        key = (site, since if base is not None else None)
+        seq, frames = self._frames
+        if seq != snapshot.seq:
+            # Requests for an older snapshot than the cached one are encoded, not cached
+            if seq > snapshot.seq:
+                return SerializedBody(self.encode(snapshot, site, since, base), WIRE_MEDIA_TYPE)
+            frames = {}
+            self._frames = (snapshot.seq, frames)
+        cached = frames.get(key)
+        if cached is None:
+            cached = frames[key] = SerializedBody(self.encode(snapshot, site, since, base), WIRE_MEDIA_TYPE)
+        return cached
+
+    def table(self, site: str | None) -> bytes:
+        table = self._tables.get(site)
+        if table is None:
+            specs = self.sensors.specs
+            table = self._tables[site] = _strings(
+                s for i in self.sensors.rows(site) for s in (specs[i].key, specs[i].unit)
+            )
+        return table
+
+    def encode(self, snapshot, site: str | None = None, since: int | None = None, base=None) -> bytes:
+        """Full frame, or delta against `base` = (values, statuses, anomaly) of snapshot `since`."""
+        rows = self.sensors.rows(site)
+        table = self.table(site)     # KeyError before anything is encoded
+        rows = np.asarray(rows, dtype=np.intp)
+        values = snapshot.values[rows]
+        statuses = snapshot.statuses[rows]
+        anomaly = snapshot.analytics.anomaly[rows]
+        if base is None:
+            kind, since, index, table_out = SENSORS_FULL, 0, np.arange(len(rows)), table
+        else:
+            changed = (
+                (values != base[0][rows]) | (statuses != base[1][rows]) | (anomaly != base[2][rows])
+            )
+            index = np.flatnonzero(changed)
+            kind, table_out = SENSORS_DELTA, b""
+            values, statuses, anomaly = values[index], statuses[index], anomaly[index]
+        count = len(index)
+        return b"".join((
+            _HEADER.pack(WIRE_MAGIC, WIRE_VERSION, kind, 0, snapshot.seq, since, to_ns(snapshot.timestamp)),
+            _SENSORS.pack(len(rows), count, len(table_out), 0),
+            table_out,
+            values.astype("<f4").tobytes(),
+            index.astype("<u2").tobytes(),
+            statuses.astype(np.uint8).tobytes(),
+            anomaly.astype(np.uint8).tobytes(),
+        ))
+
+
+# ── Pipeline ────────────────────────────────────────────────────────
+
+def _quality(q: WaterQuality) -> list[float]:
+    return [getattr(q, name) for name in _QUALITY]
+
+
+def encode_pipeline(result: PipelineResult) -> bytes:
+    """Pipeline frame (kind 3) for a `PipelineResult`."""
+    stages = result.stages
+    table = _strings([result.train, *(s for st in stages for s in (st.stage, st.stage_name_ko))])
+    floats = _quality(result.raw_water) + _quality(result.treated_water)
+    for st in stages:
+        floats += [st.hrt_ratio, st.hrt_hours, *_quality(st.effluent)]
+    return b"".join((
+        _HEADER.pack(WIRE_MAGIC, WIRE_VERSION, PIPELINE, 0, 0, 0, 0),
+        _PIPELINE.pack(len(stages), CODE_BY_STATUS[result.overall_status], 0, len(table)),
+        table,
+        np.array(floats, dtype="<f4").tobytes(),
+        bytes(CODE_BY_STATUS[st.status] for st in stages),
+    ))
@@ -0,0 +1,102 @@
+"""
+Run the benchmark suite and compare against a stored baseline.
+
+    cd backend
+    python -m benchmarks --output results.json                  # run, save
+    python -m benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks --baseline benchmarks/baseline.json --threshold 0.15
+
+With --baseline the exit status is 1 if any compared metric is worse
+than the baseline by more than the threshold (relative), so the suite
+can gate CI. Baselines are machine-specific; record one per runner.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+
+from . import load, micro
+
+# Metrics compared against the baseline, and whether higher is better
+COMPARED: dict[str, dict[str, bool]] = {
+    "micro": {"p50_us": False},
+    "load": {"rps": True, "p99_ms": False},
+}
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Human-readable regressions of `current` vs `baseline` beyond `threshold`."""
+    regressions = []
+    for section, metrics in COMPARED.items():
+        for name, now in current.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if before is None:
+                continue
+            for metric, higher_is_better in metrics.items():
+                old, new = before.get(metric), now.get(metric)
+                if not old or new is None:
+                    continue
+                change = (new - old) / old
+                worse = -change if higher_is_better else change
+                if worse > threshold:
+                    regressions.append(
+                        f"{section}/{name} {metric}: {old:.3g} → {new:.3g} ({change:+.1%})"
+                    )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="AquaView benchmark suite")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--save-baseline", metavar="PATH", help="write results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per micro-benchmark")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per load scenario")
+    parser.add_argument("--skip-load", action="store_true", help="micro-benchmarks only")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "clients": args.clients,
+        },
+        "micro": micro.run(args.min_time),
+    }
+    micro.print_table(results["micro"])
+    if not args.skip_load:
+        print()
+        results["load"] = load.run(args.clients, args.duration)
+        load.print_table(results["load"])
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nresults written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        print(f"\nbaseline {args.baseline} ({baseline.get('meta', {}).get('timestamp', '?')}):")
+        if regressions:
+            for line in regressions:
+                print(f"  REGRESSION {line}")
+            return 1
+        print(f"  no regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
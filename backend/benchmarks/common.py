@@ -0,0 +1,59 @@
+"""Timing helpers shared by the benchmark modules."""
+
+from __future__ import annotations
+
+import math
+import time
+from typing import Callable
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list (q in 0–100)."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[k]
+
+
+def summarize(samples_s: list[float], scale: float, unit: str) -> dict:
+    """p50/p99/mean of per-call durations (seconds) expressed in `unit`."""
+    ordered = sorted(samples_s)
+    mean = sum(ordered) / len(ordered)
+    return {
+        f"mean_{unit}": mean * scale,
+        f"p50_{unit}": percentile(ordered, 50) * scale,
+        f"p99_{unit}": percentile(ordered, 99) * scale,
+        "ops_per_s": 1.0 / mean if mean else float("inf"),
+        "samples": len(ordered),
+    }
+
+
+def measure(
+    fn: Callable[[], object],
+    *,
+    setup: Callable[[], object] | None = None,
+    min_time: float = 0.5,
+    max_samples: int = 100_000,
+    warmup: int = 3,
+) -> dict:
+    """
+    Time `fn()` repeatedly for about `min_time` seconds.
+
+    `setup`, if given, runs untimed before every call (e.g. to invalidate a
+    cache). Results are in microseconds.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        fn()
+
+    samples: list[float] = []
+    clock = time.perf_counter
+    deadline = clock() + min_time
+    while len(samples) < max_samples and (clock() < deadline or len(samples) < 5):
+        if setup is not None:
+            setup()
+        started = clock()
+        fn()
+        samples.append(clock() - started)
+    return summarize(samples, 1e6, "us")
@@ -0,0 +1,181 @@
+"""
+In-process ASGI load generator.
+
+    cd backend && python -m benchmarks.load [--clients 16] [--duration 3]
+
+Requests are sent straight into the ASGI app (no sockets, no HTTP client
+library), with the app's lifespan running so the acquisition loop ticks
+as in production. Each scenario runs `clients` concurrent coroutines for
+`duration` seconds and reports p50/p99 latency and requests per second.
+Handler time, middleware and JSON encoding are included; network and
+server (uvicorn) overhead are not.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit
+
+from app.main import app
+from app.pipeline import STAGE_ORDER
+
+from .common import summarize
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    method: str
+    url: str
+    body: bytes = b""
+    conditional: bool = False   # replay the last ETag like a polling browser
+
+
+def _params_body(rng: random.Random) -> bytes:
+    # A handful of slider positions, as produced by dashboard drags
+    ratios = [rng.choice((0.5, 0.75, 1.0, 1.25, 1.5)) for _ in STAGE_ORDER]
+    params = [{"stage": s, "hrt_ratio": r} for s, r in zip(STAGE_ORDER, ratios)]
+    return json.dumps({"params": params}).encode()
+
+
+def scenarios() -> list[Scenario]:
+    rng = random.Random(0)
+    batch = json.dumps({"grid": {"aeration": {"start": 0.5, "stop": 2.0, "num": 64}}}).encode()
+    return [
+        Scenario("sensors", "GET", "/api/sensors"),
+        Scenario("sensors_etag", "GET", "/api/sensors", conditional=True),
+        Scenario("alerts", "GET", "/api/alerts"),
+        Scenario("history_20", "GET", "/api/history?sensor=ph&limit=20"),
+        Scenario("history_points", "GET", "/api/history?sensor=ph&points=200"),
+        Scenario("pipeline", "GET", "/api/pipeline"),
+        Scenario("pipeline_etag", "GET", "/api/pipeline", conditional=True),
+        Scenario("pipeline_params", "POST", "/api/pipeline/params", _params_body(rng)),
+        Scenario("pipeline_batch", "POST", "/api/pipeline/batch", batch),
+    ]
+
+
+@dataclass
+class _Response:
+    status: int = 0
+    headers: dict[bytes, bytes] = field(default_factory=dict)
+
+
+async def asgi_request(
+    method: str, url: str, body: bytes = b"", headers: list[tuple[bytes, bytes]] | None = None
+) -> _Response:
+    """One request through the ASGI app; the response body is discarded."""
+    parts = urlsplit(url)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"accept-encoding", b"gzip"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            *(headers or ()),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    response = _Response()
+    done = asyncio.Event()
+    request_sent = False
+
+    async def receive() -> dict:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if message["type"] == "http.response.start":
+            response.status = message["status"]
+            response.headers = dict(message.get("headers", ()))
+        elif message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    await app(scope, receive, send)
+    return response
+
+
+async def _client(scenario: Scenario, deadline: float, latencies: list[float], errors: list[int]) -> None:
+    etag: bytes | None = None
+    clock = time.perf_counter
+    while clock() < deadline:
+        headers = [(b"if-none-match", etag)] if etag else None
+        started = clock()
+        response = await asgi_request(scenario.method, scenario.url, scenario.body, headers)
+        latencies.append(clock() - started)
+        if response.status >= 400:
+            errors.append(response.status)
+        if scenario.conditional:
+            etag = response.headers.get(b"etag", etag)
+
+
+async def run_scenario(scenario: Scenario, clients: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors: list[int] = []
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(_client(scenario, deadline, latencies, errors) for _ in range(clients)))
+    elapsed = time.perf_counter() - started
+
+    stats = summarize(latencies, 1e3, "ms")
+    stats.pop("ops_per_s")
+    stats["rps"] = len(latencies) / elapsed
+    stats["errors"] = len(errors)
+    return stats
+
+
+async def run_async(clients: int, duration: float, only: list[str] | None = None) -> dict[str, dict]:
+    results = {}
+    async with app.router.lifespan_context(app):
+        for scenario in scenarios():
+            if only and scenario.name not in only:
+                continue
+            results[scenario.name] = await run_scenario(scenario, clients, duration)
+    return results
+
+
+def run(clients: int = 16, duration: float = 3.0, only: list[str] | None = None) -> dict[str, dict]:
+    return asyncio.run(run_async(clients, duration, only))
+
+
+def print_table(results: dict[str, dict]) -> None:
+    print(f"{'scenario':<18} {'rps':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for name, r in results.items():
+        print(f"{name:<18} {r['rps']:>10.0f} {r['p50_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['errors']:>7}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AquaView in-process ASGI load test")
+    parser.add_argument("--clients", type=int, default=16, help="concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=3.0, help="seconds per scenario")
+    parser.add_argument("--only", nargs="+", help="run only these scenarios")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    results = run(args.clients, args.duration, args.only)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
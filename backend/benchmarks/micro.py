@@ -0,0 +1,131 @@
+"""
+Micro-benchmarks for the engines behind the API.
+
+    cd backend && python -m benchmarks.micro [--min-time 0.5]
+
+Each case is timed in isolation (no HTTP). Cached layers are bypassed
+where they would hide the cost being measured: `run_pipeline` is called
+directly, and `get_alerts` runs after a fresh tick every call. The
+ingest cases decode and record a batch of `INGEST_SAMPLES` samples.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from itertools import count
+from typing import Callable
+
+import numpy as np
+
+from app.anomaly import AnomalyDetector
+from app.history_store import RingBufferHistory
+from app.ingest import FRAMES_MEDIA_TYPE, IngestBatch, encode_frame, parse_batch
+from app.models import PipelineParams, ProcessStage, StageParams
+from app.pipeline import REMOVAL_CURVES, STAGE_ORDER, _sigmoid_removal, run_pipeline
+from app.pipeline_compare import compare
+from app.pipeline_sensitivity import sensitivity
+from app.simulator import SensorSimulator
+from app.wire import encode_pipeline
+
+from .common import measure
+
+HISTORY_TICKS = 3_600  # samples per sensor before timing get_history
+INGEST_SAMPLES = 10_000  # samples per ingest batch
+
+
+def _ingest_cases() -> dict[str, tuple[Callable[[], object], None]]:
+    sim = SensorSimulator(RingBufferHistory(HISTORY_TICKS), simulate=False)
+    keys = sim.sensors.keys
+    steps = INGEST_SAMPLES // len(keys)
+    rows = np.tile(np.arange(len(keys)), steps)
+    offsets = np.repeat(np.arange(steps, dtype=np.int64), len(keys)) * 1_000_000   # 1 kHz scans
+    values = np.random.default_rng(0).uniform(0.0, 100.0, len(rows))
+    now_ns = time.time_ns()
+    body = encode_frame(keys, rows, now_ns - steps * 1_000_000 + offsets, values)
+    order = np.lexsort((offsets, rows))
+    batches = count()
+
+    def record() -> int:
+        # Each batch continues where the last one ended, so nothing is stale
+        start = now_ns + next(batches) * steps * 1_000_000
+        return sim.ingest(IngestBatch(rows[order], (start + offsets)[order], values[order]))
+
+    return {
+        "ingest_parse_frames": (lambda: parse_batch(body, FRAMES_MEDIA_TYPE, sim.sensors, now_ns), None),
+        "ingest_record": (record, None),
+    }
+
+
+def _cases() -> dict[str, tuple[Callable[[], object], Callable[[], object] | None]]:
+    params = [
+        StageParams(stage=stage, hrt_ratio=ratio)
+        for stage, ratio in zip(STAGE_ORDER, (0.8, 1.2, 1.0, 1.5, 0.6))
+    ]
+    curve = REMOVAL_CURVES[ProcessStage.AERATION]["bod"]
+
+    tick_sim = SensorSimulator(RingBufferHistory(HISTORY_TICKS), seed=0)
+    detector = AnomalyDetector(tick_sim.sensors)
+    ticks = count()
+    alert_sim = SensorSimulator(RingBufferHistory(16), seed=1)
+    wire_sim = SensorSimulator(RingBufferHistory(16), seed=3)
+    pipeline = run_pipeline(params)
+    scenarios = {
+        f"aeration_{ratio}": PipelineParams(params=[*params[:1], StageParams(stage="aeration", hrt_ratio=ratio)])
+        for ratio in (0.6, 0.8, 1.0, 1.2, 1.4, 1.6, 1.8, 2.0)
+    }
+    history_sim = SensorSimulator(RingBufferHistory(HISTORY_TICKS), seed=2)
+    for _ in range(HISTORY_TICKS):
+        history_sim.tick()
+
+    return {
+        "run_pipeline": (lambda: run_pipeline(params), None),
+        "run_pipeline_default": (run_pipeline, None),
+        "sigmoid_removal": (lambda: _sigmoid_removal(1.3, *curve), None),
+        "compare_8": (lambda: compare(scenarios), None),
+        "sensitivity": (lambda: sensitivity(np.array([[0.8, 1.2, 1.0, 1.5, 0.6]])), None),
+        "simulator_tick": (tick_sim.tick, None),
+        "anomaly_update": (lambda: detector.update(next(ticks) * 1_000_000_000, tick_sim.snapshot.values), None),
+        "get_alerts": (alert_sim.get_alerts, alert_sim.tick),
+        "wire_sensors_delta": (
+            lambda: wire_sim.wire.payload(wire_sim.snapshot, None, wire_sim.snapshot.seq - 1), wire_sim.tick
+        ),
+        "wire_pipeline": (lambda: encode_pipeline(pipeline), None),
+        "get_history_20": (lambda: history_sim.get_history("ph", 20), None),
+        "get_history_3600": (lambda: history_sim.get_history("ph", HISTORY_TICKS), None),
+        **_ingest_cases(),
+    }
+
+
+def run(min_time: float = 0.5, only: list[str] | None = None) -> dict[str, dict]:
+    results = {}
+    for name, (fn, setup) in _cases().items():
+        if only and name not in only:
+            continue
+        results[name] = measure(fn, setup=setup, min_time=min_time)
+    return results
+
+
+def print_table(results: dict[str, dict]) -> None:
+    print(f"{'case':<22} {'p50 µs':>10} {'p99 µs':>10} {'ops/s':>12}")
+    for name, r in results.items():
+        print(f"{name:<22} {r['p50_us']:>10.2f} {r['p99_us']:>10.2f} {r['ops_per_s']:>12.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="AquaView engine micro-benchmarks")
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per case")
+    parser.add_argument("--only", nargs="+", help="run only these cases")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args()
+
+    results = run(args.min_time, args.only)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Tick cost vs. number of sensor tags.
+
+    cd backend && python -m benchmarks.tick_scale [--tags 10000 100000] [--ticks 20]
+
+For each size the simulator runs on a synthetic registry (sites of 500
+tags) and reports the mean per-tick time of the vectorized step
+(generate + classify) and of recording (history ring + rollups), plus
+the slowest tick (rollup buckets are folded per tag when they close).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from app.history_store import RingBufferHistory
+from app.sensor_registry import synthetic_sensor_array
+from app.simulator import RandomWalk, SensorSimulator
+
+TAGS_PER_SITE = 500
+
+
+def bench(n_tags: int, ticks: int, capacity: int) -> dict:
+    sensors = synthetic_sensor_array(max(1, n_tags // TAGS_PER_SITE), min(n_tags, TAGS_PER_SITE))
+    sim = SensorSimulator(RingBufferHistory(capacity), sensors, seed=0)
+    walk = RandomWalk(sensors, seed=0)
+
+    prev = sim.snapshot.values
+    started = time.perf_counter()
+    for _ in range(ticks):
+        prev = walk.step(prev)
+        sensors.classify(prev)
+    vector_s = (time.perf_counter() - started) / ticks
+
+    durations = []
+    for _ in range(ticks):
+        started = time.perf_counter()
+        sim.tick()
+        durations.append(time.perf_counter() - started)
+    tick_s = sum(durations) / ticks
+
+    return {
+        "tags": len(sensors),
+        "sites": len(sensors.sites),
+        "generate_classify_ms": vector_s * 1e3,
+        "tick_ms": tick_s * 1e3,
+        "record_ms": (tick_s - vector_s) * 1e3,
+        "max_tick_ms": max(durations) * 1e3,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--tags", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--ticks", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=3_600, help="history samples per tag")
+    args = parser.parse_args()
+
+    print(f"{'tags':>8} {'sites':>6} {'gen+classify':>14} {'record':>10} {'tick':>10} {'max tick':>10}")
+    for n in args.tags:
+        r = bench(n, args.ticks, args.capacity)
+        print(
+            f"{r['tags']:>8} {r['sites']:>6} {r['generate_classify_ms']:>11.2f} ms"
+            f" {r['record_ms']:>7.2f} ms {r['tick_ms']:>7.2f} ms {r['max_tick_ms']:>7.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
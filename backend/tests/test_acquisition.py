@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+
+from app.acquisition import AcquisitionLoop
+from app.history_store import RingBufferHistory
+from app.sensor_registry import synthetic_sensor_array
+from app.simulator import SensorSimulator
+
+
+def _simulator(**kwargs) -> SensorSimulator:
+    return SensorSimulator(RingBufferHistory(64), synthetic_sensor_array(1, 3), seed=2, **kwargs)
+
+
+def test_ticks_at_fixed_rate_and_notifies_listeners():
+    loop = AcquisitionLoop(_simulator(), interval=0.01)
+    seen = []
+    loop.add_listener(seen.append)
+
+    async def run():
+        loop.start()
+        loop.start()                # idempotent
+        await asyncio.sleep(0.2)
+        await loop.stop()
+
+    asyncio.run(run())
+    assert 5 <= loop.ticks <= 21 and not loop.running
+    assert [s.seq for s in seen] == sorted({s.seq for s in seen}) and len(seen) == loop.ticks
+
+
+def test_missed_slots_are_dropped_not_burst():
+    sim = _simulator()
+    slow_tick = sim.tick
+
+    def tick():
+        if loop.ticks == 2:
+            time.sleep(0.055)       # blocks the event loop for ~5 slots
+        return slow_tick()
+
+    sim.tick = tick
+    loop = AcquisitionLoop(sim, interval=0.01)
+
+    async def run():
+        loop.start()
+        await asyncio.sleep(0.15)
+        await loop.stop()
+
+    asyncio.run(run())
+    assert loop.missed >= 4
+
+
+def test_failing_listener_does_not_stop_others():
+    loop = AcquisitionLoop(_simulator(), interval=1)
+    seen = []
+    loop.add_listener(lambda snapshot: 1 / 0)
+    loop.add_listener(seen.append)
+    loop.publish(loop.simulator.snapshot)
+    assert seen == [loop.simulator.snapshot]
+
+
+def test_interval_must_be_positive():
+    with pytest.raises(ValueError):
+        AcquisitionLoop(_simulator(), interval=0)
@@ -0,0 +1,28 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.routers import admin
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_admin_disabled_without_token(client, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "")
+    assert client.get("/api/admin/profiler").status_code == 404
+    assert client.post("/api/admin/profiler", json={"enabled": True}).status_code == 404
+
+
+def test_admin_requires_matching_token(client, monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "s3cret")
+    assert client.get("/api/admin/profiler").status_code == 403
+    assert client.get("/api/admin/profiler", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/api/admin/profiler", headers={"X-Admin-Token": "s3cret"}).status_code == 200
+
+
+def test_metrics_reports_history_total(client):
+    body = client.get("/metrics").text
+    assert 'aquaview_history_size{kind="samples"}' in body
@@ -0,0 +1,74 @@
+import numpy as np
+
+from app.alert_engine import AlertEngine
+from app.models import AlertEventKind, AlertState, SensorStatus
+from app.sensor_registry import default_sensor_array
+
+SECOND = 1_000_000_000
+
+
+def _engine(**kwargs) -> tuple[AlertEngine, np.ndarray, np.ndarray]:
+    sensors = default_sensor_array()
+    normal = (sensors.normal_lo + sensors.normal_hi) / 2
+    danger = sensors.warning_hi + 1.0
+    return AlertEngine(sensors, debounce=1, **kwargs), normal, danger
+
+
+def _flap(engine: AlertEngine, normal: np.ndarray, danger: np.ndarray, ticks: int, t0: int = 0) -> None:
+    for t in range(ticks):
+        engine.evaluate(t0 + t * SECOND, danger if t % 2 == 0 else normal)
+
+
+def test_cursor_pagination_sees_every_event_once():
+    engine, normal, danger = _engine()
+    _flap(engine, normal, danger, 10)
+    seen, since = [], 0
+    while True:
+        events, truncated, _ = engine.events(since, limit=7)
+        assert not truncated
+        seen += [e.cursor for e in events]
+        if len(events) < 7:
+            break
+        since = events[-1].cursor
+    assert seen == list(range(1, engine.cursor + 1))
+
+
+def test_head_cursor_does_not_skip_events_logged_after_the_read():
+    engine, normal, danger = _engine()
+    _flap(engine, normal, danger, 4)
+    events, _, head = engine.events(0, status=SensorStatus.DANGER)
+    _flap(engine, normal, danger, 2, t0=10 * SECOND)     # logged after the read
+    assert head == events[-1].cursor + len(normal)      # clears of the last tick
+    later, _, _ = engine.events(head)
+    assert [e.cursor for e in later] == list(range(head + 1, engine.cursor + 1))
+
+
+def test_truncated_log_is_reported():
+    engine, normal, danger = _engine(log_capacity=8)
+    _flap(engine, normal, danger, 20)
+    _, truncated, _ = engine.events(0)
+    assert truncated
+
+
+def test_cleared_events_carry_normal_status():
+    engine, normal, danger = _engine()
+    _flap(engine, normal, danger, 2)
+    cleared, _, _ = engine.events(0, status=SensorStatus.NORMAL)
+    assert cleared and all(e.kind is AlertEventKind.CLEARED for e in cleared)
+    assert all(e.alert.state is AlertState.CLEARED for e in cleared)
+    danger_events, _, _ = engine.events(0, status=SensorStatus.DANGER)
+    assert all(e.kind is AlertEventKind.OPENED for e in danger_events)
+
+
+def test_acknowledge_uses_frame_time():
+    engine, normal, danger = _engine()
+    engine.evaluate(5 * SECOND, danger)
+    alert = engine.active()[0]
+    engine.acknowledge(alert.id)
+    events, _, _ = engine.events(0)
+    ack = events[-1]
+    assert ack.kind is AlertEventKind.ACKNOWLEDGED
+    assert ack.ts_ns == 5 * SECOND
+    # Time index stays sorted, so a window ending at the frame includes the ack
+    windowed, _, _ = engine.events(0, start_ns=5 * SECOND, end_ns=5 * SECOND)
+    assert windowed[-1].cursor == ack.cursor
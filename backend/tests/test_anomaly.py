@@ -0,0 +1,68 @@
+import numpy as np
+
+from app.anomaly import DRIFT, NONE, SPIKE, AnomalyDetector
+from app.sensor_registry import synthetic_sensor_array
+
+SENSORS = synthetic_sensor_array(1, 4)
+NS = 1_000_000_000
+
+
+def _noise(samples: int, seed: int = 0) -> np.ndarray:
+    centre = (SENSORS.normal_lo + SENSORS.normal_hi) / 2
+    width = SENSORS.normal_hi - SENSORS.normal_lo
+    return centre + np.random.default_rng(seed).normal(0, 0.02, (samples, len(SENSORS))) * width
+
+
+def _feed(detector: AnomalyDetector, frames: np.ndarray, t0: int = 0):
+    for t, values in enumerate(frames):
+        frame = detector.update(t0 + t * NS, values)
+    return frame
+
+
+def test_first_samples_give_exact_moments():
+    frames = _noise(40)
+    frame = _feed(AnomalyDetector(SENSORS), frames)
+    assert np.allclose(frame.std, frames.std(axis=0))
+    assert np.allclose(frame.rate, (frames[-1] - frames[-2]))
+    assert frame.seen.all()
+
+
+def test_white_noise_raises_nothing():
+    detector = AnomalyDetector(SENSORS)
+    flagged = 0
+    for t, values in enumerate(_noise(2_000, 1)):
+        flagged += np.count_nonzero(detector.update(t * NS, values).anomaly)
+    assert flagged == 0
+
+
+def test_spike_is_flagged_and_held():
+    detector = AnomalyDetector(SENSORS, hold=3)
+    frames = _noise(200, 2)
+    _feed(detector, frames)
+    glitch = frames[-1].copy()
+    glitch[1] += 5 * (SENSORS.normal_hi[1] - SENSORS.normal_lo[1])
+    frame = detector.update(200 * NS, glitch)
+    assert frame.anomaly.tolist() == [NONE, SPIKE, NONE, NONE]
+    codes = [detector.update((201 + k) * NS, frames[-1]).anomaly[1] for k in range(3)]
+    assert codes == [SPIKE, SPIKE, NONE]
+
+
+def test_ramp_is_flagged_as_drift():
+    detector = AnomalyDetector(SENSORS)
+    frames = _noise(400, 3)
+    width = SENSORS.normal_hi - SENSORS.normal_lo
+    frames[200:, 2] += np.arange(200) * 0.005 * width[2]
+    codes = [detector.update(t * NS, values).anomaly[2] for t, values in enumerate(frames)]
+    assert DRIFT in codes[200:] and DRIFT not in codes[:200]
+    assert SPIKE not in codes
+
+
+def test_columns_equal_frame_by_frame_updates():
+    frames = _noise(60, 4)
+    by_frame = _feed(AnomalyDetector(SENSORS), frames)
+    n = len(SENSORS)
+    rows = np.repeat(np.arange(n), len(frames))
+    ts = np.tile(np.arange(len(frames)) * NS, n)
+    by_columns = AnomalyDetector(SENSORS).update_columns(rows, ts, frames.T.ravel())
+    for name in ("ewma", "std", "rate", "cusum", "anomaly"):
+        assert np.allclose(getattr(by_frame, name), getattr(by_columns, name)), name
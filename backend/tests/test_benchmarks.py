@@ -0,0 +1,35 @@
+from benchmarks import load
+from benchmarks.__main__ import compare
+from benchmarks.common import measure, percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([3.0], 99) == 3.0 and percentile([], 50) == 0.0
+
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = {
+        "micro": {"tick": {"p50_us": 100.0}, "gone": {"p50_us": 1.0}},
+        "load": {"sensors": {"rps": 1000.0, "p99_ms": 10.0}},
+    }
+    current = {
+        "micro": {"tick": {"p50_us": 114.0}, "new": {"p50_us": 5.0}},
+        "load": {"sensors": {"rps": 800.0, "p99_ms": 8.0}},
+    }
+    assert compare(current, baseline, 0.15) == ["load/sensors rps: 1e+03 → 800 (-20.0%)"]
+    assert len(compare(current, baseline, 0.1)) == 2
+
+
+def test_measure_reports_microseconds():
+    stats = measure(lambda: None, min_time=0.01)
+    assert stats["samples"] >= 5 and stats["p50_us"] <= stats["p99_us"]
+
+
+def test_load_scenarios_answer_without_errors():
+    results = load.run(clients=2, duration=0.05)
+    assert set(results) == {s.name for s in load.scenarios()}
+    for name, stats in results.items():
+        assert stats["errors"] == 0, name
@@ -0,0 +1,70 @@
+import time
+
+import numpy as np
+import pytest
+
+from app.history_store import RingBufferHistory, SQLiteHistory, TieredHistory
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        yield RingBufferHistory(4)
+        return
+    history = TieredHistory(RingBufferHistory(4), SQLiteHistory(str(tmp_path / "history.db")))
+    yield history
+    history.close()
+
+
+def test_total_tracks_appends(store):
+    store.append_frame(("a", "b"), 1, [1.0, 2.0], [0, 0])
+    store.append_batch([("a", 2, 1.5, 1)])
+    store.append_columns(("a", "b"), np.array([0, 1, 1]), np.array([3, 3, 4]), np.array([1.0, 2.0, 3.0]),
+                         np.array([0, 0, 2]))
+    assert store.total() == sum(store.size(k) for k in store.keys()) == 6
+
+
+def test_sqlite_total_survives_reopen(tmp_path):
+    path = str(tmp_path / "history.db")
+    disk = SQLiteHistory(path)
+    disk.append_batch([("a", t, 1.0, 0) for t in range(5)])
+    disk.close()
+    assert SQLiteHistory(path).total() == 5
+
+
+def test_ring_reads_are_not_overwritten_by_later_appends():
+    history = RingBufferHistory(4)
+    for t in range(4):
+        history.append("a", t, float(t), 0)
+    window = history.range("a", None, None)
+    latest = history.latest("a", 2)
+    for t in range(4, 8):
+        history.append("a", t, float(t), 1)
+    assert list(window.timestamps) == [0, 1, 2, 3] and list(window.values) == [0.0, 1.0, 2.0, 3.0]
+    assert list(latest.timestamps) == [2, 3] and list(latest.statuses) == [0, 0]
+    assert list(history.range("a", None, None).timestamps) == [4, 5, 6, 7]
+
+
+def test_sqlite_appends_are_queued_and_visible_to_reads(tmp_path):
+    path = str(tmp_path / "history.db")
+    disk = SQLiteHistory(path, commit_interval=60)
+    disk.append_batch([("a", t, float(t), 0) for t in range(3)])
+    disk.append_frame(("a", "b"), 3, [3.0, 1.0], [0, 2])
+    assert disk._pending                           # nothing written on the caller's thread
+    assert list(disk.range("a", 1, None).timestamps) == [1, 2, 3]
+    assert not disk._pending
+    disk.append_batch([("b", 4, 2.0, 1)])
+    disk.close()                                   # flushes what is still queued
+    reopened = SQLiteHistory(path)
+    assert reopened.total() == 6
+    assert list(reopened.latest("b", 10).values) == [1.0, 2.0]
+
+
+def test_sqlite_writer_commits_in_background(tmp_path):
+    disk = SQLiteHistory(str(tmp_path / "history.db"), commit_interval=0.01)
+    disk.append_batch([("a", 0, 1.0, 0)])
+    deadline = time.monotonic() + 5
+    while disk._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not disk._pending
+    disk.close()
@@ -0,0 +1,54 @@
+import gzip
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.http_cache import SerializedBody, choose_encoding, etag_matches
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_etag_revalidation(client):
+    first = client.get("/api/pipeline")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    again = client.get("/api/pipeline", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+    assert client.get("/api/pipeline", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+    assert client.get("/api/pipeline", headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_compressed_body_decodes_to_json(client):
+    response = client.get("/api/pipeline", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    plain = client.get("/api/pipeline", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert response.content == plain.content    # httpx decodes the gzip body
+
+
+def test_serialized_body_compresses_once():
+    body = SerializedBody(b'{"x": 1}' * 200)
+    assert gzip.decompress(body.encoded("gzip")) == body.body
+    assert body.encoded("gzip") is body.encoded("gzip")
+    assert SerializedBody(body.body).etag == body.etag
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("gzip, deflate", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+])
+def test_choose_encoding(header, expected):
+    assert choose_encoding(header) == expected
+
+
+def test_etag_matches_lists_and_wildcard():
+    assert etag_matches('"a", "b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches(None, '"b"')
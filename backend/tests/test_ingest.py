@@ -0,0 +1,116 @@
+import json
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.history_store import RingBufferHistory, to_ns
+from app.ingest import (
+    FRAMES_MEDIA_TYPE,
+    IngestBatch,
+    encode_frame,
+    parse_batch,
+    parse_frames,
+    parse_ndjson,
+)
+from app.main import app
+from app.sensor_registry import synthetic_sensor_array
+from app.simulator import SensorSimulator
+
+SENSORS = synthetic_sensor_array(2, 3)
+NOW = 1_800_000_000 * 1_000_000_000
+NS = 1_000_000_000
+
+
+def _ndjson(*records) -> bytes:
+    return b"\n".join(json.dumps(r).encode() for r in records) + b"\n"
+
+
+def test_ndjson_and_frames_decode_to_the_same_batch():
+    body = _ndjson(
+        {"site": "site-001", "sensor": "flow-0002", "value": 3.5, "timestamp": 1_700_000_001},
+        {"site": "site-000", "sensor": "ph-0000", "value": 7.1, "timestamp": "2023-11-14T22:13:20Z"},
+        {"site": "site-000", "sensor": "ph-0000", "value": 7.2, "timestamp": 1_700_000_000.5},
+    )
+    from_json = parse_batch(body, "application/x-ndjson", SENSORS, NOW)
+    frame = encode_frame(
+        ["site-001/flow-0002", "site-000/ph-0000"],
+        np.array([0, 1, 1]),
+        np.array([1_700_000_001 * NS, 1_700_000_000 * NS, 1_700_000_000 * NS + NS // 2]),
+        np.array([3.5, 7.1, 7.2]),
+    )
+    from_frames = parse_batch(frame, FRAMES_MEDIA_TYPE, SENSORS, NOW)
+    for batch in (from_json, from_frames):
+        # Sorted by (row, time)
+        assert batch.rows.tolist() == [0, 0, 5]
+        assert batch.ts_ns.tolist() == [1_700_000_000 * NS, 1_700_000_000 * NS + NS // 2, 1_700_000_001 * NS]
+        assert batch.values.tolist() == [7.1, 7.2, 3.5]
+
+
+def test_concatenated_frames():
+    one = encode_frame(["site-000/ph-0000"], np.array([0]), np.array([NS]), np.array([1.0]))
+    two = encode_frame(["site-001/ph-0000"], np.array([0, 0]), np.array([NS, 2 * NS]), np.array([2.0, 3.0]))
+    batch = parse_frames(one + two, SENSORS)
+    assert batch.rows.tolist() == [0, 3, 3] and batch.values.tolist() == [1.0, 2.0, 3.0]
+
+
+def test_missing_timestamp_defaults_to_receipt_time():
+    batch = parse_ndjson(_ndjson({"site": "site-000", "sensor": "ph-0000", "value": 7}), SENSORS, NOW)
+    assert batch.ts_ns.tolist() == [NOW]
+
+
+@pytest.mark.parametrize("body, media_type", [
+    (_ndjson({"site": "site-000", "sensor": "nope", "value": 1}), "application/x-ndjson"),
+    (_ndjson({"site": "site-000", "sensor": "ph-0000", "value": None}), "application/x-ndjson"),
+    (_ndjson({"site": "site-000", "sensor": "ph-0000", "value": "7.1"}), "application/x-ndjson"),
+    (_ndjson({"site": "site-000", "sensor": "ph-0000", "value": True}), "application/x-ndjson"),
+    (_ndjson({"site": "site-000", "sensor": "ph-0000", "value": 1, "timestamp": "soon"}), "application/x-ndjson"),
+    (_ndjson({"site": "site-000", "sensor": "ph-0000", "value": 1, "timestamp": 1.9e9}), "application/x-ndjson"),
+    (b"not json", "application/x-ndjson"),
+    (b"AQVF\x01\x00", FRAMES_MEDIA_TYPE),
+    (encode_frame(["site-000/ph-0000"], np.array([0]), np.array([NS]), np.array([1.0]))[:-1], FRAMES_MEDIA_TYPE),
+])
+def test_invalid_batches_are_rejected(body, media_type):
+    with pytest.raises(ValueError):
+        parse_batch(body, media_type, SENSORS, NOW)
+
+
+def test_unsupported_media_type():
+    with pytest.raises(LookupError):
+        parse_batch(b"", "text/csv", SENSORS, NOW)
+
+
+def test_simulator_drops_stale_samples():
+    sim = SensorSimulator(RingBufferHistory(16), SENSORS, seed=1, simulate=False)
+    rows = np.array([0, 0, 4], dtype=np.intp)
+    accepted = sim.ingest(IngestBatch(rows=rows, ts_ns=np.array([NOW, NOW + NS, NOW]), values=np.array([7.0, 7.5, 2.0])))
+    assert accepted == 3
+    assert sim.snapshot.values[0] == 7.5 and sim.snapshot.values[4] == 2.0
+    assert sim.history.latest(SENSORS.keys[0], 5).values.tolist() == [7.0, 7.5]
+
+    late = IngestBatch(rows=np.array([0, 4], dtype=np.intp), ts_ns=np.array([NOW, NOW + NS]), values=np.array([1.0, 2.5]))
+    assert sim.ingest(late) == 1 and sim.stale == 1
+    assert sim.snapshot.values[0] == 7.5 and sim.snapshot.values[4] == 2.5
+
+
+def test_endpoint_status_codes():
+    client = TestClient(app)
+    assert client.post("/api/ingest", content=b"x", headers={"Content-Type": "text/csv"}).status_code == 415
+    bad = _ndjson({"sensor": "nope", "value": 1})
+    assert client.post("/api/ingest", content=bad, headers={"Content-Type": "application/x-ndjson"}).status_code == 422
+
+
+def test_ticks_after_future_dated_ingest_keep_history_ordered():
+    sim = SensorSimulator(RingBufferHistory(16), SENSORS, seed=1)
+    ahead_ns = to_ns(sim.snapshot.timestamp) + 30 * NS
+    sim.ingest(IngestBatch(rows=np.array([1], dtype=np.intp), ts_ns=np.array([ahead_ns]), values=np.array([4.2])))
+    for _ in range(3):
+        sim.tick()
+    held = sim.history.range(SENSORS.keys[1], None, None)
+    assert list(held.timestamps) == sorted(held.timestamps) and held.timestamps[-1] == ahead_ns
+    assert sim.snapshot.values[1] == 4.2
+    assert sim.history.range(SENSORS.keys[1], ahead_ns, None).values.tolist() == [4.2]
+    ticked = sim.history.range(SENSORS.keys[0], None, None)
+    assert len(ticked.timestamps) == 4 and list(ticked.timestamps) == sorted(ticked.timestamps)
+    # Stale-sample check still applies to the held tag
+    assert sim.ingest(IngestBatch(rows=np.array([1], dtype=np.intp), ts_ns=np.array([ahead_ns - NS]), values=np.array([1.0]))) == 0
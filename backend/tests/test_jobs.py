@@ -0,0 +1,111 @@
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.jobs import BATCH_JOB_CHUNK_ROWS, JobManager, JobPlan
+from app.http_cache import SerializedBody
+from app.models import BatchRequest, JobKind, JobRequest, JobState
+from app.pipeline_batch import evaluate_batch, to_columns
+from app.stage_registry import train_registry
+
+
+@pytest.fixture
+def manager():
+    jobs = JobManager(max_workers=2, max_active=2, ttl=60)
+    yield jobs
+    jobs._discard_pool()
+
+
+async def _wait(job, timeout: float = 60):
+    await asyncio.wait_for(asyncio.shield(job.task), timeout)
+    return job
+
+
+def _ratios(rows: int) -> list[list[float]]:
+    rng = np.random.default_rng(11)
+    return rng.uniform(0.5, 2.0, (rows, len(train_registry.default))).round(3).tolist()
+
+
+def test_batch_job_matches_direct_evaluation(manager):
+    ratios = _ratios(BATCH_JOB_CHUNK_ROWS + 37)    # two chunks
+    request = JobRequest(kind=JobKind.BATCH, batch=BatchRequest(params=ratios))
+
+    async def run():
+        plan = manager.plan(request)
+        assert len(plan.tasks) == 2
+        return await _wait(manager.submit(JobKind.BATCH, plan))
+
+    job = asyncio.run(run())
+    assert job.state is JobState.SUCCEEDED and job.done == job.total == 2
+    assert job.plan is None
+    expected = to_columns(evaluate_batch(np.array(ratios)))
+    assert json.loads(job.result.body) == json.loads(json.dumps(expected))
+    status = manager.status(job)
+    assert status.progress == 1.0 and status.expires_at is not None
+
+
+def _slow_plan(seconds: float) -> JobPlan:
+    return JobPlan(tasks=[(time.sleep, (seconds,))], merge=lambda _: SerializedBody(b"null"))
+
+
+def test_cancel_and_active_limit(manager):
+    async def run():
+        first = manager.submit(JobKind.BATCH, _slow_plan(5))
+        manager.submit(JobKind.BATCH, _slow_plan(5))
+        with pytest.raises(OverflowError):
+            manager.submit(JobKind.BATCH, _slow_plan(5))
+        manager.cancel(first.id)
+        await asyncio.gather(first.task, return_exceptions=True)
+        assert first.state is JobState.CANCELLED and first.finished
+        # A cancelled job frees its slot
+        manager.submit(JobKind.BATCH, _slow_plan(0))
+        await manager.shutdown()
+
+    asyncio.run(run())
+
+
+def test_failed_chunk_marks_job_failed(manager):
+    plan = JobPlan(tasks=[(int, ("not a number",))], merge=lambda _: SerializedBody(b"null"))
+
+    async def run():
+        return await _wait(manager.submit(JobKind.BATCH, plan))
+
+    job = asyncio.run(run())
+    assert job.state is JobState.FAILED and job.error.startswith("ValueError")
+    assert job.result is None
+
+
+def test_finished_jobs_expire(manager):
+    manager.ttl = 0
+
+    async def run():
+        return await _wait(manager.submit(JobKind.BATCH, _slow_plan(0)))
+
+    job = asyncio.run(run())
+    job.finished_at -= 1
+    with pytest.raises(KeyError):
+        manager.get(job.id)
+    assert manager.jobs() == []
+
+
+def test_unknown_train_raises_key_error(manager):
+    request = JobRequest(kind=JobKind.BATCH, batch=BatchRequest(params=_ratios(2), train="nope"))
+    with pytest.raises(KeyError):
+        manager.plan(request)
+
+
+def test_worker_task_modules_skip_the_result_cache():
+    # Spawned workers import the task functions' modules from scratch
+    code = (
+        "import sys, app.optimizer, app.pipeline_batch, app.pipeline_uncertainty;"
+        "print(sorted(m for m in ('app.pipeline_cache', 'app.pipeline_table') if m in sys.modules))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=Path(__file__).parents[1])
+    assert out.stdout.strip() == "[]"
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import SensorStatus, StageParams
+from app.optimizer import optimize, pareto_front
+from app.pipeline import run_pipeline
+from app.pipeline_cache import HRT_QUANTUM
+from app.stage_registry import train_registry
+
+
+@pytest.fixture(scope="module")
+def outcome():
+    return optimize(time_budget=0.3)
+
+
+def test_best_point_is_compliant_in_run_pipeline(outcome):
+    assert outcome.feasible and outcome.evaluations > 0
+    train = train_registry.default
+    steps = outcome.best_ratios / HRT_QUANTUM
+    assert np.allclose(steps, np.round(steps))        # on the cache lattice
+    params = [StageParams(stage=s, hrt_ratio=float(r)) for s, r in zip(train.stages, outcome.best_ratios)]
+    assert run_pipeline(params).overall_status is SensorStatus.NORMAL
+    assert outcome.best_margin >= 0
+    assert outcome.best_cost == pytest.approx(float(outcome.best_ratios @ train.design_hrt))
+
+
+def test_front_is_non_dominated(outcome):
+    cost, margin = outcome.front_cost, outcome.front_margin
+    assert np.all(np.diff(cost) >= 0) and np.all(np.diff(margin) > 0)
+    assert cost[0] == outcome.best_cost
+
+
+def test_pareto_front_drops_dominated_points():
+    cost = np.array([3.0, 1.0, 2.0, 2.0, 4.0])
+    margin = np.array([0.5, 0.1, 0.05, 0.3, 0.2])
+    assert pareto_front(cost, margin).tolist() == [1, 3, 0]
+
+
+def test_bounds_are_respected():
+    train = train_registry.default
+    bounds = np.tile([0.25, 2.5], (len(train), 1))
+    bounds[train.index["aeration"]] = [1.2, 1.4]
+    result = optimize(bounds, time_budget=0.05)
+    assert np.all(result.front_ratios[:, train.index["aeration"]] >= 1.2)
+    assert np.all(result.front_ratios[:, train.index["aeration"]] <= 1.4)
+    with pytest.raises(ValueError):
+        optimize(np.ones((2, 2)))
+
+
+def test_off_lattice_bounds_snap_inward():
+    train = train_registry.default
+    a = train.index["aeration"]
+    bounds = np.tile([0.25, 2.5], (len(train), 1))
+    bounds[a] = [1.2345, 1.3337]
+    result = optimize(bounds, time_budget=0.05)
+    column = result.front_ratios[:, a]
+    assert np.all(column >= 1.235) and np.all(column <= 1.333)
+    steps = result.front_ratios / HRT_QUANTUM
+    assert np.allclose(steps, np.round(steps))
+    bounds[a] = [1.2341, 1.2349]
+    with pytest.raises(ValueError):
+        optimize(bounds)
+
+
+def test_endpoint_result_is_the_best_point():
+    client = TestClient(app)
+    body = {"bounds": {"aeration": {"lo": 1.2345, "hi": 1.3337}}, "time_budget_ms": 50}
+    response = client.post("/api/pipeline/optimize", json=body).json()
+    stages = {st["stage"]: st["hrt_ratio"] for st in response["result"]["stages"]}
+    assert stages == pytest.approx(response["best"]["hrt_ratios"], abs=1e-12)
+    assert 1.2345 <= stages["aeration"] <= 1.3337
+
+
+def test_endpoint():
+    client = TestClient(app)
+    body = client.post("/api/pipeline/optimize", json={"time_budget_ms": 50, "max_front_points": 3}).json()
+    assert body["feasible"] and body["result"]["overall_status"] == "normal"
+    assert len(body["pareto_front"]) <= 3
+    assert client.post("/api/pipeline/optimize", json={"bounds": {"bogus": {}}}).status_code == 422
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import StageParams
+from app.pipeline import run_pipeline
+from app.pipeline_batch import evaluate_batch, merge_results
+from app.routers import pipeline as pipeline_router
+from app.stage_registry import train_registry
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_grid_rows_match_run_pipeline(client):
+    train = train_registry.get("no_nitrification")
+    body = {
+        "train": train.name,
+        "grid": {"aeration": {"start": 0.5, "stop": 1.5, "num": 3}, "disinfection": {"start": 0.3, "stop": 2.0, "num": 4}},
+        "include_stages": True,
+    }
+    columns = client.post("/api/pipeline/batch", json=body).json()
+    assert columns["count"] == 12 and columns["stages"] == list(train.stages)
+    # Last stage varies fastest
+    assert columns["hrt_ratios"]["disinfection"][:4] == pytest.approx([0.3, 0.8667, 1.4333, 2.0], abs=1e-4)
+    assert set(columns["hrt_ratios"]["primary_settling"]) == {1.0}
+
+    for row in range(columns["count"]):
+        params = [StageParams(stage=s, hrt_ratio=columns["hrt_ratios"][s][row]) for s in train.stages]
+        result = run_pipeline(params, train)
+        assert {m: v[row] for m, v in columns["treated_water"].items()} == result.treated_water.model_dump()
+        assert columns["overall_status"][row] == result.overall_status.value
+        assert [columns["stage_status"][st.stage][row] for st in result.stages] == [st.status.value for st in result.stages]
+
+
+def test_chunked_evaluation_equals_single_pass():
+    ratios = np.random.default_rng(5).uniform(0.25, 2.5, (1_000, len(train_registry.default)))
+    whole = evaluate_batch(ratios, keep_stages=True, chunk_rows=1_000)
+    parts = merge_results([evaluate_batch(ratios[lo:lo + 300], keep_stages=True) for lo in range(0, 1_000, 300)])
+    chunked = evaluate_batch(ratios, keep_stages=True, chunk_rows=64)
+    for other in (parts, chunked):
+        for m in whole.treated:
+            assert np.array_equal(whole.treated[m], other.treated[m]), m
+        assert np.array_equal(whole.stage_status, other.stage_status)
+        assert np.array_equal(whole.overall_status, other.overall_status)
+
+
+def test_rejects_bad_requests(client, monkeypatch):
+    assert client.post("/api/pipeline/batch", json={"params": [[1.0, 1.0]]}).status_code == 422
+    assert client.post("/api/pipeline/batch", json={"params": [[9.0] * 5]}).status_code == 422
+    assert client.post("/api/pipeline/batch", json={"grid": {"bogus": {}}}).status_code == 422
+    assert client.post("/api/pipeline/batch", json={"params": [[1.0] * 5], "train": "nope"}).status_code == 404
+    monkeypatch.setattr(pipeline_router, "BATCH_MAX_ROWS", 10)
+    grid = {"grid": {"aeration": {"start": 0.5, "stop": 1.5, "num": 11}}}
+    assert client.post("/api/pipeline/batch", json=grid).status_code == 413
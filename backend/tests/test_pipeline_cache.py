@@ -0,0 +1,43 @@
+from app.models import StageParams
+from app.pipeline import run_pipeline
+from app.pipeline_cache import PipelineCache
+from app.stage_registry import train_registry
+
+
+def _params(**ratios: float) -> list[StageParams]:
+    return [StageParams(stage=s, hrt_ratio=r) for s, r in ratios.items()]
+
+
+def test_default_is_pinned_and_counted_as_hit():
+    cache = PipelineCache(2)
+    assert cache.get(None) is cache.default
+    assert cache.get(_params(aeration=1.0)) is cache.default
+    assert cache.stats() == {"hits": 2, "misses": 0, "evictions": 0, "size": 0, "maxsize": 2}
+
+
+def test_quantized_ratios_share_an_entry():
+    cache = PipelineCache(2)
+    first = cache.get(_params(aeration=0.8))
+    assert cache.get(_params(aeration=0.80004)) is first
+    assert cache.get(_params(aeration=0.8), train_registry.default.name) is first
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PipelineCache(2)
+    a = cache.get(_params(aeration=0.5))
+    cache.get(_params(aeration=0.6))
+    cache.get(_params(aeration=0.5))            # a is now most recent
+    cache.get(_params(aeration=0.7))            # evicts 0.6
+    assert cache.get(_params(aeration=0.5)) is a
+    assert cache.stats()["evictions"] == 1 and cache.stats()["size"] == 2
+    cache.get(_params(aeration=0.6))
+    assert cache.stats()["misses"] == 4
+
+
+def test_cached_result_equals_engine():
+    cache = PipelineCache(4)
+    params = _params(primary_settling=1.3, nitrification=0.4)
+    entry = cache.get(params, "uv")
+    assert entry.result == run_pipeline(params, train_registry.get("uv"))
+    assert entry.payload.body == entry.result.model_dump_json().encode()
@@ -0,0 +1,61 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import PipelineParams, StageParams
+from app.pipeline_compare import compare
+from app.stage_registry import train_registry
+
+STAGES = train_registry.default.stages
+
+
+def _scenario(ratios: list[float], train: str | None = None) -> PipelineParams:
+    stages = train_registry.get(train).stages
+    return PipelineParams(params=[StageParams(stage=s, hrt_ratio=r) for s, r in zip(stages, ratios)], train=train)
+
+
+SCENARIOS = {
+    "design": _scenario([1.0, 1.0, 1.0, 1.0, 1.0]),
+    "short_disinfection": _scenario([1.0, 1.0, 1.0, 1.0, 0.5]),
+    "short_aeration": _scenario([1.0, 0.6, 1.0, 1.0, 1.0]),
+    "uv": _scenario([1.0, 1.0, 1.0, 1.0, 1.2], "uv"),
+}
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def test_each_scenario_equals_params_endpoint(client):
+    outcome = compare(SCENARIOS)
+    assert list(outcome.results) == list(SCENARIOS)
+    for name, scenario in SCENARIOS.items():
+        expected = client.post("/api/pipeline/params", json=scenario.model_dump(mode="json")).json()
+        assert outcome.results[name].model_dump(mode="json") == expected, name
+
+
+def test_shared_prefixes_are_evaluated_once():
+    outcome = compare(SCENARIOS)
+    # standard: design/short_disinfection share 4 stages, short_aeration shares 1
+    standard = len(STAGES) + 1 + (len(STAGES) - 1)
+    assert outcome.stage_evaluations == standard + len(train_registry.get("uv"))
+
+
+def test_deltas_against_baseline(client):
+    body = {
+        "scenarios": {name: s.model_dump(mode="json") for name, s in SCENARIOS.items()},
+        "baseline": "short_aeration",
+    }
+    response = client.post("/api/pipeline/compare", json=body).json()
+    assert response["baseline"] == "short_aeration"
+    assert all(v == 0 for v in response["deltas"]["short_aeration"].values())
+    design, short = (response["scenarios"][n]["treated_water"] for n in ("design", "short_aeration"))
+    assert response["deltas"]["design"]["bod"] == round(design["bod"] - short["bod"], 4)
+
+
+def test_rejects_unknown_baseline_and_train(client):
+    scenario = SCENARIOS["design"].model_dump(mode="json")
+    assert client.post("/api/pipeline/compare", json={"scenarios": {"a": scenario}, "baseline": "b"}).status_code == 422
+    bad = {**scenario, "train": "nope"}
+    assert client.post("/api/pipeline/compare", json={"scenarios": {"a": bad}}).status_code == 404
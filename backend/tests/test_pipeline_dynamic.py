@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+
+from app.history_store import RingBufferHistory
+from app.main import app
+from app.models import DynamicTrajectoryResponse
+from app.pipeline import STAGE_ORDER
+from app.pipeline_dynamic import DynamicPipeline
+from app.simulator import SensorSimulator
+
+
+def test_trajectory_keys_are_stage_ids():
+    sim = SensorSimulator(RingBufferHistory(16), seed=0)
+    plant = DynamicPipeline(sim.sensors, "default", capacity=8)
+    for _ in range(3):
+        sim.tick()
+        plant.advance(sim.snapshot)
+    trajectory = plant.trajectory(limit=2, stages=[STAGE_ORDER[-1]])
+    assert list(trajectory.stages) == [STAGE_ORDER[-1]]
+    assert len(trajectory.timestamps) == 2
+
+
+def test_trajectory_accepts_registry_defined_stages():
+    now = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    response = DynamicTrajectoryResponse(
+        site="default",
+        timestamps=[now, now + timedelta(seconds=1)],
+        flow=[1.0, 1.0],
+        temperature=[20.0, 20.0],
+        stages={"ozonation": {"bod": [1.0, 1.0]}},
+    )
+    assert response.model_dump(mode="json")["stages"] == {"ozonation": {"bod": [1.0, 1.0]}}
+
+
+def test_unknown_stage_is_rejected():
+    client = TestClient(app)
+    response = client.get("/api/pipeline/dynamic/trajectory", params={"stage": "ozonation"})
+    assert response.status_code == 422
@@ -0,0 +1,62 @@
+"""
+Pipeline results against the scalar engine the stage registry replaced.
+
+data/pipeline_baseline.json holds (hrt ratios, stage effluents) recorded
+from `run_pipeline` before stage models were compiled, when every metric
+was rounded with Python's round(); case 0 is the design point.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.models import StageParams
+from app.pipeline import run_pipeline
+from app.pipeline_batch import evaluate_chain
+from app.stage_registry import METRICS, train_registry
+
+BASELINE = json.loads((Path(__file__).parent / "data" / "pipeline_baseline.json").read_text())
+
+
+def _params(ratios: list[float]) -> list[StageParams]:
+    return [StageParams(stage=s, hrt_ratio=r) for s, r in zip(BASELINE["stages"], ratios)]
+
+
+def test_design_point_matches_baseline():
+    ratios, effluents = BASELINE["cases"][0]
+    result = run_pipeline(_params(ratios))
+    assert result.treated_water.bod == 13.97
+    assert [[getattr(st.effluent, m) for m in BASELINE["metrics"]] for st in result.stages] == effluents
+
+
+def test_run_pipeline_matches_baseline():
+    mismatched = []
+    for ratios, effluents in BASELINE["cases"]:
+        result = run_pipeline(_params(ratios))
+        if [[getattr(st.effluent, m) for m in BASELINE["metrics"]] for st in result.stages] != effluents:
+            mismatched.append(ratios)
+    assert mismatched == []
+
+
+def test_batch_matches_baseline():
+    train = train_registry.default
+    assert list(train.stages) == BASELINE["stages"]
+    ratios = np.array([case[0] for case in BASELINE["cases"]])
+    treated, _, _ = evaluate_chain(ratios, train=train)
+    expected = np.array([case[1][-1] for case in BASELINE["cases"]])
+    for j, m in enumerate(BASELINE["metrics"]):
+        assert treated[m].tolist() == expected[:, j].tolist(), m
+
+
+@pytest.mark.parametrize("value", [16.425, 0.125, 2.675, 1.005, 1642.5, 0.5, 2.5, -0.125])
+def test_finish_rounds_like_python(value):
+    train = train_registry.default
+    i = 0
+    x = np.full((len(METRICS), 1), value)
+    train.finish(i, x)
+    decimals = train.decimals[i]
+    for j in range(len(METRICS)):
+        lo, hi = train.lo[i, j], train.hi[i, j]
+        assert x[j, 0] == round(float(np.clip(value, lo, hi)), int(decimals[j]))
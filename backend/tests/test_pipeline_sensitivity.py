@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.pipeline_batch import METRICS, evaluate_chain
+from app.pipeline_sensitivity import SENSITIVITY_METRICS, sensitivity
+from app.stage_registry import train_registry
+
+EPS = 1e-6
+
+
+@pytest.mark.parametrize("train", [t.name for t in train_registry])
+def test_jacobian_matches_finite_differences(train):
+    train = train_registry.get(train)
+    rng = np.random.default_rng(23)
+    points = rng.uniform(0.4, 2.3, (16, len(train)))
+    result = sensitivity(points, train)
+
+    treated, _, _ = evaluate_chain(points, rounded=False, train=train)
+    assert np.allclose(result.treated, np.column_stack([treated[m] for m in METRICS]))
+
+    for i in range(len(train)):
+        step = np.zeros(len(train))
+        step[i] = EPS
+        up, _, _ = evaluate_chain(points + step, rounded=False, train=train)
+        down, _, _ = evaluate_chain(points - step, rounded=False, train=train)
+        for j, m in enumerate(METRICS):
+            numeric = (up[m] - down[m]) / (2 * EPS)
+            assert np.allclose(result.jacobian[:, j, i], numeric, rtol=1e-4, atol=1e-6), (train.name, i, m)
+
+
+def test_endpoint_reports_standard_metrics():
+    client = TestClient(app)
+    response = client.post("/api/pipeline/sensitivity", json={"hrt_ratios": {"aeration": 0.8}})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["hrt_ratios"]["aeration"] == 0.8
+    assert list(body["jacobian"]) == list(SENSITIVITY_METRICS)
+    # Longer aeration lowers effluent BOD
+    assert body["jacobian"]["bod"]["aeration"] < 0
+    assert client.post("/api/pipeline/sensitivity", json={"hrt_ratios": {"aeration": 9}}).status_code == 422
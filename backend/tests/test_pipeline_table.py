@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from app.config import PIPELINE_TABLE_POINTS
+from app.pipeline_batch import METRICS, evaluate_chain
+from app.pipeline_table import TransferTable, build_tables
+from app.stage_registry import train_registry
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return build_tables(train_registry, PIPELINE_TABLE_POINTS)
+
+
+def _ratios(train, rows: int, seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).uniform(0.25, 2.5, (rows, len(train)))
+
+
+def test_interpolation_within_relative_bound(tables):
+    for train in train_registry:
+        ratios = _ratios(train, 2_000, 41)
+        exact, _, _ = evaluate_chain(ratios, rounded=False, train=train)
+        table = tables[train.name].evaluate(ratios, rounded=False)
+        for j, m in enumerate(METRICS):
+            scale = np.maximum(np.abs(exact[m]), 1.0)
+            assert np.all(np.abs(table[j] - exact[m]) <= 1e-7 * scale), (train.name, m)
+        assert np.all(tables[train.name].error <= 1e-7 * np.max(np.abs(table), axis=1).clip(1.0))
+
+
+def test_grid_points_are_exact(tables):
+    train = train_registry.default
+    grid = np.linspace(0.25, 2.5, PIPELINE_TABLE_POINTS)
+    ratios = np.repeat(grid[:, None], len(train), axis=1)
+    exact, _, _ = evaluate_chain(ratios, rounded=False, train=train)
+    table = tables[train.name].evaluate(ratios, rounded=False)
+    for j, m in enumerate(METRICS):
+        assert np.allclose(table[j], exact[m], rtol=1e-12, atol=1e-12), m
+
+
+def test_rounded_results_differ_by_at_most_one_unit(tables):
+    train = train_registry.default
+    ratios = _ratios(train, 2_000, 43)
+    exact, _, _ = evaluate_chain(ratios, train=train)
+    table = tables[train.name].evaluate(ratios)
+    unit = 10.0 ** -train.decimals[-1]
+    for j, m in enumerate(METRICS):
+        assert np.all(np.abs(table[j] - exact[m]) <= unit[j] * 1.000001), m
+
+
+def test_tables_round_trip_through_cache_file(tmp_path, tables):
+    path = str(tmp_path / "tables.npz")
+    built = build_tables(train_registry, PIPELINE_TABLE_POINTS, path)
+    loaded = build_tables(train_registry, PIPELINE_TABLE_POINTS, path)
+    for name, table in built.items():
+        assert loaded[name].fingerprint == table.fingerprint
+        assert np.array_equal(loaded[name].coef, table.coef)
+        assert np.array_equal(loaded[name].error, table.error)
+
+
+def test_needs_two_points():
+    with pytest.raises(ValueError):
+        TransferTable(train_registry.default, 1)
@@ -0,0 +1,81 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.pipeline import RAW_WATER
+from app.pipeline_batch import METRICS, evaluate_chain
+from app.pipeline_uncertainty import (
+    CHUNK_REALIZATIONS,
+    _sample,
+    _sample_curves,
+    merge_uncertainty,
+    plan_uncertainty,
+    run_chunk,
+    run_uncertainty,
+)
+from app.stage_registry import train_registry
+
+RATIOS = np.ones(len(train_registry.default))
+REALIZATIONS = CHUNK_REALIZATIONS + 4_000     # two chunks
+
+
+def _outcome(**kwargs):
+    return run_uncertainty(RATIOS, realizations=REALIZATIONS, seed=42, percentiles=[5, 50, 95], **kwargs)
+
+
+def _same(a, b) -> bool:
+    return (np.array_equal(a.bands, b.bands) and np.array_equal(a.means, b.means)
+            and a.over_normal == b.over_normal
+            and np.array_equal(a.status_probability, b.status_probability))
+
+
+def test_seed_reproduces_result_for_any_worker_count():
+    serial = _outcome()
+    with ThreadPoolExecutor(2) as pool:
+        parallel = _outcome(executor=pool)
+    assert serial.realizations == parallel.realizations == REALIZATIONS
+    assert _same(serial, parallel)
+    assert not _same(serial, run_uncertainty(RATIOS, realizations=REALIZATIONS, seed=43, percentiles=[5, 50, 95]))
+
+
+def test_merge_does_not_depend_on_chunk_order():
+    plan = plan_uncertainty(RATIOS, realizations=REALIZATIONS, seed=7)
+    chunks = [run_chunk(*args) for args in plan.chunks]
+    assert len(chunks) == 2
+    assert _same(merge_uncertainty(plan, chunks), merge_uncertainty(plan, chunks[::-1]))
+
+
+def test_sketch_percentiles_track_exact_samples():
+    n = 20_000
+    plan = plan_uncertainty(RATIOS, realizations=n, seed=3, percentiles=[5, 50, 95])
+    outcome = merge_uncertainty(plan, [run_chunk(*args) for args in plan.chunks])
+
+    # Re-draw the chunk's realizations the way run_chunk does
+    seed, _, ratios, influent, spread, name = plan.chunks[0]
+    train = train_registry.get(name)
+    rng = np.random.default_rng(seed)
+    q = {m: _sample(rng, influent[m], n) if m in influent else getattr(RAW_WATER, m) for m in METRICS}
+    curves = _sample_curves(rng, spread, n, train)
+    treated, _, _ = evaluate_chain(np.broadcast_to(ratios, (n, len(train))), q, curves, rounded=False, train=train)
+
+    for j, m in enumerate(METRICS):
+        samples = np.broadcast_to(treated[m], n)
+        assert outcome.means[-1, j] == pytest.approx(samples.mean(), rel=1e-9, abs=1e-12), m
+        for k, pct in enumerate(plan.percentiles):
+            # Within ~0.1 percentile rank of the exact sample value
+            lo, hi = np.percentile(samples, [max(pct - 0.2, 0), min(pct + 0.2, 100)])
+            assert lo - 1e-9 <= outcome.bands[-1, j, k] <= hi + 1e-9, (m, pct)
+
+
+def test_mean_near_deterministic_design_point():
+    outcome = _outcome()
+    treated, _, _ = evaluate_chain(RATIOS[None, :], rounded=False)
+    bod = METRICS.index("bod")
+    # Influent ranges are centred on RAW_WATER; the mean lands near the design point
+    assert outcome.means[-1, bod] == pytest.approx(treated["bod"][0], rel=0.2)
+
+
+def test_rejects_wrong_ratio_count():
+    with pytest.raises(ValueError):
+        plan_uncertainty(np.ones(2))
@@ -0,0 +1,100 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app import replay as replay_module
+from app.history_store import RingBufferHistory, from_ns
+from app.replay import ReplaySource, SessionFile, SessionRecorder
+from app.sensor_registry import synthetic_sensor_array
+from app.simulator import SensorSimulator
+
+SENSORS = synthetic_sensor_array(1, 3)
+T0 = 1_700_000_000 * 1_000_000_000
+NS = 1_000_000_000
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(replay_module, "time", clock)
+    return clock
+
+
+def _frame(seq: int) -> SimpleNamespace:
+    return SimpleNamespace(seq=seq, timestamp=from_ns(T0 + seq * NS), values=np.full(len(SENSORS), float(seq)))
+
+
+def _record(path, count: int) -> str:
+    recorder = SessionRecorder(str(path), SENSORS.keys)
+    for seq in range(count):
+        recorder.record(_frame(seq))
+    recorder.record(_frame(count - 1))      # same seq: skipped
+    recorder.close()
+    return str(path)
+
+
+def test_recording_round_trip_and_seek(tmp_path, monkeypatch):
+    monkeypatch.setattr(replay_module, "INDEX_STRIDE", 4)
+    session = SessionFile(_record(tmp_path / "s.aqvr", 25))
+    assert len(session) == 25 and session.keys == SENSORS.keys
+    assert (session.start_ns, session.end_ns) == (T0, T0 + 24 * NS)
+    timestamps, values = session.frames(3, 6)
+    assert timestamps.tolist() == [T0 + k * NS for k in (3, 4, 5)]
+    assert values[:, 0].tolist() == [3.0, 4.0, 5.0]
+    for k in range(25):
+        assert session.seek(T0 + k * NS) == k
+        assert session.seek(T0 + k * NS - 1) == k
+    assert session.seek(T0 - NS) == 0 and session.seek(T0 + 30 * NS) == 25
+
+
+def test_reopening_drops_a_torn_record(tmp_path):
+    path = _record(tmp_path / "s.aqvr", 5)
+    with open(path, "ab") as f:
+        f.write(b"\x00" * 7)
+    recorder = SessionRecorder(path, SENSORS.keys)
+    assert recorder.records == 5
+    recorder.record(_frame(5))
+    recorder.close()
+    assert SessionFile(path).values[:, 0].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]
+    with pytest.raises(ValueError):
+        SessionRecorder(path, synthetic_sensor_array(1, 2).keys)
+
+
+def test_playback_follows_wall_clock_times_speed(tmp_path, clock):
+    source = ReplaySource(SessionFile(_record(tmp_path / "s.aqvr", 20)), speed=2.0)
+    assert source.advance() == (0, 1)          # the first record is due at once
+    clock.now += 1.5                           # 3 s of recording
+    assert source.advance() == (1, 4)
+    source.set_paused(True)
+    clock.now += 10
+    assert source.advance() == (4, 4)
+    source.set_paused(False)
+    source.set_speed(10)
+    clock.now += 1
+    assert source.advance() == (4, 14)
+    source.seek(T0 + 2 * NS)
+    assert source.generation == 1 and source.advance() == (2, 3)
+    clock.now += 100
+    source.advance()
+    assert source.finished
+
+
+def test_simulator_publishes_recorded_values(tmp_path, clock):
+    source = ReplaySource(SessionFile(_record(tmp_path / "s.aqvr", 10)))
+    sim = SensorSimulator(RingBufferHistory(32), SENSORS, replay=source)
+    assert sim.snapshot.values.tolist() == [0.0, 0.0, 0.0]
+    assert sim.snapshot.timestamp == datetime.fromtimestamp(T0 / NS, timezone.utc)
+    clock.now += 3
+    sim.tick()
+    assert sim.snapshot.values.tolist() == [3.0, 3.0, 3.0]
+    assert sim.history.latest(SENSORS.keys[0], 10).values.tolist() == [0.0, 1.0, 2.0, 3.0]
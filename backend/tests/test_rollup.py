@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from app.history_store import RingBufferHistory
+from app.rollup import NS, RollupStore, _raw_buckets, merge_buckets
+
+KEYS = ("default/ph", "default/do")
+T0 = 1_700_000_000 * NS
+SAMPLES = 4 * 3_600        # 4 h at 1 s
+
+
+def _as_tuples(buckets):
+    return [(b.start, b.min, b.max, round(b.sum, 6), b.count, b.last, b.status_counts) for b in buckets]
+
+
+@pytest.fixture(scope="module", params=["frames", "batch"])
+def stores(request):
+    rng = random.Random(7)
+    history = RingBufferHistory(SAMPLES)
+    rollups = RollupStore()
+    for t in range(SAMPLES):
+        ts = T0 + t * NS
+        values = [rng.uniform(6.0, 9.0) for _ in KEYS]
+        statuses = [rng.randrange(3) for _ in KEYS]
+        history.append_frame(KEYS, ts, values, statuses)
+        if request.param == "frames":
+            rollups.add_frame(KEYS, ts, values, statuses)
+        else:
+            rollups.add_batch(zip(KEYS, (ts, ts), values, statuses))
+    return history, rollups
+
+
+@pytest.mark.parametrize("bucket_s", [1, 60, 300, 3_600])
+def test_rollup_aggregate_equals_raw(stores, bucket_s):
+    history, rollups = stores
+    rng = random.Random(bucket_s)
+    windows = [(None, None), (T0 + 227 * NS + 1, None), (None, T0 + 9_000 * NS + 3)]
+    for _ in range(20):
+        a, b = sorted(rng.randrange(-100, SAMPLES + 100) for _ in range(2))
+        windows.append((T0 + a * NS + rng.randrange(NS), T0 + b * NS + rng.randrange(NS)))
+    for start, end in windows:
+        raw = merge_buckets(_raw_buckets(history.range(KEYS[0], start, end)), bucket_s * NS)
+        assert _as_tuples(rollups.aggregate(history, KEYS[0], start, end, bucket_s)) == _as_tuples(raw)
+
+
+def test_edge_buckets_are_clipped(stores):
+    history, rollups = stores
+    start, end = T0 + 30 * 60 * NS + 17 * NS, T0 + 3 * 3_600 * NS + 5 * NS
+    buckets = rollups.aggregate(history, KEYS[0], start, end, 3_600)
+    assert sum(b.count for b in buckets) == (end - start) // NS + 1
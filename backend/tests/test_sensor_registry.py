@@ -0,0 +1,55 @@
+import json
+
+import numpy as np
+import pytest
+
+from app.sensor_registry import (
+    DANGER,
+    NORMAL,
+    WARNING,
+    SensorArray,
+    default_sensor_array,
+    load_sensor_config,
+    tag_spec,
+)
+
+
+def test_config_file_overrides_type_defaults(tmp_path):
+    path = tmp_path / "sensors.json"
+    path.write_text(json.dumps({"sites": [
+        {"site": "plant-a", "tags": [{"tag": "ph", "type": "ph"}]},
+        {"site": "plant-b", "tags": [
+            {"tag": "ph", "type": "ph"},
+            {"tag": "flow-inlet", "type": "flow", "normal": [40, 160]},
+        ]},
+    ]}))
+    sensors = load_sensor_config(str(path))
+    assert sensors.keys == ("plant-a/ph", "plant-b/ph", "plant-b/flow-inlet")
+    assert sensors.lookup("plant-b", "flow-inlet") == 2
+    assert sensors.specs[2].normal == (40.0, 160.0) and sensors.specs[2].warning == (30.0, 180.0)
+    assert list(sensors.rows("plant-b")) == [1, 2] and list(sensors.rows(None)) == [0, 1, 2]
+    with pytest.raises(KeyError):
+        sensors.lookup("plant-a", "flow-inlet")
+    with pytest.raises(KeyError):
+        sensors.rows("plant-c")
+
+
+def test_vectorized_classification_matches_bands():
+    sensors = default_sensor_array()
+    ph = sensors.lookup("default", "ph")
+    values = np.array((sensors.normal_lo + sensors.normal_hi) / 2)
+    assert sensors.classify(values).tolist() == [NORMAL] * len(sensors)
+    samples = np.array([6.5, 8.5, 6.2, 8.8, 5.9, 9.1])
+    rows = np.full(len(samples), ph)
+    assert sensors.classify_rows(samples, rows).tolist() == [NORMAL, NORMAL, WARNING, WARNING, DANGER, DANGER]
+
+
+def test_invalid_specs_are_rejected():
+    with pytest.raises(ValueError):
+        tag_spec("a", "ph", "ph", normal=(9, 7))
+    with pytest.raises(ValueError):
+        SensorArray([tag_spec("a", "ph", "ph"), tag_spec("a", "ph", "ph")])
+    with pytest.raises(ValueError):
+        SensorArray([])
+    with pytest.raises(ValueError):
+        tag_spec("a", "x", "not-a-type")
@@ -0,0 +1,46 @@
+import numpy as np
+
+from app import simulator as simulator_module
+from app.history_store import RingBufferHistory
+from app.sensor_registry import synthetic_sensor_array
+from app.simulator import RandomWalk, SensorSimulator
+
+SENSORS = synthetic_sensor_array(2, 40)
+
+
+def _series(walk: RandomWalk, ticks: int) -> np.ndarray:
+    values = [walk.initial()]
+    for _ in range(ticks):
+        values.append(walk.step(values[-1]))
+    return np.array(values)
+
+
+def test_same_seed_same_series():
+    assert np.array_equal(_series(RandomWalk(SENSORS, 9), 50), _series(RandomWalk(SENSORS, 9), 50))
+    assert not np.array_equal(_series(RandomWalk(SENSORS, 9), 50), _series(RandomWalk(SENSORS, 10), 50))
+
+
+def test_series_does_not_depend_on_noise_block_size(monkeypatch):
+    expected = _series(RandomWalk(SENSORS, 4), 300)
+    monkeypatch.setattr(simulator_module, "NOISE_BLOCK_SAMPLES", 3 * len(SENSORS))
+    small = RandomWalk(SENSORS, 4)
+    assert small._rows == 3
+    assert np.array_equal(_series(small, 300), expected)
+
+
+def test_walk_stays_within_sensor_range():
+    series = _series(RandomWalk(SENSORS, 1), 2_000)
+    assert np.all(series >= SENSORS.range_lo) and np.all(series <= SENSORS.range_hi)
+    assert np.array_equal(series, np.round(series, 2))
+
+
+def test_seeded_simulators_publish_identical_values():
+    a = SensorSimulator(RingBufferHistory(8), SENSORS, seed=12)
+    b = SensorSimulator(RingBufferHistory(8), SENSORS, seed=12)
+    for _ in range(5):
+        a.tick()
+        b.tick()
+        assert np.array_equal(a.snapshot.values, b.snapshot.values)
+        assert np.array_equal(a.snapshot.statuses, b.snapshot.statuses)
+    key = SENSORS.keys[0]
+    assert len(a.history.latest(key, 8)) == 6    # initial reading + 5 ticks
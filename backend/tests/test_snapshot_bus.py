@@ -0,0 +1,104 @@
+import itertools
+import os
+import threading
+from dataclasses import replace
+
+import numpy as np
+import pytest
+
+from app.history_store import RingBufferHistory
+from app.sensor_registry import synthetic_sensor_array
+from app.simulator import SensorSimulator
+from app.snapshot_bus import SnapshotBus
+
+_names = itertools.count()
+
+
+@pytest.fixture
+def sim():
+    return SensorSimulator(RingBufferHistory(4), synthetic_sensor_array(2, 500), seed=5, simulate=False)
+
+
+@pytest.fixture
+def bus(sim):
+    producer = SnapshotBus.create(f"aqvb-test-{os.getpid()}-{next(_names)}", sim.sensors, slots=4)
+    yield producer
+    producer.close()
+
+
+def _reader(bus: SnapshotBus, sim) -> SnapshotBus:
+    return SnapshotBus.attach(bus.shm.name, sim.sensors)
+
+
+def test_reader_sees_published_snapshots(sim, bus):
+    reader = _reader(bus, sim)
+    published = []
+    for _ in range(3):
+        sim.tick()
+        bus.publish(sim.snapshot)
+        published.append(sim.snapshot)
+    snapshots, resume = reader.read_since(0)
+    assert resume == 3 and reader.skipped == 0
+    for got, want in zip(snapshots, published):
+        assert got.seq == want.seq and got.timestamp == want.timestamp
+        assert np.array_equal(got.values, want.values)
+        assert np.array_equal(got.statuses, want.statuses)
+        assert np.array_equal(got.analytics.anomaly, want.analytics.anomaly)
+    assert snapshots[-1].alerts_payload.body == published[-1].alerts_payload.body
+    assert reader.read_since(resume) == ([], 3)
+    reader.close()
+
+
+def test_lagging_reader_skips_overwritten_snapshots(sim, bus):
+    reader = _reader(bus, sim)
+    for _ in range(bus.slots + 3):
+        sim.tick()
+        bus.publish(sim.snapshot)
+    snapshots, resume = reader.read_since(0)
+    assert len(snapshots) == bus.slots and reader.skipped == 3
+    assert snapshots[-1].seq == sim.snapshot.seq and resume == bus.slots + 3
+    reader.close()
+
+
+def test_record_being_written_is_not_returned(sim, bus):
+    sim.tick()
+    bus.publish(sim.snapshot)
+    reader = _reader(bus, sim)
+    bus._records["lock"][0] += 1            # producer mid-write
+    assert reader.read_since(0) == ([], 1) and reader.skipped == 1
+    bus._records["lock"][0] += 1
+    reader.close()
+
+
+def test_concurrent_reads_are_never_torn(sim, bus):
+    base = sim.snapshot
+    n = len(sim.sensors)
+    stop = threading.Event()
+
+    def produce():
+        for k in itertools.count(1):
+            if stop.is_set():
+                return
+            values = np.full(n, float(k))
+            bus.publish(replace(base, seq=k, values=values, _cache={}))
+
+    reader = _reader(bus, sim)
+    writer = threading.Thread(target=produce)
+    writer.start()
+    try:
+        after, seen = 0, 0
+        while seen < 2_000:
+            snapshots, after = reader.read_since(after)
+            for s in snapshots:
+                # Every value of snapshot k was written as k
+                assert np.all(s.values == s.seq)
+            seen += len(snapshots) + 1
+    finally:
+        stop.set()
+        writer.join()
+        reader.close()
+
+
+def test_attach_rejects_other_tag_set(bus):
+    with pytest.raises(ValueError):
+        SnapshotBus.attach(bus.shm.name, synthetic_sensor_array(1, 3))
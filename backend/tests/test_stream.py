@@ -0,0 +1,27 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+
+def _next_error(ws) -> dict:
+    # Channel frames (e.g. the initial alerts state) may arrive first
+    while True:
+        message = ws.receive_json()
+        if "channel" not in message:
+            return message
+
+
+def test_malformed_filter_messages_keep_the_socket_open():
+    with TestClient(app) as client, client.websocket_connect("/api/stream?channels=alerts") as ws:
+        for message in (
+            "not json", "[1, 2]", '{"channels": ["nope"]}',
+            '{"channels": 5}', '{"channels": null}', '{"channels": ["alerts", 3]}', '{"channels": {"a": 1}}',
+        ):
+            ws.send_text(message)
+            assert "error" in _next_error(ws)
+        ws.send_bytes(b"\xff\xfe")
+        assert "error" in _next_error(ws)
+        ws.send_text('{"channels": ["pipeline"]}')
+        while (frame := ws.receive_json()).get("channel") != "pipeline":
+            pass
+        assert frame["data"]["train"]
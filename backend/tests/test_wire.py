@@ -0,0 +1,118 @@
+"""Decode wire frames by the layout documented in app/wire.py."""
+
+import struct
+
+import numpy as np
+
+from app.history_store import RingBufferHistory, to_ns
+from app.ingest import IngestBatch
+from app.models import WaterQuality
+from app.pipeline import run_pipeline
+from app.sensor_registry import synthetic_sensor_array
+from app.simulator import SensorSimulator
+from app.wire import PIPELINE, SENSORS_DELTA, SENSORS_FULL, WIRE_MAGIC, encode_pipeline
+
+HEADER = struct.Struct("<4sHBBqqq")
+
+
+def _strings(buf: bytes, offset: int, count: int) -> tuple[list[str], int]:
+    out = []
+    for _ in range(count):
+        (n,) = struct.unpack_from("<H", buf, offset)
+        out.append(buf[offset + 2:offset + 2 + n].decode())
+        offset += 2 + n
+    return out, offset
+
+
+def decode_sensors(buf: bytes) -> dict:
+    magic, version, kind, _, seq, base, _ = HEADER.unpack_from(buf)
+    assert magic == WIRE_MAGIC and version == 1 and kind in (SENSORS_FULL, SENSORS_DELTA)
+    n_tags, count, table_len, _ = struct.unpack_from("<IIII", buf, HEADER.size)
+    offset = HEADER.size + 16
+    table, _ = _strings(buf, offset, 2 * n_tags) if table_len else ([], offset)
+    offset += table_len
+    values = np.frombuffer(buf, "<f4", count, offset)
+    offset += 4 * count
+    index = np.frombuffer(buf, "<u2", count, offset)
+    offset += 2 * count
+    status = np.frombuffer(buf, np.uint8, count, offset)
+    anomaly = np.frombuffer(buf, np.uint8, count, offset + count)
+    assert offset + 2 * count == len(buf)
+    return {"kind": kind, "seq": seq, "base": base, "tags": table[0::2], "values": values,
+            "index": index, "status": status, "anomaly": anomaly}
+
+
+def _simulator() -> SensorSimulator:
+    return SensorSimulator(RingBufferHistory(16), synthetic_sensor_array(3, 50), seed=3, simulate=False)
+
+
+def test_full_then_deltas_reproduce_every_snapshot():
+    sim = _simulator()
+    sim.tick()
+    full = decode_sensors(sim.wire.payload(sim.snapshot).body)
+    assert full["kind"] == SENSORS_FULL
+    assert full["tags"] == list(sim.sensors.keys)
+    values, status, anomaly = full["values"].copy(), full["status"].copy(), full["anomaly"].copy()
+    held = full["seq"]
+
+    for _ in range(10):
+        sim.tick()
+        snapshot = sim.snapshot
+        delta = decode_sensors(sim.wire.payload(snapshot, None, held).body)
+        assert (delta["kind"], delta["seq"], delta["base"]) == (SENSORS_DELTA, snapshot.seq, held)
+        assert delta["tags"] == []
+        values[delta["index"]] = delta["values"]
+        status[delta["index"]] = delta["status"]
+        anomaly[delta["index"]] = delta["anomaly"]
+        held = delta["seq"]
+        assert np.array_equal(values, snapshot.values.astype("<f4"))
+        assert np.array_equal(status, snapshot.statuses)
+        assert np.array_equal(anomaly, snapshot.analytics.anomaly)
+
+
+def test_delta_carries_only_changed_tags():
+    sim = _simulator()
+    sim.tick()
+    base = sim.snapshot
+    rows = np.array([3, 70, 140], dtype=np.intp)
+    ts = np.full(len(rows), to_ns(base.timestamp) + 1)
+    sim.ingest(IngestBatch(rows=rows, ts_ns=ts, values=base.values[rows] + 0.5))
+    delta = decode_sensors(sim.wire.payload(sim.snapshot, None, base.seq).body)
+    assert delta["kind"] == SENSORS_DELTA
+    assert delta["index"].tolist() == rows.tolist()
+    assert np.array_equal(delta["values"], (base.values[rows] + 0.5).astype("<f4"))
+
+
+def test_unknown_base_falls_back_to_full_frame():
+    sim = _simulator()
+    sim.tick()
+    frame = decode_sensors(sim.wire.payload(sim.snapshot, None, sim.snapshot.seq + 1_000).body)
+    assert frame["kind"] == SENSORS_FULL and len(frame["values"]) == len(sim.sensors)
+
+
+def test_site_frame_lists_only_that_site():
+    sim = _simulator()
+    sim.tick()
+    site = next(iter(sim.sensors.sites))
+    frame = decode_sensors(sim.wire.payload(sim.snapshot, site).body)
+    rows = sim.sensors.rows(site)
+    assert frame["tags"] == [sim.sensors.keys[i] for i in rows]
+    assert np.array_equal(frame["values"], sim.snapshot.values[rows].astype("<f4"))
+
+
+def test_pipeline_frame_round_trip():
+    result = run_pipeline()
+    buf = encode_pipeline(result)
+    magic, _, kind, _, _, _, _ = HEADER.unpack_from(buf)
+    assert (magic, kind) == (WIRE_MAGIC, PIPELINE)
+    n_stages, _, _, table_len = struct.unpack_from("<HBBI", buf, HEADER.size)
+    offset = HEADER.size + 8
+    table, _ = _strings(buf, offset, 1 + 2 * n_stages)
+    assert table[0] == result.train and table[1::2] == [s.stage for s in result.stages]
+    offset += table_len
+    metrics = len(WaterQuality.model_fields)
+    floats = np.frombuffer(buf, "<f4", 2 * metrics + n_stages * (2 + metrics), offset)
+    treated = floats[metrics:2 * metrics]
+    expected = [getattr(result.treated_water, m) for m in WaterQuality.model_fields]
+    assert np.array_equal(treated, np.array(expected, dtype="<f4"))
+    assert len(buf) == offset + 4 * len(floats) + n_stages